@@ -8,13 +8,19 @@ Refactored macro strategy system
 __version__ = "2.0.0"
 __author__ = "AI Assistant"
 
-# 公开主要的接口
-from .workflows import MainWorkflow
-from .config import SignalConfig, BacktestConfig, ExportConfig
+# 公开主要的接口（首次访问时才导入，导入顶层包不会加载各引擎与 pandas/scipy）
+from .utils.lazy_exports import lazy_exports
 
 __all__ = [
     'MainWorkflow',
     'SignalConfig', 
     'BacktestConfig',
     'ExportConfig'
-] 
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MainWorkflow': '.workflows.main_workflow',
+    'SignalConfig': '.config.signal_config',
+    'BacktestConfig': '.config.backtest_config',
+    'ExportConfig': '.config.export_config',
+})
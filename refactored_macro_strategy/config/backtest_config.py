@@ -7,6 +7,13 @@ from typing import Optional, Literal
 from dataclasses import dataclass
 
 
+# 回测标的 -> (第一标的价格列, 第二标的价格列)
+TARGET_COLUMNS = {
+    'value_growth': ('ValueR', 'GrowthR'),
+    'big_small': ('BigR', 'SmallR'),
+}
+
+
 @dataclass
 class BacktestConfig:
     """回测配置类"""
@@ -14,6 +21,8 @@ class BacktestConfig:
     # 并行处理设置
     enable_parallel: bool = True
     num_processes: Optional[int] = 16
+    executor_backend: Literal['process', 'thread', 'serial'] = 'process'  # 并行执行后端
+    blas_threads: int = 1  # 每个工作单元的BLAS/OpenMP线程数上限
     
     # 回测标的设置
     backtest_target: Literal['value_growth', 'big_small'] = 'value_growth'  # 回测标的选择
@@ -38,15 +47,15 @@ class BacktestConfig:
         if self.num_processes is None:
             import os
             self.num_processes = min(os.cpu_count(), 16)
+        if self.executor_backend not in ('process', 'thread', 'serial'):
+            raise ValueError(f"不支持的执行后端: {self.executor_backend}")
     
-    def get_target_columns(self) -> tuple:
-        """获取回测标的对应的价格列名"""
-        if self.backtest_target == 'value_growth':
-            return ('ValueR', 'GrowthR')
-        elif self.backtest_target == 'big_small':
-            return ('BigR', 'SmallR')
-        else:
-            raise ValueError(f"不支持的回测标的: {self.backtest_target}")
+    def get_target_columns(self, backtest_target: Optional[str] = None) -> tuple:
+        """获取回测标的对应的价格列名，未指定时使用当前配置的标的"""
+        target = backtest_target or self.backtest_target
+        if target not in TARGET_COLUMNS:
+            raise ValueError(f"不支持的回测标的: {target}")
+        return TARGET_COLUMNS[target]
     
     def get_trading_logic_description(self) -> str:
         """获取交易逻辑说明"""
@@ -15,8 +15,28 @@ class ExportConfig:
     # 输出目录
     output_dir: str = "signal_test_results"
     
-    # Excel文件配置
-    excel_engine: str = "openpyxl"
+    # Excel写出引擎：'xlsxwriter' 逐行流式写出（未安装时退回openpyxl），或 'openpyxl'
+    excel_engine: Literal['xlsxwriter', 'openpyxl'] = "xlsxwriter"
+    
+    # 完整数据表导出格式：'excel' 全部写入工作簿；'parquet' / 'feather' / 'csv'
+    # 时完整数据表单独成文件，Excel 只保留汇总工作表
+    export_format: Literal['excel', 'parquet', 'feather', 'csv'] = 'excel'
+    
+    # 多策略/多标的运行时在后台线程写出结果，计算与文件写入重叠
+    async_export: bool = True
+    
+    # 滚动原始结果同时保存为列式内存映射目录（.cols），稳定性重新分析直接按列读取
+    columnar_rolling_results: bool = True
+    
+    # 结果库文件名（位于输出目录下），各工作流的运行结果同时写入；为None时不写入
+    result_store_filename: Optional[str] = "result_store.db"
+    
+    # 每次运行写入 输出目录/runs/<运行键>/（运行键为数据、配置与代码版本的哈希），
+    # 相同输入的重跑直接复用已有结果
+    run_directories: bool = True
+    
+    # 当前运行目录（由工作流在运行期间设置），设置后结果文件写入该目录
+    run_dir: Optional[str] = None
     
     # 回测标的类型 (用于文件命名)
     backtest_target: Optional[Literal['value_growth', 'big_small']] = None
@@ -44,6 +64,9 @@ class ExportConfig:
         
         if self.agg_functions is None:
             self.agg_functions = ['mean', 'std', 'max', 'min', 'count']
+        
+        if self.export_format not in ('excel', 'parquet', 'feather', 'csv'):
+            raise ValueError(f"不支持的导出格式: {self.export_format}")
     
     def get_target_suffix(self) -> str:
         """获取回测标的对应的文件名后缀"""
@@ -55,10 +78,11 @@ class ExportConfig:
             return ""
     
     def ensure_output_dir(self) -> str:
-        """确保输出目录存在"""
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-        return self.output_dir
+        """确保输出目录存在（运行期间为当前运行目录）"""
+        output_dir = self.run_dir or self.output_dir
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        return output_dir
     
     def get_backtest_filepath(self) -> str:
         """获取回测结果文件路径"""
@@ -78,6 +102,14 @@ class ExportConfig:
         filename = f"{self.base_stability_filename}{suffix}.xlsx"
         return os.path.join(self.ensure_output_dir(), filename)
     
+    def get_result_store_path(self) -> Optional[str]:
+        """获取结果库路径，未启用时返回None"""
+        if not self.result_store_filename:
+            return None
+        # 结果库跨运行共享，始终位于输出根目录
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, self.result_store_filename)
+    
     def get_export_sheets_config(self) -> Dict[str, Dict]:
         """获取导出工作表配置 - 精简版，移除无意义的汇总"""
         target_desc = ""
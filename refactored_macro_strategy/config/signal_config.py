@@ -298,7 +298,11 @@ class SignalConfig:
         
         # 自动生成combination_id如果未提供
         if 'combination_id' not in signal_config:
-            signal_config['combination_id'] = f"{signal_config['indicator']}_{signal_config['signal_type']}_{signal_config['parameter_n']}_{signal_config['assumed_direction']}"
+            from ..utils.combination_registry import format_combination_id
+            signal_config['combination_id'] = format_combination_id(
+                signal_config['indicator'], signal_config['signal_type'],
+                signal_config['parameter_n'], signal_config['assumed_direction']
+            )
         
         self.VOTING_STRATEGIES[strategy_type].append(signal_config)
     
@@ -3,15 +3,22 @@
 Core modules for refactored macro strategy
 """
 
-from .signal_engine import SignalEngine
-from .backtest_engine import BacktestEngine
-from .result_processor import ResultProcessor
-from .stability_analyzer import RankingStabilityAnalyzer, StabilityConfig
+from ..utils.lazy_exports import lazy_exports
 
 __all__ = [
     'SignalEngine',
     'BacktestEngine',
     'ResultProcessor',
     'RankingStabilityAnalyzer',
-    'StabilityConfig'
-] 
\ No newline at end of file
+    'StabilityConfig',
+    'VoteMatrix'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'SignalEngine': '.signal_engine',
+    'BacktestEngine': '.backtest_engine',
+    'ResultProcessor': '.result_processor',
+    'RankingStabilityAnalyzer': '.stability_analyzer',
+    'StabilityConfig': '.stability_analyzer',
+    'VoteMatrix': '.vote_matrix',
+})
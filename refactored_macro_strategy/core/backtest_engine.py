@@ -7,11 +7,9 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from scipy import stats
-import multiprocessing
-import os
 
 from ..utils.validators import validate_backtest_inputs, check_data_alignment
+from ..utils.executor import TaskExecutor
 from ..config.backtest_config import BacktestConfig
 
 
@@ -71,22 +69,16 @@ class BacktestEngine:
         
         return base_direction
     
-    def calculate_portfolio_returns(self, signals: pd.Series,
-                                  price_data: pd.DataFrame,
-                                  signal_type: str,
-                                  assumed_direction: int,
-                                  effective_start_date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
-        """计算组合收益率"""
-        
-        # 获取回测标的对应的价格列
-        target_col1, target_col2 = self.config.get_target_columns()
-        
-        # 检查价格数据是否包含所需列
-        required_columns = [target_col1, target_col2]
-        missing_cols = [col for col in required_columns if col not in price_data.columns]
-        if missing_cols:
-            raise ValueError(f"价格数据缺少必要的列: {missing_cols}")
-        
+    def build_position_path(self, signals: pd.Series,
+                            price_data: pd.DataFrame,
+                            signal_type: str,
+                            assumed_direction: int) -> pd.DataFrame:
+        """
+        生成调仓路径（与回测标的无关，多个标的可共享）
+        
+        返回:
+            每次仓位变化一行：signal_date, trading_date, signal_value, old_position, new_position
+        """
         signals_filtered = signals.dropna()
         if signals_filtered.empty:
             return pd.DataFrame()
@@ -117,17 +109,29 @@ class BacktestEngine:
                     'trading_date': trading_date,
                     'signal_value': signal_value,
                     'old_position': current_position,
-                    'new_position': target_position,
-                    f'{target_col1.lower()}_price': price_data.loc[trading_date, target_col1],
-                    f'{target_col2.lower()}_price': price_data.loc[trading_date, target_col2]
+                    'new_position': target_position
                 })
                 current_position = target_position
         
-        if not trades:
+        return pd.DataFrame(trades)
+    
+    def calculate_path_returns(self, trades_df: pd.DataFrame,
+                               price_data: pd.DataFrame,
+                               backtest_target: Optional[str] = None) -> pd.DataFrame:
+        """
+        按调仓路径计算指定回测标的的多空组合日收益
+        
+        参数:
+            trades_df: build_position_path 生成的调仓路径
+            price_data: 价格数据
+            backtest_target: 回测标的，默认使用配置中的标的
+        """
+        if trades_df.empty:
             return pd.DataFrame()
         
-        # 计算收益
-        trades_df = pd.DataFrame(trades)
+        # 获取回测标的对应的价格列
+        target_col1, target_col2 = self.config.get_target_columns(backtest_target)
+        
         portfolio_returns_list = []
         
         for i in range(len(trades_df)):
@@ -163,6 +167,24 @@ class BacktestEngine:
         
         return pd.DataFrame(portfolio_returns_list) if portfolio_returns_list else pd.DataFrame()
     
+    def _check_target_columns(self, price_data: pd.DataFrame, backtest_target: Optional[str] = None) -> None:
+        """检查价格数据是否包含回测标的所需列"""
+        required_columns = list(self.config.get_target_columns(backtest_target))
+        missing_cols = [col for col in required_columns if col not in price_data.columns]
+        if missing_cols:
+            raise ValueError(f"价格数据缺少必要的列: {missing_cols}")
+    
+    def calculate_portfolio_returns(self, signals: pd.Series,
+                                  price_data: pd.DataFrame,
+                                  signal_type: str,
+                                  assumed_direction: int,
+                                  effective_start_date: Optional[pd.Timestamp] = None,
+                                  backtest_target: Optional[str] = None) -> pd.DataFrame:
+        """计算组合收益率"""
+        self._check_target_columns(price_data, backtest_target)
+        trades_df = self.build_position_path(signals, price_data, signal_type, assumed_direction)
+        return self.calculate_path_returns(trades_df, price_data, backtest_target)
+    
     def calculate_performance_metrics(self, returns_df: pd.DataFrame) -> Dict[str, float]:
         """计算回测业绩指标"""
         if returns_df.empty or 'daily_return' not in returns_df.columns:
@@ -195,6 +217,8 @@ class BacktestEngine:
         if total_months > 1:
             clean_monthly_returns = monthly_returns.dropna()
             if len(clean_monthly_returns) > 1:
+                # scipy.stats 导入耗时约1秒，只在首次需要p值时加载
+                from scipy import stats
                 t_stat_val, p_value_val = stats.ttest_1samp(clean_monthly_returns, 0, nan_policy='omit')
                 df_ttest_val = len(clean_monthly_returns) - 1
         
@@ -237,59 +261,111 @@ class BacktestEngine:
                 return {'error': f'指标 {indicator_name} 的信号序列为空'}
             
             returns_df = self.calculate_portfolio_returns(signals, price_data, signal_type, assumed_direction, window_start_date)
-            
-            if returns_df.empty:
-                return {'error': '无有效交易数据'}
-            
-            performance = self.calculate_performance_metrics(returns_df)
-            if not performance:
-                return {'error': '无法计算业绩指标'}
-            
-            # 获取原始指标方向
-            original_indicator_direction = None
-            if memo_df is not None and 'index' in memo_df.columns and 'direction' in memo_df.columns:
-                memo_df_copy = memo_df.copy()
-                memo_df_copy['index'] = memo_df_copy['index'].astype(str)
-                direction_series = memo_df_copy.set_index('index')['direction']
-                if indicator_name in direction_series.index:
-                    original_indicator_direction = int(direction_series.loc[indicator_name])
-            
-            result = {
-                'indicator': indicator_name,
-                'signal_type': signal_type,
-                'parameter_n': parameter_n,
-                'assumed_direction': assumed_direction,
-                'original_indicator_direction': original_indicator_direction,
-                'backtest_start_date': returns_df['date'].min().strftime('%Y-%m-%d') if not returns_df.empty and 'date' in returns_df.columns else None,
-                'backtest_end_date': returns_df['date'].max().strftime('%Y-%m-%d') if not returns_df.empty and 'date' in returns_df.columns else None,
-                'window_start_param': window_start_date.strftime('%Y-%m-%d') if window_start_date else None,
-                **performance
-            }
-            return result
+            return self._build_backtest_result(indicator_name, signal_type, parameter_n, assumed_direction,
+                                               returns_df, window_start_date, memo_df)
         except Exception as e:
             return {'error': f'回测过程中出现错误: {str(e)}'}
     
+    def run_single_backtest_multi_target(self, indicator_name: str,
+                                         signal_type: str,
+                                         parameter_n: int,
+                                         signals: pd.Series,
+                                         price_data: pd.DataFrame,
+                                         assumed_direction: int,
+                                         window_start_date: Optional[pd.Timestamp] = None,
+                                         memo_df: Optional[pd.DataFrame] = None,
+                                         backtest_targets: Optional[List[str]] = None) -> List[Dict[str, any]]:
+        """
+        对多个回测标的运行单个指标的回测，调仓路径只生成一次
+        
+        返回:
+            每个标的一个结果字典（含 backtest_target 字段），失败时为含 error 的字典
+        """
+        backtest_targets = backtest_targets or [self.config.backtest_target]
+        try:
+            if signals.empty:
+                return [{'error': f'指标 {indicator_name} 的信号序列为空'}]
+            
+            for target in backtest_targets:
+                self._check_target_columns(price_data, target)
+            trades_df = self.build_position_path(signals, price_data, signal_type, assumed_direction)
+        except Exception as e:
+            return [{'error': f'回测过程中出现错误: {str(e)}'}]
+        
+        results = []
+        for target in backtest_targets:
+            try:
+                returns_df = self.calculate_path_returns(trades_df, price_data, target)
+                result = self._build_backtest_result(indicator_name, signal_type, parameter_n, assumed_direction,
+                                                     returns_df, window_start_date, memo_df)
+                if 'error' not in result:
+                    result = {'backtest_target': target, **result}
+                results.append(result)
+            except Exception as e:
+                results.append({'error': f'回测过程中出现错误: {str(e)}'})
+        return results
+    
+    def _build_backtest_result(self, indicator_name: str, signal_type: str, parameter_n: int,
+                               assumed_direction: int, returns_df: pd.DataFrame,
+                               window_start_date: Optional[pd.Timestamp] = None,
+                               memo_df: Optional[pd.DataFrame] = None) -> Dict[str, any]:
+        """根据组合日收益计算业绩并组装单条回测结果"""
+        if returns_df.empty:
+            return {'error': '无有效交易数据'}
+        
+        performance = self.calculate_performance_metrics(returns_df)
+        if not performance:
+            return {'error': '无法计算业绩指标'}
+        
+        # 获取原始指标方向
+        original_indicator_direction = None
+        if memo_df is not None and 'index' in memo_df.columns and 'direction' in memo_df.columns:
+            memo_df_copy = memo_df.copy()
+            memo_df_copy['index'] = memo_df_copy['index'].astype(str)
+            direction_series = memo_df_copy.set_index('index')['direction']
+            if indicator_name in direction_series.index:
+                original_indicator_direction = int(direction_series.loc[indicator_name])
+        
+        return {
+            'indicator': indicator_name,
+            'signal_type': signal_type,
+            'parameter_n': parameter_n,
+            'assumed_direction': assumed_direction,
+            'original_indicator_direction': original_indicator_direction,
+            'backtest_start_date': returns_df['date'].min().strftime('%Y-%m-%d') if not returns_df.empty and 'date' in returns_df.columns else None,
+            'backtest_end_date': returns_df['date'].max().strftime('%Y-%m-%d') if not returns_df.empty and 'date' in returns_df.columns else None,
+            'window_start_param': window_start_date.strftime('%Y-%m-%d') if window_start_date else None,
+            **performance
+        }
+    
     def run_batch_backtest(self, test_results: Dict,
                          price_data: pd.DataFrame,
                          memo_df: Optional[pd.DataFrame] = None,
                          indicators: Optional[List[str]] = None,
                          signal_types: Optional[List[str]] = None,
                          window_start_date: Optional[pd.Timestamp] = None,
-                         enable_parallel: Optional[bool] = None) -> pd.DataFrame:
-        """批量运行回测 - 统一处理串行和并行"""
+                         enable_parallel: Optional[bool] = None,
+                         backtest_targets: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        批量运行回测 - 统一处理串行和并行
+        
+        backtest_targets 非空时进入多标的模式：每个组合的调仓路径只生成一次，
+        对每个标的分别计算收益，结果带 backtest_target 列
+        """
         
         use_parallel = enable_parallel if enable_parallel is not None else self.config.enable_parallel
         
         if use_parallel:
-            return self._run_batch_backtest_parallel(test_results, price_data, memo_df, indicators, signal_types, window_start_date)
+            return self._run_batch_backtest_parallel(test_results, price_data, memo_df, indicators, signal_types, window_start_date, backtest_targets)
         else:
-            return self._run_batch_backtest_serial(test_results, price_data, memo_df, indicators, signal_types, window_start_date)
+            return self._run_batch_backtest_serial(test_results, price_data, memo_df, indicators, signal_types, window_start_date, backtest_targets)
     
     def _run_batch_backtest_serial(self, test_results: Dict, price_data: pd.DataFrame,
                                  memo_df: Optional[pd.DataFrame] = None,
                                  indicators: Optional[List[str]] = None,
                                  signal_types: Optional[List[str]] = None,
-                                 window_start_date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+                                 window_start_date: Optional[pd.Timestamp] = None,
+                                 backtest_targets: Optional[List[str]] = None) -> pd.DataFrame:
         """串行批量回测"""
         print("开始串行回测...")
         backtest_results_list = []
@@ -347,13 +423,14 @@ class BacktestEngine:
                         if current_task % max(1, total_tasks // 20) == 0:
                             print(f"  进度: {current_task}/{total_tasks} ({(current_task/total_tasks*100):.0f}%)")
                         
-                        result = self.run_single_backtest(
+                        task_results = self._run_backtest_task(
                             indicator_name, st, parameter_n, signals_series,
-                            price_data, assumed_dir, window_start_date, memo_df
+                            price_data, assumed_dir, window_start_date, memo_df, backtest_targets
                         )
                         
-                        if isinstance(result, dict) and 'error' not in result:
-                            backtest_results_list.append(result)
+                        for result in task_results:
+                            if isinstance(result, dict) and 'error' not in result:
+                                backtest_results_list.append(result)
         
         if not backtest_results_list:
             print("警告：串行回测完成，但没有成功的结果")
@@ -367,23 +444,26 @@ class BacktestEngine:
                                    memo_df: Optional[pd.DataFrame] = None,
                                    indicators: Optional[List[str]] = None,
                                    signal_types: Optional[List[str]] = None,
-                                   window_start_date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+                                   window_start_date: Optional[pd.Timestamp] = None,
+                                   backtest_targets: Optional[List[str]] = None) -> pd.DataFrame:
         """并行批量回测"""
         print("开始并行回测...")
         
         # 准备并行任务
-        task_args_list = self._prepare_parallel_tasks(test_results, price_data, memo_df, indicators, signal_types, window_start_date)
+        task_args_list = self._prepare_parallel_tasks(test_results, price_data, memo_df, indicators, signal_types, window_start_date, backtest_targets)
         
         if not task_args_list:
             print("警告: 没有有效的并行回测任务")
             return pd.DataFrame()
         
-        processes = min(self.config.num_processes, os.cpu_count(), 60)
-        print(f"开始并行批量回测，共 {len(task_args_list)} 个任务，使用 {processes} 个进程...")
+        # 统一执行器：共享全局工作单元预算，嵌套在其他工作进程中时自动串行
+        executor = TaskExecutor(backend=self.config.executor_backend,
+                                max_workers=self.config.num_processes,
+                                blas_threads=self.config.blas_threads)
+        print(f"开始并行批量回测，共 {len(task_args_list)} 个任务，使用 {executor.describe(len(task_args_list))}...")
         
         try:
-            with multiprocessing.Pool(processes=processes) as pool:
-                results_list = pool.starmap(self._run_single_backtest_wrapper, task_args_list)
+            task_results_list = executor.starmap(self._run_single_backtest_wrapper, task_args_list)
         except Exception as e:
             print(f"并行回测过程中发生错误: {e}")
             return pd.DataFrame()
@@ -391,7 +471,7 @@ class BacktestEngine:
         # 处理结果
         successful_results = []
         error_count = 0
-        for res in results_list:
+        for res in (res for task_results in task_results_list for res in task_results):
             if isinstance(res, dict) and 'error' in res:
                 error_count += 1
             elif isinstance(res, dict):
@@ -414,7 +494,8 @@ class BacktestEngine:
                               memo_df: Optional[pd.DataFrame] = None,
                               indicators: Optional[List[str]] = None,
                               signal_types: Optional[List[str]] = None,
-                              window_start_date: Optional[pd.Timestamp] = None) -> List[Tuple]:
+                              window_start_date: Optional[pd.Timestamp] = None,
+                              backtest_targets: Optional[List[str]] = None) -> List[Tuple]:
         """准备并行任务参数列表"""
         task_args_list = []
         effective_signal_types = signal_types if signal_types is not None else list(test_results.keys())
@@ -445,11 +526,18 @@ class BacktestEngine:
                     for assumed_dir in directions:
                         task_args_list.append((
                             indicator_name, st, parameter_n, signals_series, price_data,
-                            assumed_dir, window_start_date, memo_df
+                            assumed_dir, window_start_date, memo_df, backtest_targets
                         ))
         
         return task_args_list
     
-    def _run_single_backtest_wrapper(self, *args) -> Dict[str, any]:
+    def _run_backtest_task(self, *args) -> List[Dict[str, any]]:
+        """执行单个回测任务，最后一个参数为回测标的列表（None表示单标的）"""
+        *single_args, backtest_targets = args
+        if backtest_targets:
+            return self.run_single_backtest_multi_target(*single_args, backtest_targets=backtest_targets)
+        return [self.run_single_backtest(*single_args)]
+    
+    def _run_single_backtest_wrapper(self, *args) -> List[Dict[str, any]]:
         """并行回测的单个任务包装器"""
-        return self.run_single_backtest(*args) 
\ No newline at end of file
+        return self._run_backtest_task(*args) 
\ No newline at end of file
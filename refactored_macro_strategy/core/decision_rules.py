@@ -0,0 +1,199 @@
+"""
+投票决策规则网格
+Grid of voting decision rules evaluated in one batch
+
+在同一投票矩阵上比较不同的决策规则：
+- majority: 简单多数（与 calculate_voting_decisions 一致，平票持有第二标的）
+- supermajority: 一方票数占比达到阈值才切换，否则维持上期持仓
+- hysteresis: 票数差超过 k 才切换，否则维持上期持仓
+- confidence: 按投票置信度缩放权重 w = 0.5 + 0.5·sign(c)·|c|^γ，
+  c = (第一标的票数 - 第二标的票数) / 总票数；γ=1 即按票数比例分配
+
+所有规则的逐期权重拼成 (决策日数 × 规则数) 矩阵，交给 SubsetEvaluator 按列批量回测。
+"""
+
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from .vote_matrix import VoteMatrix
+from .subset_evaluator import SubsetEvaluator, METRIC_COLUMNS
+
+
+RULE_TYPES = ('majority', 'supermajority', 'hysteresis', 'confidence')
+
+
+@dataclass(frozen=True)
+class DecisionRule:
+    """
+    投票决策规则
+
+    参数:
+        rule_type: 规则类型，见 RULE_TYPES
+        parameter: supermajority 为占比阈值 (0.5, 1]，hysteresis 为票数差带宽 k >= 0，
+                   confidence 为指数 γ > 0，majority 忽略
+    """
+    rule_type: str
+    parameter: float = 0.0
+
+    def __post_init__(self):
+        if self.rule_type not in RULE_TYPES:
+            raise ValueError(f"不支持的决策规则: {self.rule_type}，可选: {RULE_TYPES}")
+        if self.rule_type == 'supermajority' and not 0.5 < self.parameter <= 1:
+            raise ValueError(f"超级多数阈值必须在 (0.5, 1] 内，当前为: {self.parameter}")
+        if self.rule_type == 'hysteresis' and self.parameter < 0:
+            raise ValueError(f"滞后带宽不能为负，当前为: {self.parameter}")
+        if self.rule_type == 'confidence' and self.parameter <= 0:
+            raise ValueError(f"置信度指数必须为正，当前为: {self.parameter}")
+
+    @property
+    def label(self) -> str:
+        if self.rule_type == 'majority':
+            return 'majority'
+        return f"{self.rule_type}_{self.parameter:g}"
+
+    @property
+    def default_first_weight(self) -> float:
+        """没有有效信号时的初始第一标的权重"""
+        return 0.5 if self.rule_type == 'confidence' else 0.0
+
+
+def build_rule_grid(supermajority_thresholds: Sequence[float] = (0.6, 2 / 3, 0.75),
+                    hysteresis_bands: Sequence[float] = (1, 2, 3),
+                    confidence_exponents: Sequence[float] = (0.5, 1.0, 2.0),
+                    include_majority: bool = True) -> List[DecisionRule]:
+    """
+    生成决策规则网格
+
+    参数:
+        supermajority_thresholds: 超级多数占比阈值
+        hysteresis_bands: 滞后带宽（票数差）
+        confidence_exponents: 置信度缩放指数
+        include_majority: 是否包含简单多数规则作为对照
+
+    返回:
+        决策规则列表
+    """
+    rules = [DecisionRule('majority')] if include_majority else []
+    rules += [DecisionRule('supermajority', float(q)) for q in supermajority_thresholds]
+    rules += [DecisionRule('hysteresis', float(k)) for k in hysteresis_bands]
+    rules += [DecisionRule('confidence', float(g)) for g in confidence_exponents]
+    return rules
+
+
+def _hold_forward(targets: np.ndarray, fill_value: float = 0.0) -> np.ndarray:
+    """沿决策日方向向前填充NaN（维持上期持仓），开头仍无持仓时取 fill_value"""
+    n_rows = targets.shape[0]
+    last_valid = np.where(np.isnan(targets), -1, np.arange(n_rows)[:, None])
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    held = np.take_along_axis(targets, np.maximum(last_valid, 0), axis=0)
+    held[last_valid < 0] = fill_value
+    return held
+
+
+def rule_weights(votes_first: np.ndarray,
+                 votes_second: np.ndarray,
+                 rules: Sequence[DecisionRule]) -> np.ndarray:
+    """
+    计算各规则在每个决策日的第一标的权重
+
+    参数:
+        votes_first / votes_second: 票数，形状 (决策日数,)
+        rules: 决策规则列表
+
+    返回:
+        第一标的权重矩阵，形状 (决策日数, 规则数)
+    """
+    votes_first = np.asarray(votes_first, dtype=float)
+    votes_second = np.asarray(votes_second, dtype=float)
+    total = votes_first + votes_second
+    margin = votes_first - votes_second
+    has_votes = total > 0
+    share_first = np.divide(votes_first, total, out=np.full(total.shape, np.nan), where=has_votes)
+    confidence = np.divide(margin, total, out=np.zeros(total.shape), where=has_votes)
+
+    rule_types = np.array([rule.rule_type for rule in rules], dtype=object)
+    parameters = np.array([rule.parameter for rule in rules], dtype=float)
+    weights = np.empty((len(total), len(rules)))
+
+    columns = np.flatnonzero(rule_types == 'majority')
+    weights[:, columns] = (votes_first > votes_second).astype(float)[:, None]
+
+    # 阈值类规则：达到条件才切换，否则记为NaN并沿时间维持上期持仓
+    columns = np.flatnonzero(rule_types == 'supermajority')
+    if len(columns):
+        thresholds = parameters[columns][None, :]
+        targets = np.full((len(total), len(columns)), np.nan)
+        targets[share_first[:, None] >= thresholds] = 1.0
+        targets[(1 - share_first)[:, None] >= thresholds] = 0.0
+        weights[:, columns] = _hold_forward(targets)
+
+    columns = np.flatnonzero(rule_types == 'hysteresis')
+    if len(columns):
+        bands = parameters[columns][None, :]
+        targets = np.full((len(total), len(columns)), np.nan)
+        targets[margin[:, None] > bands] = 1.0
+        targets[margin[:, None] < -bands] = 0.0
+        weights[:, columns] = _hold_forward(targets)
+
+    columns = np.flatnonzero(rule_types == 'confidence')
+    if len(columns):
+        exponents = parameters[columns][None, :]
+        scaled = np.sign(confidence)[:, None] * np.abs(confidence)[:, None] ** exponents
+        weights[:, columns] = 0.5 + 0.5 * scaled
+
+    return weights
+
+
+class DecisionRuleEngine:
+    """
+    决策规则网格评估器
+
+    参数:
+        evaluator: 已绑定价格数据与策略类型的子集评估器
+    """
+
+    def __init__(self, evaluator: SubsetEvaluator):
+        self.evaluator = evaluator
+
+    def evaluate(self, vote_matrix: VoteMatrix,
+                 rules: Optional[Sequence[DecisionRule]] = None,
+                 signal_mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        在同一投票矩阵上批量评估一组决策规则
+
+        参数:
+            vote_matrix: 投票矩阵
+            rules: 决策规则列表，默认 build_rule_grid()
+            signal_mask: 参与投票的信号（布尔数组），默认全部信号
+
+        返回:
+            每行一个规则：rule, rule_type, parameter, decision_changes 及绩效指标
+        """
+        if rules is None:
+            rules = build_rule_grid()
+        rules = list(rules)
+        if not rules:
+            return pd.DataFrame(columns=['rule', 'rule_type', 'parameter', 'decision_changes'] + METRIC_COLUMNS)
+
+        if signal_mask is None:
+            signal_mask = np.ones(vote_matrix.n_signals, dtype=bool)
+        votes_first, votes_second = self.evaluator.vote_counts(vote_matrix, np.asarray(signal_mask)[:, None])
+        weights = rule_weights(votes_first[:, 0], votes_second[:, 0], rules)
+
+        print(f"决策规则网格评估: {len(rules)} 个规则 ({self.evaluator.strategy_type})")
+
+        # 初始持仓默认值不同的规则分组回测，再按原顺序拼回
+        defaults = np.array([rule.default_first_weight for rule in rules])
+        metrics = pd.DataFrame(index=range(len(rules)), columns=METRIC_COLUMNS, dtype=float)
+        for default_weight in np.unique(defaults):
+            columns = np.flatnonzero(defaults == default_weight)
+            group_metrics = self.evaluator.evaluate_weights(vote_matrix.dates, weights[:, columns], default_weight)
+            metrics.iloc[columns] = group_metrics[METRIC_COLUMNS].to_numpy()
+
+        metrics.insert(0, 'rule', [rule.label for rule in rules])
+        metrics.insert(1, 'rule_type', [rule.rule_type for rule in rules])
+        metrics.insert(2, 'parameter', [rule.parameter for rule in rules])
+        metrics.insert(3, 'decision_changes', np.count_nonzero(np.diff(weights, axis=0), axis=0))
+        return metrics
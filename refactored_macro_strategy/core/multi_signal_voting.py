@@ -7,12 +7,18 @@ Multi-Signal Voting Backtest System
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 import os
 
 from ..utils.data_loader import load_all_data
 from .signal_engine import SignalEngine
+from .vote_matrix import VoteMatrix
+from .nav_engine import (
+    compute_switching_nav, compute_rebalanced_benchmark_nav, piecewise_holdings_nav,
+    decision_trading_positions
+)
+from .period_performance import batch_period_performance
 from ..config.signal_config import SignalConfig
 
 
@@ -118,13 +124,15 @@ class MultiSignalVotingEngine:
         self.signal_engine = SignalEngine(self.signal_config)
         self.signal_configuration = SignalConfiguration(self.signal_config)
     
-    def generate_voting_signals(self, 
-                               data: pd.DataFrame,
-                               signal_configs: List[Dict],
-                               strategy_type: str,
-                               signal_start_date: str = '2012-11-01') -> pd.DataFrame:
+    def generate_vote_matrix(self, 
+                             data: pd.DataFrame,
+                             signal_configs: List[Dict],
+                             strategy_type: str,
+                             signal_start_date: str = '2012-11-01') -> VoteMatrix:
         """
-        为指定策略生成投票信号
+        为指定策略生成宽格式投票矩阵
+        
+        相同 (信号类型, 参数) 的信号在所有相关指标上一次性计算。
         
         参数:
             data: 宏观指标数据
@@ -133,21 +141,41 @@ class MultiSignalVotingEngine:
             signal_start_date: 信号计算开始日期，默认2012-11-01
             
         返回:
-            包含每个时间点投票结果的DataFrame
+            VoteMatrix（1=价值/大盘，0=成长/小盘），无可用信号时为空矩阵
         """
+        if strategy_type not in ('value_growth', 'big_small'):
+            raise ValueError(f"不支持的策略类型: {strategy_type}")
+        
         # 过滤数据到指定开始时间之后
         signal_start_ts = pd.Timestamp(signal_start_date)
         filtered_data = data.loc[data.index >= signal_start_ts].copy()
         
         if filtered_data.empty:
             print(f"警告: 过滤到{signal_start_date}之后无可用数据")
-            return pd.DataFrame()
+            return VoteMatrix(np.empty((0, 0), dtype=np.int8), pd.DatetimeIndex([]), [])
         
         print(f"\n=== {strategy_type} 策略信号生成 ===")
         print(f"信号计算期间: {signal_start_date} -> {filtered_data.index[-1].strftime('%Y-%m-%d')}")
         print(f"配置的信号数量: {len(signal_configs)}")
         
-        voting_results = []
+        # 按 (信号类型, 参数) 分组批量计算信号
+        signal_frames = {}
+        frame_errors = {}
+        groups = {}
+        for signal_config in signal_configs:
+            if signal_config['indicator'] in filtered_data.columns:
+                key = (signal_config['signal_type'], signal_config['parameter_n'])
+                groups.setdefault(key, []).append(signal_config['indicator'])
+        for (signal_type, parameter_n), indicators in groups.items():
+            try:
+                signal_frames[(signal_type, parameter_n)] = self.signal_engine.generate_signal_frame(
+                    filtered_data[list(dict.fromkeys(indicators))], signal_type, parameter_n
+                )
+            except Exception as e:
+                frame_errors[(signal_type, parameter_n)] = e
+        
+        vote_columns = []
+        signal_keys = []
         
         for i, signal_config in enumerate(signal_configs, 1):
             indicator = signal_config['indicator']
@@ -162,69 +190,66 @@ class MultiSignalVotingEngine:
                 print(f"    警告: 指标 {indicator} 不存在于数据中，跳过")
                 continue
             
-            try:
-                # 生成原始信号
-                raw_signal = self.signal_engine.generate_single_signal(
-                    filtered_data[indicator], signal_type, parameter_n
-                )
-                
-                # 处理NaN值 - 将NaN填充为False（表示无信号）
-                if raw_signal.isna().any():
-                    print(f"    警告: 信号包含NaN值，已填充为False")
-                    raw_signal = raw_signal.fillna(False).infer_objects(copy=False)
-                
-                # 确保raw_signal是布尔类型
-                if raw_signal.dtype != bool:
-                    raw_signal = raw_signal.astype(bool)
-                
-                # 根据假定方向调整信号
-                if assumed_direction == 1:
-                    # 正向：信号为True时支持对应方向
-                    adjusted_signal = raw_signal
-                else:
-                    # 反向：信号为True时支持相反方向
-                    adjusted_signal = ~raw_signal
-                
-                # 根据策略类型确定投票方向
-                if strategy_type == 'value_growth':
-                    # 对于价值成长：True=价值，False=成长
-                    vote_direction = adjusted_signal.astype(int)  # 1=价值，0=成长
-                elif strategy_type == 'big_small':
-                    # 对于大小盘：True=大盘，False=小盘
-                    vote_direction = adjusted_signal.astype(int)  # 1=大盘，0=小盘
-                
-                # 添加到投票结果
-                vote_series = pd.DataFrame({
-                    'date': filtered_data.index,
-                    'signal_id': combination_id,
-                    'vote': vote_direction,
-                    'indicator': indicator,
-                    'signal_type': signal_type
-                })
-                
-                voting_results.append(vote_series)
-                
-            except Exception as e:
-                print(f"    错误: 信号生成失败 - {e}")
+            if (signal_type, parameter_n) in frame_errors:
+                print(f"    错误: 信号生成失败 - {frame_errors[(signal_type, parameter_n)]}")
                 continue
+            
+            raw_signal = signal_frames[(signal_type, parameter_n)][indicator].to_numpy()
+            
+            # 处理NaN值 - NaN视为False（表示无信号）
+            if np.isnan(raw_signal).any():
+                print(f"    警告: 信号包含NaN值，已填充为False")
+            signal_true = raw_signal == 1.0
+            
+            # 根据假定方向调整信号：正向时True支持第一标的，反向时True支持第二标的
+            # 投票: 1=价值/大盘，0=成长/小盘
+            vote_direction = signal_true if assumed_direction == 1 else ~signal_true
+            
+            vote_columns.append(vote_direction.astype(np.int8))
+            signal_keys.append((combination_id, indicator, signal_type))
         
-        if not voting_results:
+        if not vote_columns:
             print("警告: 没有成功生成任何信号")
-            return pd.DataFrame()
-        
-        # 合并所有投票结果
-        all_votes_df = pd.concat(voting_results, ignore_index=True)
+            return VoteMatrix(np.empty((len(filtered_data), 0), dtype=np.int8), filtered_data.index, [])
+        
+        return VoteMatrix(
+            np.column_stack(vote_columns),
+            filtered_data.index,
+            [key[0] for key in signal_keys],
+            [key[1] for key in signal_keys],
+            [key[2] for key in signal_keys]
+        )
+    
+    def generate_voting_signals(self, 
+                               data: pd.DataFrame,
+                               signal_configs: List[Dict],
+                               strategy_type: str,
+                               signal_start_date: str = '2012-11-01') -> pd.DataFrame:
+        """
+        为指定策略生成长格式投票信号 (date, signal_id, vote, indicator, signal_type)
         
-        return all_votes_df
+        参数:
+            data: 宏观指标数据
+            signal_configs: 信号配置列表
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            signal_start_date: 信号计算开始日期，默认2012-11-01
+            
+        返回:
+            包含每个时间点投票结果的DataFrame；计算决策时建议直接使用 generate_vote_matrix
+        """
+        vote_matrix = self.generate_vote_matrix(data, signal_configs, strategy_type, signal_start_date)
+        if vote_matrix.empty:
+            return pd.DataFrame()
+        return vote_matrix.to_long()
     
     def calculate_voting_decisions(self, 
-                                  voting_signals: pd.DataFrame,
+                                  voting_signals,
                                   strategy_type: str) -> pd.DataFrame:
         """
         计算每个时间点的投票决策
         
         参数:
-            voting_signals: 包含所有信号投票的DataFrame
+            voting_signals: VoteMatrix，或包含所有信号投票的长格式DataFrame
             strategy_type: 策略类型
             
         返回:
@@ -233,14 +258,13 @@ class MultiSignalVotingEngine:
         if voting_signals.empty:
             return pd.DataFrame()
         
-        print(f"\n=== {strategy_type} 投票决策计算 ===")
+        if not isinstance(voting_signals, VoteMatrix):
+            voting_signals = VoteMatrix.from_long(voting_signals)
         
-        # 按日期分组统计投票
-        voting_summary = voting_signals.groupby('date').agg({
-            'vote': ['sum', 'count', lambda x: (x == 1).sum(), lambda x: (x == 0).sum()]
-        }).reset_index()
+        print(f"\n=== {strategy_type} 投票决策计算 ===")
         
-        voting_summary.columns = ['date', 'total_score', 'total_signals', 'votes_for_first', 'votes_for_second']
+        # 按日期统计投票（矩阵按行求和）
+        voting_summary = voting_signals.tally()
         
         # 确定获胜方向
         if strategy_type == 'value_growth':
@@ -260,8 +284,6 @@ class MultiSignalVotingEngine:
         voting_summary['vote_margin'] = abs(voting_summary['votes_for_first'] - voting_summary['votes_for_second'])
         voting_summary['vote_confidence'] = voting_summary['vote_margin'] / voting_summary['total_signals']
         
-        voting_summary = voting_summary.set_index('date')
-        
         print(f"投票决策统计:")
         if strategy_type == 'value_growth':
             value_wins = (voting_summary['winning_direction'] == 1).sum()
@@ -399,75 +421,29 @@ class MultiSignalBacktestEngine:
             'benchmark': benchmark_returns
         }).dropna()
         
-        # 计算净值序列（用于准确的年度收益计算）
-        strategy_nav = (1 + aligned_data['strategy']).cumprod()
-        benchmark_nav = (1 + aligned_data['benchmark']).cumprod()
+        if aligned_data.empty:
+            return pd.DataFrame()
         
-        # 按年分组计算
-        yearly_data = []
-        for year in range(aligned_data.index[0].year, aligned_data.index[-1].year + 1):
-            year_data = aligned_data[aligned_data.index.year == year]
-            year_strategy_nav = strategy_nav[strategy_nav.index.year == year]
-            year_benchmark_nav = benchmark_nav[benchmark_nav.index.year == year]
-            
-            if len(year_data) == 0 or len(year_strategy_nav) == 0:
-                continue
-            
-            # 计算年度收益（使用净值首尾，避免累积误差）
-            strategy_annual = (year_strategy_nav.iloc[-1] / year_strategy_nav.iloc[0]) - 1
-            benchmark_annual = (year_benchmark_nav.iloc[-1] / year_benchmark_nav.iloc[0]) - 1
-            excess_annual = strategy_annual - benchmark_annual
-            
-            # 计算年度波动率
-            strategy_vol = year_data['strategy'].std() * np.sqrt(252)
-            benchmark_vol = year_data['benchmark'].std() * np.sqrt(252)
-            
-            # 计算年度年化收益（与年度收益相同，因为已经是年度数据）
-            strategy_annualized = strategy_annual
-            benchmark_annualized = benchmark_annual
-            
-            # 计算年度夏普比率
-            strategy_sharpe = strategy_annualized / strategy_vol if strategy_vol > 0 else 0
-            benchmark_sharpe = benchmark_annualized / benchmark_vol if benchmark_vol > 0 else 0
-            
-            # 计算年度最大回撤
-            strategy_cum = year_strategy_nav / year_strategy_nav.iloc[0]  # 相对于年初
-            strategy_dd = (strategy_cum / strategy_cum.expanding().max() - 1).min()
-            
-            benchmark_cum = year_benchmark_nav / year_benchmark_nav.iloc[0]  # 相对于年初
-            benchmark_dd = (benchmark_cum / benchmark_cum.expanding().max() - 1).min()
-            
-            # 计算年度相对回撤（策略相对于基准的回撤）
-            relative_nav = year_strategy_nav / year_benchmark_nav  # 策略相对基准的表现
-            relative_cum = relative_nav / relative_nav.iloc[0]  # 相对于年初的相对表现
-            relative_dd = (relative_cum / relative_cum.expanding().max() - 1).min()
-            
-            # 计算年度月胜率
-            year_monthly_strategy = year_data['strategy'].resample('M').apply(lambda x: (1 + x).prod() - 1)
-            year_monthly_benchmark = year_data['benchmark'].resample('M').apply(lambda x: (1 + x).prod() - 1)
-            year_monthly_excess = year_monthly_strategy - year_monthly_benchmark
-            year_win_rate = (year_monthly_excess > 0).mean() if len(year_monthly_excess) > 0 else 0
-            
-            yearly_data.append({
-                '年份': str(year),
-                '策略收益': strategy_annual,
-                '基准收益': benchmark_annual,
-                '超额收益': excess_annual,
-                '策略年化收益': strategy_annualized,
-                '基准年化收益': benchmark_annualized,
-                '策略波动率': strategy_vol,
-                '基准波动率': benchmark_vol,
-                '策略夏普比率': strategy_sharpe,
-                '基准夏普比率': benchmark_sharpe,
-                '策略最大回撤': strategy_dd,
-                '基准最大回撤': benchmark_dd,
-                '相对回撤': relative_dd,
-                '月胜率': year_win_rate,
-                '交易天数': len(year_data)
-            })
-        
-        # 创建年度数据DataFrame
-        yearly_df = pd.DataFrame(yearly_data)
+        # 按年份区段批量计算（口径同逐年循环：净值首尾收益、期内波动、相对年初回撤、月胜率）
+        period_table = batch_period_performance(aligned_data[['strategy']], aligned_data['benchmark'], freq='Y')
+        yearly_df = pd.DataFrame({
+            '年份': period_table['period'],
+            '策略收益': period_table['strategy_return'],
+            '基准收益': period_table['benchmark_return'],
+            '超额收益': period_table['excess_return'],
+            # 年度数据的年化收益即年度收益
+            '策略年化收益': period_table['strategy_return'],
+            '基准年化收益': period_table['benchmark_return'],
+            '策略波动率': period_table['strategy_volatility'],
+            '基准波动率': period_table['benchmark_volatility'],
+            '策略夏普比率': period_table['strategy_sharpe_ratio'],
+            '基准夏普比率': period_table['benchmark_sharpe_ratio'],
+            '策略最大回撤': period_table['strategy_max_drawdown'],
+            '基准最大回撤': period_table['benchmark_max_drawdown'],
+            '相对回撤': period_table['relative_drawdown'],
+            '月胜率': period_table['monthly_win_rate'],
+            '交易天数': period_table['trading_days']
+        })
         
         # 添加累计表现行
         if overall_metrics and yearly_df is not None and len(yearly_df) > 0:
@@ -477,6 +453,8 @@ class MultiSignalBacktestEngine:
             monthly_win_rate = overall_metrics['monthly_win_rate']
             
             # 计算整个期间的相对回撤（策略相对基准的最大回撤）
+            strategy_nav = (1 + aligned_data['strategy']).cumprod()
+            benchmark_nav = (1 + aligned_data['benchmark']).cumprod()
             overall_relative_nav = strategy_nav / benchmark_nav
             overall_relative_drawdown = (overall_relative_nav / overall_relative_nav.expanding().max() - 1).min()
             
@@ -551,17 +529,21 @@ class MultiSignalBacktestEngine:
     def calculate_benchmark_returns(self, 
                                    price_data: pd.DataFrame,
                                    strategy_type: str,
-                                   rebalance_dates: pd.DatetimeIndex) -> pd.Series:
+                                   rebalance_dates: Optional[pd.DatetimeIndex] = None) -> pd.Series:
         """
         计算基准收益（50%+50%月度再平衡）
         
+        再平衡日按目标权重分配份额，两次再平衡之间持有份额不变，
+        与回测中的 benchmark_nav 口径一致。
+        
         参数:
             price_data: 价格数据
             strategy_type: 策略类型
-            rebalance_dates: 再平衡日期
+            rebalance_dates: 再平衡日期（非交易日顺延至下一交易日），
+                            默认每月1日恰为交易日时再平衡，并使用共享缓存
             
         返回:
-            基准收益序列
+            基准日收益序列（索引为除首日外的全部交易日）
         """
         if strategy_type == 'value_growth':
             col1, col2 = 'ValueR', 'GrowthR'
@@ -574,62 +556,42 @@ class MultiSignalBacktestEngine:
         if col1 not in price_data.columns or col2 not in price_data.columns:
             raise ValueError(f"价格数据缺少必要的列: {[col1, col2]}")
         
-        benchmark_returns = []
-        
-        for i, rebalance_date in enumerate(rebalance_dates):
-            # 确定下一个再平衡日期
-            if i < len(rebalance_dates) - 1:
-                next_date = rebalance_dates[i + 1]
-                period_data = price_data.loc[rebalance_date:next_date]
-            else:
-                period_data = price_data.loc[rebalance_date:]
-            
-            if len(period_data) <= 1:
-                continue
-            
-            # 计算期间收益率
-            period_returns = period_data.pct_change().dropna()
-            
-            # 50%+50%的组合收益
-            portfolio_returns = 0.5 * period_returns[col1] + 0.5 * period_returns[col2]
-            
-            benchmark_returns.extend(portfolio_returns.tolist())
-        
-        # 构建完整的收益序列
-        all_dates = price_data.index[1:]  # 排除第一个日期（无收益）
-        benchmark_series = pd.Series(0.0, index=all_dates)
-        
-        # 填入基准收益
-        current_idx = 0
-        for i, rebalance_date in enumerate(rebalance_dates):
-            if i < len(rebalance_dates) - 1:
-                next_date = rebalance_dates[i + 1]
-                period_mask = (all_dates >= rebalance_date) & (all_dates < next_date)
-            else:
-                period_mask = all_dates >= rebalance_date
-            
-            period_length = period_mask.sum()
-            if period_length > 0 and current_idx < len(benchmark_returns):
-                end_idx = min(current_idx + period_length, len(benchmark_returns))
-                # 确保分配的值长度与目标索引长度匹配
-                values_to_assign = benchmark_returns[current_idx:end_idx]
-                target_indices = all_dates[period_mask]
-                
-                # 如果长度不匹配，截取或填充
-                if len(values_to_assign) == len(target_indices):
-                    benchmark_series.loc[target_indices] = values_to_assign
-                elif len(values_to_assign) > len(target_indices):
-                    # 截取多余的值
-                    benchmark_series.loc[target_indices] = values_to_assign[:len(target_indices)]
-                else:
-                    # 填充不足的值（用最后一个值填充）
-                    padded_values = values_to_assign + [values_to_assign[-1]] * (len(target_indices) - len(values_to_assign))
-                    benchmark_series.loc[target_indices] = padded_values
-                
-                current_idx = end_idx
+        if price_data.empty:
+            return pd.Series(dtype=float)
         
-        return benchmark_series
+        if rebalance_dates is None:
+            benchmark_nav = compute_rebalanced_benchmark_nav(
+                price_data, [col1, col2], price_data.index[0]
+            )['nav']
+        else:
+            positions = price_data.index.searchsorted(pd.DatetimeIndex(rebalance_dates))
+            positions = np.unique(positions[(positions >= 1) & (positions < len(price_data))])
+            weights = np.array([0.5, 0.5])
+            nav_values = piecewise_holdings_nav(
+                price_data[[col1, col2]].to_numpy(dtype=float), positions,
+                np.tile(weights, (len(positions), 1)), weights
+            )['nav']
+            benchmark_nav = pd.Series(nav_values, index=price_data.index)
+        
+        return benchmark_nav.pct_change().iloc[1:]
     
+    @staticmethod
+    def _decision_trading_dates(decision_dates: pd.DatetimeIndex,
+                                trading_index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """
+        信号日期 -> 调仓日期：信号月份之后第2个月的首个交易日
+
+        参数:
+            decision_dates: 信号（决策）日期
+            trading_index: 回测区间内的交易日索引
+
+        返回:
+            与decision_dates对齐的调仓日期，没有可用交易日（如最新信号）时为NaT
+        """
+        positions = decision_trading_positions(decision_dates, trading_index, delay_months=2)
+        trading_dates = trading_index[np.maximum(positions, 0)]
+        return trading_dates.where(positions >= 0)
+
     def run_voting_backtest(self,
                            voting_decisions: pd.DataFrame,
                            price_data: pd.DataFrame,
@@ -676,49 +638,28 @@ class MultiSignalBacktestEngine:
         if price_data_filtered.empty:
             raise ValueError("指定时间范围内没有价格数据")
         
-        # 生成交易信号
-        trading_signals = []
-        
-        for decision_date, decision_data in voting_decisions.iterrows():
-            # 根据T-2月的信号，在T月第一个交易日调仓
-            # decision_date 是信号日期，需要找到对应的交易日期
-            
-            # 计算目标交易月份
-            target_year = decision_date.year
-            target_month = decision_date.month + 2
-            
-            # 处理跨年
-            if target_month > 12:
-                target_month -= 12
-                target_year += 1
-            
-            # 找到目标月份的第一个交易日
-            target_month_start = pd.Timestamp(target_year, target_month, 1)
-            available_trading_dates = price_data_filtered.index[price_data_filtered.index >= target_month_start]
-            
-            # 如果没有可用的交易日期（如最新信号），设置为None
-            if len(available_trading_dates) == 0:
-                trading_date = None
-            else:
-                trading_date = available_trading_dates[0]
-            
-            # 确定持仓方向
-            winning_direction = decision_data['winning_direction']
-            target_asset = direction_map[winning_direction]
-            
-            trading_signals.append({
-                'signal_date': decision_date,
-                'trading_date': trading_date,
-                'target_asset': target_asset,
-                'winning_direction': winning_direction,
-                'vote_confidence': decision_data.get('vote_confidence', 0)
-            })
-        
-        if not trading_signals:
+        # 生成交易信号：根据T-2月的信号，在T月第一个交易日调仓
+        if voting_decisions.empty:
             print("警告: 没有生成任何交易信号")
             return {}
         
-        trading_signals_df = pd.DataFrame(trading_signals)
+        winning_direction = voting_decisions['winning_direction'].to_numpy()
+        unknown_directions = set(np.unique(winning_direction)) - set(direction_map)
+        if unknown_directions:
+            raise ValueError(f"未知的投票方向: {sorted(unknown_directions)}")
+        
+        if 'vote_confidence' in voting_decisions.columns:
+            vote_confidence = voting_decisions['vote_confidence'].to_numpy()
+        else:
+            vote_confidence = 0
+        
+        trading_signals_df = pd.DataFrame({
+            'signal_date': voting_decisions.index,
+            'trading_date': self._decision_trading_dates(voting_decisions.index, price_data_filtered.index),
+            'target_asset': np.where(winning_direction == 1, direction_map[1], direction_map[0]),
+            'winning_direction': winning_direction,
+            'vote_confidence': vote_confidence
+        })
         print(f"生成交易信号: {len(trading_signals_df)} 个")
         
         # 计算净值基准日期
@@ -810,21 +751,11 @@ class MultiSignalBacktestEngine:
         print(f"净值基准日期: {nav_base_date.strftime('%Y-%m-%d')}")
         print(f"基准日价格: {asset1_col}={base_price_asset1:.4f}, {asset2_col}={base_price_asset2:.4f}")
         
-        # 初始化净值序列
-        strategy_nav = pd.Series(index=nav_price_data.index, dtype=float)
-        benchmark_nav = pd.Series(index=nav_price_data.index, dtype=float)
-        
-        # 基准日期净值设为1.0
-        strategy_nav.iloc[0] = 1.0
-        benchmark_nav.iloc[0] = 1.0
-        
-        # 基准投资组合：始终50%+50%
-        benchmark_shares_asset1 = 0.5 / base_price_asset1  # 基准50%资金购买asset1的份额
-        benchmark_shares_asset2 = 0.5 / base_price_asset2  # 基准50%资金购买asset2的份额
-        
-        # 生成基准再平衡日期（每月第一个交易日）
-        rebalance_dates = pd.date_range(start=nav_base_date, end=nav_price_data.index[-1], freq='MS')  # 每月第一天
-        rebalance_dates = rebalance_dates[rebalance_dates.isin(nav_price_data.index)]  # 只保留实际交易日
+        # 基准投资组合：始终50%+50%，每月第一个交易日再平衡
+        benchmark_result = compute_rebalanced_benchmark_nav(
+            nav_price_data, [asset1_col, asset2_col], nav_base_date
+        )
+        rebalance_dates = benchmark_result['rebalance_dates']
         
         print(f"基准再平衡日期数量: {len(rebalance_dates)}")
         if len(rebalance_dates) > 0:
@@ -836,73 +767,39 @@ class MultiSignalBacktestEngine:
             (trading_signals_df['trading_date'] >= nav_base_date)
         ].sort_values('trading_date')
         
-        # 确定策略初始持仓
+        # 信号目标资产 -> 权重（100%持有目标资产）
+        is_asset1 = (valid_signals['target_asset'] == asset1_col).to_numpy()
+        signal_weights = np.column_stack((is_asset1, ~is_asset1)).astype(float)
+        
         if not valid_signals.empty:
-            first_signal = valid_signals.iloc[0]
-            if first_signal['target_asset'] == asset1_col:
-                strategy_shares_asset1 = 1.0 / base_price_asset1  # 100%资金购买asset1
-                strategy_shares_asset2 = 0.0
-            else:
-                strategy_shares_asset1 = 0.0
-                strategy_shares_asset2 = 1.0 / base_price_asset2  # 100%资金购买asset2
-            
-            print(f"策略初始持仓: {first_signal['target_asset']} 100%")
+            initial_weights = signal_weights[0]
+            print(f"策略初始持仓: {valid_signals['target_asset'].iloc[0]} 100%")
         else:
             # 如果没有有效信号，默认持有asset2（成长/小盘）
-            strategy_shares_asset1 = 0.0
-            strategy_shares_asset2 = 1.0 / base_price_asset2
+            initial_weights = np.array([0.0, 1.0])
             print(f"策略初始持仓: {asset2_col} 100% (无信号默认)")
         
-        # 逐日计算净值
-        rebalance_count = 0
-        for i in range(1, len(nav_price_data)):
-            current_date = nav_price_data.index[i]
-            current_price_asset1 = nav_price_data.iloc[i][asset1_col]
-            current_price_asset2 = nav_price_data.iloc[i][asset2_col]
-            
-            # 检查基准是否需要再平衡（每月第一个交易日）
-            if current_date in rebalance_dates:
-                # 计算再平衡前的基准净值
-                current_benchmark_nav_value = (benchmark_shares_asset1 * current_price_asset1 + 
-                                             benchmark_shares_asset2 * current_price_asset2)
-                
-                # 重新平衡为50%+50%
-                benchmark_shares_asset1 = (current_benchmark_nav_value * 0.5) / current_price_asset1
-                benchmark_shares_asset2 = (current_benchmark_nav_value * 0.5) / current_price_asset2
-                
-                rebalance_count += 1
-                if rebalance_count <= 3:  # 只打印前3次再平衡详情
-                    print(f"基准再平衡 {current_date.strftime('%Y-%m-%d')}: 净值={current_benchmark_nav_value:.4f}")
-            
-            # 检查策略是否有调仓信号
-            signals_on_date = valid_signals[valid_signals['trading_date'] == current_date]
-            
-            if not signals_on_date.empty:
-                # 有调仓信号：先计算调仓前的净值，然后调仓
-                prev_strategy_nav_value = (strategy_shares_asset1 * current_price_asset1 + 
-                                         strategy_shares_asset2 * current_price_asset2)
-                
-                # 调仓：将所有资金投入新的目标资产
-                new_signal = signals_on_date.iloc[-1]  # 如果有多个信号取最后一个
-                if new_signal['target_asset'] == asset1_col:
-                    strategy_shares_asset1 = prev_strategy_nav_value / current_price_asset1
-                    strategy_shares_asset2 = 0.0
-                else:
-                    strategy_shares_asset1 = 0.0
-                    strategy_shares_asset2 = prev_strategy_nav_value / current_price_asset2
-                
-                print(f"策略调仓 {current_date.strftime('%Y-%m-%d')}: 切换至 {new_signal['target_asset']}")
-            
-            # 计算当日净值
-            strategy_nav_value = (strategy_shares_asset1 * current_price_asset1 + 
-                                strategy_shares_asset2 * current_price_asset2)
-            benchmark_nav_value = (benchmark_shares_asset1 * current_price_asset1 + 
-                                 benchmark_shares_asset2 * current_price_asset2)
-            
-            strategy_nav.iloc[i] = strategy_nav_value
-            benchmark_nav.iloc[i] = benchmark_nav_value
+        strategy_result = compute_switching_nav(
+            nav_price_data, [asset1_col, asset2_col],
+            valid_signals['trading_date'], signal_weights, initial_weights
+        )
         
-        print(f"总共执行基准再平衡: {rebalance_count} 次")
+        strategy_nav = strategy_result['nav']
+        benchmark_nav = benchmark_result['nav']
+        
+        # 打印前3次基准再平衡与前5次策略调仓详情
+        for date in rebalance_dates[:3]:
+            print(f"基准再平衡 {date.strftime('%Y-%m-%d')}: 净值={benchmark_nav.loc[date]:.4f}")
+        switch_dates = strategy_result['rebalance_dates']
+        switch_assets = np.where(strategy_result['rebalance_weights'][:, 0] > 0, asset1_col, asset2_col)
+        for date, asset in zip(switch_dates[:5], switch_assets[:5]):
+            print(f"策略调仓 {date.strftime('%Y-%m-%d')}: 切换至 {asset}")
+        
+        print(f"总共执行基准再平衡: {len(rebalance_dates)} 次")
+        print(f"总共执行策略调仓: {len(switch_dates)} 次")
+        
+        strategy_shares_asset1, strategy_shares_asset2 = strategy_result['shares']
+        benchmark_shares_asset1, benchmark_shares_asset2 = benchmark_result['shares']
         
         return {
             'strategy_nav': strategy_nav,
@@ -918,7 +815,8 @@ class MultiSignalBacktestEngine:
                                         price_data: pd.DataFrame,
                                         strategy_type: str,
                                         start_date: str = '2013-01-01',
-                                        end_date: str = '2025-05-27') -> Dict:
+                                        end_date: str = '2025-05-27',
+                                        nav_modes: Sequence[str] = ('drift', 'daily')) -> Dict:
         """
         运行按投票比例分配的多信号投票回测
         
@@ -928,6 +826,8 @@ class MultiSignalBacktestEngine:
             strategy_type: 策略类型
             start_date: 回测开始日期
             end_date: 回测结束日期
+            nav_modes: 同时计算的持仓方式，第一个用于绩效分析（默认drift与历史一致，
+                      daily为每日再平衡到投票比例的对照曲线）
             
         返回:
             回测结果字典
@@ -959,58 +859,34 @@ class MultiSignalBacktestEngine:
         if price_data_filtered.empty:
             raise ValueError("指定时间范围内没有价格数据")
         
-        # 生成按比例分配的交易信号
-        trading_signals = []
-        
-        for decision_date, decision_data in voting_decisions.iterrows():
-            # 根据T-2月的信号，在T月第一个交易日调仓
-            target_year = decision_date.year
-            target_month = decision_date.month + 2
-            
-            # 处理跨年
-            if target_month > 12:
-                target_month -= 12
-                target_year += 1
-            
-            # 找到目标月份的第一个交易日
-            target_month_start = pd.Timestamp(target_year, target_month, 1)
-            available_trading_dates = price_data_filtered.index[price_data_filtered.index >= target_month_start]
-            
-            # 如果没有可用的交易日期（如最新信号），设置为None
-            if len(available_trading_dates) == 0:
-                trading_date = None
-            else:
-                trading_date = available_trading_dates[0]
-            
-            # 计算投票比例
-            if strategy_type == 'value_growth':
-                votes_asset1 = decision_data['value_votes']  # 价值票数
-                votes_asset2 = decision_data['growth_votes']  # 成长票数
-            elif strategy_type == 'big_small':
-                votes_asset1 = decision_data['big_votes']  # 大盘票数
-                votes_asset2 = decision_data['small_votes']  # 小盘票数
-            
-            total_votes = votes_asset1 + votes_asset2
-            weight_asset1 = votes_asset1 / total_votes if total_votes > 0 else 0.5
-            weight_asset2 = votes_asset2 / total_votes if total_votes > 0 else 0.5
-            
-            trading_signals.append({
-                'signal_date': decision_date,
-                'trading_date': trading_date,
-                'asset1_weight': weight_asset1,
-                'asset2_weight': weight_asset2,
-                'asset1_votes': votes_asset1,
-                'asset2_votes': votes_asset2,
-                'total_votes': total_votes,
-                'asset1_name': asset1_name,
-                'asset2_name': asset2_name
-            })
-        
-        if not trading_signals:
+        # 生成按比例分配的交易信号：根据T-2月的信号，在T月第一个交易日调仓
+        if voting_decisions.empty:
             print("警告: 没有生成任何交易信号")
             return {}
         
-        trading_signals_df = pd.DataFrame(trading_signals)
+        if strategy_type == 'value_growth':
+            votes_asset1 = voting_decisions['value_votes'].to_numpy()  # 价值票数
+            votes_asset2 = voting_decisions['growth_votes'].to_numpy()  # 成长票数
+        else:
+            votes_asset1 = voting_decisions['big_votes'].to_numpy()  # 大盘票数
+            votes_asset2 = voting_decisions['small_votes'].to_numpy()  # 小盘票数
+        
+        total_votes = votes_asset1 + votes_asset2
+        has_votes = total_votes > 0
+        weight_asset1 = np.divide(votes_asset1, total_votes, out=np.full(len(total_votes), 0.5), where=has_votes)
+        weight_asset2 = np.divide(votes_asset2, total_votes, out=np.full(len(total_votes), 0.5), where=has_votes)
+        
+        trading_signals_df = pd.DataFrame({
+            'signal_date': voting_decisions.index,
+            'trading_date': self._decision_trading_dates(voting_decisions.index, price_data_filtered.index),
+            'asset1_weight': weight_asset1,
+            'asset2_weight': weight_asset2,
+            'asset1_votes': votes_asset1,
+            'asset2_votes': votes_asset2,
+            'total_votes': total_votes,
+            'asset1_name': asset1_name,
+            'asset2_name': asset2_name
+        })
         print(f"生成按比例分配交易信号: {len(trading_signals_df)} 个")
         
         # 显示权重分布统计
@@ -1033,7 +909,7 @@ class MultiSignalBacktestEngine:
         
         # 使用新的按比例净值计算方法
         nav_results = self.calculate_nav_curves_by_proportional_shares(
-            trading_signals_df, price_data_filtered, strategy_type, nav_base_date
+            trading_signals_df, price_data_filtered, strategy_type, nav_base_date, nav_modes
         )
         
         strategy_nav = nav_results['strategy_nav']
@@ -1059,6 +935,7 @@ class MultiSignalBacktestEngine:
             'benchmark_returns': benchmark_returns_from_nav,
             'strategy_nav': strategy_nav,
             'benchmark_nav': benchmark_nav,
+            'strategy_nav_by_mode': nav_results['strategy_navs'],
             'nav_base_date': nav_base_date,
             'enhanced_metrics': enhanced_metrics,
             'voting_decisions': voting_decisions
@@ -1073,7 +950,8 @@ class MultiSignalBacktestEngine:
                                                     trading_signals_df: pd.DataFrame,
                                                     price_data: pd.DataFrame,
                                                     strategy_type: str,
-                                                    nav_base_date: pd.Timestamp) -> Dict:
+                                                    nav_base_date: pd.Timestamp,
+                                                    nav_modes: Sequence[str] = ('drift',)) -> Dict:
         """
         基于投票比例分配计算净值曲线
         
@@ -1082,9 +960,11 @@ class MultiSignalBacktestEngine:
             price_data: 价格数据
             strategy_type: 策略类型
             nav_base_date: 净值基准日期（2013-01-04）
+            nav_modes: 持仓方式，'drift'为调仓日分配份额后权重随价格漂移，
+                      'daily'为每日再平衡到目标比例；strategy_nav 对应第一个
             
         返回:
-            包含策略和基准净值序列的字典
+            包含策略和基准净值序列的字典，strategy_navs 为各持仓方式的净值
         """
         # 确定资产列名
         if strategy_type == 'value_growth':
@@ -1109,21 +989,11 @@ class MultiSignalBacktestEngine:
         print(f"净值基准日期: {nav_base_date.strftime('%Y-%m-%d')}")
         print(f"基准日价格: {asset1_col}={base_price_asset1:.4f}, {asset2_col}={base_price_asset2:.4f}")
         
-        # 初始化净值序列
-        strategy_nav = pd.Series(index=nav_price_data.index, dtype=float)
-        benchmark_nav = pd.Series(index=nav_price_data.index, dtype=float)
-        
-        # 基准日期净值设为1.0
-        strategy_nav.iloc[0] = 1.0
-        benchmark_nav.iloc[0] = 1.0
-        
-        # 基准投资组合：始终50%+50%
-        benchmark_shares_asset1 = 0.5 / base_price_asset1  # 基准50%资金购买asset1的份额
-        benchmark_shares_asset2 = 0.5 / base_price_asset2  # 基准50%资金购买asset2的份额
-        
-        # 生成基准再平衡日期（每月第一个交易日）
-        rebalance_dates = pd.date_range(start=nav_base_date, end=nav_price_data.index[-1], freq='MS')  # 每月第一天
-        rebalance_dates = rebalance_dates[rebalance_dates.isin(nav_price_data.index)]  # 只保留实际交易日
+        # 基准投资组合：始终50%+50%，每月第一个交易日再平衡
+        benchmark_result = compute_rebalanced_benchmark_nav(
+            nav_price_data, [asset1_col, asset2_col], nav_base_date
+        )
+        rebalance_dates = benchmark_result['rebalance_dates']
         
         print(f"基准再平衡日期数量: {len(rebalance_dates)}")
         if len(rebalance_dates) > 0:
@@ -1135,84 +1005,45 @@ class MultiSignalBacktestEngine:
             (trading_signals_df['trading_date'] >= nav_base_date)
         ].sort_values('trading_date')
         
+        signal_weights = valid_signals[['asset1_weight', 'asset2_weight']].to_numpy(dtype=float)
+        
         # 确定策略初始持仓比例
         if not valid_signals.empty:
-            first_signal = valid_signals.iloc[0]
-            weight1 = first_signal['asset1_weight']
-            weight2 = first_signal['asset2_weight']
-            
-            # 根据比例分配初始1元资金
-            strategy_shares_asset1 = weight1 / base_price_asset1
-            strategy_shares_asset2 = weight2 / base_price_asset2
-            
-            print(f"策略初始持仓: {asset1_name} {weight1:.1%}, {asset2_name} {weight2:.1%}")
+            initial_weights = signal_weights[0]
+            print(f"策略初始持仓: {asset1_name} {initial_weights[0]:.1%}, {asset2_name} {initial_weights[1]:.1%}")
         else:
             # 如果没有有效信号，默认50%+50%分配
-            strategy_shares_asset1 = 0.5 / base_price_asset1
-            strategy_shares_asset2 = 0.5 / base_price_asset2
+            initial_weights = np.array([0.5, 0.5])
             print(f"策略初始持仓: {asset1_name} 50%, {asset2_name} 50% (无信号默认)")
         
-        # 逐日计算净值
-        rebalance_count = 0
-        strategy_rebalance_count = 0
+        strategy_result = compute_switching_nav(
+            nav_price_data, [asset1_col, asset2_col],
+            valid_signals['trading_date'], signal_weights, initial_weights,
+            modes=tuple(nav_modes)
+        )
         
-        for i in range(1, len(nav_price_data)):
-            current_date = nav_price_data.index[i]
-            current_price_asset1 = nav_price_data.iloc[i][asset1_col]
-            current_price_asset2 = nav_price_data.iloc[i][asset2_col]
-            
-            # 检查基准是否需要再平衡（每月第一个交易日）
-            if current_date in rebalance_dates:
-                # 计算再平衡前的基准净值
-                current_benchmark_nav_value = (benchmark_shares_asset1 * current_price_asset1 + 
-                                             benchmark_shares_asset2 * current_price_asset2)
-                
-                # 重新平衡为50%+50%
-                benchmark_shares_asset1 = (current_benchmark_nav_value * 0.5) / current_price_asset1
-                benchmark_shares_asset2 = (current_benchmark_nav_value * 0.5) / current_price_asset2
-                
-                rebalance_count += 1
-                if rebalance_count <= 3:  # 只打印前3次再平衡详情
-                    print(f"基准再平衡 {current_date.strftime('%Y-%m-%d')}: 净值={current_benchmark_nav_value:.4f}")
-            
-            # 检查策略是否有调仓信号
-            signals_on_date = valid_signals[valid_signals['trading_date'] == current_date]
-            
-            if not signals_on_date.empty:
-                # 有调仓信号：先计算调仓前的净值，然后按新比例调仓
-                prev_strategy_nav_value = (strategy_shares_asset1 * current_price_asset1 + 
-                                         strategy_shares_asset2 * current_price_asset2)
-                
-                # 获取新的投票比例信号
-                new_signal = signals_on_date.iloc[-1]  # 如果有多个信号取最后一个
-                new_weight1 = new_signal['asset1_weight']
-                new_weight2 = new_signal['asset2_weight']
-                
-                # 按新比例重新分配资金
-                strategy_shares_asset1 = (prev_strategy_nav_value * new_weight1) / current_price_asset1
-                strategy_shares_asset2 = (prev_strategy_nav_value * new_weight2) / current_price_asset2
-                
-                strategy_rebalance_count += 1
-                if strategy_rebalance_count <= 5:  # 打印前5次策略调仓详情
-                    print(f"策略调仓 {current_date.strftime('%Y-%m-%d')}: {asset1_name} {new_weight1:.1%}, {asset2_name} {new_weight2:.1%}")
-            
-            # 计算当日净值
-            strategy_nav_value = (strategy_shares_asset1 * current_price_asset1 + 
-                                strategy_shares_asset2 * current_price_asset2)
-            benchmark_nav_value = (benchmark_shares_asset1 * current_price_asset1 + 
-                                 benchmark_shares_asset2 * current_price_asset2)
-            
-            strategy_nav.iloc[i] = strategy_nav_value
-            benchmark_nav.iloc[i] = benchmark_nav_value
+        strategy_nav = strategy_result['nav']
+        benchmark_nav = benchmark_result['nav']
+        
+        # 打印前3次基准再平衡与前5次策略调仓详情
+        for date in rebalance_dates[:3]:
+            print(f"基准再平衡 {date.strftime('%Y-%m-%d')}: 净值={benchmark_nav.loc[date]:.4f}")
+        switch_dates = strategy_result['rebalance_dates']
+        for date, (new_weight1, new_weight2) in zip(switch_dates[:5], strategy_result['rebalance_weights'][:5]):
+            print(f"策略调仓 {date.strftime('%Y-%m-%d')}: {asset1_name} {new_weight1:.1%}, {asset2_name} {new_weight2:.1%}")
         
-        print(f"总共执行基准再平衡: {rebalance_count} 次")
-        print(f"总共执行策略调仓: {strategy_rebalance_count} 次")
+        print(f"总共执行基准再平衡: {len(rebalance_dates)} 次")
+        print(f"总共执行策略调仓: {len(switch_dates)} 次")
+        
+        strategy_shares_asset1, strategy_shares_asset2 = strategy_result['shares']
+        benchmark_shares_asset1, benchmark_shares_asset2 = benchmark_result['shares']
         
         return {
             'strategy_nav': strategy_nav,
             'benchmark_nav': benchmark_nav,
+            'strategy_navs': strategy_result['navs'],
             'strategy_shares_asset1': strategy_shares_asset1,
             'strategy_shares_asset2': strategy_shares_asset2,
             'benchmark_shares_asset1': benchmark_shares_asset1,
             'benchmark_shares_asset2': benchmark_shares_asset2
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,429 @@
+"""
+持仓份额净值引擎
+Vectorized share-holdings NAV engine
+
+两次调仓之间持仓份额保持不变，组合净值只取决于区间起点净值与各资产的
+累计价格涨幅：
+
+    NAV_t = NAV_r × Σ_j w_j × P_t,j / P_r,j        (r 为 t 所在区间的调仓日)
+
+因此只需用 searchsorted 确定每个交易日所属的调仓区间，再对区间末净值做
+累乘，即可一次性得到整条净值曲线，无需逐日循环。
+
+支持两种持仓方式（可在一次调用中同时计算）：
+- drift: 调仓日按目标权重分配份额，其后权重随价格漂移（与历史逐日实现一致）
+- daily: 每个交易日收盘都再平衡回当前目标权重
+
+固定权重定期再平衡的基准净值在同一份价格数据上的所有回测中完全相同，
+按 (价格数据指纹, 资产对, 基准日, 再平衡频率, 权重) 缓存，只计算一次。
+"""
+
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence
+
+from ..utils.fingerprint import data_fingerprint
+
+
+NAV_MODES = ('drift', 'daily')
+TRADING_DAYS_PER_YEAR = 252
+
+
+def calendar_rebalance_positions(index: pd.DatetimeIndex,
+                                 nav_base_date: pd.Timestamp,
+                                 rebalance_freq: str = 'MS') -> np.ndarray:
+    """
+    日历再平衡日（恰为交易日时）在价格索引中的位置
+
+    参数:
+        index: 净值计算期间的交易日索引
+        nav_base_date: 净值基准日期
+        rebalance_freq: pandas日期频率，默认'MS'（每月1日）
+
+    返回:
+        升序的整数位置数组
+    """
+    if len(index) == 0:
+        return np.empty(0, dtype=np.int64)
+    rebalance_dates = pd.date_range(start=nav_base_date, end=index[-1], freq=rebalance_freq)
+    positions = index.get_indexer(rebalance_dates)
+    return positions[positions >= 0].astype(np.int64)
+
+
+def signal_positions(index: pd.DatetimeIndex,
+                     trading_dates: Sequence) -> np.ndarray:
+    """
+    将调仓日期映射为价格索引中的位置，不在索引中的日期记为 -1
+
+    参数:
+        index: 交易日索引
+        trading_dates: 调仓日期序列（可含NaT）
+
+    返回:
+        与trading_dates对齐的整数位置数组
+    """
+    return index.get_indexer(pd.DatetimeIndex(trading_dates)).astype(np.int64)
+
+
+def decision_trading_positions(decision_dates: Sequence,
+                               trading_index: pd.DatetimeIndex,
+                               delay_months: int = 2) -> np.ndarray:
+    """
+    将信号日期映射为调仓交易日位置：信号所在月份之后第 delay_months 个月的首个交易日
+
+    参数:
+        decision_dates: 信号（决策）日期
+        trading_index: 升序交易日索引
+        delay_months: 延迟月数，默认2（T-2月信号在T月初调仓）
+
+    返回:
+        与decision_dates对齐的整数位置数组，没有可用交易日时为 -1
+    """
+    decision_dates = pd.DatetimeIndex(decision_dates)
+    if len(decision_dates) == 0:
+        return np.empty(0, dtype=np.int64)
+    target_month_starts = (decision_dates.to_period('M') + delay_months).to_timestamp()
+    positions = trading_index.searchsorted(target_month_starts, side='left').astype(np.int64)
+    positions[positions >= len(trading_index)] = -1
+    return positions
+
+
+def piecewise_holdings_nav(prices: np.ndarray,
+                           rebalance_positions: np.ndarray,
+                           target_weights: np.ndarray,
+                           initial_weights: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    计算分段恒定持仓份额下的净值曲线
+
+    第0个交易日按 initial_weights 以净值1.0建仓；在每个调仓位置用调仓前的
+    净值按对应目标权重重新分配份额，调仓日本身的净值不受调仓影响。
+
+    参数:
+        prices: 价格矩阵，形状 (交易日数, 资产数)
+        rebalance_positions: 升序且不重复的调仓位置（>=1）
+        target_weights: 各调仓位置的目标权重，形状 (调仓次数, 资产数)
+        initial_weights: 初始权重，形状 (资产数,)
+
+    返回:
+        {'nav': 净值数组, 'shares': 期末持仓份额, 'segment_nav': 各区间起点净值}
+    """
+    prices = np.asarray(prices, dtype=float)
+    rebalance_positions = np.asarray(rebalance_positions, dtype=np.int64)
+    target_weights = np.asarray(target_weights, dtype=float).reshape(len(rebalance_positions), prices.shape[1])
+    initial_weights = np.asarray(initial_weights, dtype=float)
+
+    if prices.ndim != 2 or len(prices) == 0:
+        raise ValueError("价格矩阵必须为非空二维数组")
+    if len(rebalance_positions) and (rebalance_positions[0] < 1
+                                     or np.any(np.diff(rebalance_positions) <= 0)
+                                     or rebalance_positions[-1] >= len(prices)):
+        raise ValueError("调仓位置必须升序、不重复且位于 [1, 交易日数) 内")
+
+    # 区间起点与每个区间的持仓权重
+    starts = np.concatenate(([0], rebalance_positions))
+    weights = np.vstack((initial_weights[None, :], target_weights))
+
+    # 每个交易日所属的区间及其相对区间起点的价格涨幅
+    segment = np.searchsorted(starts, np.arange(len(prices)), side='right') - 1
+    growth = prices / prices[starts[segment]]
+    segment_growth = (weights[segment] * growth).sum(axis=1)
+
+    # 区间起点净值 = 各前序区间按原持仓在调仓日的涨幅累乘
+    segment_nav = np.ones(len(starts))
+    if len(rebalance_positions):
+        end_growth = (weights[:-1] * prices[rebalance_positions] / prices[starts[:-1]]).sum(axis=1)
+        segment_nav[1:] = np.cumprod(end_growth)
+
+    nav = segment_nav[segment] * segment_growth
+    nav[0] = 1.0
+
+    shares = segment_nav[-1] * weights[-1] / prices[starts[-1]]
+    return {'nav': nav, 'shares': shares, 'segment_nav': segment_nav}
+
+
+def forward_fill_weights(n_days: int,
+                         rebalance_positions: np.ndarray,
+                         target_weights: np.ndarray,
+                         initial_weights: np.ndarray) -> np.ndarray:
+    """
+    将调仓日目标权重展开为逐日目标权重矩阵
+
+    参数:
+        n_days: 交易日数
+        rebalance_positions: 升序且不重复的调仓位置
+        target_weights: 各调仓位置的目标权重，形状 (调仓次数, 资产数)
+        initial_weights: 初始权重
+
+    返回:
+        形状 (交易日数, 资产数) 的权重矩阵，第t行为第t日收盘后的目标权重
+    """
+    weights = np.vstack((np.asarray(initial_weights, dtype=float)[None, :],
+                         np.asarray(target_weights, dtype=float).reshape(len(rebalance_positions), -1)))
+    starts = np.concatenate(([0], np.asarray(rebalance_positions, dtype=np.int64)))
+    segment = np.searchsorted(starts, np.arange(n_days), side='right') - 1
+    return weights[segment]
+
+
+def daily_rebalanced_nav(prices: np.ndarray, weight_matrix: np.ndarray) -> np.ndarray:
+    """
+    计算每日收盘再平衡到目标权重的净值曲线
+
+    参数:
+        prices: 价格矩阵，形状 (交易日数, 资产数)
+        weight_matrix: 逐日目标权重，形状与prices相同；第t日收益使用第t-1日的权重
+
+    返回:
+        净值数组，首日为1.0
+    """
+    prices = np.asarray(prices, dtype=float)
+    weight_matrix = np.asarray(weight_matrix, dtype=float)
+    if prices.shape != weight_matrix.shape:
+        raise ValueError(f"权重矩阵形状 {weight_matrix.shape} 与价格矩阵 {prices.shape} 不一致")
+
+    nav = np.ones(len(prices))
+    if len(prices) > 1:
+        growth = (weight_matrix[:-1] * (prices[1:] / prices[:-1])).sum(axis=1)
+        nav[1:] = np.cumprod(growth)
+    return nav
+
+
+def multi_mode_nav(prices: np.ndarray,
+                   rebalance_positions: np.ndarray,
+                   target_weights: np.ndarray,
+                   initial_weights: np.ndarray,
+                   modes: Sequence[str] = NAV_MODES) -> Dict[str, np.ndarray]:
+    """
+    在同一组调仓信号下同时计算多种持仓方式的净值
+
+    参数:
+        prices: 价格矩阵，形状 (交易日数, 资产数)
+        rebalance_positions: 升序且不重复的调仓位置（>=1）
+        target_weights: 各调仓位置的目标权重，形状 (调仓次数, 资产数)
+        initial_weights: 初始权重
+        modes: 持仓方式，取值见 NAV_MODES
+
+    返回:
+        {持仓方式: 净值数组}，另含 'shares'（drift方式下的期末份额）
+    """
+    if not modes:
+        raise ValueError("至少需要指定一种持仓方式")
+    unknown = [mode for mode in modes if mode not in NAV_MODES]
+    if unknown:
+        raise ValueError(f"不支持的持仓方式: {unknown}")
+
+    results = {}
+    if 'drift' in modes:
+        drift_result = piecewise_holdings_nav(prices, rebalance_positions, target_weights, initial_weights)
+        results['drift'] = drift_result['nav']
+        results['shares'] = drift_result['shares']
+    if 'daily' in modes:
+        weight_matrix = forward_fill_weights(len(prices), rebalance_positions, target_weights, initial_weights)
+        results['daily'] = daily_rebalanced_nav(prices, weight_matrix)
+    return results
+
+
+def batched_two_asset_nav(prices: np.ndarray,
+                          rebalance_positions: np.ndarray,
+                          first_weights: np.ndarray,
+                          initial_first_weights: np.ndarray) -> np.ndarray:
+    """
+    对共享调仓日期的多个两资产组合批量计算drift净值
+
+    各组合在同一组调仓日调仓，只是第一资产权重不同（第二资产权重为 1-w）。
+    资产的区间涨幅对所有组合共用，只有权重组合需要按列展开。
+
+    参数:
+        prices: 价格矩阵，形状 (交易日数, 2)
+        rebalance_positions: 升序且不重复的调仓位置（>=1）
+        first_weights: 各调仓日的第一资产权重，形状 (调仓次数, 组合数)
+        initial_first_weights: 初始第一资产权重，形状 (组合数,)
+
+    返回:
+        净值矩阵，形状 (交易日数, 组合数)
+    """
+    prices = np.asarray(prices, dtype=float)
+    rebalance_positions = np.asarray(rebalance_positions, dtype=np.int64)
+    initial_first_weights = np.asarray(initial_first_weights, dtype=float)
+    first_weights = np.asarray(first_weights, dtype=float).reshape(len(rebalance_positions), len(initial_first_weights))
+    if prices.ndim != 2 or prices.shape[1] != 2:
+        raise ValueError("批量净值计算仅支持两资产价格矩阵")
+
+    starts = np.concatenate(([0], rebalance_positions))
+    weights = np.vstack((initial_first_weights[None, :], first_weights))
+
+    segment = np.searchsorted(starts, np.arange(len(prices)), side='right') - 1
+    growth = prices / prices[starts[segment]]
+    segment_weights = weights[segment]
+    nav = segment_weights * growth[:, [0]] + (1.0 - segment_weights) * growth[:, [1]]
+
+    segment_nav = np.ones((len(starts), len(initial_first_weights)))
+    if len(rebalance_positions):
+        end_growth = prices[rebalance_positions] / prices[starts[:-1]]
+        segment_end = weights[:-1] * end_growth[:, [0]] + (1.0 - weights[:-1]) * end_growth[:, [1]]
+        segment_nav[1:] = np.cumprod(segment_end, axis=0)
+
+    nav *= segment_nav[segment]
+    nav[0] = 1.0
+    return nav
+
+
+def compute_switching_nav(price_data: pd.DataFrame,
+                          asset_cols: Sequence[str],
+                          trading_dates: Sequence,
+                          target_weights: np.ndarray,
+                          initial_weights: Optional[np.ndarray] = None,
+                          modes: Sequence[str] = ('drift',)) -> Dict:
+    """
+    按调仓信号计算策略净值
+
+    同一交易日有多个信号时取最后一个；基准日及不在价格索引中的信号不触发调仓。
+
+    参数:
+        price_data: 净值计算期间的价格数据（首行为基准日）
+        asset_cols: 资产价格列
+        trading_dates: 各信号的调仓日期（已按时间排序）
+        target_weights: 各信号的目标权重，形状 (信号数, 资产数)
+        initial_weights: 初始权重，默认取第一个信号的目标权重
+        modes: 需要计算的持仓方式，'nav' 对应第一个
+
+    返回:
+        {'nav': 净值Series, 'navs': {持仓方式: 净值Series}, 'shares': 期末份额,
+         'rebalance_dates': 实际调仓日期, 'rebalance_weights': 实际调仓权重}
+    """
+    prices = price_data[list(asset_cols)].to_numpy(dtype=float)
+    target_weights = np.asarray(target_weights, dtype=float).reshape(-1, len(asset_cols))
+
+    positions = signal_positions(price_data.index, trading_dates)
+    if initial_weights is None:
+        if len(target_weights) == 0:
+            raise ValueError("没有信号时必须指定初始权重")
+        initial_weights = target_weights[0]
+
+    # 同日多个信号保留最后一个
+    valid = positions >= 1
+    positions, target_weights = positions[valid], target_weights[valid]
+    order = np.argsort(positions, kind='stable')
+    positions, target_weights = positions[order], target_weights[order]
+    keep = np.append(positions[1:] != positions[:-1], True)[:len(positions)]
+    positions, target_weights = positions[keep], target_weights[keep]
+
+    result = multi_mode_nav(prices, positions, target_weights, initial_weights, modes)
+    navs = {mode: pd.Series(result[mode], index=price_data.index) for mode in modes}
+    if 'shares' in result:
+        shares = result['shares']
+    else:
+        shares = navs[modes[-1]].iloc[-1] * forward_fill_weights(
+            len(prices), positions, target_weights, initial_weights)[-1] / prices[-1]
+    return {
+        'nav': navs[modes[0]],
+        'navs': navs,
+        'shares': shares,
+        'rebalance_dates': price_data.index[positions],
+        'rebalance_weights': target_weights,
+    }
+
+
+class BenchmarkNavCache:
+    """
+    基准净值的LRU缓存
+
+    参数:
+        maxsize: 最多缓存的基准条数
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, entry: Dict) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_BENCHMARK_CACHE = BenchmarkNavCache()
+
+
+def get_benchmark_cache() -> BenchmarkNavCache:
+    """获取进程内共享的基准净值缓存"""
+    return _BENCHMARK_CACHE
+
+
+def compute_rebalanced_benchmark_nav(price_data: pd.DataFrame,
+                                     asset_cols: Sequence[str],
+                                     nav_base_date: pd.Timestamp,
+                                     weights: Optional[Sequence[float]] = None,
+                                     rebalance_freq: str = 'MS',
+                                     use_cache: bool = True) -> Dict:
+    """
+    计算定期再平衡到固定权重的基准净值
+
+    参数:
+        price_data: 净值计算期间的价格数据（首行为基准日）
+        asset_cols: 资产价格列
+        nav_base_date: 净值基准日期
+        weights: 固定权重，默认等权
+        rebalance_freq: 再平衡频率，默认每月初
+        use_cache: 是否使用共享缓存
+
+    返回:
+        {'nav': 净值Series, 'shares': 期末份额, 'rebalance_dates': 再平衡日期}
+    """
+    asset_cols = list(asset_cols)
+    if weights is None:
+        weights = np.full(len(asset_cols), 1.0 / len(asset_cols))
+    weights = np.asarray(weights, dtype=float)
+
+    cache_key = None
+    if use_cache:
+        cache_key = (data_fingerprint(price_data, asset_cols), tuple(asset_cols),
+                     pd.Timestamp(nav_base_date), rebalance_freq, tuple(weights.tolist()))
+        cached = _BENCHMARK_CACHE.get(cache_key)
+        if cached is not None:
+            return _copy_benchmark_entry(cached)
+
+    positions = calendar_rebalance_positions(price_data.index, nav_base_date, rebalance_freq)
+    positions = positions[positions >= 1]
+    prices = price_data[asset_cols].to_numpy(dtype=float)
+
+    result = piecewise_holdings_nav(prices, positions,
+                                    np.tile(weights, (len(positions), 1)), weights)
+    entry = {
+        'nav': pd.Series(result['nav'], index=price_data.index),
+        'shares': result['shares'],
+        'rebalance_dates': price_data.index[positions],
+    }
+    if cache_key is not None:
+        _BENCHMARK_CACHE.put(cache_key, entry)
+        return _copy_benchmark_entry(entry)
+    return entry
+
+
+def _copy_benchmark_entry(entry: Dict) -> Dict:
+    """返回缓存条目的副本，避免调用方修改缓存内容"""
+    return {
+        'nav': entry['nav'].copy(),
+        'shares': entry['shares'].copy(),
+        'rebalance_dates': entry['rebalance_dates'],
+    }
@@ -0,0 +1,223 @@
+"""
+分期绩效批量计算
+Batched yearly / monthly performance breakdown
+
+将交易日按年份（或月份）编码为连续区段，用 ufunc.reduceat 在区段边界上
+一次性归约收益、波动与月度复合收益，对 (交易日数 × 策略数) 的收益矩阵
+同时给出每个策略的分期绩效表。
+
+口径与 MultiSignalBacktestEngine.calculate_yearly_performance 一致：
+- 期间收益取期内净值首尾之比（净值为全区间累乘）
+- 波动率为期内日收益标准差 × sqrt(252)
+- 最大回撤与相对回撤均相对期初重新计算
+- 月胜率为期内各自然月复合超额收益为正的比例
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Union
+
+from .nav_engine import TRADING_DAYS_PER_YEAR
+
+
+PERIOD_FREQS = ('Y', 'M')
+
+PERIOD_METRIC_COLUMNS = [
+    'strategy_return', 'benchmark_return', 'excess_return',
+    'strategy_volatility', 'benchmark_volatility',
+    'strategy_sharpe_ratio', 'benchmark_sharpe_ratio',
+    'strategy_max_drawdown', 'benchmark_max_drawdown',
+    'relative_drawdown', 'monthly_win_rate', 'trading_days'
+]
+
+
+def period_segments(dates: pd.DatetimeIndex, freq: str = 'Y') -> Dict[str, np.ndarray]:
+    """
+    按年份或月份划分升序日期序列
+
+    参数:
+        dates: 升序日期索引
+        freq: 'Y' 按年，'M' 按月
+
+    返回:
+        {'starts': 各区段起始位置, 'ends': 各区段结束位置(不含),
+         'labels': 区段标签（'2020' 或 '2020-01'）}
+    """
+    if freq not in PERIOD_FREQS:
+        raise ValueError(f"不支持的分期频率: {freq}，可选: {PERIOD_FREQS}")
+    dates = pd.DatetimeIndex(dates)
+    if freq == 'Y':
+        codes = dates.year.to_numpy()
+    else:
+        codes = (dates.year * 12 + dates.month - 1).to_numpy()
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(codes)].astype(np.int64)
+    period_dates = dates[starts]
+    labels = period_dates.strftime('%Y') if freq == 'Y' else period_dates.strftime('%Y-%m')
+    return {'starts': starts, 'ends': ends, 'labels': np.asarray(labels, dtype=object)}
+
+
+def _segment_drawdown(nav: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    各区段内相对期初的最大回撤，形状 (区段数, 列数)
+
+    区段首尾相接覆盖全部行：按区段起点净值重新定基后，排成 (最长区段, 区段数 × 列数)
+    的补齐数组（第 k 行为各区段的第 k 个交易日，补齐位置为 -inf），沿第0维累计
+    最大值即为每段各自重新起算的历史高点，最后用 minimum.reduceat 取各段最大回撤。
+    """
+    counts = ends - starts
+    n_segments, n_columns = len(starts), nav.shape[1]
+    # 每行在补齐数组（按 (区段内序号, 区段) 展平）中的位置
+    offsets = np.arange(len(nav)) - np.repeat(starts, counts)
+    rows = offsets * n_segments + np.repeat(np.arange(n_segments), counts)
+
+    cumulative = nav / np.repeat(nav[starts], counts, axis=0)
+    padded = np.full((counts.max() * n_segments, n_columns), -np.inf)
+    padded[rows] = cumulative
+    flat = padded.reshape(counts.max(), n_segments * n_columns)
+    np.maximum.accumulate(flat, axis=0, out=flat)
+    drawdown = np.divide(cumulative, padded[rows], out=cumulative)
+    drawdown -= 1
+    return np.minimum.reduceat(drawdown, starts, axis=0)
+
+
+def _segment_volatility(returns: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """各区段内日收益的样本标准差年化，单日区段为NaN"""
+    means = np.add.reduceat(returns, starts, axis=0) / counts[:, None]
+    deviations = returns - np.repeat(means, counts, axis=0)
+    squared = np.add.reduceat(deviations ** 2, starts, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = np.where(counts[:, None] > 1, squared / (counts[:, None] - 1), np.nan)
+    return np.sqrt(variance) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+def period_metric_arrays(strategy_returns: np.ndarray,
+                         benchmark_returns: np.ndarray,
+                         dates: pd.DatetimeIndex,
+                         freq: str = 'Y') -> Dict[str, np.ndarray]:
+    """
+    按列批量计算分期绩效
+
+    参数:
+        strategy_returns: 策略日收益矩阵，形状 (交易日数, 策略数)
+        benchmark_returns: 基准日收益，形状 (交易日数,) 或与策略相同
+        dates: 升序交易日索引
+        freq: 'Y' 按年，'M' 按月
+
+    返回:
+        'labels' 为区段标签，其余键见 PERIOD_METRIC_COLUMNS，
+        取值形状为 (区段数, 策略数)
+    """
+    strategy_returns = np.asarray(strategy_returns, dtype=float)
+    if strategy_returns.ndim == 1:
+        strategy_returns = strategy_returns[:, None]
+    benchmark_returns = np.asarray(benchmark_returns, dtype=float)
+    if benchmark_returns.ndim == 1:
+        benchmark_returns = benchmark_returns[:, None]
+    if len(strategy_returns) != len(dates) or len(benchmark_returns) != len(dates):
+        raise ValueError("收益矩阵行数与日期数不一致")
+    if benchmark_returns.shape[1] not in (1, strategy_returns.shape[1]):
+        raise ValueError(f"基准列数 {benchmark_returns.shape[1]} 与策略列数 {strategy_returns.shape[1]} 不匹配")
+
+    segments = period_segments(dates, freq)
+    starts, ends = segments['starts'], segments['ends']
+    counts = ends - starts
+    n_periods, n_strategies = len(starts), strategy_returns.shape[1]
+    if n_periods == 0:
+        empty = np.empty((0, n_strategies))
+        return {'labels': segments['labels'], **{col: empty for col in PERIOD_METRIC_COLUMNS}}
+
+    strategy_nav = np.cumprod(1 + strategy_returns, axis=0)
+    benchmark_nav = np.cumprod(1 + benchmark_returns, axis=0)
+
+    # 期间收益：期内净值首尾之比
+    strategy_period = strategy_nav[ends - 1] / strategy_nav[starts] - 1
+    benchmark_period = benchmark_nav[ends - 1] / benchmark_nav[starts] - 1
+
+    strategy_vol = _segment_volatility(strategy_returns, starts, counts)
+    benchmark_vol = _segment_volatility(benchmark_returns, starts, counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strategy_sharpe = np.where(strategy_vol > 0, strategy_period / strategy_vol, 0.0)
+        benchmark_sharpe = np.where(benchmark_vol > 0, benchmark_period / benchmark_vol, 0.0)
+
+    strategy_dd = _segment_drawdown(strategy_nav, starts, ends)
+    benchmark_dd = _segment_drawdown(benchmark_nav, starts, ends)
+    relative_dd = _segment_drawdown(strategy_nav / benchmark_nav, starts, ends)
+
+    # 月胜率：自然月复合超额收益为正的月份占期内跨越月份数的比例
+    month_segments = period_segments(dates, 'M')
+    month_starts = month_segments['starts']
+    monthly_excess = (np.multiply.reduceat(1 + strategy_returns, month_starts, axis=0)
+                      - np.multiply.reduceat(1 + benchmark_returns, month_starts, axis=0))
+    month_period = np.searchsorted(starts, month_starts, side='right') - 1
+    month_first = np.searchsorted(month_period, np.arange(n_periods), side='left')
+    monthly_wins = np.add.reduceat((monthly_excess > 0).astype(float), month_first, axis=0)
+    period_dates = pd.DatetimeIndex(dates)
+    first_month = (period_dates.year * 12 + period_dates.month).to_numpy()[starts]
+    last_month = (period_dates.year * 12 + period_dates.month).to_numpy()[ends - 1]
+    monthly_win_rate = monthly_wins / (last_month - first_month + 1)[:, None]
+
+    def _broadcast(values: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(values, (n_periods, n_strategies))
+
+    return {
+        'labels': segments['labels'],
+        'strategy_return': strategy_period,
+        'benchmark_return': _broadcast(benchmark_period),
+        'excess_return': strategy_period - benchmark_period,
+        'strategy_volatility': strategy_vol,
+        'benchmark_volatility': _broadcast(benchmark_vol),
+        'strategy_sharpe_ratio': strategy_sharpe,
+        'benchmark_sharpe_ratio': _broadcast(benchmark_sharpe),
+        'strategy_max_drawdown': strategy_dd,
+        'benchmark_max_drawdown': _broadcast(benchmark_dd),
+        'relative_drawdown': relative_dd,
+        'monthly_win_rate': monthly_win_rate,
+        'trading_days': _broadcast(counts[:, None]),
+    }
+
+
+def batch_period_performance(strategy_returns: Union[pd.DataFrame, pd.Series],
+                             benchmark_returns: Union[pd.DataFrame, pd.Series],
+                             freq: str = 'Y') -> pd.DataFrame:
+    """
+    多策略分期绩效表
+
+    参数:
+        strategy_returns: 策略日收益，列为策略（Series视为单个策略）
+        benchmark_returns: 基准日收益，Series为所有策略共用，DataFrame需与策略列一一对应
+        freq: 'Y' 按年，'M' 按月
+
+    返回:
+        长表：strategy, period 及 PERIOD_METRIC_COLUMNS，按策略、期间排列；
+        只保留所有列均有收益的日期
+    """
+    if isinstance(strategy_returns, pd.Series):
+        strategy_returns = strategy_returns.to_frame(strategy_returns.name or 'strategy')
+    if isinstance(benchmark_returns, pd.DataFrame) and benchmark_returns.shape[1] != strategy_returns.shape[1]:
+        raise ValueError(f"基准列数 {benchmark_returns.shape[1]} 与策略列数 {strategy_returns.shape[1]} 不匹配")
+
+    # 对齐日期并剔除缺失
+    benchmark_frame = (benchmark_returns.to_frame() if isinstance(benchmark_returns, pd.Series)
+                       else benchmark_returns)
+    strategy_values = strategy_returns.to_numpy(dtype=float)
+    benchmark_values = benchmark_frame.reindex(strategy_returns.index).to_numpy(dtype=float)
+    valid = ~(np.isnan(strategy_values).any(axis=1) | np.isnan(benchmark_values).any(axis=1))
+    dates = pd.DatetimeIndex(strategy_returns.index[valid])
+    strategy_values, benchmark_values = strategy_values[valid], benchmark_values[valid]
+    if not dates.is_monotonic_increasing:
+        order = np.argsort(dates, kind='stable')
+        dates, strategy_values, benchmark_values = dates[order], strategy_values[order], benchmark_values[order]
+
+    metrics = period_metric_arrays(strategy_values, benchmark_values, dates, freq)
+    n_periods, n_strategies = len(metrics['labels']), strategy_values.shape[1]
+
+    # (期间, 策略) -> 按策略展开的长表
+    table = pd.DataFrame({
+        'strategy': np.repeat(np.asarray(strategy_returns.columns, dtype=object), n_periods),
+        'period': np.tile(metrics['labels'], n_strategies),
+        **{col: np.asarray(metrics[col]).T.reshape(-1) for col in PERIOD_METRIC_COLUMNS}
+    })
+    table['trading_days'] = table['trading_days'].astype(np.int64)
+    return table
@@ -9,6 +9,7 @@ from typing import Dict, List, Optional
 import os
 
 from ..config.export_config import ExportConfig
+from ..utils.table_io import export_tables
 
 
 class ResultProcessor:
@@ -48,7 +49,7 @@ class ResultProcessor:
         
         # 按指标分组，选择信息比率最高的组合
         best_combinations = []
-        for indicator_name, group in significant_positive_results.groupby('indicator'):
+        for indicator_name, group in significant_positive_results.groupby('indicator', observed=True):
             best_combination = group.loc[group['information_ratio'].idxmax()]
             best_combinations.append(best_combination)
         
@@ -129,7 +130,7 @@ class ResultProcessor:
     
     def export_results(self, backtest_df: pd.DataFrame,
                       filtered_df: Optional[pd.DataFrame] = None) -> str:
-        """导出结果到Excel - 精简版"""
+        """导出结果 - 汇总工作表写入Excel，完整结果按 export_format 导出"""
         if backtest_df.empty:
             print("无结果可导出")
             return ""
@@ -138,31 +139,30 @@ class ResultProcessor:
             filepath = self.config.get_backtest_filepath()
             print(f"\n导出结果到: {filepath}")
             
-            with pd.ExcelWriter(filepath, engine=self.config.excel_engine) as writer:
-                # 完整结果
-                backtest_df.to_excel(writer, sheet_name='Full_Results', index=False)
-                
-                # 筛选结果
-                if filtered_df is not None and not filtered_df.empty:
-                    filtered_df.to_excel(writer, sheet_name='Filtered_Best', index=False)
-                
-                # 汇总分析
-                if not backtest_df.empty:
-                    self._export_summary_sheets(writer, backtest_df)
-                
-                # 如果有筛选结果，也导出其汇总
-                if filtered_df is not None and not filtered_df.empty:
-                    self._export_filtered_summary_sheets(writer, filtered_df)
+            # 完整结果与筛选结果
+            sheets = {'Full_Results': backtest_df}
+            if filtered_df is not None and not filtered_df.empty:
+                sheets['Filtered_Best'] = filtered_df
+            
+            # 汇总分析
+            sheets.update(self._summary_sheets(backtest_df))
             
-            print(f"导出完成: {filepath}")
-            return filepath
+            # 如果有筛选结果，也导出其汇总
+            if filtered_df is not None and not filtered_df.empty:
+                sheets.update(self._filtered_summary_sheets(filtered_df))
+            
+            written = export_tables(filepath, sheets, ['Full_Results', 'Filtered_Best'],
+                                    self.config.export_format, self.config.excel_engine)
+            print(f"导出完成: {', '.join(written)}")
+            return written[0] if written else ""
             
         except Exception as e:
             print(f"导出失败: {e}")
             return ""
     
-    def _export_summary_sheets(self, writer: pd.ExcelWriter, df: pd.DataFrame) -> None:
-        """导出汇总工作表 - 只保留有价值的分析"""
+    def _summary_sheets(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """汇总工作表 - 只保留有价值的分析"""
+        sheets = {}
         
         # 只导出显著且正向的结果汇总
         if all(col in df.columns for col in ['is_significant_0.05', 't_statistic', 'information_ratio']):
@@ -171,17 +171,19 @@ class ResultProcessor:
                 (df['t_statistic'] > 0)
             ]
             if not significant_positive.empty:
-                significant_positive.to_excel(writer, sheet_name='Significant_Positive', index=False)
+                sheets['Significant_Positive'] = significant_positive
         
         # Top表现者（只要t>0的）
         if all(col in df.columns for col in ['information_ratio', 't_statistic']):
             positive_t_results = df[df['t_statistic'] > 0]
             if not positive_t_results.empty:
-                top_performers = positive_t_results.nlargest(50, 'information_ratio')
-                top_performers.to_excel(writer, sheet_name='Top_Positive_IR', index=False)
+                sheets['Top_Positive_IR'] = positive_t_results.nlargest(50, 'information_ratio')
+        
+        return sheets
     
-    def _export_filtered_summary_sheets(self, writer: pd.ExcelWriter, filtered_df: pd.DataFrame) -> None:
-        """导出筛选结果的汇总工作表 - 精简版"""
+    def _filtered_summary_sheets(self, filtered_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """筛选结果的汇总工作表 - 精简版"""
+        sheets = {}
         
         # 筛选结果的整体统计
         if 'information_ratio' in filtered_df.columns:
@@ -196,8 +198,9 @@ class ResultProcessor:
                     filtered_df['indicator'].nunique() if 'indicator' in filtered_df.columns else 0
                 ]
             }
-            stats_df = pd.DataFrame(stats_data)
-            stats_df.to_excel(writer, sheet_name='Filtered_Summary', index=False)
+            sheets['Filtered_Summary'] = pd.DataFrame(stats_data)
+        
+        return sheets
     
     def compare_analysis(self, original_df: pd.DataFrame, 
                         filtered_df: pd.DataFrame) -> None:
@@ -11,6 +11,32 @@ from ..utils.validators import validate_series_input
 from ..config.signal_config import SignalConfig
 
 
+def _signal_kernel(data, signal_type: str, n: int):
+    """
+    信号计算核心（Series与DataFrame通用）
+    
+    返回:
+        (布尔信号, 有效信号所需的最少观测点数)
+    """
+    if signal_type == 'historical_high':
+        rolling_median = data.rolling(window=n, min_periods=n).median().shift(1)
+        return data > rolling_median, n + 1
+    if signal_type == 'marginal_improvement':
+        past_n_months = data.rolling(window=n, min_periods=n).mean()
+        past_year = data.rolling(window=12, min_periods=12).mean()
+        return past_n_months > past_year, 12
+    if signal_type == 'exceed_expectation':
+        past_mean = data.rolling(window=n, min_periods=n).mean().shift(1)
+        return data > past_mean, n + 1
+    if signal_type == 'historical_new_high':
+        past_max = data.rolling(window=n, min_periods=n).max().shift(1)
+        return data > past_max, n + 1
+    if signal_type == 'historical_new_low':
+        past_min = data.rolling(window=n, min_periods=n).min().shift(1)
+        return data < past_min, n + 1
+    raise ValueError(f"不支持的信号类型: {signal_type}")
+
+
 class SignalEngine:
     """
     精简的信号生成引擎
@@ -34,38 +60,32 @@ class SignalEngine:
     @validate_series_input
     def _historical_high(self, data: pd.Series, n: int = 12) -> pd.Series:
         """历史高位模式识别"""
-        rolling_median = data.rolling(window=n, min_periods=n).median().shift(1)
-        signal = data > rolling_median
-        return self._apply_validity_mask(signal, data, n + 1)
+        signal, required_points = _signal_kernel(data, 'historical_high', n)
+        return self._apply_validity_mask(signal, data, required_points)
     
     @validate_series_input
     def _marginal_improvement(self, data: pd.Series, n: int = 3) -> pd.Series:
         """边际改善模式识别"""
-        past_n_months = data.rolling(window=n, min_periods=n).mean()
-        past_year = data.rolling(window=12, min_periods=12).mean()
-        signal = past_n_months > past_year
-        return self._apply_validity_mask(signal, data, 12)
+        signal, required_points = _signal_kernel(data, 'marginal_improvement', n)
+        return self._apply_validity_mask(signal, data, required_points)
     
     @validate_series_input
     def _exceed_expectation(self, data: pd.Series, n: int = 12) -> pd.Series:
         """超预期模式识别"""
-        past_mean = data.rolling(window=n, min_periods=n).mean().shift(1)
-        signal = data > past_mean
-        return self._apply_validity_mask(signal, data, n + 1)
+        signal, required_points = _signal_kernel(data, 'exceed_expectation', n)
+        return self._apply_validity_mask(signal, data, required_points)
     
     @validate_series_input
     def _historical_new_high(self, data: pd.Series, n: int = 12) -> pd.Series:
         """历史新高模式识别"""
-        past_max = data.rolling(window=n, min_periods=n).max().shift(1)
-        signal = data > past_max
-        return self._apply_validity_mask(signal, data, n + 1)
+        signal, required_points = _signal_kernel(data, 'historical_new_high', n)
+        return self._apply_validity_mask(signal, data, required_points)
     
     @validate_series_input
     def _historical_new_low(self, data: pd.Series, n: int = 12) -> pd.Series:
         """历史新低模式识别"""
-        past_min = data.rolling(window=n, min_periods=n).min().shift(1)
-        signal = data < past_min
-        return self._apply_validity_mask(signal, data, n + 1)
+        signal, required_points = _signal_kernel(data, 'historical_new_low', n)
+        return self._apply_validity_mask(signal, data, required_points)
     
     def _apply_validity_mask(self, signal: pd.Series, data: pd.Series, required_points: int) -> pd.Series:
         """应用有效性掩码，前面数据不足的部分设为NaN"""
@@ -88,6 +108,40 @@ class SignalEngine:
         signal_func = self.signal_functions[signal_type]
         return signal_func(data, n)
     
+    def generate_signal_frame(self, data: pd.DataFrame, signal_type: str, n: int) -> pd.DataFrame:
+        """
+        对多个指标一次性生成同一类型、同一参数的信号
+        
+        与逐列调用 generate_single_signal 结果一致，但滚动计算在整个
+        DataFrame上完成，并以float矩阵返回（1.0=True, 0.0=False, NaN=数据不足）。
+        
+        参数:
+            data: 指标数据，每列一个指标
+            signal_type: 信号类型
+            n: 信号参数
+            
+        返回:
+            与data同形状的float DataFrame
+        """
+        if signal_type not in self.signal_functions:
+            raise ValueError(f"不支持的信号类型: {signal_type}")
+        if not isinstance(n, (int, np.integer)) or n <= 0:
+            raise ValueError("参数n必须是正整数")
+        if len(data) < n:
+            raise ValueError(f"数据长度({len(data)})不足，需要至少{n}个观测值")
+        
+        signal, required_points = _signal_kernel(data, signal_type, n)
+        values = signal.to_numpy(dtype=float, copy=True)
+        
+        # 有效性掩码：每列首个有效值之后 required_points-1 行之前设为NaN
+        valid = data.notna().to_numpy()
+        valid_start = valid.argmax(axis=0) + required_points - 1
+        apply_mask = valid.any(axis=0) & (valid_start < len(data))
+        mask = (np.arange(len(data))[:, None] < valid_start[None, :]) & apply_mask[None, :]
+        values[mask] = np.nan
+        
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+    
     def generate_signals_for_indicator(self, data: pd.Series, 
                                      signal_types: Optional[List[str]] = None,
                                      custom_params: Optional[Dict[str, int]] = None) -> Dict[str, pd.Series]:
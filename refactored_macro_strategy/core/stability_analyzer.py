@@ -10,6 +10,18 @@ import numpy as np
 from dataclasses import dataclass
 from typing import Optional, Dict, List, Tuple
 from ..config.export_config import ExportConfig
+from ..utils.combination_registry import CombinationRegistry
+from ..utils.table_io import export_tables
+from ..utils.partitioned_results import PartitionedResults
+from .streaming_stats import StreamingGroupStats
+
+
+# 稳定性分析读取的滚动结果列（重新分析时只需加载这些列）
+ROLLING_ANALYSIS_COLUMNS = [
+    'window_id', 'indicator', 'signal_type', 'parameter_n', 'assumed_direction',
+    't_statistic', 'p_value', 'df_ttest', 'is_significant_0.05', 'information_ratio'
+]
+ROLLING_CONTEXT_COLUMNS = ['window_start_date', 'window_end_date', 'backtest_target']
 
 
 @dataclass
@@ -62,6 +74,9 @@ class RankingStabilityAnalyzer:
                  export_config: Optional[ExportConfig] = None):
         self.config = config or StabilityConfig()
         self.export_config = export_config or ExportConfig()
+        self.registry = CombinationRegistry()
+        # 后台导出器（由工作流在多标的运行期间设置），为None时同步写出
+        self.exporter = None
     
     def extract_significant_combinations_per_window(self, 
                                             rolling_results_df: pd.DataFrame) -> pd.DataFrame:
@@ -91,48 +106,102 @@ class RankingStabilityAnalyzer:
         if missing_cols:
             raise ValueError(f"缺少必要的列: {missing_cols}")
         
-        selected_results = []
+        significant_mask = (
+            (rolling_results_df['is_significant_0.05'] == 1) &
+            (rolling_results_df['t_statistic'] > 0)
+        ).to_numpy()
         
-        # 按窗口分组处理
-        for window_id, window_data in rolling_results_df.groupby('window_id'):
-            # 筛选显著且t>0的组合
-            significant_positive = window_data[
-                (window_data['is_significant_0.05'] == 1) & 
-                (window_data['t_statistic'] > 0)
-            ].copy()
-            
-            if significant_positive.empty:
-                continue
-            
-            # 按信息比率排序
-            significant_positive = significant_positive.sort_values(
-                'information_ratio', ascending=False
-            ).copy()
-            
-            # 根据配置决定是否限制数量
-            if self.config.enable_top_k_limit:
-                # 取前K个
-                selected_in_window = significant_positive.head(self.config.top_k_per_window).copy()
-            else:
-                # 保留所有显著组合
-                selected_in_window = significant_positive.copy()
-            
-            # 添加窗口内排名
-            selected_in_window['rank_in_window'] = range(1, len(selected_in_window) + 1)
-            
-            selected_results.append(selected_in_window)
+        final_results = self._rank_within_windows(rolling_results_df, {0.05: significant_mask})[0.05]
         
-        if not selected_results:
+        if final_results.empty:
             print("警告: 没有窗口包含显著的正向组合")
             return pd.DataFrame()
         
-        final_results = pd.concat(selected_results, ignore_index=True)
-        
         print(f"提取完成: 共 {len(final_results)} 条记录，"
               f"涉及 {final_results['window_id'].nunique()} 个窗口")
         
         return final_results
     
+    def extract_significant_combinations_multi_threshold(self,
+                                                         rolling_results_df: pd.DataFrame,
+                                                         thresholds: Tuple[float, ...] = (0.01, 0.05, 0.10)
+                                                         ) -> Dict[float, pd.DataFrame]:
+        """
+        一次排序同时提取多个显著性水平下每个窗口的显著组合
+        
+        参数:
+            rolling_results_df: 滚动回测的原始结果（需包含p_value、df_ttest列）
+            thresholds: 显著性水平列表
+            
+        返回:
+            {显著性水平: 显著组合DataFrame}，各DataFrame结构与
+            extract_significant_combinations_per_window 的返回一致
+        """
+        if rolling_results_df.empty:
+            return {threshold: pd.DataFrame() for threshold in thresholds}
+        
+        required_cols = ['window_id', 'indicator', 'signal_type', 'parameter_n',
+                        'assumed_direction', 'p_value', 'df_ttest', 't_statistic',
+                        'information_ratio']
+        missing_cols = [col for col in required_cols if col not in rolling_results_df.columns]
+        if missing_cols:
+            raise ValueError(f"缺少必要的列: {missing_cols}")
+        
+        print(f"开始按显著性水平 {list(thresholds)} 提取每个窗口的显著组合...")
+        
+        p_values = rolling_results_df['p_value'].to_numpy(dtype=float)
+        base_mask = ((rolling_results_df['df_ttest'] > 0) &
+                     (rolling_results_df['t_statistic'] > 0)).to_numpy()
+        masks = {threshold: base_mask & (p_values < threshold) for threshold in thresholds}
+        
+        results = self._rank_within_windows(rolling_results_df, masks)
+        for threshold, selected in results.items():
+            windows = selected['window_id'].nunique() if not selected.empty else 0
+            print(f"  显著性水平 {threshold}: {len(selected)} 条记录，涉及 {windows} 个窗口")
+        
+        return results
+    
+    def _rank_within_windows(self, rolling_results_df: pd.DataFrame,
+                             masks: Dict[float, np.ndarray]) -> Dict[float, pd.DataFrame]:
+        """
+        在所有窗口上一次性完成窗口内IR排名与TopK截取
+        
+        参数:
+            rolling_results_df: 滚动回测结果
+            masks: {键: 与行对齐的布尔筛选数组}
+            
+        返回:
+            {键: 筛选后按 (window_id 升序, 信息比率降序) 排列并带 rank_in_window 的DataFrame}
+        """
+        # 窗口整数编码 + 一次稳定排序：窗口升序、信息比率降序（NaN排在窗口末尾）
+        window_codes, _ = pd.factorize(rolling_results_df['window_id'], sort=True)
+        ir_values = rolling_results_df['information_ratio'].to_numpy(dtype=float)
+        order = np.lexsort((-ir_values, window_codes))
+        sorted_codes = window_codes[order]
+        top_k = self.config.top_k_per_window if self.config.enable_top_k_limit else None
+        
+        results = {}
+        for key, mask in masks.items():
+            selected = order[mask[order]]
+            selected_codes = sorted_codes[mask[order]]
+            
+            # 窗口内排名 = 行位置 - 所在窗口的起始位置 + 1
+            positions = np.arange(len(selected))
+            is_group_start = np.r_[True, selected_codes[1:] != selected_codes[:-1]] if len(selected) else np.empty(0, dtype=bool)
+            group_start = np.maximum.accumulate(np.where(is_group_start, positions, 0))
+            ranks = positions - group_start + 1
+            
+            if top_k is not None:
+                keep = ranks <= top_k
+                selected = selected[keep]
+                ranks = ranks[keep]
+            
+            selected_df = rolling_results_df.iloc[selected].reset_index(drop=True)
+            selected_df['rank_in_window'] = ranks
+            results[key] = selected_df
+        
+        return results
+    
     def calculate_ranking_stability(self, significant_df: pd.DataFrame, 
                                    rolling_results_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -150,44 +219,85 @@ class RankingStabilityAnalyzer:
         
         print("开始计算排名稳定性...")
         
-        # 创建组合唯一标识
-        significant_df['combination_id'] = (
-            significant_df['indicator'].astype(str) + '_' +
-            significant_df['signal_type'].astype(str) + '_' +
-            significant_df['parameter_n'].astype(str) + '_' +
-            significant_df['assumed_direction'].astype(str)
-        )
+        # 组合键统一编码为整数（indicator / signal_type 转为category），分组全部基于整数编码
+        self.registry.encode_frame(significant_df)
+        self.registry.encode_frame(rolling_results_df)
         
-        # 创建原始数据的组合标识（用于计算全窗口平均IR）
-        rolling_results_df['combination_id'] = (
-            rolling_results_df['indicator'].astype(str) + '_' +
-            rolling_results_df['signal_type'].astype(str) + '_' +
-            rolling_results_df['parameter_n'].astype(str) + '_' +
-            rolling_results_df['assumed_direction'].astype(str)
-        )
+        # 计算每个组合在所有窗口中的IR统计（包括不显著的窗口）
+        all_window_ir_stats = self._all_window_ir_stats(rolling_results_df)
+        return self._score_combinations(significant_df, all_window_ir_stats)
+    
+    @staticmethod
+    def _all_window_ir_stats(rolling_results_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        每个组合在所有窗口中的IR统计
         
-        # 计算每个组合在所有窗口中的平均IR（包括不显著的窗口）
-        all_window_ir_stats = rolling_results_df.groupby('combination_id').agg({
-            'information_ratio': ['mean', 'std', 'count']
-        }).reset_index()
-        all_window_ir_stats.columns = ['combination_id', 'all_window_ir_mean', 'all_window_ir_std', 'all_window_count']
+        返回:
+            以 combination_code 为索引：all_window_ir_mean, all_window_ir_std,
+            all_window_count, ir_median, ir_mad, has_nan
+        """
+        all_ir = rolling_results_df['information_ratio']
+        all_codes = rolling_results_df['combination_code']
+        all_grouped = all_ir.groupby(all_codes)
+        all_window_ir_stats = pd.DataFrame({
+            'all_window_ir_mean': all_grouped.mean(),
+            'all_window_ir_std': all_grouped.std(),
+            'all_window_count': all_grouped.count(),
+        })
+        
+        # 全窗口IR的中位数绝对偏差 (MAD)，一次分组完成
+        all_window_ir_stats['ir_median'] = all_grouped.median()
+        all_window_ir_stats['ir_mad'] = (all_ir - all_grouped.transform('median')).abs().groupby(all_codes).median()
+        # 含NaN的组合在原实现中中位数为NaN，排名稳定性得分记为0
+        all_window_ir_stats['has_nan'] = all_ir.isna().groupby(all_codes).any()
+        return all_window_ir_stats
+    
+    def _score_combinations(self, significant_df: pd.DataFrame,
+                            all_window_ir_stats: pd.DataFrame) -> pd.DataFrame:
+        """
+        由显著组合（已编码）与全窗口IR统计计算四维稳定性得分
         
+        参数:
+            significant_df: 带 combination_code 与 rank_in_window 的显著组合
+            all_window_ir_stats: _all_window_ir_stats 格式的全窗口IR统计
+            
+        返回:
+            按综合稳定性得分降序排列的稳定性结果
+        """
+        significant_df['combination_id'] = self.registry.combination_ids(significant_df['combination_code'])
         print(f"计算全窗口IR统计: 涉及 {len(all_window_ir_stats)} 个组合，"
               f"平均每组合 {all_window_ir_stats['all_window_count'].mean():.1f} 个窗口")
         
-        # 第一步：收集所有符合条件组合的全窗口平均IR，用于计算绝对表现得分  
-        valid_combo_ids = set()
-        for combo_id, combo_data in significant_df.groupby('combination_id'):
-            total_windows = combo_data['window_id'].nunique()
-            if total_windows >= self.config.min_appearance_windows:
-                valid_combo_ids.add(combo_id)
+        # 显著窗口统计
+        sig_codes = significant_df['combination_code']
+        sig_grouped = significant_df.groupby(sig_codes, sort=True)
+        total_possible_windows = significant_df['window_id'].nunique()
+        ranks = sig_grouped['rank_in_window']
+        sig_ir = sig_grouped['information_ratio']
+        combo_stats = pd.DataFrame({
+            'appearance_windows': sig_grouped['window_id'].nunique(),
+            'rank_mean': ranks.mean(),
+            'rank_std': ranks.std(ddof=0),
+            'best_rank': ranks.min(),
+            'worst_rank': ranks.max(),
+            'median_rank': ranks.median(),
+            'ir_mean': sig_ir.mean(),
+            'ir_std': sig_ir.std(ddof=0),
+            'ir_min': sig_ir.min(),
+            'ir_max': sig_ir.max(),
+            't_statistic_mean': sig_grouped['t_statistic'].mean(),
+            't_statistic_std': sig_grouped['t_statistic'].std(),
+        })
         
-        # 获取符合条件组合的全窗口IR统计
-        valid_all_window_ir = all_window_ir_stats[
-            all_window_ir_stats['combination_id'].isin(valid_combo_ids)
-        ]['all_window_ir_mean'].values
+        # 第一步：筛选出现窗口数足够的组合
+        combo_stats = combo_stats[combo_stats['appearance_windows'] >= self.config.min_appearance_windows]
+        missing_codes = combo_stats.index.difference(all_window_ir_stats.index)
+        for code in missing_codes:
+            print(f"警告: 组合 {self.registry.combination_ids([code])[0]} 在原始数据中未找到，跳过")
+        combo_stats = combo_stats.join(all_window_ir_stats, how='inner')
         
-        # 计算全窗口IR的分布统计，用于标准化绝对表现得分
+        # 符合条件组合的全窗口IR分布统计，用于标准化绝对表现得分
+        valid_all_window_ir = combo_stats['all_window_ir_mean'].to_numpy()
         if len(valid_all_window_ir) > 0:
             ir_mean_global = np.mean(valid_all_window_ir)
             ir_std_global = np.std(valid_all_window_ir)
@@ -199,151 +309,105 @@ class RankingStabilityAnalyzer:
             ir_mean_global = ir_std_global = 0
             ir_min_global = ir_max_global = 0
         
-        stability_results = []
+        if combo_stats.empty:
+            print("警告: 没有满足条件的组合")
+            return pd.DataFrame()
         
-        # 第二步：按组合分组分析
-        for combo_id, combo_data in significant_df.groupby('combination_id'):
-            combo_info = combo_data.iloc[0]  # 获取组合基本信息
-            
-            # 基本统计
-            total_windows = combo_data['window_id'].nunique()
-            total_possible_windows = significant_df['window_id'].nunique()
-            
-            # 如果出现窗口数太少，跳过
-            if total_windows < self.config.min_appearance_windows:
-                continue
-            
-            # 获取该组合的全窗口IR统计
-            combo_all_window_stats = all_window_ir_stats[
-                all_window_ir_stats['combination_id'] == combo_id
-            ]
-            if combo_all_window_stats.empty:
-                print(f"警告: 组合 {combo_id} 在原始数据中未找到，跳过")
-                continue
-            
-            all_window_ir_mean = combo_all_window_stats['all_window_ir_mean'].iloc[0]
-            all_window_ir_std = combo_all_window_stats['all_window_ir_std'].iloc[0]
-            all_window_count = combo_all_window_stats['all_window_count'].iloc[0]
-            
-            # 1. 表现一致性分析 (基于全窗口IR) *** 改为全窗口一致性 ***
-            # 计算该组合全窗口IR相对稳定性，使用与performance_stability不同的方法
-            # 这里使用基于中位数的稳定性评估，更关注极值的影响
-            if all_window_count >= 3:
-                # 获取该组合在所有窗口的IR值
-                combo_all_window_ir = rolling_results_df[
-                    rolling_results_df['combination_id'] == combo_id
-                ]['information_ratio'].values
-                
-                if len(combo_all_window_ir) > 0:
-                    ir_median = np.median(combo_all_window_ir)
-                    # 计算所有窗口IR与中位数的绝对偏差的中位数 (MAD - Median Absolute Deviation)
-                    mad = np.median(np.abs(combo_all_window_ir - ir_median))
-                    # 标准化MAD相对于中位数的比例
-                    mad_ratio = mad / abs(ir_median) if abs(ir_median) > 1e-6 else float('inf')
-                    ranking_stability_score = 1 / (1 + mad_ratio) if mad_ratio != float('inf') else 0
-                else:
-                    ranking_stability_score = 0
-            else:
-                ranking_stability_score = 0
+        # 第二步：向量化计算四维得分
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1. 表现一致性 (全窗口IR的MAD相对中位数)
+            abs_median = combo_stats['ir_median'].abs()
+            mad_ratio = np.where(abs_median > 1e-6, combo_stats['ir_mad'] / abs_median, np.inf)
+            ranking_stability_score = np.where(np.isinf(mad_ratio), 0.0, 1 / (1 + mad_ratio))
+            ranking_stability_score = np.where(
+                (combo_stats['all_window_count'] >= 3) & ~combo_stats['has_nan'],
+                ranking_stability_score, 0.0
+            )
             
-            # 保留显著窗口排名统计用于输出和分析
-            ranks = combo_data['rank_in_window'].values
-            rank_mean = np.mean(ranks)
-            rank_std = np.std(ranks)
-            rank_cv = rank_std / rank_mean if rank_mean > 0 else float('inf')
+            rank_cv = np.where(combo_stats['rank_mean'] > 0,
+                               combo_stats['rank_std'] / combo_stats['rank_mean'], np.inf)
             
             # 2. 显著性一致率
-            significance_consistency = total_windows / total_possible_windows
-            
-            # 3. 性能稳定性 (基于全窗口IR) *** 修改为全窗口 ***
-            all_window_ir_cv = all_window_ir_std / abs(all_window_ir_mean) if abs(all_window_ir_mean) > 1e-6 else float('inf')
+            significance_consistency = combo_stats['appearance_windows'] / total_possible_windows
             
-            performance_stability_score = 1 / (1 + all_window_ir_cv) if all_window_ir_cv != float('inf') else 0
+            # 3. 性能稳定性 (全窗口IR变异系数)
+            all_abs_mean = combo_stats['all_window_ir_mean'].abs()
+            all_window_ir_cv = np.where(all_abs_mean > 1e-6,
+                                        combo_stats['all_window_ir_std'] / all_abs_mean, np.inf)
+            performance_stability_score = np.where(np.isinf(all_window_ir_cv), 0.0, 1 / (1 + all_window_ir_cv))
             
-            # 保留显著窗口IR统计用于输出和其他分析
-            significant_ir_values = combo_data['information_ratio'].values
-            significant_ir_mean = np.mean(significant_ir_values)
-            significant_ir_std = np.std(significant_ir_values)
-            significant_ir_cv = significant_ir_std / abs(significant_ir_mean) if abs(significant_ir_mean) > 1e-6 else float('inf')
+            sig_abs_mean = combo_stats['ir_mean'].abs()
+            significant_ir_cv = np.where(sig_abs_mean > 1e-6, combo_stats['ir_std'] / sig_abs_mean, np.inf)
             
-            # 4. 绝对表现得分 (基于全窗口IR)
+            # 4. 绝对表现得分 (全窗口IR的z-score经sigmoid映射到[0,1])
             if ir_std_global > 0:
-                # 使用全窗口平均IR进行标准化：(全窗口IR - 全局均值) / 全局标准差
-                ir_z_score = (all_window_ir_mean - ir_mean_global) / ir_std_global
-                # 将z-score映射到[0,1]，使用sigmoid函数
+                ir_z_score = (combo_stats['all_window_ir_mean'] - ir_mean_global) / ir_std_global
                 absolute_performance_score = 1 / (1 + np.exp(-ir_z_score))
+            elif ir_max_global > ir_min_global:
+                absolute_performance_score = ((combo_stats['all_window_ir_mean'] - ir_min_global) /
+                                              (ir_max_global - ir_min_global))
             else:
-                # 如果没有方差，使用简单的线性映射
-                if ir_max_global > ir_min_global:
-                    absolute_performance_score = (all_window_ir_mean - ir_min_global) / (ir_max_global - ir_min_global)
-                else:
-                    absolute_performance_score = 0.5  # 所有IR相同时给中等得分
-            
-            # 5. 综合稳定性得分 (四维加权)
-            overall_stability_score = (
-                self.config.ranking_weight * ranking_stability_score +
-                self.config.significance_weight * significance_consistency +
-                self.config.performance_weight * performance_stability_score +
-                self.config.absolute_performance_weight * absolute_performance_score
-            )
-            
-            # 6. 其他统计信息
-            best_rank = np.min(ranks)
-            worst_rank = np.max(ranks)
-            median_rank = np.median(ranks)
-            
-            stability_results.append({
-                'combination_id': combo_id,
-                'indicator': combo_info['indicator'],
-                'signal_type': combo_info['signal_type'],
-                'parameter_n': combo_info['parameter_n'],
-                'assumed_direction': combo_info['assumed_direction'],
-                
-                # 出现频率
-                'appearance_windows': total_windows,
-                'total_possible_windows': total_possible_windows,
-                'appearance_rate': significance_consistency,
-                
-                # 排名统计
-                'rank_mean': rank_mean,
-                'rank_std': rank_std,
-                'rank_cv': rank_cv,
-                'best_rank': best_rank,
-                'worst_rank': worst_rank,
-                'median_rank': median_rank,
-                
-                # 性能统计
-                'ir_mean': significant_ir_mean,
-                'ir_std': significant_ir_std,
-                'ir_cv': significant_ir_cv,
-                'ir_min': np.min(significant_ir_values),
-                'ir_max': np.max(significant_ir_values),
-                
-                # 全窗口IR统计 (新增)
-                'all_window_ir_mean': all_window_ir_mean,
-                'all_window_ir_std': all_window_ir_std, 
-                'all_window_count': all_window_count,
-                
-                # 稳定性得分
-                'ranking_stability_score': ranking_stability_score,
-                'significance_consistency_score': significance_consistency,
-                'performance_stability_score': performance_stability_score,
-                'absolute_performance_score': absolute_performance_score,
-                'overall_stability_score': overall_stability_score,
-                
-                # t统计量平均值
-                't_statistic_mean': combo_data['t_statistic'].mean(),
-                't_statistic_std': combo_data['t_statistic'].std(),
-            })
+                absolute_performance_score = pd.Series(0.5, index=combo_stats.index)
+        
+        # 5. 综合稳定性得分 (四维加权)
+        overall_stability_score = (
+            self.config.ranking_weight * ranking_stability_score +
+            self.config.significance_weight * significance_consistency +
+            self.config.performance_weight * performance_stability_score +
+            self.config.absolute_performance_weight * absolute_performance_score
+        )
         
-        stability_df = pd.DataFrame(stability_results)
+        codes = combo_stats.index.to_numpy()
+        first_rows = sig_grouped[['indicator', 'signal_type', 'parameter_n', 'assumed_direction']].first().loc[codes]
+        
+        stability_df = pd.DataFrame({
+            'combination_id': self.registry.combination_ids(codes),
+            'combination_code': codes,
+            'indicator': first_rows['indicator'].to_numpy(),
+            'signal_type': first_rows['signal_type'].to_numpy(),
+            'parameter_n': first_rows['parameter_n'].to_numpy(),
+            'assumed_direction': first_rows['assumed_direction'].to_numpy(),
+            
+            # 出现频率
+            'appearance_windows': combo_stats['appearance_windows'].to_numpy(),
+            'total_possible_windows': total_possible_windows,
+            'appearance_rate': significance_consistency.to_numpy(),
+            
+            # 排名统计
+            'rank_mean': combo_stats['rank_mean'].to_numpy(),
+            'rank_std': combo_stats['rank_std'].to_numpy(),
+            'rank_cv': rank_cv,
+            'best_rank': combo_stats['best_rank'].to_numpy(),
+            'worst_rank': combo_stats['worst_rank'].to_numpy(),
+            'median_rank': combo_stats['median_rank'].to_numpy(),
+            
+            # 性能统计
+            'ir_mean': combo_stats['ir_mean'].to_numpy(),
+            'ir_std': combo_stats['ir_std'].to_numpy(),
+            'ir_cv': significant_ir_cv,
+            'ir_min': combo_stats['ir_min'].to_numpy(),
+            'ir_max': combo_stats['ir_max'].to_numpy(),
+            
+            # 全窗口IR统计
+            'all_window_ir_mean': combo_stats['all_window_ir_mean'].to_numpy(),
+            'all_window_ir_std': combo_stats['all_window_ir_std'].to_numpy(),
+            'all_window_count': combo_stats['all_window_count'].to_numpy(),
+            
+            # 稳定性得分
+            'ranking_stability_score': ranking_stability_score,
+            'significance_consistency_score': significance_consistency.to_numpy(),
+            'performance_stability_score': performance_stability_score,
+            'absolute_performance_score': np.asarray(absolute_performance_score, dtype=float),
+            'overall_stability_score': np.asarray(overall_stability_score, dtype=float),
+            
+            # t统计量平均值
+            't_statistic_mean': combo_stats['t_statistic_mean'].to_numpy(),
+            't_statistic_std': combo_stats['t_statistic_std'].to_numpy(),
+        })
         
-        if not stability_df.empty:
-            # 按综合稳定性得分排序
-            stability_df = stability_df.sort_values('overall_stability_score', ascending=False)
-            print(f"稳定性分析完成: 共分析 {len(stability_df)} 个参数组合")
-        else:
-            print("警告: 没有满足条件的组合")
+        # 按综合稳定性得分排序
+        stability_df = stability_df.sort_values('overall_stability_score', ascending=False)
+        print(f"稳定性分析完成: 共分析 {len(stability_df)} 个参数组合")
         
         return stability_df
     
@@ -383,7 +447,7 @@ class RankingStabilityAnalyzer:
         
         if not qualified_combinations.empty:
             # 按指标分组，选择每组中得分最高的
-            for indicator_name, group in qualified_combinations.groupby('indicator'):
+            for indicator_name, group in qualified_combinations.groupby('indicator', observed=True):
                 best_combination = group.loc[group['overall_stability_score'].idxmax()]
                 best_combinations_per_indicator.append(best_combination)
             
@@ -402,7 +466,7 @@ class RankingStabilityAnalyzer:
             print(f"没有综合得分超过{high_stability_threshold}的组合")
         
         # 2. 按指标汇总的稳定性
-        indicator_stability = stability_df.groupby('indicator').agg({
+        indicator_stability = stability_df.groupby('indicator', observed=True).agg({
             'overall_stability_score': 'mean',
             'appearance_rate': 'mean',
             'rank_mean': 'mean',
@@ -413,7 +477,7 @@ class RankingStabilityAnalyzer:
         insights['indicator_stability_summary'] = indicator_stability
         
         # 3. 按信号类型汇总的稳定性
-        signal_type_stability = stability_df.groupby('signal_type').agg({
+        signal_type_stability = stability_df.groupby('signal_type', observed=True).agg({
             'overall_stability_score': 'mean',
             'appearance_rate': 'mean',
             'rank_mean': 'mean',
@@ -484,27 +548,32 @@ class RankingStabilityAnalyzer:
         try:
             # 生成文件路径
             timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            filepath = f"signal_test_results/ranking_stability_analysis_{timestamp}.xlsx"
+            target_suffix = self.export_config.get_target_suffix()
+            filepath = os.path.join(self.export_config.ensure_output_dir(),
+                                    f"ranking_stability_analysis{target_suffix}_{timestamp}.xlsx")
             
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
             
             print(f"导出稳定性分析结果到: {filepath}")
             
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                # 主要结果
-                if not stability_df.empty:
-                    stability_df.to_excel(writer, sheet_name='Stability_Analysis', index=False)
-                
-                # 洞察报告
-                for sheet_name, data_df in insights.items():
-                    if not data_df.empty:
-                        sheet_name_clean = sheet_name.replace('_', '_')[:31]  # Excel限制
-                        data_df.to_excel(writer, sheet_name=sheet_name_clean, index=False)
-                
-                # 原始显著组合数据
-                if not significant_df.empty:
-                    significant_df.to_excel(writer, sheet_name='Raw_Significant_Data', index=False)
-            
+            # 主要结果、洞察报告与原始显著组合数据
+            sheets = {}
+            if not stability_df.empty:
+                sheets['Stability_Analysis'] = stability_df
+            for sheet_name, data_df in insights.items():
+                if not data_df.empty:
+                    sheets[sheet_name[:31]] = data_df  # Excel限制
+            if not significant_df.empty:
+                sheets['Raw_Significant_Data'] = significant_df
+            
+            if self.exporter is not None:
+                self.exporter.submit_tables(filepath, sheets, ['Raw_Significant_Data'], self.export_config.export_format,
+                                            self.export_config.excel_engine)
+                print(f"稳定性分析结果已提交后台导出: {filepath}")
+                return filepath
+            
+            export_tables(filepath, sheets, ['Raw_Significant_Data'], self.export_config.export_format,
+                          self.export_config.excel_engine)
             print(f"稳定性分析结果导出完成: {filepath}")
             return filepath
             
@@ -542,21 +611,127 @@ class RankingStabilityAnalyzer:
                 print("无法计算稳定性，分析终止")
                 return {}
             
-            # 3. 生成洞察
-            insights = self.generate_stability_insights(stability_df)
+            return self._complete_analysis(stability_df, significant_df)
+            
+        except Exception as e:
+            print(f"稳定性分析失败: {e}")
+            return {}
+    
+    def _complete_analysis(self, stability_df: pd.DataFrame,
+                           significant_df: pd.DataFrame) -> Dict[str, any]:
+        """生成洞察、导出并打印关键发现"""
+        # 3. 生成洞察
+        insights = self.generate_stability_insights(stability_df)
+        
+        # 4. 导出结果
+        export_path = self.export_stability_analysis(stability_df, insights, significant_df)
+        
+        # 5. 打印关键发现
+        self._print_key_findings(stability_df, insights)
+        
+        return {
+            'stability_analysis': stability_df,
+            'insights': insights,
+            'significant_data': significant_df,
+            'export_path': export_path
+        }
+    
+    def stream_partitioned_results(self, partitions: PartitionedResults,
+                                   backtest_target: Optional[str] = None,
+                                   buffer_size: int = 64) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        逐窗口读取分区结果，提取显著组合并累积全窗口IR统计
+        
+        每次只有一个窗口的结果在内存中；全窗口IR的均值/标准差由可合并的
+        计数与离差平方和得到，中位数/MAD 由分层样本缓冲区得到
+        （组合的窗口数不超过 buffer_size 时与整表计算一致）。
+        
+        参数:
+            partitions: 按窗口分区的滚动回测结果
+            backtest_target: 多标的结果中只分析该标的，None 表示全部行
+            buffer_size: 中位数/MAD 样本缓冲区大小
+            
+        返回:
+            (显著组合DataFrame, _all_window_ir_stats 格式的全窗口IR统计)
+        """
+        missing_cols = [col for col in ROLLING_ANALYSIS_COLUMNS if col not in partitions.columns]
+        if missing_cols:
+            raise ValueError(f"缺少必要的列: {missing_cols}")
+        
+        print(f"逐窗口读取分区结果: {len(partitions.window_ids)} 个窗口, {partitions.total_rows} 条记录")
+        ir_stats = StreamingGroupStats(buffer_size)
+        significant_parts = []
+        for _, window_df in partitions.iter_windows(ROLLING_ANALYSIS_COLUMNS + ROLLING_CONTEXT_COLUMNS):
+            if backtest_target is not None and 'backtest_target' in window_df.columns:
+                window_df = window_df[window_df['backtest_target'].astype(str) == backtest_target]
+                window_df = window_df.reset_index(drop=True)
+            if window_df.empty:
+                continue
             
-            # 4. 导出结果
-            export_path = self.export_stability_analysis(stability_df, insights, significant_df)
+            self.registry.encode_frame(window_df)
+            ir_stats.update(window_df['combination_code'].to_numpy(),
+                            window_df['information_ratio'].to_numpy(dtype=float))
+            
+            # 排名只在窗口内进行，逐窗口提取与整表提取结果一致
+            significant_mask = ((window_df['is_significant_0.05'] == 1) &
+                                (window_df['t_statistic'] > 0)).to_numpy()
+            selected = self._rank_within_windows(window_df, {0.05: significant_mask})[0.05]
+            if not selected.empty:
+                significant_parts.append(selected)
+        
+        significant_df = pd.concat(significant_parts, ignore_index=True) if significant_parts else pd.DataFrame()
+        if not significant_df.empty:
+            self.registry.encode_frame(significant_df)
+            print(f"提取完成: 共 {len(significant_df)} 条记录，"
+                  f"涉及 {significant_df['window_id'].nunique()} 个窗口")
+        
+        stats_frame = ir_stats.to_frame()
+        approximate_count = int((~stats_frame['exact']).sum())
+        if approximate_count:
+            print(f"注意: {approximate_count} 个组合的窗口数超过 {buffer_size}，IR中位数/MAD为近似值")
+        all_window_ir_stats = stats_frame.drop(columns='exact').rename(columns={
+            'mean': 'all_window_ir_mean', 'std': 'all_window_ir_std', 'count': 'all_window_count',
+            'median': 'ir_median', 'mad': 'ir_mad'
+        })[['all_window_ir_mean', 'all_window_ir_std', 'all_window_count', 'ir_median', 'ir_mad', 'has_nan']]
+        all_window_ir_stats.index.name = 'combination_code'
+        return significant_df, all_window_ir_stats
+    
+    def run_partitioned_stability_analysis(self, partitions: PartitionedResults,
+                                           backtest_target: Optional[str] = None,
+                                           buffer_size: int = 64) -> Dict[str, any]:
+        """
+        在按窗口分区的滚动结果上运行完整稳定性分析（不拼接完整结果表）
+        
+        参数:
+            partitions: 按窗口分区的滚动回测结果
+            backtest_target: 多标的结果中只分析该标的
+            buffer_size: 中位数/MAD 样本缓冲区大小
             
-            # 5. 打印关键发现
-            self._print_key_findings(stability_df, insights)
+        返回:
+            与 run_complete_stability_analysis 相同结构的结果字典
+        """
+        print("="*80)
+        print("基于排名的稳定性分析 (分区流式)")
+        print("="*80)
+        print(f"配置: 最少窗口数={self.config.min_appearance_windows}")
+        print(f"{self.config.get_selection_summary()}")
+        print(f"{self.config.get_weights_summary()}")
+        
+        try:
+            significant_df, all_window_ir_stats = self.stream_partitioned_results(
+                partitions, backtest_target, buffer_size
+            )
+            if significant_df.empty:
+                print("无法提取显著组合，分析终止")
+                return {}
+            
+            print("开始计算排名稳定性...")
+            stability_df = self._score_combinations(significant_df, all_window_ir_stats)
+            if stability_df.empty:
+                print("无法计算稳定性，分析终止")
+                return {}
             
-            return {
-                'stability_analysis': stability_df,
-                'insights': insights,
-                'significant_data': significant_df,
-                'export_path': export_path
-            }
+            return self._complete_analysis(stability_df, significant_df)
             
         except Exception as e:
             print(f"稳定性分析失败: {e}")
@@ -0,0 +1,309 @@
+"""
+可合并的分组统计量
+Mergeable per-group aggregates for out-of-core stability analysis
+
+滚动结果按窗口分区逐块读取时，每个组合的全窗口IR统计量需要跨分区累积：
+- GroupMoments: 计数、均值与离差平方和 (count / mean / M2)，按 Chan 并行公式合并，
+  等价于累积 count、sum、sum of squares 但数值更稳定
+- GroupQuantileSketch: 分层样本缓冲区，容量内精确保存全部取值；超出容量时
+  逐层隔一取一压缩（Munro-Paterson），用于中位数与 MAD
+
+两者都支持 update（加入一个数据块）与 merge（合并另一个累积器），
+内存只与组合数 × 缓冲区容量（及对数级的层数）有关，与总行数无关。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+
+def _grow_rows(array: np.ndarray, size: int, fill_value) -> np.ndarray:
+    """将数组第一维扩展到 size，新行填 fill_value"""
+    if len(array) >= size:
+        return array
+    extra = np.full((size - len(array),) + array.shape[1:], fill_value, dtype=array.dtype)
+    return np.concatenate([array, extra])
+
+
+def _occurrence_rank(codes: np.ndarray) -> np.ndarray:
+    """每个元素在同组内的出现序号（0起）"""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    positions = np.arange(len(codes))
+    is_start = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if len(codes) else np.empty(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = positions - group_start
+    return ranks
+
+
+class GroupMoments:
+    """按整数组编码累积的计数、均值与离差平方和"""
+
+    def __init__(self):
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.count)
+
+    def _grow(self, size: int) -> None:
+        self.count = _grow_rows(self.count, size, 0)
+        self.mean = _grow_rows(self.mean, size, 0.0)
+        self.m2 = _grow_rows(self.m2, size, 0.0)
+
+    def _merge_arrays(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        size = max(self.n_groups, len(count))
+        self._grow(size)
+        count = _grow_rows(count, size, 0)
+        mean = _grow_rows(mean, size, 0.0)
+        m2 = _grow_rows(m2, size, 0.0)
+
+        total = self.count + count
+        active = count > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = mean - self.mean
+            self.mean = np.where(active, self.mean + delta * count / total, self.mean)
+            self.m2 = np.where(active, self.m2 + m2 + delta ** 2 * self.count * count / total, self.m2)
+        self.count = total
+
+    def update(self, codes: np.ndarray, values: np.ndarray) -> None:
+        """
+        加入一个数据块
+
+        参数:
+            codes: 组编码（非负整数）
+            values: 取值，NaN 不计入
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        if len(codes) == 0:
+            return
+
+        size = max(self.n_groups, int(codes.max()) + 1)
+        count = np.bincount(codes, minlength=size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.bincount(codes, weights=values, minlength=size) / count
+        mean = np.where(count > 0, mean, 0.0)
+        m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=size)
+        self._merge_arrays(count, mean, m2)
+
+    def merge(self, other: 'GroupMoments') -> 'GroupMoments':
+        """合并另一个累积器（原地），返回自身"""
+        self._merge_arrays(other.count, other.mean, other.m2)
+        return self
+
+    def means(self) -> np.ndarray:
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def stds(self, ddof: int = 1) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > ddof, np.sqrt(self.m2 / (self.count - ddof)), np.nan)
+
+
+class GroupQuantileSketch:
+    """
+    按组的分层样本缓冲区（Munro-Paterson 式）
+
+    第 ℓ 层的样本权重为 2^ℓ。新取值进入第0层；某层满 buffer_size 个样本时排序后
+    隔一取一（起点按压缩次数交替），一半样本晋升到上一层。每组取值数不超过
+    buffer_size 时从不压缩，中位数与 MAD 为精确值；否则为近似值，
+    内存为 组数 × buffer_size × 层数（层数约 log2(取值数 / buffer_size)）。
+
+    参数:
+        buffer_size: 每层缓冲区大小（偶数）
+        initial_capacity: 第0层的初始宽度，按需倍增到 buffer_size
+    """
+
+    def __init__(self, buffer_size: int = 64, initial_capacity: int = 8):
+        if buffer_size < 2 or buffer_size % 2:
+            raise ValueError(f"buffer_size必须为不小于2的偶数，当前为: {buffer_size}")
+        self.buffer_size = buffer_size
+        self.level_values = [np.full((0, min(initial_capacity, buffer_size)), np.nan)]
+        self.level_fill = [np.zeros(0, dtype=np.int64)]
+        self.compactions = np.zeros(0, dtype=np.int64)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.compactions)
+
+    @property
+    def is_exact(self) -> np.ndarray:
+        """各组的中位数/MAD是否为精确值（未发生过压缩）"""
+        return self.compactions == 0
+
+    def _grow(self, size: int) -> None:
+        self.level_values = [_grow_rows(values, size, np.nan) for values in self.level_values]
+        self.level_fill = [_grow_rows(fill, size, 0) for fill in self.level_fill]
+        self.compactions = _grow_rows(self.compactions, size, 0)
+
+    def _ensure_level(self, level: int) -> None:
+        while len(self.level_values) <= level:
+            self.level_values.append(np.full((self.n_groups, self.buffer_size), np.nan))
+            self.level_fill.append(np.zeros(self.n_groups, dtype=np.int64))
+
+    def _compact(self, level: int, groups: np.ndarray) -> None:
+        """将指定组第 level 层的满缓冲区隔一取一晋升到上一层并清空"""
+        values = np.sort(self.level_values[level][groups], axis=1)
+        take_odd = (self.compactions[groups] % 2 == 1)[:, None]
+        promoted = np.where(take_odd, values[:, 1::2], values[:, 0::2])
+        self.level_values[level][groups] = np.nan
+        self.level_fill[level][groups] = 0
+        self.compactions[groups] += 1
+        for column in range(promoted.shape[1]):
+            self._push(level + 1, groups, promoted[:, column])
+
+    def _push(self, level: int, codes: np.ndarray, values: np.ndarray) -> None:
+        """向第 level 层插入样本（codes 内无重复）"""
+        if len(codes) == 0:
+            return
+        self._ensure_level(level)
+        width = self.level_values[level].shape[1]
+        full = codes[self.level_fill[level][codes] >= width]
+        if len(full):
+            if width < self.buffer_size:
+                extra = min(width * 2, self.buffer_size) - width
+                self.level_values[level] = np.hstack(
+                    [self.level_values[level], np.full((self.n_groups, extra), np.nan)]
+                )
+            else:
+                self._compact(level, full)
+        positions = self.level_fill[level][codes]
+        self.level_values[level][codes, positions] = values
+        self.level_fill[level][codes] += 1
+
+    def _add(self, level: int, codes: np.ndarray, values: np.ndarray) -> None:
+        if len(codes) == 0:
+            return
+        self._grow(max(self.n_groups, int(codes.max()) + 1))
+        # 同组的多个取值分轮插入，保证每轮内组编码唯一
+        ranks = _occurrence_rank(codes)
+        for rank in range(int(ranks.max()) + 1):
+            selected = ranks == rank
+            self._push(level, codes[selected], values[selected])
+
+    def update(self, codes: np.ndarray, values: np.ndarray) -> None:
+        """
+        加入一个数据块
+
+        参数:
+            codes: 组编码（非负整数）
+            values: 取值，NaN 不计入
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        self._add(0, codes[valid], values[valid])
+
+    def merge(self, other: 'GroupQuantileSketch') -> 'GroupQuantileSketch':
+        """合并另一个累积器（原地），同层样本直接并入同层，返回自身"""
+        self._grow(max(self.n_groups, other.n_groups))
+        self.compactions[:other.n_groups] += other.compactions
+        for level, (values, fill) in enumerate(zip(other.level_values, other.level_fill)):
+            for column in range(values.shape[1]):
+                codes = np.flatnonzero(fill > column)
+                self._push(level, codes, values[codes, column])
+        return self
+
+    def _samples(self) -> tuple:
+        """全部层的样本与权重，形状 (组数, 样本槽位数)"""
+        values = np.hstack(self.level_values)
+        weights = np.hstack([np.where(np.isnan(level_values), 0.0, 2.0 ** level)
+                             for level, level_values in enumerate(self.level_values)])
+        return values, weights
+
+    @staticmethod
+    def _weighted_median(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """逐行加权中位数（NaN 与零权重为填充），恰好平分时取两侧均值"""
+        order = np.argsort(values, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        weights = np.take_along_axis(weights, order, axis=1)
+        cumulative = np.cumsum(weights, axis=1)
+        total = cumulative[:, -1] if values.shape[1] else np.zeros(len(values))
+        half = total / 2
+
+        index = np.argmax(cumulative >= half[:, None], axis=1)
+        rows = np.arange(len(values))
+        median = values[rows, index]
+        next_index = np.minimum(index + 1, values.shape[1] - 1)
+        split = (cumulative[rows, index] == half) & (next_index > index) & (weights[rows, next_index] > 0)
+        median = np.where(split, (median + values[rows, next_index]) / 2, median)
+        return np.where(total > 0, median, np.nan)
+
+    def medians(self) -> np.ndarray:
+        values, weights = self._samples()
+        return self._weighted_median(values, weights)
+
+    def mads(self, medians: Optional[np.ndarray] = None) -> np.ndarray:
+        """中位数绝对偏差 median(|x - median(x)|)"""
+        values, weights = self._samples()
+        if medians is None:
+            medians = self._weighted_median(values, weights)
+        return self._weighted_median(np.abs(values - medians[:, None]), weights)
+
+
+class StreamingGroupStats:
+    """
+    分组统计累积器：计数、均值、标准差、中位数、MAD 与是否含缺失值
+
+    参数:
+        buffer_size: 中位数/MAD 样本缓冲区大小，每组取值数不超过该值时结果精确
+    """
+
+    def __init__(self, buffer_size: int = 64):
+        self.moments = GroupMoments()
+        self.sketch = GroupQuantileSketch(buffer_size)
+        self.seen = np.zeros(0, dtype=bool)
+        self.has_nan = np.zeros(0, dtype=bool)
+
+    def update(self, codes: np.ndarray, values: np.ndarray) -> None:
+        """加入一个数据块（codes 为非负整数组编码）"""
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+        if len(codes) == 0:
+            return
+        size = max(len(self.seen), int(codes.max()) + 1)
+        self.seen = _grow_rows(self.seen, size, False)
+        self.has_nan = _grow_rows(self.has_nan, size, False)
+        self.seen[codes] = True
+        self.has_nan[codes[np.isnan(values)]] = True
+        self.moments.update(codes, values)
+        self.sketch.update(codes, values)
+
+    def merge(self, other: 'StreamingGroupStats') -> 'StreamingGroupStats':
+        """合并另一个累积器（原地），返回自身"""
+        size = max(len(self.seen), len(other.seen))
+        self.seen = _grow_rows(self.seen, size, False)
+        self.has_nan = _grow_rows(self.has_nan, size, False)
+        self.seen[:len(other.seen)] |= other.seen
+        self.has_nan[:len(other.has_nan)] |= other.has_nan
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        汇总为 DataFrame
+
+        返回:
+            以组编码为索引（只含出现过的组）：count, mean, std, median, mad, has_nan, exact
+        """
+        size = len(self.seen)
+        self.moments._grow(size)
+        self.sketch._grow(size)
+        codes = np.flatnonzero(self.seen)
+        medians = self.sketch.medians()
+        frame = pd.DataFrame({
+            'count': self.moments.count,
+            'mean': self.moments.means(),
+            'std': self.moments.stds(ddof=1),
+            'median': medians,
+            'mad': self.sketch.mads(medians),
+            'has_nan': self.has_nan,
+            'exact': self.sketch.is_exact,
+        })
+        return frame.iloc[codes]
@@ -0,0 +1,402 @@
+"""
+投票信号子集批量评估
+Batch evaluator for voting-signal subsets
+
+敏感性测试与信号筛选需要比较大量信号子集的投票策略表现。对每个子集重新
+生成信号、计算决策并逐日回测代价很高；这里只生成一次投票矩阵，用成员矩阵
+(信号数 × 子集数) 通过矩阵乘法得到所有子集的逐期票数，再按列批量计算
+净值与绩效指标。
+
+口径与 MultiSignalBacktestEngine.run_voting_backtest /
+run_voting_backtest_proportional 一致：T-2月信号在T月首个交易日调仓，
+首个有效信号决定初始持仓，基准为每月初再平衡的50%+50%组合。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Union
+
+from ..config.backtest_config import TARGET_COLUMNS
+from .vote_matrix import VoteMatrix
+from .nav_engine import (
+    TRADING_DAYS_PER_YEAR, batched_two_asset_nav, compute_rebalanced_benchmark_nav,
+    decision_trading_positions
+)
+
+
+VOTE_MODES = ('binary', 'proportional')
+
+METRIC_COLUMNS = [
+    'strategy_total_return', 'strategy_annual_return', 'strategy_volatility',
+    'strategy_sharpe_ratio', 'strategy_max_drawdown', 'excess_annual_return',
+    'information_ratio', 'tracking_error', 'relative_drawdown', 'monthly_win_rate'
+]
+
+
+def prefix_membership(n_signals: int, counts: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    前N个信号构成的嵌套子集成员矩阵
+
+    参数:
+        n_signals: 信号总数（按排序）
+        counts: 子集大小列表，默认 1..n_signals
+
+    返回:
+        bool矩阵，形状 (n_signals, len(counts))
+    """
+    if counts is None:
+        counts = range(1, n_signals + 1)
+    counts = np.asarray(list(counts), dtype=np.int64)
+    if np.any(counts < 0) or np.any(counts > n_signals):
+        raise ValueError(f"子集大小必须在 [0, {n_signals}] 内")
+    return np.arange(n_signals)[:, None] < counts[None, :]
+
+
+def membership_from_subsets(signal_ids: Sequence[str],
+                            subsets: Sequence[Sequence[Union[int, str]]]) -> np.ndarray:
+    """
+    由子集列表构建成员矩阵
+
+    参数:
+        signal_ids: 投票矩阵中的信号标识顺序
+        subsets: 每个子集为信号下标或 combination_id 的列表
+
+    返回:
+        bool矩阵，形状 (信号数, 子集数)
+    """
+    position = {signal_id: i for i, signal_id in enumerate(signal_ids)}
+    membership = np.zeros((len(signal_ids), len(subsets)), dtype=bool)
+    for j, subset in enumerate(subsets):
+        for member in subset:
+            if isinstance(member, (int, np.integer)):
+                if not 0 <= member < len(signal_ids):
+                    raise ValueError(f"信号下标越界: {member}")
+                membership[member, j] = True
+            elif member in position:
+                membership[position[member], j] = True
+            else:
+                raise ValueError(f"投票矩阵中不存在信号: {member}")
+    return membership
+
+
+def batch_performance_metrics(strategy_nav: np.ndarray,
+                              benchmark_nav: np.ndarray,
+                              dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    按列批量计算绩效指标（口径同 calculate_enhanced_performance_metrics）
+
+    参数:
+        strategy_nav: 策略净值矩阵，形状 (交易日数, 策略数)
+        benchmark_nav: 基准净值，形状 (交易日数,)
+        dates: 交易日索引
+
+    返回:
+        每行一个策略的指标表，列见 METRIC_COLUMNS
+    """
+    strategy_nav = np.asarray(strategy_nav, dtype=float)
+    if strategy_nav.ndim == 1:
+        strategy_nav = strategy_nav[:, None]
+    benchmark_nav = np.asarray(benchmark_nav, dtype=float)
+    if len(strategy_nav) < 3:
+        raise ValueError("净值序列过短，无法计算绩效指标")
+
+    strategy_growth = strategy_nav[1:] / strategy_nav[:-1]
+    benchmark_growth = benchmark_nav[1:] / benchmark_nav[:-1]
+    n_returns = len(strategy_growth)
+    annualizer = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    def _basic(growth: np.ndarray):
+        cumulative = np.cumprod(growth, axis=0)
+        total_return = cumulative[-1] - 1
+        annual_return = (1 + total_return) ** (TRADING_DAYS_PER_YEAR / n_returns) - 1
+        volatility = np.std(growth - 1, axis=0, ddof=1) * annualizer
+        sharpe = np.divide(annual_return, volatility,
+                           out=np.zeros_like(annual_return), where=volatility > 0)
+        max_drawdown = (cumulative / np.maximum.accumulate(cumulative, axis=0) - 1).min(axis=0)
+        return cumulative, total_return, annual_return, volatility, sharpe, max_drawdown
+
+    cum_s, total_s, annual_s, vol_s, sharpe_s, mdd_s = _basic(strategy_growth)
+    cum_b, _, annual_b, _, _, _ = _basic(benchmark_growth[:, None])
+
+    excess = strategy_growth - benchmark_growth[:, None]
+    excess_std = np.std(excess, axis=0, ddof=1)
+    information_ratio = np.divide(excess.mean(axis=0), excess_std,
+                                  out=np.zeros_like(excess_std), where=excess_std > 0) * annualizer
+
+    relative_nav = cum_s / cum_b
+    relative_drawdown = (relative_nav / np.maximum.accumulate(relative_nav, axis=0) - 1).min(axis=0)
+
+    # 月度复合收益：按月份边界对日增长率做乘法归约
+    return_dates = pd.DatetimeIndex(dates)[1:]
+    month_codes = return_dates.year * 12 + return_dates.month
+    month_starts = np.flatnonzero(np.r_[True, month_codes[1:] != month_codes[:-1]])
+    monthly_s = np.multiply.reduceat(strategy_growth, month_starts, axis=0)
+    monthly_b = np.multiply.reduceat(benchmark_growth, month_starts)
+    monthly_win_rate = (monthly_s - monthly_b[:, None] > 0).mean(axis=0)
+
+    return pd.DataFrame({
+        'strategy_total_return': total_s,
+        'strategy_annual_return': annual_s,
+        'strategy_volatility': vol_s,
+        'strategy_sharpe_ratio': sharpe_s,
+        'strategy_max_drawdown': mdd_s,
+        'excess_annual_return': annual_s - annual_b[0],
+        'information_ratio': information_ratio,
+        'tracking_error': excess_std * annualizer,
+        'relative_drawdown': relative_drawdown,
+        'monthly_win_rate': monthly_win_rate,
+    })
+
+
+class SubsetEvaluator:
+    """
+    投票信号子集批量评估器
+
+    参数:
+        price_data: 价格数据
+        strategy_type: 策略类型 ('value_growth' 或 'big_small')
+        start_date: 回测开始日期
+        end_date: 回测结束日期
+        nav_base_date: 净值基准日期（不是交易日时顺延）
+        signal_delay_months: 信号到调仓的延迟月数
+        batch_size: 每批评估的子集数，控制内存占用
+    """
+
+    def __init__(self, price_data: pd.DataFrame,
+                 strategy_type: str,
+                 start_date: str = '2013-01-01',
+                 end_date: str = '2025-05-27',
+                 nav_base_date: str = '2013-01-04',
+                 signal_delay_months: int = 2,
+                 batch_size: int = 1024):
+        if strategy_type not in TARGET_COLUMNS:
+            raise ValueError(f"不支持的策略类型: {strategy_type}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size必须为正整数，当前为: {batch_size}")
+
+        self.strategy_type = strategy_type
+        self.asset_cols = list(TARGET_COLUMNS[strategy_type])
+        self.signal_delay_months = signal_delay_months
+        self.batch_size = batch_size
+
+        missing_cols = [col for col in self.asset_cols if col not in price_data.columns]
+        if missing_cols:
+            raise ValueError(f"价格数据缺少必要的列: {missing_cols}")
+
+        self.price_data = price_data.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+        if self.price_data.empty:
+            raise ValueError("指定时间范围内没有价格数据")
+
+        base_position = self.price_data.index.searchsorted(pd.Timestamp(nav_base_date))
+        if base_position >= len(self.price_data):
+            base_position = 0
+        self.base_position = int(base_position)
+        self.nav_base_date = self.price_data.index[self.base_position]
+        self.nav_price_data = self.price_data.iloc[self.base_position:]
+        self.nav_dates = self.nav_price_data.index
+        self.prices = self.nav_price_data[self.asset_cols].to_numpy(dtype=float)
+
+        benchmark = compute_rebalanced_benchmark_nav(self.nav_price_data, self.asset_cols, self.nav_base_date)
+        self.benchmark_nav = benchmark['nav'].to_numpy()
+        self.benchmark_metrics = batch_performance_metrics(
+            self.benchmark_nav, self.benchmark_nav, self.nav_dates
+        ).iloc[0]
+
+    def _decision_schedule(self, decision_dates: pd.DatetimeIndex) -> Dict[str, np.ndarray]:
+        """
+        计算决策行到调仓位置的映射（与子集无关，所有子集共用）
+
+        返回:
+            {'initial_row': 决定初始持仓的决策行（无有效信号时为-1）,
+             'rebalance_rows': 触发调仓的决策行, 'rebalance_positions': 对应的净值位置}
+        """
+        positions = decision_trading_positions(decision_dates, self.price_data.index, self.signal_delay_months)
+        nav_positions = positions - self.base_position
+        valid_rows = np.flatnonzero((positions >= 0) & (nav_positions >= 0))
+        valid_rows = valid_rows[np.argsort(nav_positions[valid_rows], kind='stable')]
+
+        initial_row = int(valid_rows[0]) if len(valid_rows) else -1
+
+        # 基准日的信号只影响初始持仓；同一调仓日取最后一个信号
+        rows = valid_rows[nav_positions[valid_rows] >= 1]
+        row_positions = nav_positions[rows]
+        keep = np.append(row_positions[1:] != row_positions[:-1], True)[:len(rows)]
+        return {
+            'initial_row': initial_row,
+            'rebalance_rows': rows[keep],
+            'rebalance_positions': row_positions[keep],
+        }
+
+    @staticmethod
+    def vote_counts(vote_matrix: VoteMatrix, membership: np.ndarray):
+        """
+        计算每个子集在每个决策日的票数
+
+        参数:
+            vote_matrix: 投票矩阵
+            membership: 成员矩阵，形状 (信号数, 子集数)
+
+        返回:
+            (支持第一标的票数, 支持第二标的票数)，形状均为 (决策日数, 子集数)
+        """
+        membership = np.asarray(membership, dtype=np.float32)
+        if membership.ndim != 2 or membership.shape[0] != vote_matrix.n_signals:
+            raise ValueError(f"成员矩阵形状 {membership.shape} 与信号数 {vote_matrix.n_signals} 不匹配")
+        # float32矩阵乘法对整数票数是精确的，转为float64后再参与权重计算
+        votes_first = ((vote_matrix.votes == 1).astype(np.float32) @ membership).astype(np.float64)
+        votes_second = ((vote_matrix.votes == 0).astype(np.float32) @ membership).astype(np.float64)
+        return votes_first, votes_second
+
+    @staticmethod
+    def prefix_vote_counts(vote_matrix: VoteMatrix, counts: Optional[Sequence[int]] = None):
+        """
+        计算前k个信号（嵌套前缀子集）的票数
+
+        沿信号方向做累加：前k+1个信号的票数 = 前k个信号的票数 + 第k+1个信号的投票，
+        因此所有前缀子集只需一次扫描。
+
+        参数:
+            vote_matrix: 按排序排列的投票矩阵
+            counts: 前缀大小列表，默认 1..信号数
+
+        返回:
+            (支持第一标的票数, 支持第二标的票数)，形状均为 (决策日数, len(counts))
+        """
+        n_signals = vote_matrix.n_signals
+        if counts is None:
+            counts = range(1, n_signals + 1)
+        counts = np.asarray(list(counts), dtype=np.int64)
+        if np.any(counts < 0) or np.any(counts > n_signals):
+            raise ValueError(f"前缀大小必须在 [0, {n_signals}] 内")
+
+        n_dates = len(vote_matrix.dates)
+        running_first = np.zeros((n_dates, n_signals + 1))
+        running_second = np.zeros((n_dates, n_signals + 1))
+        np.cumsum(vote_matrix.votes == 1, axis=1, out=running_first[:, 1:])
+        np.cumsum(vote_matrix.votes == 0, axis=1, out=running_second[:, 1:])
+        return running_first[:, counts], running_second[:, counts]
+
+    @staticmethod
+    def decision_weights(votes_first: np.ndarray, votes_second: np.ndarray,
+                         mode: str = 'binary') -> np.ndarray:
+        """
+        由票数得到第一标的的目标权重
+
+        参数:
+            votes_first / votes_second: 票数矩阵
+            mode: 'binary' 多数票全仓（平票持有第二标的），'proportional' 按票数比例
+
+        返回:
+            第一标的权重矩阵
+        """
+        if mode == 'binary':
+            return (votes_first > votes_second).astype(float)
+        if mode == 'proportional':
+            total = votes_first + votes_second
+            return np.divide(votes_first, total, out=np.full(total.shape, 0.5), where=total > 0)
+        raise ValueError(f"不支持的投票模式: {mode}，可选: {VOTE_MODES}")
+
+    def evaluate_weights(self, decision_dates: pd.DatetimeIndex,
+                         first_weights: np.ndarray,
+                         default_first_weight: float = 0.0) -> pd.DataFrame:
+        """
+        对按决策日给出的第一标的权重批量回测
+
+        参数:
+            decision_dates: 决策日期，形状 (决策日数,)
+            first_weights: 第一标的权重，形状 (决策日数, 策略数)
+            default_first_weight: 无有效信号时的初始权重
+
+        返回:
+            每行一个策略的绩效指标表
+        """
+        first_weights = np.asarray(first_weights, dtype=float)
+        if first_weights.ndim == 1:
+            first_weights = first_weights[:, None]
+        schedule = self._decision_schedule(pd.DatetimeIndex(decision_dates))
+
+        results = []
+        for start in range(0, first_weights.shape[1], self.batch_size):
+            batch = first_weights[:, start:start + self.batch_size]
+            if schedule['initial_row'] >= 0:
+                initial = batch[schedule['initial_row']]
+            else:
+                initial = np.full(batch.shape[1], default_first_weight)
+            nav = batched_two_asset_nav(self.prices, schedule['rebalance_positions'],
+                                        batch[schedule['rebalance_rows']], initial)
+            results.append(batch_performance_metrics(nav, self.benchmark_nav, self.nav_dates))
+        if not results:
+            return pd.DataFrame(columns=METRIC_COLUMNS)
+        return pd.concat(results, ignore_index=True)
+
+    def evaluate_prefixes(self, vote_matrix: VoteMatrix,
+                          counts: Optional[Sequence[int]] = None,
+                          mode: str = 'binary') -> pd.DataFrame:
+        """
+        一次性评估前1..N个信号构成的全部嵌套子集
+
+        参数:
+            vote_matrix: 按信号排序排列的投票矩阵
+            counts: 需要评估的前缀大小，默认 1..信号数
+            mode: 'binary' 或 'proportional'
+
+        返回:
+            每行一个前缀子集：subset_id, signal_count, signals 及绩效指标
+        """
+        if counts is None:
+            counts = range(1, vote_matrix.n_signals + 1)
+        counts = list(counts)
+
+        print(f"嵌套前缀评估: {len(counts)} 个信号数量 ({self.strategy_type}, {mode})")
+        votes_first, votes_second = self.prefix_vote_counts(vote_matrix, counts)
+        weights = self.decision_weights(votes_first, votes_second, mode)
+        default_weight = 0.5 if mode == 'proportional' else 0.0
+        metrics = self.evaluate_weights(vote_matrix.dates, weights, default_weight)
+
+        metrics.insert(0, 'subset_id', np.arange(len(counts)))
+        metrics.insert(1, 'signal_count', counts)
+        metrics.insert(2, 'signals', [f"top_{n}" for n in counts])
+        return metrics
+
+    def evaluate(self, vote_matrix: VoteMatrix,
+                 membership: np.ndarray,
+                 mode: str = 'binary',
+                 subset_labels: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        批量评估信号子集
+
+        参数:
+            vote_matrix: 全部候选信号的投票矩阵
+            membership: 成员矩阵，形状 (信号数, 子集数)
+            mode: 'binary' 或 'proportional'
+            subset_labels: 子集标签，默认为以逗号连接的信号下标
+
+        返回:
+            每行一个子集：subset_id, signal_count, signals 及绩效指标
+        """
+        if mode not in VOTE_MODES:
+            raise ValueError(f"不支持的投票模式: {mode}，可选: {VOTE_MODES}")
+        membership = np.asarray(membership, dtype=bool)
+        if membership.ndim != 2 or membership.shape[0] != vote_matrix.n_signals:
+            raise ValueError(f"成员矩阵形状 {membership.shape} 与信号数 {vote_matrix.n_signals} 不匹配")
+
+        if membership.shape[1] == 0:
+            return pd.DataFrame(columns=['subset_id', 'signal_count', 'signals'] + METRIC_COLUMNS)
+
+        print(f"批量评估 {membership.shape[1]} 个信号子集 ({self.strategy_type}, {mode})")
+
+        results = []
+        for start in range(0, membership.shape[1], self.batch_size):
+            batch_membership = membership[:, start:start + self.batch_size]
+            votes_first, votes_second = self.vote_counts(vote_matrix, batch_membership)
+            weights = self.decision_weights(votes_first, votes_second, mode)
+            default_weight = 0.5 if mode == 'proportional' else 0.0
+            results.append(self.evaluate_weights(vote_matrix.dates, weights, default_weight))
+        metrics = pd.concat(results, ignore_index=True)
+
+        if subset_labels is None:
+            subset_labels = [','.join(map(str, np.flatnonzero(column))) for column in membership.T]
+        metrics.insert(0, 'subset_id', np.arange(membership.shape[1]))
+        metrics.insert(1, 'signal_count', membership.sum(axis=0))
+        metrics.insert(2, 'signals', list(subset_labels))
+        return metrics
@@ -0,0 +1,230 @@
+"""
+投票信号子集搜索
+Exhaustive Gray-code and beam search over voting-signal subsets
+
+1. 穷举搜索：按格雷码顺序枚举全部非空子集，相邻子集只相差一个信号，
+   票数只需加上或减去该信号的投票（对按列排列的增量做累加），
+   再交给 SubsetEvaluator 按列批量回测。适用于十几个候选信号（约8千个子集）。
+2. 束搜索：候选信号较多（如从稳定性分析结果中取前50个）时，逐层在当前
+   最优的若干子集上各添加一个信号，只保留目标指标最高的 beam_width 个子集继续扩展。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional
+
+from .vote_matrix import VoteMatrix
+from .subset_evaluator import SubsetEvaluator, VOTE_MODES, METRIC_COLUMNS
+
+
+MAX_EXHAUSTIVE_SIGNALS = 20
+
+
+def gray_code_sequence(n_signals: int) -> Dict[str, np.ndarray]:
+    """
+    生成 1..2^n-1 的格雷码序列
+
+    参数:
+        n_signals: 信号数
+
+    返回:
+        {'masks': 各步子集的位掩码, 'flip_bits': 该步变化的信号下标,
+         'signs': +1 表示加入该信号，-1 表示移除}
+    """
+    steps = np.arange(1, 2 ** n_signals, dtype=np.int64)
+    masks = steps ^ (steps >> 1)
+    flip_bits = np.log2(steps & -steps).astype(np.int64)
+    signs = np.where((masks >> flip_bits) & 1, 1, -1).astype(np.int8)
+    return {'masks': masks, 'flip_bits': flip_bits, 'signs': signs}
+
+
+def mask_to_indices(mask: int) -> List[int]:
+    """位掩码 -> 信号下标列表"""
+    return [bit for bit in range(int(mask).bit_length()) if (int(mask) >> bit) & 1]
+
+
+def candidate_configs_from_stability(stability_results: pd.DataFrame,
+                                     top_n: int = 50,
+                                     score_column: str = 'overall_stability_score') -> List[Dict]:
+    """
+    从排名稳定性分析结果中选取候选投票信号
+
+    参数:
+        stability_results: calculate_ranking_stability 的输出
+        top_n: 候选数量
+        score_column: 排序依据列
+
+    返回:
+        可直接用于 generate_vote_matrix 的信号配置列表
+    """
+    required_cols = ['combination_id', 'indicator', 'signal_type', 'parameter_n', 'assumed_direction']
+    missing_cols = [col for col in required_cols + [score_column] if col not in stability_results.columns]
+    if missing_cols:
+        raise ValueError(f"稳定性结果缺少必要的列: {missing_cols}")
+
+    top_results = stability_results.sort_values(score_column, ascending=False).head(top_n)
+    return [
+        {
+            'indicator': str(row['indicator']),
+            'signal_type': str(row['signal_type']),
+            'parameter_n': int(row['parameter_n']),
+            'assumed_direction': int(row['assumed_direction']),
+            'combination_id': str(row['combination_id']),
+        }
+        for _, row in top_results.iterrows()
+    ]
+
+
+class SignalSubsetSearch:
+    """
+    信号子集搜索器
+
+    参数:
+        evaluator: 已绑定价格数据与策略类型的子集评估器
+        metric: 排序目标指标，默认信息比率
+    """
+
+    def __init__(self, evaluator: SubsetEvaluator, metric: str = 'information_ratio'):
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"不支持的排序指标: {metric}，可选: {METRIC_COLUMNS}")
+        self.evaluator = evaluator
+        self.metric = metric
+
+    def _rank(self, results: pd.DataFrame, vote_matrix: VoteMatrix) -> pd.DataFrame:
+        """按目标指标降序排名，并附上信号标识"""
+        ranked = results.sort_values(self.metric, ascending=False, kind='stable').reset_index(drop=True)
+        ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+        signal_ids = np.asarray(vote_matrix.signal_ids, dtype=object)
+        ranked['signal_ids'] = [
+            ','.join(signal_ids[[int(i) for i in signals.split(',')]]) if signals else ''
+            for signals in ranked['signals']
+        ]
+        return ranked
+
+    def exhaustive(self, vote_matrix: VoteMatrix,
+                   mode: str = 'binary',
+                   min_size: int = 1,
+                   max_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        按格雷码顺序穷举全部子集
+
+        参数:
+            vote_matrix: 候选信号投票矩阵
+            mode: 'binary' 或 'proportional'
+            min_size / max_size: 保留的子集大小范围
+
+        返回:
+            按目标指标排名的子集绩效表
+        """
+        if mode not in VOTE_MODES:
+            raise ValueError(f"不支持的投票模式: {mode}，可选: {VOTE_MODES}")
+        n_signals = vote_matrix.n_signals
+        if n_signals > MAX_EXHAUSTIVE_SIGNALS:
+            raise ValueError(f"候选信号数 {n_signals} 超过穷举上限 {MAX_EXHAUSTIVE_SIGNALS}，请使用束搜索")
+        if n_signals == 0:
+            return pd.DataFrame()
+
+        sequence = gray_code_sequence(n_signals)
+        total_subsets = len(sequence['masks'])
+        print(f"格雷码穷举: {n_signals} 个信号, {total_subsets} 个子集 ({mode})")
+
+        first_votes = (vote_matrix.votes == 1).astype(np.float64)
+        second_votes = (vote_matrix.votes == 0).astype(np.float64)
+        carry_first = np.zeros(len(vote_matrix.dates))
+        carry_second = np.zeros(len(vote_matrix.dates))
+        default_weight = 0.5 if mode == 'proportional' else 0.0
+
+        results = []
+        batch_size = self.evaluator.batch_size
+        for start in range(0, total_subsets, batch_size):
+            stop = min(start + batch_size, total_subsets)
+            bits = sequence['flip_bits'][start:stop]
+            signs = sequence['signs'][start:stop]
+
+            # 相邻子集只相差一个信号：票数 = 上一子集票数 ± 该信号的投票
+            votes_first = carry_first[:, None] + np.cumsum(first_votes[:, bits] * signs, axis=1)
+            votes_second = carry_second[:, None] + np.cumsum(second_votes[:, bits] * signs, axis=1)
+            carry_first, carry_second = votes_first[:, -1], votes_second[:, -1]
+
+            weights = self.evaluator.decision_weights(votes_first, votes_second, mode)
+            batch_results = self.evaluator.evaluate_weights(vote_matrix.dates, weights, default_weight)
+            batch_results.insert(0, 'subset_mask', sequence['masks'][start:stop])
+            results.append(batch_results)
+
+        results = pd.concat(results, ignore_index=True)
+        masks = results['subset_mask'].to_numpy()
+        sizes = np.array([bin(int(mask)).count('1') for mask in masks])
+        results.insert(1, 'signal_count', sizes)
+        results.insert(2, 'signals', [','.join(map(str, mask_to_indices(mask))) for mask in masks])
+
+        upper = max_size or n_signals
+        results = results[(sizes >= min_size) & (sizes <= upper)]
+        return self._rank(results, vote_matrix)
+
+    def beam(self, vote_matrix: VoteMatrix,
+             mode: str = 'binary',
+             beam_width: int = 20,
+             max_size: Optional[int] = None,
+             patience: int = 2) -> pd.DataFrame:
+        """
+        束搜索：逐层向当前最优子集添加一个信号
+
+        参数:
+            vote_matrix: 候选信号投票矩阵
+            mode: 'binary' 或 'proportional'
+            beam_width: 每层保留的子集数
+            max_size: 最大子集大小，默认不超过候选数
+            patience: 连续多少层最优指标未提升后提前停止
+
+        返回:
+            全部已评估子集按目标指标排名的绩效表
+        """
+        if beam_width < 1:
+            raise ValueError(f"beam_width必须为正整数，当前为: {beam_width}")
+        n_signals = vote_matrix.n_signals
+        if n_signals == 0:
+            return pd.DataFrame()
+        max_size = min(max_size or n_signals, n_signals)
+
+        print(f"束搜索: {n_signals} 个候选信号, 束宽 {beam_width}, 最大子集 {max_size} ({mode})")
+
+        beam = np.zeros((n_signals, 1), dtype=bool)
+        seen = set()
+        all_results = []
+        best_value = -np.inf
+        stale_levels = 0
+
+        for size in range(1, max_size + 1):
+            # 当前束中每个子集各添加一个未包含的信号，去重后批量评估
+            candidates = []
+            for column in beam.T:
+                for signal in np.flatnonzero(~column):
+                    candidate = column.copy()
+                    candidate[signal] = True
+                    key = np.packbits(candidate).tobytes()
+                    if key not in seen:
+                        seen.add(key)
+                        candidates.append(candidate)
+            if not candidates:
+                break
+
+            membership = np.column_stack(candidates)
+            level_results = self.evaluator.evaluate(vote_matrix, membership, mode)
+            all_results.append(level_results)
+
+            order = np.argsort(-level_results[self.metric].to_numpy(), kind='stable')[:beam_width]
+            beam = membership[:, order]
+
+            level_best = level_results[self.metric].max()
+            print(f"  子集大小 {size}: 评估 {membership.shape[1]} 个候选, 最优{self.metric}={level_best:.4f}")
+            if level_best > best_value:
+                best_value = level_best
+                stale_levels = 0
+            else:
+                stale_levels += 1
+                if stale_levels >= patience:
+                    print(f"  连续 {patience} 层未提升，提前停止")
+                    break
+
+        results = pd.concat(all_results, ignore_index=True).drop(columns=['subset_id'])
+        return self._rank(results, vote_matrix)
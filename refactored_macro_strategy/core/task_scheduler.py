@@ -0,0 +1,181 @@
+"""
+滚动窗口任务调度器
+Longest-processing-time (LPT) scheduler for rolling-window backtest tasks
+
+按时间顺序提交窗口任务时，各窗口的指标覆盖度不同导致耗时差异较大，
+最后几个慢任务常常让大部分进程空闲。调度器先按数据规模、有效指标数和
+参数网格大小估算每个任务的成本，将任务拆分为 (窗口 × 信号类型) 粒度，
+再按估算成本从大到小提交，并统计每个工作单元的利用率。
+"""
+
+import os
+import time
+import threading
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.executor import TaskExecutor
+
+
+@dataclass
+class ScheduledTask:
+    """单个调度任务"""
+    task_id: int
+    window_id: int
+    signal_type: str
+    estimated_cost: float
+    args: Tuple = field(default_factory=tuple, repr=False)
+
+
+def estimate_window_task_cost(window_indicator_data: pd.DataFrame,
+                              window_price_data: pd.DataFrame,
+                              indicators: List[str],
+                              parameter_count: int,
+                              direction_count: int,
+                              target_count: int = 1) -> float:
+    """
+    估算单个 (窗口 × 信号类型) 任务的相对成本
+
+    每个组合的回测成本与窗口内交易日数和回测标的数成正比，
+    组合数 = 有效指标数 × 参数个数 × 方向数；信号生成成本与有效观测点数成正比。
+
+    参数:
+        window_indicator_data: 窗口内的指标数据
+        window_price_data: 窗口内的价格数据
+        indicators: 待回测的指标列表
+        parameter_count: 该信号类型的参数个数
+        direction_count: 测试方向数 (1或2)
+        target_count: 共享信号的回测标的数
+
+    返回:
+        相对成本（无量纲）
+    """
+    columns = [col for col in indicators if col in window_indicator_data.columns]
+    if not columns:
+        return 0.0
+
+    observations = window_indicator_data[columns].notna().sum()
+    active_indicators = int((observations > 0).sum())
+    combinations = active_indicators * parameter_count * direction_count
+    signal_cost = float(observations.sum()) * parameter_count
+    backtest_cost = combinations * (len(window_price_data) * target_count + len(window_indicator_data))
+    return float(backtest_cost + signal_cost)
+
+
+def _timed_call(func: Callable, args: Tuple) -> Tuple[Any, str, float, float]:
+    """在工作单元中执行任务并记录工作单元标识与起止时间"""
+    start = time.time()
+    result = func(*args)
+    worker = f"{os.getpid()}-{threading.get_ident()}"
+    return result, worker, start, time.time()
+
+
+class LPTScheduler:
+    """
+    最长处理时间优先调度器
+
+    任务按估算成本降序提交到执行器，先跑大任务、小任务填补尾部空闲，
+    运行结束后通过 utilization_report 查看各工作单元的忙闲情况。
+    """
+
+    def __init__(self, executor: Optional[TaskExecutor] = None):
+        self.executor = executor or TaskExecutor()
+        self.task_log: List[Dict] = []
+        self.wall_time: float = 0.0
+
+    @staticmethod
+    def order_tasks(tasks: List[ScheduledTask]) -> List[ScheduledTask]:
+        """按估算成本降序排列，成本相同时保持原有顺序"""
+        return sorted(tasks, key=lambda task: -task.estimated_cost)
+
+    def run(self, func: Callable, tasks: List[ScheduledTask],
+            on_result: Optional[Callable[[ScheduledTask, Any], Any]] = None) -> Dict[int, Any]:
+        """
+        以LPT顺序并行执行任务
+
+        参数:
+            func: 任务函数（进程后端下需可pickle），以 task.args 解包调用
+            tasks: 调度任务列表
+            on_result: 每个任务完成时在主进程中调用 on_result(task, 返回值)，
+                       返回值中保存的是它的返回值（可用于即时落盘、只保留摘要）
+
+        返回:
+            {task_id: 任务返回值}，任务异常时不包含该task_id
+        """
+        self.task_log = []
+        results = {}
+        if not tasks:
+            return results
+
+        ordered = self.order_tasks(tasks)
+
+        run_start = time.time()
+        task_args = [(func, task.args) for task in ordered]
+        for index, output, error in self.executor.imap_unordered(_timed_call, task_args):
+            task = ordered[index]
+            if error is not None:
+                print(f"任务 {task.task_id} (窗口 {task.window_id}, {task.signal_type}) 执行异常: {error}")
+                continue
+            result, worker, start, end = output
+            results[task.task_id] = on_result(task, result) if on_result is not None else result
+            self.task_log.append({
+                'task_id': task.task_id,
+                'window_id': task.window_id,
+                'signal_type': task.signal_type,
+                'estimated_cost': task.estimated_cost,
+                'worker': worker,
+                'start_time': start,
+                'end_time': end,
+                'duration': end - start,
+            })
+        self.wall_time = time.time() - run_start
+        return results
+
+    def utilization_report(self) -> pd.DataFrame:
+        """
+        生成每个工作单元（进程或线程）的利用率统计
+
+        返回:
+            每行一个工作单元：任务数、估算成本合计、忙碌时间、
+            空闲时间和利用率（忙碌时间 / 总墙钟时间）
+        """
+        if not self.task_log:
+            return pd.DataFrame()
+
+        log_df = pd.DataFrame(self.task_log)
+        run_start = log_df['start_time'].min()
+        report = log_df.groupby('worker').agg(
+            task_count=('task_id', 'count'),
+            estimated_cost=('estimated_cost', 'sum'),
+            busy_seconds=('duration', 'sum'),
+            last_finish=('end_time', 'max'),
+        )
+        wall_time = max(self.wall_time, log_df['end_time'].max() - run_start, 1e-9)
+        report['last_finish'] = report['last_finish'] - run_start
+        report['idle_seconds'] = wall_time - report['busy_seconds']
+        report['utilization'] = report['busy_seconds'] / wall_time
+        return report.sort_values('busy_seconds', ascending=False)
+
+    def cost_model_fit(self) -> float:
+        """估算成本与实际耗时的相关系数，用于检验成本模型"""
+        if len(self.task_log) < 2:
+            return float('nan')
+        log_df = pd.DataFrame(self.task_log)
+        return float(np.corrcoef(log_df['estimated_cost'], log_df['duration'])[0, 1])
+
+    def print_utilization_summary(self) -> None:
+        """打印调度利用率摘要"""
+        report = self.utilization_report()
+        if report.empty:
+            print("无调度统计信息")
+            return
+
+        print(f"\n调度统计: {len(self.task_log)} 个任务, {len(report)} 个工作单元, "
+              f"总耗时 {self.wall_time:.1f}s")
+        print(f"  平均利用率: {report['utilization'].mean():.1%}, "
+              f"最低利用率: {report['utilization'].min():.1%}")
+        print(f"  最晚完成的工作单元结束于 {report['last_finish'].max():.1f}s, "
+              f"最早空闲的工作单元结束于 {report['last_finish'].min():.1f}s")
+        print(f"  成本估算与实际耗时相关系数: {self.cost_model_fit():.3f}")
@@ -0,0 +1,134 @@
+"""
+投票矩阵
+Wide int8 vote matrix (dates × signals)
+
+每个信号在每个日期的投票存放在一个 int8 矩阵中：
+1 = 支持第一标的（价值/大盘），0 = 支持第二标的（成长/小盘），-1 = 未投票。
+投票统计只需按行求和；长表格式仅在导出或逐条查看时按需生成。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Sequence
+
+
+NO_VOTE = -1
+
+
+class VoteMatrix:
+    """
+    宽格式投票矩阵
+
+    参数:
+        votes: int8 投票矩阵，形状 (日期数, 信号数)
+        dates: 日期索引
+        signal_ids: 各信号的 combination_id
+        indicators: 各信号的指标名
+        signal_types: 各信号的信号类型
+    """
+
+    def __init__(self, votes: np.ndarray,
+                 dates: pd.DatetimeIndex,
+                 signal_ids: Sequence[str],
+                 indicators: Optional[Sequence[str]] = None,
+                 signal_types: Optional[Sequence[str]] = None):
+        votes = np.asarray(votes, dtype=np.int8).reshape(len(dates), len(signal_ids))
+        self.votes = votes
+        self.dates = pd.DatetimeIndex(dates)
+        self.signal_ids = list(signal_ids)
+        self.indicators = list(indicators) if indicators is not None else [''] * len(self.signal_ids)
+        self.signal_types = list(signal_types) if signal_types is not None else [''] * len(self.signal_ids)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        return f"VoteMatrix({len(self.dates)} dates × {self.n_signals} signals)"
+
+    @property
+    def n_signals(self) -> int:
+        return len(self.signal_ids)
+
+    @property
+    def empty(self) -> bool:
+        """与DataFrame.empty语义一致：无日期或无信号"""
+        return self.votes.size == 0
+
+    @classmethod
+    def from_long(cls, voting_signals: pd.DataFrame) -> 'VoteMatrix':
+        """
+        由长表 (date, signal_id, vote[, indicator, signal_type]) 构建投票矩阵
+
+        参数:
+            voting_signals: 长格式投票数据
+
+        返回:
+            VoteMatrix，长表中缺失的 (日期, 信号) 记为未投票
+        """
+        missing_cols = [col for col in ['date', 'signal_id', 'vote'] if col not in voting_signals.columns]
+        if missing_cols:
+            raise ValueError(f"投票数据缺少必要的列: {missing_cols}")
+
+        date_codes, dates = pd.factorize(voting_signals['date'], sort=True)
+        signal_codes, signal_ids = pd.factorize(voting_signals['signal_id'].astype(str))
+
+        votes = np.full((len(dates), len(signal_ids)), NO_VOTE, dtype=np.int8)
+        vote_values = voting_signals['vote'].to_numpy()
+        has_vote = pd.notna(vote_values)
+        votes[date_codes[has_vote], signal_codes[has_vote]] = vote_values[has_vote].astype(np.int8)
+
+        _, first_positions = np.unique(signal_codes, return_index=True)
+        first_rows = voting_signals.iloc[first_positions]
+        indicators = first_rows['indicator'].astype(str).tolist() if 'indicator' in voting_signals else None
+        signal_types = first_rows['signal_type'].astype(str).tolist() if 'signal_type' in voting_signals else None
+        return cls(votes, pd.DatetimeIndex(dates), list(signal_ids), indicators, signal_types)
+
+    def to_frame(self) -> pd.DataFrame:
+        """返回宽格式DataFrame（行=日期，列=signal_id）"""
+        return pd.DataFrame(self.votes, index=self.dates.rename('date'), columns=self.signal_ids)
+
+    def to_long(self) -> pd.DataFrame:
+        """
+        生成长格式投票表 (date, signal_id, vote, indicator, signal_type)
+
+        按信号分块、块内按日期排列；未投票的 (日期, 信号) 不输出。
+        """
+        n_dates, n_signals = self.votes.shape
+        signal_codes = np.repeat(np.arange(n_signals), n_dates)
+        date_values = np.tile(self.dates.to_numpy(), n_signals)
+        vote_values = self.votes.T.reshape(-1)
+
+        def _categorical(values: List[str]) -> pd.Categorical:
+            categories, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+            return pd.Categorical.from_codes(codes[signal_codes], categories=categories)
+
+        long_df = pd.DataFrame({
+            'date': date_values,
+            'signal_id': _categorical(self.signal_ids),
+            'vote': vote_values.astype(np.int64),
+            'indicator': _categorical(self.indicators),
+            'signal_type': _categorical(self.signal_types)
+        })
+        if (vote_values == NO_VOTE).any():
+            long_df = long_df[vote_values != NO_VOTE].reset_index(drop=True)
+        return long_df
+
+    def tally(self) -> pd.DataFrame:
+        """
+        按日期统计投票
+
+        返回:
+            以date为索引的DataFrame：total_score, total_signals,
+            votes_for_first, votes_for_second（仅含至少有一票的日期）
+        """
+        votes_for_first = (self.votes == 1).sum(axis=1, dtype=np.int64)
+        votes_for_second = (self.votes == 0).sum(axis=1, dtype=np.int64)
+        total_signals = (self.votes != NO_VOTE).sum(axis=1, dtype=np.int64)
+        tally_df = pd.DataFrame({
+            'total_score': votes_for_first,
+            'total_signals': total_signals,
+            'votes_for_first': votes_for_first,
+            'votes_for_second': votes_for_second,
+        }, index=self.dates.rename('date'))
+        # 与按日期分组的口径一致：没有任何投票的日期不参与统计
+        return tally_df[total_signals > 0]
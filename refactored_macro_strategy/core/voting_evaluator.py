@@ -0,0 +1,280 @@
+"""
+投票配置即时评估
+What-if evaluator for custom voting configurations
+
+交互式调整投票配置时，每次都走 generate_voting_signals → calculate_voting_decisions
+→ run_voting_backtest 会重复生成信号、重复计算基准并逐步打印。这里一次性预计算：
+- 全部候选信号列：(信号类型, 参数) -> 所有指标的信号矩阵
+- 交易日历：决策日 -> 调仓位置（各配置共用，见 SubsetEvaluator）
+- 基准净值与基准收益
+
+之后 evaluate 只需从缓存的数组中取出配置涉及的信号列、按行计票并计算一条净值，
+口径与 run_voting_backtest（binary）/ run_voting_backtest_proportional（drift净值）一致。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from ..config.signal_config import SignalConfig
+from ..config.backtest_config import TARGET_COLUMNS
+from .signal_engine import SignalEngine
+from .nav_engine import TRADING_DAYS_PER_YEAR, piecewise_holdings_nav
+from .subset_evaluator import SubsetEvaluator, VOTE_MODES
+from .multi_signal_voting import SignalConfiguration, MultiSignalBacktestEngine
+
+
+class VotingEvaluator:
+    """
+    投票配置即时评估器
+
+    参数:
+        indicator_data: 宏观指标数据
+        price_data: 价格数据
+        signal_config: 信号配置（precompute 时按其 TEST_PARAMS 预计算候选信号）
+        start_date: 回测开始日期
+        end_date: 回测结束日期
+        signal_start_date: 信号计算开始日期
+        precompute: 是否在初始化时预计算全部候选信号列，否则首次用到时计算
+    """
+
+    def __init__(self, indicator_data: pd.DataFrame,
+                 price_data: pd.DataFrame,
+                 signal_config: Optional[SignalConfig] = None,
+                 start_date: str = '2013-01-01',
+                 end_date: str = '2025-05-27',
+                 signal_start_date: str = '2012-11-01',
+                 precompute: bool = True):
+        self.signal_config = signal_config or SignalConfig()
+        self.signal_engine = SignalEngine(self.signal_config)
+        self.signal_configuration = SignalConfiguration(self.signal_config)
+        self.backtest_engine = MultiSignalBacktestEngine()
+        self.price_data = price_data
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.indicator_data = indicator_data.loc[indicator_data.index >= pd.Timestamp(signal_start_date)]
+        if self.indicator_data.empty:
+            raise ValueError(f"{signal_start_date} 之后没有指标数据")
+        self.decision_dates = pd.DatetimeIndex(self.indicator_data.index)
+
+        self._signal_frames: Dict[Tuple[str, int], np.ndarray] = {}
+        self._columns = {indicator: i for i, indicator in enumerate(self.indicator_data.columns)}
+        self._strategies: Dict[str, Dict] = {}
+
+        if precompute:
+            for signal_type in self.signal_config.SIGNAL_TYPES:
+                for n in self.signal_config.TEST_PARAMS.get(signal_type, []):
+                    self._signal_frame(signal_type, n)
+            for strategy_type in TARGET_COLUMNS:
+                self._strategy(strategy_type)
+
+    def __repr__(self) -> str:
+        return (f"VotingEvaluator({len(self._columns)} 个指标, "
+                f"{len(self._signal_frames)} 组候选信号, {len(self.decision_dates)} 个决策日)")
+
+    def _signal_frame(self, signal_type: str, parameter_n: int) -> np.ndarray:
+        """(信号类型, 参数) 在全部指标上的信号是否为True，形状 (决策日数, 指标数)"""
+        key = (signal_type, int(parameter_n))
+        frame = self._signal_frames.get(key)
+        if frame is None:
+            signal = self.signal_engine.generate_signal_frame(self.indicator_data, signal_type, int(parameter_n))
+            # NaN视为False（无信号），与 generate_vote_matrix 一致
+            frame = signal.to_numpy() == 1.0
+            self._signal_frames[key] = frame
+        return frame
+
+    def _strategy(self, strategy_type: str) -> Dict:
+        """策略类型对应的交易日历、调仓安排与基准（首次用到时计算）"""
+        cached = self._strategies.get(strategy_type)
+        if cached is not None:
+            return cached
+
+        subset_evaluator = SubsetEvaluator(self.price_data, strategy_type, self.start_date, self.end_date)
+        nav_dates = subset_evaluator.nav_dates
+        benchmark_nav = pd.Series(subset_evaluator.benchmark_nav, index=nav_dates)
+        benchmark_returns = benchmark_nav.pct_change().dropna()
+        cached = {
+            'evaluator': subset_evaluator,
+            'schedule': subset_evaluator._decision_schedule(self.decision_dates),
+            'benchmark_nav': benchmark_nav,
+            'benchmark_returns': benchmark_returns,
+            'benchmark_metrics': _basic_metrics(benchmark_returns.to_numpy()),
+        }
+        self._strategies[strategy_type] = cached
+        return cached
+
+    def vote_columns(self, signal_configs: List[Dict]) -> Tuple[np.ndarray, List[Dict], List[Dict]]:
+        """
+        从缓存的信号矩阵中取出配置涉及的投票列
+
+        参数:
+            signal_configs: 信号配置列表（indicator, signal_type, parameter_n, assumed_direction）
+
+        返回:
+            (int8投票矩阵 形状 (决策日数, 有效信号数), 有效信号配置, 跳过的信号配置及原因)
+        """
+        columns, used, skipped = [], [], []
+        for signal_config in signal_configs:
+            indicator = signal_config['indicator']
+            if indicator not in self._columns:
+                skipped.append({**signal_config, 'reason': f'指标 {indicator} 不存在于数据中'})
+                continue
+            try:
+                frame = self._signal_frame(signal_config['signal_type'], signal_config['parameter_n'])
+            except Exception as e:
+                skipped.append({**signal_config, 'reason': f'信号生成失败 - {e}'})
+                continue
+            signal_true = frame[:, self._columns[indicator]]
+            # 投票: 1=价值/大盘，0=成长/小盘；反向时True支持第二标的
+            columns.append(signal_true if int(signal_config['assumed_direction']) == 1 else ~signal_true)
+            used.append(signal_config)
+        votes = (np.column_stack(columns) if columns
+                 else np.empty((len(self.decision_dates), 0), dtype=bool)).astype(np.int8)
+        return votes, used, skipped
+
+    def evaluate(self, signal_configs: List[Dict],
+                 strategy_type: str,
+                 mode: str = 'binary',
+                 include_yearly: bool = True) -> Dict:
+        """
+        评估一个投票配置
+
+        参数:
+            signal_configs: 信号配置列表（如 parse_signal_config_text 解析结果中的一个策略）
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            mode: 'binary' 多数票全仓，'proportional' 按票数比例分配
+            include_yearly: 是否计算年度绩效表（占评估耗时的大部分，批量筛选配置时可关闭，
+                            此时 yearly_analysis 为空表）
+
+        返回:
+            {'strategy_type', 'mode', 'signal_count', 'skipped_signals', 'enhanced_metrics',
+             'yearly_analysis', 'strategy_nav', 'benchmark_nav', 'strategy_returns', 'benchmark_returns'}，
+            enhanced_metrics 与 run_voting_backtest 的同名结果结构相同
+        """
+        if strategy_type not in TARGET_COLUMNS:
+            raise ValueError(f"不支持的策略类型: {strategy_type}")
+        if mode not in VOTE_MODES:
+            raise ValueError(f"不支持的投票模式: {mode}，可选: {VOTE_MODES}")
+
+        votes, used, skipped = self.vote_columns(signal_configs)
+        if not used:
+            raise ValueError(f"{strategy_type} 配置中没有可用的信号")
+
+        strategy = self._strategy(strategy_type)
+        schedule = strategy['schedule']
+        target_weights = _target_weights(votes, mode)
+        if schedule['initial_row'] >= 0:
+            initial = target_weights[schedule['initial_row']]
+        else:
+            initial = np.array([0.5, 0.5]) if mode == 'proportional' else np.array([0.0, 1.0])
+
+        subset_evaluator = strategy['evaluator']
+        nav_values = piecewise_holdings_nav(subset_evaluator.prices, schedule['rebalance_positions'],
+                                            target_weights[schedule['rebalance_rows']], initial)['nav']
+        strategy_nav = pd.Series(nav_values, index=subset_evaluator.nav_dates)
+        strategy_returns = strategy_nav.pct_change().dropna()
+
+        enhanced_metrics = self._enhanced_metrics(strategy_returns, strategy, include_yearly)
+        return {
+            'strategy_type': strategy_type,
+            'mode': mode,
+            'signal_count': len(used),
+            'skipped_signals': skipped,
+            'enhanced_metrics': enhanced_metrics,
+            'yearly_analysis': enhanced_metrics['yearly_analysis'],
+            'strategy_nav': strategy_nav,
+            'benchmark_nav': strategy['benchmark_nav'],
+            'strategy_returns': strategy_returns,
+            'benchmark_returns': strategy['benchmark_returns'],
+        }
+
+    def evaluate_text(self, config_text: str, mode: str = 'binary',
+                      include_yearly: bool = True) -> Dict[str, Dict]:
+        """
+        评估制表符分隔的配置文本（格式同 parse_signal_config_text）
+
+        返回:
+            策略类型 -> evaluate 结果（只包含文本中出现的策略）
+        """
+        parsed = self.signal_configuration.parse_signal_config_text(config_text)
+        return {strategy_type: self.evaluate(signal_configs, strategy_type, mode, include_yearly)
+                for strategy_type, signal_configs in parsed.items() if signal_configs}
+
+    def _enhanced_metrics(self, strategy_returns: pd.Series, strategy: Dict,
+                          include_yearly: bool = True) -> Dict:
+        """绩效指标（口径同 calculate_enhanced_performance_metrics，月度统计按数组归约）"""
+        benchmark_returns = strategy['benchmark_returns']
+        strategy_values = strategy_returns.to_numpy()
+        benchmark_values = benchmark_returns.to_numpy()
+        strategy_metrics = _basic_metrics(strategy_values)
+        benchmark_metrics = strategy['benchmark_metrics']
+
+        excess = strategy_values - benchmark_values
+        excess_std = excess.std(ddof=1)
+        annualizer = np.sqrt(TRADING_DAYS_PER_YEAR)
+        excess_metrics = {
+            'excess_annualized_return': strategy_metrics['annualized_return'] - benchmark_metrics['annualized_return'],
+            'excess_volatility': excess_std * annualizer,
+            'information_ratio': excess.mean() / excess_std * annualizer if excess_std > 0 else 0,
+            'tracking_error': excess_std * annualizer,
+        }
+
+        relative_nav = np.cumprod(1 + strategy_values) / np.cumprod(1 + benchmark_values)
+        relative_drawdown = (relative_nav / np.maximum.accumulate(relative_nav) - 1).min()
+
+        dates = strategy_returns.index
+        month_codes = dates.year * 12 + dates.month
+        month_starts = np.flatnonzero(np.r_[True, month_codes[1:] != month_codes[:-1]])
+        monthly_excess = ((np.multiply.reduceat(1 + strategy_values, month_starts) - 1)
+                          - (np.multiply.reduceat(1 + benchmark_values, month_starts) - 1))
+        monthly_win_rate = {
+            'monthly_win_rate': (monthly_excess > 0).mean(),
+            'total_months': len(monthly_excess),
+            'winning_months': int((monthly_excess > 0).sum()),
+            'losing_months': int((monthly_excess <= 0).sum()),
+        }
+
+        overall = {
+            'strategy_metrics': strategy_metrics,
+            'benchmark_metrics': benchmark_metrics,
+            'excess_metrics': excess_metrics,
+            'monthly_win_rate': monthly_win_rate,
+        }
+        yearly_analysis = pd.DataFrame()
+        if include_yearly:
+            yearly_analysis = self.backtest_engine.calculate_yearly_performance(
+                strategy_returns, benchmark_returns, overall
+            )
+        return {**overall, 'relative_drawdown': relative_drawdown, 'yearly_analysis': yearly_analysis}
+
+
+def _target_weights(votes: np.ndarray, mode: str) -> np.ndarray:
+    """各决策日的两资产目标权重（计算方式与投票回测引擎一致，净值逐位相同）"""
+    votes_first = (votes == 1).sum(axis=1, dtype=np.int64)
+    votes_second = (votes == 0).sum(axis=1, dtype=np.int64)
+    if mode == 'binary':
+        # 多数票全仓第一标的，平票持有第二标的
+        is_first = votes_first > votes_second
+        return np.column_stack((is_first, ~is_first)).astype(float)
+    total = votes_first + votes_second
+    has_votes = total > 0
+    return np.column_stack((
+        np.divide(votes_first, total, out=np.full(len(total), 0.5), where=has_votes),
+        np.divide(votes_second, total, out=np.full(len(total), 0.5), where=has_votes),
+    ))
+
+
+def _basic_metrics(returns: np.ndarray) -> Dict[str, float]:
+    """总收益、年化收益、波动率、夏普比率与最大回撤"""
+    cumulative = np.cumprod(1 + returns)
+    total_return = cumulative[-1] - 1
+    annualized_return = (1 + total_return) ** (TRADING_DAYS_PER_YEAR / len(returns)) - 1
+    volatility = returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'volatility': volatility,
+        'sharpe_ratio': annualized_return / volatility if volatility > 0 else 0,
+        'max_drawdown': (cumulative / np.maximum.accumulate(cumulative) - 1).min(),
+    }
@@ -0,0 +1,110 @@
+"""
+导入耗时基准
+Import-time benchmark for the package entry points
+
+每个导入目标在全新的解释器中执行（与命令行工具、新建工作进程的情况一致），
+重复多次取中位数，并检查：
+- 耗时不超过预算（毫秒）
+- 不应被加载的重量级依赖（如 scipy）确实没有被加载
+
+任一检查不通过时以非零状态退出，可在修改导入结构后运行以防回退：
+    python refactored_macro_strategy/examples/benchmark_import_time.py [重复次数]
+"""
+
+import sys
+import os
+import json
+import statistics
+import subprocess
+
+# 获取当前文件的目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取项目根目录 (macroStrategy)
+project_root = os.path.dirname(os.path.dirname(current_dir))
+
+
+# (导入语句, 耗时预算毫秒, 不应加载的模块)
+IMPORT_TARGETS = [
+    ("import refactored_macro_strategy", 150, ('pandas', 'numpy', 'scipy')),
+    ("import refactored_macro_strategy.config", 150, ('pandas', 'numpy', 'scipy')),
+    ("import refactored_macro_strategy.utils.executor", 150, ('pandas', 'scipy')),
+    ("import refactored_macro_strategy.core.backtest_engine", 1500, ('scipy',)),
+    ("from refactored_macro_strategy import MainWorkflow", 2000, ('scipy',)),
+    ("import refactored_macro_strategy.workflows.analysis_server", 2000, ('scipy',)),
+]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure_import(statement: str, repeat: int = 5) -> dict:
+    """
+    在全新解释器中多次执行导入语句
+
+    参数:
+        statement: 导入语句
+        repeat: 重复次数
+
+    返回:
+        {'median_ms', 'min_ms', 'modules'}（modules 为最后一次运行后已加载的模块）
+    """
+    timings, modules = [], []
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [project_root, os.environ.get('PYTHONPATH')]))}
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(statement=statement)],
+                                capture_output=True, text=True, env=env, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['ms'])
+        modules = result['modules']
+    return {'median_ms': statistics.median(timings), 'min_ms': min(timings), 'modules': modules}
+
+
+def run_import_benchmark(repeat: int = 5) -> bool:
+    """
+    运行全部导入目标并打印结果
+
+    参数:
+        repeat: 每个目标的重复次数
+
+    返回:
+        全部检查是否通过
+    """
+    print("=" * 80)
+    print(f"导入耗时基准 (每项 {repeat} 次，取中位数)")
+    print("=" * 80)
+
+    passed = True
+    for statement, budget_ms, forbidden in IMPORT_TARGETS:
+        try:
+            result = measure_import(statement, repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"[失败] {statement}: 导入出错\n{e.stderr}")
+            passed = False
+            continue
+
+        loaded = [name for name in forbidden if name in result['modules']]
+        ok = result['median_ms'] <= budget_ms and not loaded
+        passed = passed and ok
+        status = "通过" if ok else "失败"
+        print(f"[{status}] {statement}")
+        print(f"        中位数 {result['median_ms']:.1f}ms (最快 {result['min_ms']:.1f}ms, 预算 {budget_ms}ms)")
+        if loaded:
+            print(f"        不应加载的模块已被加载: {loaded}")
+
+    print("=" * 80)
+    print("全部通过" if passed else "存在未通过的检查")
+    return passed
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sys.exit(0 if run_import_benchmark(repeat) else 1)
+
+
+if __name__ == "__main__":
+    main()
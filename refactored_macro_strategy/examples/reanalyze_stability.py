@@ -2,6 +2,9 @@
 独立稳定性重新分析脚本
 基于现有的滚动回测数据重新计算稳定性分析结果
 用于在修改StabilityConfig设置后快速重新分析，无需重新运行耗时的滚动回测
+
+滚动结果既可以是导出的 Excel/CSV 文件，也可以是同时写出的 .cols 列式目录；
+后者按列内存映射读取，大结果集几乎瞬间加载
 """
 
 import sys
@@ -27,7 +30,7 @@ def reanalyze_stability(rolling_results_file: str, custom_stability_config: Stab
     基于现有滚动回测数据重新计算稳定性分析
     
     参数:
-        rolling_results_file: 滚动回测结果文件路径
+        rolling_results_file: 滚动回测结果文件路径或 .cols 列式目录
         custom_stability_config: 自定义稳定性配置 (可选)
     """
     print("="*80)
@@ -128,7 +131,7 @@ def reanalyze_stability(rolling_results_file: str, custom_stability_config: Stab
 
 def main():
     """主函数"""
-    # 默认的滚动回测结果文件 (您可以修改这个路径)
+    # 默认的滚动回测结果文件 (您可以修改这个路径，也可以传入同名的 .cols 列式目录)
     default_file = "signal_test_results/rolling_raw_results_value_growth_20250529_140924.xlsx"
     
     # 如果命令行提供了文件路径参数，使用它
@@ -1287,7 +1287,7 @@ def run_detailed_voting_results_analysis(data_path):
                     vote_confidence = 0
                 
                 # 获取该月每个信号的投票情况
-                month_signals = month_data.groupby('signal_id').first()
+                month_signals = month_data.groupby('signal_id', observed=True).first()
                 
                 for signal_id, signal_data in month_signals.iterrows():
                     # 获取信号配置信息
@@ -1456,6 +1456,51 @@ def run_detailed_voting_results_analysis(data_path):
         traceback.print_exc()
 
 
+def run_all_examples(data_path):
+    """
+    依次运行全部非交互示例，各场景共享同一个阶段图运行器：
+    数据只加载一次，相同配置的信号、回测与投票矩阵只计算一次，
+    结果同时缓存到 signal_test_results/dag_cache/ 供下次运行复用
+    """
+    from refactored_macro_strategy.workflows.dag_runner import (
+        DagRunner, use_shared_runner, data_stage, vote_matrix_stage
+    )
+    
+    print("="*80)
+    print("开始运行：全部示例（共享数据、信号与基准缓存）")
+    print("="*80)
+    
+    scenarios = [
+        ('全部完整回测', run_all_complete_test),
+        ('大小盘稳定性分析', run_big_small_stability_analysis),
+        ('价值成长稳定性分析', run_ranking_stability_analysis),
+        ('跨标的稳定性比较', run_stability_comparison_across_targets),
+        ('多信号投票策略', run_both_voting_strategies),
+        ('按比例分配多信号投票策略', run_both_proportional_voting_strategies),
+        ('双策略敏感性分析', run_both_strategies_sensitivity_analysis),
+        ('Top 11 宏观事件投票结果明细分析', run_detailed_voting_results_analysis),
+    ]
+    
+    runner = DagRunner(cache_dir=os.path.join("signal_test_results", "dag_cache"))
+    with use_shared_runner(runner):
+        # 预先并发计算各场景共用且互不依赖的上游阶段
+        signal_config = SignalConfig()
+        runner.run([data_stage(runner, data_path)] + [
+            vote_matrix_stage(runner, data_path, signal_config,
+                              signal_config.get_voting_strategy_signals(strategy_type), strategy_type)
+            for strategy_type in ['value_growth', 'big_small']
+        ])
+        
+        for name, func in scenarios:
+            print(f"\n>>> 运行: {name}")
+            try:
+                func(data_path)
+            except Exception as e:
+                print(f"{name} 失败: {e}")
+    
+    runner.print_summary()
+
+
 def main():
     """主函数"""
     data_path = "宏观指标与逻辑.xlsx"
@@ -1482,7 +1527,8 @@ def main():
         '18': ('双策略敏感性分析', run_both_strategies_sensitivity_analysis),
         '19': ('自定义敏感性分析', run_custom_sensitivity_analysis),
         '20': ('敏感性分析信息概览', show_sensitivity_analysis_info),
-        '21': ('Top 11 宏观事件投票结果明细分析', run_detailed_voting_results_analysis)
+        '21': ('Top 11 宏观事件投票结果明细分析', run_detailed_voting_results_analysis),
+        '22': ('全部示例（共享数据与信号缓存）', run_all_examples)
     }
     
     print("可用示例:")
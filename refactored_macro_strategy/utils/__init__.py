@@ -3,22 +3,7 @@
 Utility modules for the macro strategy system
 """
 
-from .validators import (
-    validate_series_input,
-    validate_dataframe_input,
-    validate_backtest_inputs,
-    check_data_alignment,
-    sanitize_numeric_series
-)
-
-from .data_loader import (
-    load_all_data,
-    load_specific_sheets,
-    save_data_to_excel,
-    create_default_memo_data,
-    align_data,
-    validate_data_quality
-)
+from .lazy_exports import lazy_exports
 
 __all__ = [
     'validate_series_input',
@@ -31,5 +16,61 @@ __all__ = [
     'save_data_to_excel',
     'create_default_memo_data',
     'align_data',
-    'validate_data_quality'
-] 
\ No newline at end of file
+    'validate_data_quality',
+    'CombinationRegistry',
+    'format_combination_id',
+    'COMBINATION_KEY_COLUMNS',
+    'data_fingerprint',
+    'file_fingerprint',
+    'write_table',
+    'read_table',
+    'export_tables',
+    'write_excel_workbook',
+    'AsyncExporter',
+    'ExportError',
+    'background_export',
+    'ResultStore',
+    'write_columnar',
+    'read_columnar',
+    'is_columnar',
+    'PartitionedResults',
+    'is_partitioned',
+    'RunManifest',
+    'stage_key',
+    'code_version'
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'validate_series_input': '.validators',
+    'validate_dataframe_input': '.validators',
+    'validate_backtest_inputs': '.validators',
+    'check_data_alignment': '.validators',
+    'sanitize_numeric_series': '.validators',
+    'load_all_data': '.data_loader',
+    'load_specific_sheets': '.data_loader',
+    'save_data_to_excel': '.data_loader',
+    'create_default_memo_data': '.data_loader',
+    'align_data': '.data_loader',
+    'validate_data_quality': '.data_loader',
+    'CombinationRegistry': '.combination_registry',
+    'format_combination_id': '.combination_registry',
+    'COMBINATION_KEY_COLUMNS': '.combination_registry',
+    'data_fingerprint': '.fingerprint',
+    'file_fingerprint': '.fingerprint',
+    'write_table': '.table_io',
+    'read_table': '.table_io',
+    'export_tables': '.table_io',
+    'write_excel_workbook': '.table_io',
+    'AsyncExporter': '.async_exporter',
+    'ExportError': '.async_exporter',
+    'background_export': '.async_exporter',
+    'ResultStore': '.result_store',
+    'write_columnar': '.columnar_store',
+    'read_columnar': '.columnar_store',
+    'is_columnar': '.columnar_store',
+    'PartitionedResults': '.partitioned_results',
+    'is_partitioned': '.partitioned_results',
+    'RunManifest': '.run_manifest',
+    'stage_key': '.run_manifest',
+    'code_version': '.run_manifest',
+})
@@ -0,0 +1,204 @@
+"""
+后台导出队列
+Background export queue
+
+工作流算完一个策略后把待写出的表交给后台线程，立即开始下一个策略的计算；
+运行结束时 flush/close 等待全部写出，并把写出失败汇总为 ExportError 抛出。
+
+使用线程而不是进程：待写出的 DataFrame 无需序列化拷贝，文件写入与压缩期间
+会释放 GIL。提交时对表做快照（snapshot）：pandas 写时复制生效时为浅拷贝，
+否则（pandas < 3 且未开启写时复制）为深拷贝，之后对原表的修改不会影响排队中的数据。
+"""
+
+import queue
+import threading
+import concurrent.futures
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from .table_io import export_tables
+
+
+def copy_on_write_enabled() -> bool:
+    """pandas 写时复制是否生效（pandas >= 3 始终生效，pandas 2.x 取决于选项）"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        # pandas 2.2 的 'warn' 模式不算生效；pandas 1.x 没有该选项（OptionError 是 KeyError 的子类）
+        return pd.get_option('mode.copy_on_write') is True
+    except KeyError:
+        return False
+
+
+def snapshot(df: Union[pd.DataFrame, pd.Series]) -> Union[pd.DataFrame, pd.Series]:
+    """
+    数据表快照：之后对原表的原地修改不影响快照
+
+    写时复制生效时为浅拷贝（不复制数据），否则为深拷贝。
+    """
+    return df.copy(deep=not copy_on_write_enabled())
+
+
+class ExportError(RuntimeError):
+    """后台导出失败（errors 为各失败任务的 (描述, 异常)）"""
+
+    def __init__(self, errors: List[tuple]):
+        self.errors = list(errors)
+        details = '; '.join(f"{description}: {error}" for description, error in self.errors)
+        super().__init__(f"后台导出失败 {len(self.errors)} 项 - {details}")
+
+
+class AsyncExporter:
+    """
+    后台导出器
+
+    参数:
+        max_pending: 队列中最多等待的任务数，超过时提交方阻塞（限制内存占用）
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, max_pending: int = 8):
+        if max_pending < 1:
+            raise ValueError(f"max_pending必须为正整数，当前为: {max_pending}")
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.completed = 0
+
+    def __enter__(self) -> 'AsyncExporter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # with 块内已有异常时不再用导出错误覆盖它
+        self.close(raise_errors=exc_type is None)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='async-exporter', daemon=True)
+            self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._SENTINEL:
+                    return
+                future, description, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args, **kwargs))
+                    with self._lock:
+                        self.completed += 1
+                except BaseException as e:
+                    print(f"  ✗ 后台导出失败: {description} - {e}")
+                    with self._lock:
+                        self._errors.append((description, e))
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func: Callable[..., Any], *args,
+               description: str = '', **kwargs) -> concurrent.futures.Future:
+        """
+        提交一个导出任务
+
+        参数:
+            func: 在后台线程中执行的写出函数
+            description: 任务描述（用于错误信息）
+
+        返回:
+            Future，结果为 func 的返回值
+        """
+        if self._closed:
+            raise RuntimeError("导出器已关闭，不能再提交任务")
+        self._ensure_started()
+        future = concurrent.futures.Future()
+        self._queue.put((future, description or getattr(func, '__name__', 'export'), func, args, kwargs))
+        return future
+
+    def submit_tables(self, path: str,
+                      sheets: Dict[str, pd.DataFrame],
+                      full_table_names: Sequence[str] = (),
+                      export_format: str = 'excel',
+                      excel_engine: str = 'xlsxwriter') -> concurrent.futures.Future:
+        """
+        提交一组结果表的写出（参数同 table_io.export_tables）
+
+        返回:
+            Future，结果为写出的文件路径列表
+        """
+        tables = {name: snapshot(df) for name, df in sheets.items() if df is not None}
+        return self.submit(export_tables, path, tables, tuple(full_table_names), export_format,
+                           excel_engine, description=path)
+
+    def flush(self, raise_errors: bool = True) -> None:
+        """
+        等待已提交的任务全部完成
+
+        参数:
+            raise_errors: 有任务失败时抛出 ExportError（错误随之清空）
+        """
+        if self._thread is not None:
+            self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors and raise_errors:
+            raise ExportError(errors)
+
+    def close(self, raise_errors: bool = True) -> None:
+        """等待全部任务完成并停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.flush(raise_errors)
+        finally:
+            if self._thread is not None:
+                self._queue.put(self._SENTINEL)
+                self._thread.join()
+                self._thread = None
+
+
+@contextmanager
+def background_export(*owners: Any, enabled: bool = True) -> Iterator[Optional[AsyncExporter]]:
+    """
+    在 with 块内为 owners 启用后台导出（设置各自的 exporter 属性），退出时等待全部写出
+
+    第一个 owner 已处于后台导出中（嵌套调用）时直接复用外层导出器。
+
+    参数:
+        owners: 带 exporter 属性的工作流/分析器对象，共用同一个导出器
+        enabled: False 时不启用，导出保持同步
+
+    返回:
+        上下文中的导出器（未启用时为None）
+    """
+    current = getattr(owners[0], 'exporter', None) if owners else None
+    if not enabled or not owners or current is not None:
+        yield current
+        return
+
+    exporter = AsyncExporter()
+    for owner in owners:
+        owner.exporter = exporter
+    try:
+        yield exporter
+    except BaseException:
+        exporter.close(raise_errors=False)
+        raise
+    else:
+        exporter.close()
+        print(f"后台导出完成: {exporter.completed} 个任务")
+    finally:
+        for owner in owners:
+            owner.exporter = None
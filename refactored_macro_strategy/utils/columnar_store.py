@@ -0,0 +1,142 @@
+"""
+列式内存映射存储
+Memory-mapped columnar storage for large result tables
+
+滚动回测原始结果可达数百万行，从 Excel 重新读取需要逐个单元格解析。
+这里将每一列保存为一个 .npy 文件（目录以 .cols 结尾）：
+- 数值 / 布尔列按原 dtype 保存
+- 日期列保存为 int64 时间戳
+- 字符串与 category 列保存为整数编码，类别表写入 columns.json
+
+读取时按需打开列文件（np.load(mmap_mode='r')），只访问用到的列，
+不需要的列完全不触碰磁盘。
+"""
+
+import os
+import json
+import shutil
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Sequence
+
+
+COLUMNAR_SUFFIX = '.cols'
+MANIFEST_FILENAME = 'columns.json'
+
+
+def columnar_path(path: str) -> str:
+    """将路径的扩展名替换为列式目录后缀"""
+    return os.path.splitext(path)[0] + COLUMNAR_SUFFIX
+
+
+def is_columnar(path: str) -> bool:
+    """路径是否为 write_columnar 写出的列式目录"""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILENAME))
+
+
+def _encode_column(series: pd.Series) -> tuple:
+    """单列 -> (保存的数组, 清单信息)"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int32)
+        return codes, {'kind': 'category', 'categories': dtype.categories.tolist(), 'ordered': bool(dtype.ordered)}
+    if pd.api.types.is_datetime64_dtype(dtype):
+        unit = np.datetime_data(series.to_numpy().dtype)[0]
+        return series.to_numpy().view(np.int64), {'kind': 'datetime', 'unit': unit}
+    if pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+        return series.to_numpy(dtype=bool), {'kind': 'numeric'}
+    if pd.api.types.is_numeric_dtype(dtype):
+        if isinstance(dtype, np.dtype):
+            return series.to_numpy(), {'kind': 'numeric'}
+        # 可空整数等扩展类型按浮点保存，缺失值为NaN
+        return series.to_numpy(dtype=float, na_value=np.nan), {'kind': 'numeric'}
+
+    # 其余（字符串/对象列）按类别编码
+    # 缺失值编码为 -1（各 pandas 版本的默认行为一致）
+    codes, uniques = pd.factorize(series)
+    categories = [value if isinstance(value, (str, int, float, bool)) else str(value) for value in uniques.tolist()]
+    return codes.astype(np.int32), {'kind': 'category', 'categories': categories, 'ordered': False}
+
+
+def write_columnar(df: pd.DataFrame, path: str) -> str:
+    """
+    将 DataFrame 写为列式目录（不保存索引）
+
+    参数:
+        df: 数据表
+        path: 输出目录，扩展名统一替换为 .cols；已存在时整体替换
+
+    返回:
+        实际输出目录
+    """
+    path = columnar_path(path)
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+    os.makedirs(temp_path)
+
+    manifest = {'rows': int(len(df)), 'columns': []}
+    for position, (name, series) in enumerate(df.items()):
+        array, info = _encode_column(series)
+        filename = f"c{position}.npy"
+        np.save(os.path.join(temp_path, filename), np.ascontiguousarray(array), allow_pickle=False)
+        manifest['columns'].append({'name': str(name), 'file': filename, 'dtype': str(array.dtype), **info})
+
+    with open(os.path.join(temp_path, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    # 写完再替换，读取方不会看到写了一半的目录
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(temp_path, path)
+    return path
+
+
+def _read_manifest(path: str) -> dict:
+    if not is_columnar(path):
+        raise ValueError(f"不是列式数据目录: {path}")
+    with open(os.path.join(path, MANIFEST_FILENAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def columnar_columns(path: str) -> List[str]:
+    """列式目录中的列名（按写出顺序）"""
+    return [column['name'] for column in _read_manifest(path)['columns']]
+
+
+def read_columnar(path: str,
+                  columns: Optional[Sequence[str]] = None,
+                  mmap: bool = True) -> pd.DataFrame:
+    """
+    读取列式目录
+
+    参数:
+        path: write_columnar 写出的目录
+        columns: 只读取这些列（按给定顺序），默认全部列
+        mmap: 以内存映射方式打开列文件
+
+    返回:
+        DataFrame，字符串列还原为 category
+    """
+    manifest = _read_manifest(path)
+    column_info = {column['name']: column for column in manifest['columns']}
+    if columns is None:
+        columns = list(column_info)
+    missing_cols = [col for col in columns if col not in column_info]
+    if missing_cols:
+        raise ValueError(f"列式数据缺少列: {missing_cols}")
+
+    data = {}
+    for name in columns:
+        info = column_info[name]
+        array = np.load(os.path.join(path, info['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if info['kind'] == 'category':
+            data[name] = pd.Categorical.from_codes(
+                np.asarray(array), categories=pd.Index(info['categories']),
+                ordered=info.get('ordered', False)
+            )
+        elif info['kind'] == 'datetime':
+            data[name] = array.view(f"datetime64[{info['unit']}]")
+        else:
+            data[name] = array
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest['rows']))
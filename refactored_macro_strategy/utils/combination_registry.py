@@ -0,0 +1,118 @@
+"""
+参数组合注册表
+Combination registry - compact integer codes for (indicator, signal_type, parameter_n, assumed_direction)
+
+回测与稳定性分析中的所有分组/关联都基于组合键进行。逐行拼接字符串
+combination_id 再按 object 列分组代价很高，这里统一为每个组合分配
+int32 编码，并将 indicator / signal_type 转为 category 列；
+字符串形式的 combination_id 仅在输出时按需解码。
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+
+COMBINATION_KEY_COLUMNS = ['indicator', 'signal_type', 'parameter_n', 'assumed_direction']
+COMBINATION_CODE_COLUMN = 'combination_code'
+CATEGORICAL_COLUMNS = ['indicator', 'signal_type']
+
+
+def format_combination_id(indicator, signal_type, parameter_n, assumed_direction) -> str:
+    """生成组合的字符串标识，格式与历史结果文件保持一致"""
+    return f"{indicator}_{signal_type}_{parameter_n}_{assumed_direction}"
+
+
+class CombinationRegistry:
+    """
+    组合编码注册表
+
+    同一个注册表内，相同的组合键始终映射到同一个整数编码，
+    编码按首次出现顺序从0开始递增。
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple] = []
+        self._ids: List[str] = []
+        self._lookup = {}
+        self._index: Optional[pd.MultiIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def register(self, indicator, signal_type, parameter_n, assumed_direction) -> int:
+        """注册单个组合，返回其编码"""
+        key = (str(indicator), str(signal_type), int(parameter_n), int(assumed_direction))
+        code = self._lookup.get(key)
+        if code is None:
+            code = len(self._keys)
+            self._lookup[key] = code
+            self._keys.append(key)
+            self._ids.append(format_combination_id(*key))
+            self._index = None
+        return code
+
+    def _get_index(self) -> pd.MultiIndex:
+        if self._index is None:
+            self._index = pd.MultiIndex.from_tuples(self._keys, names=COMBINATION_KEY_COLUMNS)
+        return self._index
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        对DataFrame中的组合键进行向量化编码
+
+        参数:
+            df: 包含 COMBINATION_KEY_COLUMNS 的DataFrame
+
+        返回:
+            与df行对齐的int32编码数组
+        """
+        missing_cols = [col for col in COMBINATION_KEY_COLUMNS if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"缺少组合键列: {missing_cols}")
+
+        if df.empty:
+            return np.empty(0, dtype=np.int32)
+
+        key_df = pd.DataFrame({
+            'indicator': df['indicator'].astype(str).to_numpy(dtype=object),
+            'signal_type': df['signal_type'].astype(str).to_numpy(dtype=object),
+            'parameter_n': df['parameter_n'].to_numpy().astype(np.int64),
+            'assumed_direction': df['assumed_direction'].to_numpy().astype(np.int64),
+        })
+
+        # 只对去重后的组合逐个注册，行数通常远小于结果行数
+        for key in key_df.drop_duplicates().itertuples(index=False, name=None):
+            self.register(*key)
+
+        codes = self._get_index().get_indexer(pd.MultiIndex.from_frame(key_df))
+        return codes.astype(np.int32)
+
+    def encode_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        为DataFrame添加 combination_code 列，并将 indicator / signal_type 转为category
+
+        参数:
+            df: 回测结果DataFrame（原地修改）
+
+        返回:
+            修改后的同一个DataFrame
+        """
+        if df.empty:
+            return df
+
+        df[COMBINATION_CODE_COLUMN] = self.encode(df)
+        for col in CATEGORICAL_COLUMNS:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        return df
+
+    def combination_ids(self, codes: Iterable[int]) -> np.ndarray:
+        """将整数编码解码为字符串 combination_id"""
+        return np.asarray(self._ids, dtype=object)[np.asarray(codes, dtype=np.int64)]
+
+    def key_frame(self) -> pd.DataFrame:
+        """返回全部已注册组合的键表，索引为编码"""
+        key_df = pd.DataFrame(self._keys, columns=COMBINATION_KEY_COLUMNS)
+        key_df.index.name = COMBINATION_CODE_COLUMN
+        return key_df
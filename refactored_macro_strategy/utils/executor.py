@@ -0,0 +1,251 @@
+"""
+统一任务执行器
+Unified task executor with a machine-wide worker budget
+
+所有引擎和工作流的并行执行都通过 TaskExecutor 完成：
+1. 支持 process / thread / serial 三种后端
+2. 全局工作进程预算不超过 CPU 核数（且不超过60，Windows进程池上限），
+   多个执行器同时运行时共享预算，不会超额创建进程
+3. 工作进程/线程内再次发起的并行调用自动降级为串行，避免嵌套超订
+4. 工作进程内限制 BLAS/OpenMP 线程数：进程池启动期间在父进程设置线程数环境变量
+   （spawn 启动的工作进程导入 NumPy 前即生效），fork 启动时 BLAS 已加载，
+   由 threadpoolctl 在运行期限制
+
+预算的作用范围是单个 Python 进程：同一进程内的所有执行器共享预算，执行器的
+工作进程被标记为工作单元、不会再开池，因此一次运行的整棵进程树不会超订。
+彼此独立启动的多个程序各自持有一份预算，不会互相感知；在同一台机器上同时
+运行多个程序时，用 MACRO_STRATEGY_MAX_WORKERS 或 set_worker_budget 为每个程序分配核数。
+"""
+
+import os
+import threading
+import concurrent.futures
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Iterator, List, Literal, Optional, Sequence, Tuple
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # 可选依赖
+    threadpool_limits = None
+
+
+ExecutorBackend = Literal['process', 'thread', 'serial']
+
+MAX_POOL_WORKERS = 60
+WORKER_ENV_FLAG = 'MACRO_STRATEGY_WORKER'
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                 'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+_thread_state = threading.local()
+
+
+class WorkerBudget:
+    """进程内全局工作单元预算（线程安全；不跨独立启动的进程共享）"""
+
+    def __init__(self, total: Optional[int] = None):
+        self._lock = threading.Lock()
+        self.total = total or default_worker_budget()
+        self.in_use = 0
+
+    def acquire(self, requested: int) -> int:
+        """申请工作单元，返回实际分配数量（可能为0）"""
+        with self._lock:
+            granted = max(0, min(requested, self.total - self.in_use))
+            self.in_use += granted
+            return granted
+
+    def release(self, count: int) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - count)
+
+
+def default_worker_budget() -> int:
+    """默认预算：环境变量 MACRO_STRATEGY_MAX_WORKERS 或 CPU核数，上限60"""
+    env_value = os.environ.get('MACRO_STRATEGY_MAX_WORKERS')
+    if env_value and env_value.isdigit() and int(env_value) > 0:
+        return min(int(env_value), MAX_POOL_WORKERS)
+    return max(1, min(os.cpu_count() or 1, MAX_POOL_WORKERS))
+
+
+_GLOBAL_BUDGET = WorkerBudget()
+
+
+def get_worker_budget() -> WorkerBudget:
+    """获取全局预算对象"""
+    return _GLOBAL_BUDGET
+
+
+def set_worker_budget(total: int) -> None:
+    """调整全局预算上限（如在共享服务器上主动让出核数）"""
+    if total < 1:
+        raise ValueError(f"工作单元预算必须为正整数，当前为: {total}")
+    _GLOBAL_BUDGET.total = min(total, MAX_POOL_WORKERS)
+
+
+def in_worker() -> bool:
+    """当前是否运行在执行器的工作进程或工作线程中"""
+    return os.environ.get(WORKER_ENV_FLAG) == '1' or getattr(_thread_state, 'depth', 0) > 0
+
+
+@contextmanager
+def blas_thread_env(num_threads: int) -> Iterator[None]:
+    """临时设置 BLAS/OpenMP 线程数环境变量（供随后启动的子进程继承），退出时恢复"""
+    previous = {var: os.environ.get(var) for var in BLAS_ENV_VARS}
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(num_threads)
+    try:
+        yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def limit_blas_threads(num_threads: int) -> None:
+    """限制当前进程的 BLAS/OpenMP 线程数"""
+    for var in BLAS_ENV_VARS:
+        os.environ[var] = str(num_threads)
+    if threadpool_limits is not None:
+        threadpool_limits(limits=num_threads)
+
+
+def _process_worker_initializer(blas_threads: int) -> None:
+    """工作进程初始化：标记嵌套并限制BLAS线程"""
+    os.environ[WORKER_ENV_FLAG] = '1'
+    limit_blas_threads(blas_threads)
+
+
+def _call_in_worker_thread(func: Callable, args: Tuple) -> Any:
+    """在工作线程中执行任务，期间标记嵌套深度"""
+    _thread_state.depth = getattr(_thread_state, 'depth', 0) + 1
+    try:
+        return func(*args)
+    finally:
+        _thread_state.depth -= 1
+
+
+class TaskExecutor:
+    """
+    统一任务执行器
+
+    参数:
+        backend: 'process' / 'thread' / 'serial'
+        max_workers: 期望的工作单元数，None表示使用全部可用预算
+        blas_threads: 每个工作单元允许的BLAS线程数
+        budget: 预算对象，默认使用全局预算
+    """
+
+    def __init__(self, backend: ExecutorBackend = 'process',
+                 max_workers: Optional[int] = None,
+                 blas_threads: int = 1,
+                 budget: Optional[WorkerBudget] = None):
+        if backend not in ('process', 'thread', 'serial'):
+            raise ValueError(f"不支持的执行后端: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers
+        self.blas_threads = max(1, blas_threads)
+        self.budget = budget or _GLOBAL_BUDGET
+
+    @contextmanager
+    def _reserve(self, task_count: int) -> Iterator[Tuple[str, int]]:
+        """按任务数和预算确定实际后端与工作单元数，结束时归还预算"""
+        if self.backend == 'serial' or task_count <= 1 or in_worker():
+            yield 'serial', 1
+            return
+
+        requested = min(task_count, self.max_workers or self.budget.total, MAX_POOL_WORKERS)
+        granted = self.budget.acquire(requested)
+        try:
+            if granted <= 1:
+                yield 'serial', 1
+            else:
+                yield self.backend, granted
+        finally:
+            self.budget.release(granted)
+
+    def _make_pool(self, backend: str, workers: int) -> concurrent.futures.Executor:
+        if backend == 'process':
+            return concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_process_worker_initializer,
+                initargs=(self.blas_threads,)
+            )
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    def _blas_limit(self, backend: str):
+        """
+        限制工作单元的BLAS线程
+
+        进程后端：池运行期间在父进程设置线程数环境变量，工作进程启动时继承
+        （工作进程在首次提交任务时才启动）；线程后端：在主进程内临时限制。
+        """
+        if backend == 'process':
+            return blas_thread_env(self.blas_threads)
+        if backend == 'thread' and threadpool_limits is not None:
+            return threadpool_limits(limits=self.blas_threads)
+        return nullcontext()
+
+    def imap_unordered(self, func: Callable,
+                       args_list: Sequence[Tuple]) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+        """
+        并行执行任务，按完成顺序逐个返回
+
+        参数:
+            func: 任务函数（process后端下需可pickle），以参数元组解包调用
+            args_list: 参数元组列表，按此顺序提交
+
+        返回:
+            迭代器，元素为 (任务下标, 返回值, 异常)；任务成功时异常为None
+        """
+        with self._reserve(len(args_list)) as (backend, workers):
+            if backend == 'serial':
+                for index, args in enumerate(args_list):
+                    try:
+                        yield index, func(*args), None
+                    except Exception as exc:
+                        yield index, None, exc
+                return
+
+            with self._blas_limit(backend), self._make_pool(backend, workers) as pool:
+                if backend == 'thread':
+                    futures = {pool.submit(_call_in_worker_thread, func, args): index
+                               for index, args in enumerate(args_list)}
+                else:
+                    futures = {pool.submit(func, *args): index
+                               for index, args in enumerate(args_list)}
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        yield futures[future], future.result(), None
+                    except Exception as exc:
+                        yield futures[future], None, exc
+
+    def starmap(self, func: Callable, args_list: Sequence[Tuple]) -> List[Any]:
+        """
+        并行执行任务并按提交顺序返回结果，任一任务异常时抛出
+
+        参数:
+            func: 任务函数
+            args_list: 参数元组列表
+
+        返回:
+            与args_list顺序一致的结果列表
+        """
+        results = [None] * len(args_list)
+        for index, result, error in self.imap_unordered(func, args_list):
+            if error is not None:
+                raise error
+            results[index] = result
+        return results
+
+    def describe(self, task_count: int) -> str:
+        """描述给定任务数下将采用的执行方式（不占用预算）"""
+        if self.backend == 'serial' or task_count <= 1 or in_worker():
+            return "串行执行"
+        available = self.budget.total - self.budget.in_use
+        workers = min(task_count, self.max_workers or self.budget.total, available, MAX_POOL_WORKERS)
+        if workers <= 1:
+            return "串行执行"
+        unit = "进程" if self.backend == 'process' else "线程"
+        return f"{workers} 个{unit}"
@@ -0,0 +1,59 @@
+"""
+数据指纹工具
+Content fingerprints for pandas objects
+
+用于缓存键：同一份数据（索引与取值完全相同）总是得到相同的指纹，
+与对象身份无关，因此切片、拷贝后的相同数据也能命中缓存。
+file_fingerprint 对数据文件的字节计算指纹，无需先加载数据。
+"""
+
+import hashlib
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence, Union
+
+
+def data_fingerprint(data: Union[pd.DataFrame, pd.Series],
+                     columns: Optional[Sequence[str]] = None) -> str:
+    """
+    计算DataFrame/Series的内容指纹
+
+    参数:
+        data: 待计算的数据
+        columns: 仅对指定列计算（DataFrame时有效），默认全部列
+
+    返回:
+        十六进制摘要字符串
+    """
+    if isinstance(data, pd.DataFrame) and columns is not None:
+        missing_cols = [col for col in columns if col not in data.columns]
+        if missing_cols:
+            raise ValueError(f"数据缺少指纹计算所需的列: {missing_cols}")
+        data = data[list(columns)]
+
+    digest = hashlib.blake2b(digest_size=16)
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    digest.update(np.ascontiguousarray(row_hashes).tobytes())
+
+    # 列名与形状一并纳入，避免不同列布局碰撞
+    names = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    digest.update(repr((names, data.shape)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    计算文件内容指纹（只读字节，不解析文件）
+
+    参数:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    返回:
+        十六进制摘要字符串
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,41 @@
+"""
+包属性的延迟导入
+Lazy package exports (PEP 562)
+
+各包的 __init__ 原本直接导入全部子模块，导入顶层包就会加载全部引擎、
+pandas 与 scipy，命令行工具与每个新建的工作进程都要付出这部分启动时间。
+这里为包生成模块级 __getattr__ / __dir__：公开属性在首次访问时才导入
+所在模块，之后写回包的命名空间，再次访问不再经过 __getattr__。
+"""
+
+import importlib
+import importlib.util
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    为包生成延迟导入的 __getattr__ 与 __dir__
+
+    参数:
+        package: 包名（在 __init__ 中传入 __name__）
+        exports: 公开属性名 -> 所在模块的相对路径（如 '.signal_engine'）
+
+    返回:
+        (__getattr__, __dir__)；未登记的属性名若对应子模块则导入该子模块
+    """
+    def __getattr__(name: str):
+        module_name = exports.get(name)
+        if module_name is not None:
+            value = getattr(importlib.import_module(module_name, package), name)
+        elif not name.startswith('__') and importlib.util.find_spec(f"{package}.{name}") is not None:
+            value = importlib.import_module(f"{package}.{name}")
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
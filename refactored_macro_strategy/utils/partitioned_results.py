@@ -0,0 +1,155 @@
+"""
+分区结果存储
+Per-window partitioned storage for rolling backtest results
+
+参数网格很大时，所有窗口的滚动结果拼成一个 DataFrame 会超出内存。
+分区模式下每个 (窗口 × 信号类型) 任务完成后立即写成一个列式分区
+（见 columnar_store），分区清单 partitions.json 记录每个分区所属的窗口与行数；
+稳定性分析按窗口逐个读取分区，完整结果表始终不会在内存中拼接。
+"""
+
+import os
+import json
+import shutil
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .columnar_store import write_columnar, read_columnar, columnar_columns
+
+
+PARTITION_MANIFEST = 'partitions.json'
+
+
+class PartitionedResults:
+    """
+    按窗口分区的结果目录
+
+    参数:
+        directory: 分区目录（已存在时读取其分区清单）
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.partitions: List[Dict] = []
+        manifest_path = os.path.join(directory, PARTITION_MANIFEST)
+        if os.path.isfile(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.partitions = json.load(f)['partitions']
+
+    @classmethod
+    def create(cls, directory: str, overwrite: bool = False) -> 'PartitionedResults':
+        """
+        新建空的分区目录
+
+        参数:
+            directory: 分区目录
+            overwrite: 目录中已有分区时是否清空
+        """
+        if is_partitioned(directory):
+            if not overwrite:
+                raise ValueError(f"分区目录已存在: {directory}")
+            shutil.rmtree(directory)
+        os.makedirs(directory, exist_ok=True)
+        partitioned = cls(directory)
+        partitioned._save_manifest()
+        return partitioned
+
+    def __len__(self) -> int:
+        return len(self.partitions)
+
+    def __repr__(self) -> str:
+        return (f"PartitionedResults('{self.directory}', {len(self)} 个分区, "
+                f"{len(self.window_ids)} 个窗口, {self.total_rows} 行)")
+
+    @property
+    def empty(self) -> bool:
+        return self.total_rows == 0
+
+    @property
+    def total_rows(self) -> int:
+        return sum(partition['rows'] for partition in self.partitions)
+
+    @property
+    def window_ids(self) -> List[int]:
+        return sorted({partition['window_id'] for partition in self.partitions})
+
+    @property
+    def columns(self) -> List[str]:
+        """各分区列名的并集（按首次出现顺序）"""
+        columns = []
+        for partition in self.partitions:
+            for column in columnar_columns(self._path(partition)):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def _path(self, partition: Dict) -> str:
+        return os.path.join(self.directory, partition['file'])
+
+    def _save_manifest(self) -> None:
+        temp_path = os.path.join(self.directory, PARTITION_MANIFEST + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'partitions': self.partitions}, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self.directory, PARTITION_MANIFEST))
+
+    def write_partition(self, df: pd.DataFrame, window_id: int, part_id: Optional[int] = None) -> str:
+        """
+        写入一个分区
+
+        参数:
+            df: 分区数据（单个窗口的部分或全部结果）
+            window_id: 所属窗口
+            part_id: 窗口内分区的排列序号（如任务编号），默认按写入顺序；
+                     并行任务完成顺序不固定时用它保证读取顺序一致
+
+        返回:
+            分区路径
+        """
+        if part_id is None:
+            part_id = len(self.partitions)
+        filename = f"window_{int(window_id):05d}_part_{int(part_id):06d}"
+        path = write_columnar(df, os.path.join(self.directory, filename))
+        self.partitions.append({'file': os.path.basename(path), 'window_id': int(window_id),
+                                'part_id': int(part_id), 'rows': int(len(df))})
+        self._save_manifest()
+        return path
+
+    def _read(self, partition: Dict, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        path = self._path(partition)
+        if columns is not None:
+            available = set(columnar_columns(path))
+            columns = [col for col in columns if col in available]
+        return read_columnar(path, columns)
+
+    def read_window(self, window_id: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """读取单个窗口的全部分区（按分区序号拼接）"""
+        window_partitions = sorted((partition for partition in self.partitions
+                                    if partition['window_id'] == window_id),
+                                   key=lambda partition: partition['part_id'])
+        frames = [self._read(partition, columns) for partition in window_partitions]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def iter_windows(self, columns: Optional[Sequence[str]] = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """
+        按窗口升序逐个读取
+
+        参数:
+            columns: 只读取这些列（分区中不存在的列忽略）
+
+        返回:
+            (window_id, 该窗口结果) 迭代器
+        """
+        for window_id in self.window_ids:
+            yield window_id, self.read_window(window_id, columns)
+
+    def iter_partitions(self, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """按写入顺序逐个读取分区"""
+        for partition in self.partitions:
+            yield self._read(partition, columns)
+
+
+def is_partitioned(path: str) -> bool:
+    """路径是否为分区结果目录"""
+    return os.path.isfile(os.path.join(path, PARTITION_MANIFEST))
@@ -0,0 +1,370 @@
+"""
+本地结果库
+Embedded SQLite result store indexed across runs
+
+每次运行（单次回测、滚动稳定性分析、多信号投票、敏感性测试）登记为一条 run，
+运行配置、回测结果行、滚动窗口结果行、稳定性得分与净值序列写入同一个
+SQLite 文件。indicator / signal_type / target / window_id 均建有索引，
+跨历史运行查询“某指标的最佳IR”无需再逐个打开 Excel 工作簿。
+
+结果表只保存 TABLE_SCHEMAS 中声明的列，完整数据仍以导出文件为准。
+"""
+
+import os
+import json
+import sqlite3
+import dataclasses
+import pandas as pd
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+
+COMBINATION_COLUMNS = [
+    ('indicator', 'TEXT'), ('signal_type', 'TEXT'),
+    ('parameter_n', 'INTEGER'), ('assumed_direction', 'INTEGER'), ('target', 'TEXT')
+]
+
+BACKTEST_METRIC_COLUMNS = [
+    ('information_ratio', 'REAL'), ('annualized_return', 'REAL'), ('total_return', 'REAL'),
+    ('volatility', 'REAL'), ('max_drawdown', 'REAL'), ('win_rate', 'REAL'),
+    ('monthly_avg_return', 'REAL'), ('t_statistic', 'REAL'), ('p_value', 'REAL'),
+    ('is_significant_0.05', 'INTEGER')
+]
+
+# 表名 -> 除 run_id 外的列定义
+TABLE_SCHEMAS = {
+    'backtest_rows': COMBINATION_COLUMNS + BACKTEST_METRIC_COLUMNS,
+    'rolling_rows': ([('window_id', 'INTEGER'), ('window_start_date', 'TEXT'), ('window_end_date', 'TEXT')]
+                     + COMBINATION_COLUMNS + BACKTEST_METRIC_COLUMNS),
+    'stability_scores': COMBINATION_COLUMNS + [
+        ('overall_stability_score', 'REAL'), ('ranking_stability_score', 'REAL'),
+        ('significance_consistency_score', 'REAL'), ('performance_stability_score', 'REAL'),
+        ('absolute_performance_score', 'REAL'), ('appearance_rate', 'REAL'),
+        ('rank_mean', 'REAL'), ('ir_mean', 'REAL'), ('ir_std', 'REAL')
+    ],
+    'nav_series': [('series', 'TEXT'), ('date', 'TEXT'),
+                   ('strategy_nav', 'REAL'), ('benchmark_nav', 'REAL')],
+}
+
+INDEXED_COLUMNS = {
+    'backtest_rows': ['indicator', 'signal_type', 'target'],
+    'rolling_rows': ['indicator', 'signal_type', 'target', 'window_id'],
+    'stability_scores': ['indicator', 'signal_type', 'target'],
+    'nav_series': ['series'],
+}
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_type TEXT NOT NULL,
+    target TEXT,
+    created_at TEXT NOT NULL,
+    description TEXT,
+    export_path TEXT,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_type ON runs (run_type, target);
+CREATE TABLE IF NOT EXISTS configs (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (run_id, section)
+);
+"""
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _json_dumps(payload: Any) -> str:
+    if dataclasses.is_dataclass(payload) and not isinstance(payload, type):
+        payload = dataclasses.asdict(payload)
+    return json.dumps(payload, ensure_ascii=False, default=_json_default)
+
+
+def _sql_column(series: pd.Series, sql_type: str) -> list:
+    """单列 -> sqlite 可写入的 Python 值（缺失值为 NULL）"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime('%Y-%m-%d').astype(object)
+    elif sql_type == 'TEXT':
+        values = series.astype(object).map(lambda value: value if isinstance(value, str) else str(value))
+    elif sql_type == 'INTEGER':
+        values = pd.to_numeric(series, errors='coerce').astype('Int64').astype(object)
+    else:
+        values = pd.to_numeric(series, errors='coerce').astype(float).astype(object)
+    return values.where(series.notna(), None).tolist()
+
+
+class ResultStore:
+    """
+    SQLite 结果库
+
+    参数:
+        path: 数据库文件路径（不存在时自动创建）
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self._create_schema()
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _create_schema(self) -> None:
+        with self.connection:
+            self.connection.executescript(_SCHEMA_SQL)
+            for table, columns in TABLE_SCHEMAS.items():
+                column_sql = ', '.join(f"{_quote(name)} {sql_type}" for name, sql_type in columns)
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE, {column_sql})"
+                )
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_run ON {table} (run_id)")
+                for column in INDEXED_COLUMNS[table]:
+                    self.connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({_quote(column)})"
+                    )
+
+    # ---------------------------------------------------------------- 写入
+
+    def start_run(self, run_type: str,
+                  target: Optional[str] = None,
+                  configs: Optional[Dict[str, Any]] = None,
+                  description: str = '',
+                  export_path: Optional[str] = None,
+                  metrics: Optional[Dict[str, Any]] = None) -> int:
+        """
+        登记一次运行
+
+        参数:
+            run_type: 运行类型，如 'backtest' / 'stability' / 'multi_signal_voting'
+            target: 回测标的
+            configs: 配置名 -> 配置对象（dataclass 或可 JSON 序列化的对象）
+            description: 说明
+            export_path: 对应的导出文件路径
+            metrics: 运行级汇总指标
+
+        返回:
+            run_id
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (run_type, target, created_at, description, export_path, metrics) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_type, target, pd.Timestamp.now().isoformat(timespec='seconds'), description,
+                 export_path, _json_dumps(metrics) if metrics is not None else None)
+            )
+            run_id = cursor.lastrowid
+            if configs:
+                self.connection.executemany(
+                    "INSERT INTO configs (run_id, section, payload) VALUES (?, ?, ?)",
+                    [(run_id, section, _json_dumps(payload)) for section, payload in configs.items()]
+                )
+        return run_id
+
+    def _insert_frame(self, table: str, run_id: int, df: pd.DataFrame) -> int:
+        """按表结构写入 DataFrame 中声明的列，缺少的列记为 NULL"""
+        if df is None or df.empty:
+            return 0
+        columns = TABLE_SCHEMAS[table]
+        values = [[run_id] * len(df)]
+        for name, sql_type in columns:
+            values.append(_sql_column(df[name], sql_type) if name in df.columns else [None] * len(df))
+
+        column_sql = ', '.join(['run_id'] + [_quote(name) for name, _ in columns])
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO {table} ({column_sql}) VALUES ({placeholders})", zip(*values)
+            )
+        return len(df)
+
+    @staticmethod
+    def _with_target(df: pd.DataFrame, target: Optional[str]) -> pd.DataFrame:
+        """统一标的列：优先使用结果中的 backtest_target 列"""
+        if df is None:
+            return df
+        if 'backtest_target' in df.columns:
+            return df.assign(target=df['backtest_target'])
+        return df.assign(target=target)
+
+    def add_backtest_results(self, run_id: int, results: pd.DataFrame,
+                             target: Optional[str] = None) -> int:
+        """写入单次回测结果（每行一个参数组合），返回写入行数"""
+        return self._insert_frame('backtest_rows', run_id, self._with_target(results, target))
+
+    def add_rolling_results(self, run_id: int, results: pd.DataFrame,
+                            target: Optional[str] = None) -> int:
+        """写入滚动窗口回测结果（每行一个窗口内的参数组合），返回写入行数"""
+        return self._insert_frame('rolling_rows', run_id, self._with_target(results, target))
+
+    def add_stability_scores(self, run_id: int, stability_df: pd.DataFrame,
+                             target: Optional[str] = None) -> int:
+        """写入稳定性分析得分，返回写入行数"""
+        return self._insert_frame('stability_scores', run_id, self._with_target(stability_df, target))
+
+    def add_nav_series(self, run_id: int, series: str,
+                       strategy_nav: pd.Series,
+                       benchmark_nav: Optional[pd.Series] = None) -> int:
+        """
+        写入净值序列
+
+        参数:
+            run_id: 运行编号
+            series: 序列名称（同一运行内区分多条净值）
+            strategy_nav: 策略净值（日期索引）
+            benchmark_nav: 基准净值，按策略净值日期对齐
+
+        返回:
+            写入行数
+        """
+        nav = pd.DataFrame({'strategy_nav': strategy_nav})
+        nav['benchmark_nav'] = benchmark_nav.reindex(nav.index) if benchmark_nav is not None else np.nan
+        nav = nav.rename_axis('date').reset_index()
+        nav['series'] = series
+        return self._insert_frame('nav_series', run_id, nav)
+
+    def delete_run(self, run_id: int) -> None:
+        """删除一次运行及其全部结果"""
+        with self.connection:
+            self.connection.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+    # ---------------------------------------------------------------- 查询
+
+    def runs(self, run_type: Optional[str] = None, target: Optional[str] = None) -> pd.DataFrame:
+        """列出运行记录，最新的在前"""
+        return self._read_sql('runs', {'run_type': run_type, 'target': target},
+                              order_by='run_id', ascending=False)
+
+    def run_config(self, run_id: int) -> Dict[str, Any]:
+        """读取某次运行的配置：配置名 -> 反序列化后的对象"""
+        rows = self.connection.execute(
+            "SELECT section, payload FROM configs WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        return {section: json.loads(payload) for section, payload in rows}
+
+    def query(self, table: str,
+              order_by: Optional[str] = None,
+              ascending: bool = False,
+              limit: Optional[int] = None,
+              **filters: Any) -> pd.DataFrame:
+        """
+        按条件查询结果表
+
+        参数:
+            table: 'backtest_rows' / 'rolling_rows' / 'stability_scores' / 'nav_series'
+            order_by: 排序列
+            ascending: 是否升序
+            limit: 最多返回行数
+            filters: 列名=取值（列表/元组表示 IN），如 indicator='PMI', run_id=[1, 2]
+
+        返回:
+            查询结果，附带运行的 run_type 与 created_at
+        """
+        if table not in TABLE_SCHEMAS:
+            raise ValueError(f"未知的结果表: {table}，可选: {list(TABLE_SCHEMAS)}")
+        return self._read_sql(table, filters, order_by, ascending, limit)
+
+    def best_results(self, metric: str = 'information_ratio',
+                     table: str = 'backtest_rows',
+                     group_by: Union[str, Sequence[str]] = 'indicator',
+                     top_n: int = 1,
+                     **filters: Any) -> pd.DataFrame:
+        """
+        跨全部历史运行，按分组取指标最高的记录
+
+        参数:
+            metric: 排序指标
+            table: 结果表
+            group_by: 分组列，如 'indicator' 或 ['indicator', 'signal_type']
+            top_n: 每组保留的记录数
+            filters: 过滤条件，同 query
+
+        返回:
+            每组前 top_n 条记录，按分组与指标降序排列
+        """
+        if table not in TABLE_SCHEMAS:
+            raise ValueError(f"未知的结果表: {table}，可选: {list(TABLE_SCHEMAS)}")
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        self._check_columns(table, [metric] + group_by)
+
+        where_sql, params = self._where_clause(table, filters)
+        partition = ', '.join(f"r.{_quote(col)}" for col in group_by)
+        sql = (
+            f"SELECT * FROM (SELECT r.*, runs.run_type, runs.created_at, "
+            f"ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY r.{_quote(metric)} DESC) AS group_rank "
+            f"FROM {table} AS r JOIN runs USING (run_id){where_sql} "
+            f"AND r.{_quote(metric)} IS NOT NULL) "
+            f"WHERE group_rank <= ? ORDER BY {', '.join(_quote(col) for col in group_by)}, group_rank"
+        )
+        return pd.read_sql_query(sql, self.connection, params=params + [int(top_n)])
+
+    def load_nav(self, run_id: int, series: Optional[str] = None) -> pd.DataFrame:
+        """读取净值序列，日期为索引；未指定 series 且有多条时保留 series 列"""
+        nav = self._read_sql('nav_series', {'run_id': run_id, 'series': series}, order_by='date', ascending=True)
+        nav = nav.drop(columns=['run_type', 'created_at'])
+        nav['date'] = pd.to_datetime(nav['date'])
+        nav = nav.set_index('date').drop(columns='run_id')
+        if series is not None or nav['series'].nunique() <= 1:
+            nav = nav.drop(columns='series')
+        return nav
+
+    def _check_columns(self, table: str, columns: Sequence[str]) -> None:
+        valid = {'run_id'} | {name for name, _ in TABLE_SCHEMAS.get(table, [])}
+        if table == 'runs':
+            valid |= {'run_type', 'target', 'created_at', 'description', 'export_path', 'metrics'}
+        unknown = [col for col in columns if col not in valid]
+        if unknown:
+            raise ValueError(f"{table} 中不存在的列: {unknown}")
+
+    def _where_clause(self, table: str, filters: Dict[str, Any]) -> tuple:
+        filters = {col: value for col, value in filters.items() if value is not None}
+        self._check_columns(table, list(filters))
+        clauses, params = ['1 = 1'], []
+        alias = 'runs' if table == 'runs' else 'r'
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+                value = list(value)
+                clauses.append(f"{alias}.{_quote(column)} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{alias}.{_quote(column)} = ?")
+                params.append(value)
+        return ' WHERE ' + ' AND '.join(clauses), params
+
+    def _read_sql(self, table: str, filters: Dict[str, Any],
+                  order_by: Optional[str] = None,
+                  ascending: bool = False,
+                  limit: Optional[int] = None) -> pd.DataFrame:
+        where_sql, params = self._where_clause(table, filters)
+        if table == 'runs':
+            sql = f"SELECT * FROM runs{where_sql}"
+        else:
+            sql = f"SELECT r.*, runs.run_type, runs.created_at FROM {table} AS r JOIN runs USING (run_id){where_sql}"
+        if order_by is not None:
+            self._check_columns(table, [order_by])
+            sql += f" ORDER BY {_quote(order_by)} {'ASC' if ascending else 'DESC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return pd.read_sql_query(sql, self.connection, params=params)
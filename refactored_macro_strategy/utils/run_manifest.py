@@ -0,0 +1,238 @@
+"""
+运行目录与运行清单
+Content-addressed run directories with manifests
+
+每次运行写入 <output_dir>/runs/<运行键>/，运行键是（数据指纹、全部配置、
+代码版本）的哈希，因此相同输入的运行总是落在同一个目录。目录中的
+manifest.json 记录各阶段的阶段键、耗时、行数与产出文件路径：
+- 运行已完成时，相同输入的重跑直接读取已有产出；
+- 各阶段的阶段键只包含该阶段及其上游用到的输入，下游配置不同的运行
+  可以复用其他运行目录中阶段键相同的上游产出。
+"""
+
+import os
+import json
+import time
+import hashlib
+import dataclasses
+import functools
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+RUNS_SUBDIR = 'runs'
+RUN_MANIFEST = 'manifest.json'
+
+# 不影响结果的配置字段（执行后端、后台导出、当前运行目录），不计入运行键
+RUN_STATE_FIELDS = ('run_dir', 'enable_parallel', 'num_processes', 'executor_backend',
+                    'blas_threads', 'async_export')
+
+
+def _canonical(value: Any) -> Any:
+    """转换为可稳定序列化的结构（dataclass 展开，字典按键排序）"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        value = {name: item for name, item in dataclasses.asdict(value).items()
+                 if name not in RUN_STATE_FIELDS}
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_canonical(item) for item in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def stage_key(*parts: Any) -> str:
+    """
+    由输入计算阶段键
+
+    参数:
+        parts: 数据指纹、配置对象（dataclass/字典/列表）、上游阶段键等
+
+    返回:
+        十六进制摘要字符串
+    """
+    payload = json.dumps(_canonical(list(parts)), ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=12).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """代码版本：包版本号 + 包内全部源文件内容的哈希"""
+    from .. import __version__
+
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.blake2b(digest_size=8)
+    for directory, subdirs, filenames in os.walk(package_dir):
+        subdirs[:] = sorted(name for name in subdirs if name != '__pycache__')
+        for filename in sorted(filenames):
+            if not filename.endswith('.py'):
+                continue
+            path = os.path.join(directory, filename)
+            digest.update(os.path.relpath(path, package_dir).replace(os.sep, '/').encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return f"{__version__}+{digest.hexdigest()}"
+
+
+class RunManifest:
+    """
+    单次运行的目录与清单
+
+    参数:
+        root: 输出根目录（运行目录位于 root/runs/ 下）
+        run_key: 运行键
+        inputs: 运行输入摘要（数据指纹、配置、代码版本），写入清单供查阅
+    """
+
+    def __init__(self, root: str, run_key: str, inputs: Optional[Dict[str, Any]] = None):
+        self.root = root
+        self.run_key = run_key
+        self.directory = os.path.join(root, RUNS_SUBDIR, run_key)
+        self.manifest = {
+            'run_key': run_key,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'inputs': _canonical(inputs or {}),
+            'stages': {},
+            'complete': False,
+        }
+        manifest_path = os.path.join(self.directory, RUN_MANIFEST)
+        if os.path.isfile(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    @classmethod
+    def open(cls, root: str, data_fingerprint: str,
+             configs: Dict[str, Any], version: Optional[str] = None) -> 'RunManifest':
+        """
+        按运行输入打开（或新建）运行目录
+
+        参数:
+            root: 输出根目录
+            data_fingerprint: 输入数据指纹
+            configs: 影响结果的全部配置（名称 -> 配置对象）
+            version: 代码版本，默认 code_version()
+
+        返回:
+            RunManifest
+        """
+        version = version or code_version()
+        run_key = stage_key(data_fingerprint, configs, version)
+        inputs = {'data_fingerprint': data_fingerprint, 'code_version': version, 'configs': configs}
+        return cls(root, run_key, inputs)
+
+    def __repr__(self) -> str:
+        state = '已完成' if self.is_complete else '未完成'
+        return f"RunManifest('{self.directory}', {len(self.stages)} 个阶段, {state})"
+
+    @property
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest['stages']
+
+    @property
+    def is_complete(self) -> bool:
+        """运行已完成且各阶段产出文件都还在"""
+        return bool(self.manifest.get('complete')) and all(
+            _artifacts_exist(record) for record in self.stages.values()
+        )
+
+    def path(self, filename: str) -> str:
+        """运行目录下的文件路径（目录不存在时创建）"""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, filename)
+
+    def save(self) -> str:
+        """写出清单（先写临时文件再替换）"""
+        manifest_path = self.path(RUN_MANIFEST)
+        self.manifest['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        temp_path = manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, manifest_path)
+        return manifest_path
+
+    def artifact(self, stage: str, name: str) -> Optional[str]:
+        """某阶段的产出文件路径"""
+        return self.stages.get(stage, {}).get('artifacts', {}).get(name)
+
+    def find_stage(self, stage: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        查找阶段键相同且产出文件仍在的已完成阶段（优先本运行目录）
+
+        参数:
+            stage: 阶段名
+            key: 阶段键
+
+        返回:
+            阶段记录（含 run_key），没有可复用的阶段时返回None
+        """
+        record = self.stages.get(stage)
+        if record is not None and record.get('key') == key and _artifacts_exist(record):
+            return {**record, 'run_key': self.run_key}
+
+        runs_dir = os.path.join(self.root, RUNS_SUBDIR)
+        if not os.path.isdir(runs_dir):
+            return None
+        for run_key in sorted(os.listdir(runs_dir)):
+            manifest_path = os.path.join(runs_dir, run_key, RUN_MANIFEST)
+            if run_key == self.run_key or not os.path.isfile(manifest_path):
+                continue
+            try:
+                with open(manifest_path, encoding='utf-8') as f:
+                    record = json.load(f)['stages'].get(stage)
+            except (OSError, ValueError, KeyError):
+                continue
+            if record is not None and record.get('key') == key and _artifacts_exist(record):
+                return {**record, 'run_key': run_key}
+        return None
+
+    def reuse_stage(self, stage: str, record: Dict[str, Any]) -> None:
+        """登记复用的阶段（产出文件仍指向原运行目录）"""
+        reused = {name: value for name, value in record.items() if name != 'run_key'}
+        if record['run_key'] != self.run_key:
+            reused['reused_from'] = record['run_key']
+        self.stages[stage] = reused
+        self.save()
+
+    @contextmanager
+    def stage(self, name: str, key: str) -> Iterator[Dict[str, Any]]:
+        """
+        计时执行一个阶段，正常结束后写入清单
+
+        with 块内向返回的记录写入 'rows'、'artifacts'（名称 -> 路径）与 'info'。
+
+        参数:
+            name: 阶段名
+            key: 阶段键
+        """
+        record = {'key': key, 'started_at': datetime.now().isoformat(timespec='seconds'),
+                  'rows': None, 'artifacts': {}, 'info': {}}
+        self.manifest['complete'] = False
+        start = time.time()
+        yield record
+        record['duration_seconds'] = round(time.time() - start, 3)
+        self.stages[name] = _canonical(record)
+        self.save()
+
+    def complete(self) -> None:
+        """标记运行完成"""
+        self.manifest['complete'] = True
+        self.save()
+
+    def timing_summary(self) -> List[str]:
+        """各阶段耗时与行数的文字摘要"""
+        lines = []
+        for name, record in self.stages.items():
+            source = f" (复用 {record['reused_from']})" if record.get('reused_from') else ''
+            rows = f", {record['rows']} 行" if record.get('rows') is not None else ''
+            lines.append(f"{name}: {record.get('duration_seconds', 0):.2f}秒{rows}{source}")
+        return lines
+
+
+def _artifacts_exist(record: Dict[str, Any]) -> bool:
+    return all(path and os.path.exists(path) for path in record.get('artifacts', {}).values())
@@ -0,0 +1,220 @@
+"""
+结果表读写
+Pluggable table export backend
+
+完整数据表（滚动原始结果、净值曲线、日度收益等）按 ExportConfig.export_format
+写成 Parquet / Feather / CSV 文件；Excel 只保留精简的汇总工作簿。
+Excel 默认使用 xlsxwriter 的 constant_memory 模式逐行流式写入（未安装时退回 openpyxl），
+也可按 ExportConfig.excel_engine 指定 openpyxl。
+"""
+
+import os
+import datetime
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import xlsxwriter
+except ImportError:  # 可选依赖
+    xlsxwriter = None
+
+try:
+    import pyarrow
+except ImportError:  # 可选依赖，Parquet/Feather 需要
+    pyarrow = None
+
+
+TABLE_FORMATS = ('excel', 'parquet', 'feather', 'csv')
+TABLE_EXTENSIONS = {'excel': '.xlsx', 'parquet': '.parquet', 'feather': '.feather', 'csv': '.csv'}
+EXCEL_ENGINES = ('xlsxwriter', 'openpyxl')
+EXCEL_SHEET_NAME_LIMIT = 31
+
+
+def resolve_table_format(export_format: str) -> str:
+    """
+    检查导出格式，缺少 pyarrow 时 Parquet/Feather 退回 CSV
+
+    参数:
+        export_format: 'excel' / 'parquet' / 'feather' / 'csv'
+
+    返回:
+        实际使用的格式
+    """
+    if export_format not in TABLE_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}，可选: {TABLE_FORMATS}")
+    if export_format in ('parquet', 'feather') and pyarrow is None:
+        print(f"警告: 未安装pyarrow，{export_format} 导出改用CSV")
+        return 'csv'
+    return export_format
+
+
+def table_filepath(path: str, export_format: str) -> str:
+    """将文件路径的扩展名替换为导出格式对应的扩展名"""
+    return os.path.splitext(path)[0] + TABLE_EXTENSIONS[export_format]
+
+
+def _excel_value(value):
+    """单个值 -> Excel 可写入的 Python 值（缺失值为空单元格）"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if np.isfinite(value) else None
+    if isinstance(value, pd.Timestamp):
+        return value.tz_localize(None).to_pydatetime() if value.tzinfo else value.to_pydatetime()
+    if isinstance(value, (str, bool, int, datetime.date)):
+        return value
+    return str(value)
+
+
+def _excel_cell_columns(df: pd.DataFrame) -> List[list]:
+    """按列转换为 Excel 可写入的 Python 值，数值列整列转换"""
+    columns = []
+    for _, series in df.items():
+        if pd.api.types.is_float_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            array = series.to_numpy(dtype=float, na_value=np.nan)
+            values = [value if ok else None for value, ok in zip(array.tolist(), np.isfinite(array))]
+        elif (pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series)) and not series.hasnans:
+            values = series.to_numpy().tolist()
+        else:
+            values = [_excel_value(value) for value in series]
+        columns.append(values)
+    return columns
+
+
+def write_excel_workbook(path: str, sheets: Dict[str, pd.DataFrame],
+                         engine: str = 'xlsxwriter') -> str:
+    """
+    将多个表写入一个 Excel 工作簿（不写索引，需要索引的表请先 reset_index）
+
+    参数:
+        path: 输出路径
+        sheets: 工作表名 -> DataFrame
+        engine: 'xlsxwriter'（流式写出，未安装时退回 openpyxl）或 'openpyxl'
+
+    返回:
+        输出路径
+    """
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"不支持的Excel引擎: {engine}，可选: {EXCEL_ENGINES}")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sheets = {name[:EXCEL_SHEET_NAME_LIMIT]: df for name, df in sheets.items() if df is not None}
+
+    if engine == 'openpyxl' or xlsxwriter is None:
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        return path
+
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'strings_to_urls': False
+    })
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    try:
+        for sheet_name, df in sheets.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            # constant_memory 模式只能按行顺序写入
+            worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+            for row_number, row in enumerate(zip(*_excel_cell_columns(df)), start=1):
+                worksheet.write_row(row_number, 0, row)
+    finally:
+        workbook.close()
+    return path
+
+
+def write_table(df: pd.DataFrame, path: str, export_format: str = 'csv',
+                sheet_name: str = 'Sheet1', excel_engine: str = 'xlsxwriter') -> str:
+    """
+    按格式写出单个数据表
+
+    参数:
+        df: 数据表（不写索引）
+        path: 输出路径，扩展名按格式自动替换
+        export_format: 'excel' / 'parquet' / 'feather' / 'csv'
+        sheet_name: Excel 格式时的工作表名
+        excel_engine: Excel 格式时的写出引擎
+
+    返回:
+        实际输出路径
+    """
+    export_format = resolve_table_format(export_format)
+    path = table_filepath(path, export_format)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    if export_format == 'excel':
+        return write_excel_workbook(path, {sheet_name: df}, excel_engine)
+    if export_format == 'parquet':
+        df.to_parquet(path, index=False)
+    elif export_format == 'feather':
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+def read_table(path: str, sheet_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    按扩展名读取 write_table 写出的数据表
+
+    参数:
+        path: 文件路径
+        sheet_name: Excel 文件的工作表名，默认第一个
+
+    返回:
+        DataFrame
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(path, sheet_name=sheet_name or 0)
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension == '.feather':
+        return pd.read_feather(path)
+    if extension == '.csv':
+        return pd.read_csv(path, encoding='utf-8-sig')
+    raise ValueError(f"无法识别的数据表格式: {path}")
+
+
+def export_tables(path: str,
+                  sheets: Dict[str, pd.DataFrame],
+                  full_table_names: Sequence[str] = (),
+                  export_format: str = 'excel',
+                  excel_engine: str = 'xlsxwriter') -> List[str]:
+    """
+    导出一组结果表：汇总表写入 Excel 工作簿，完整数据表按格式写出
+
+    export_format 为 'excel' 时所有表按 sheets 的顺序写入同一个工作簿（与历史输出一致）；
+    其他格式时 full_table_names 中的表各自写成 {工作簿名}_{表名}.{扩展名}，
+    工作簿只保留其余的汇总表。
+
+    参数:
+        path: Excel 工作簿路径
+        sheets: 工作表名 -> DataFrame（按工作簿中的顺序）
+        full_table_names: 属于完整数据表的表名
+        export_format: 完整数据表的导出格式
+        excel_engine: 工作簿的写出引擎
+
+    返回:
+        写出的文件路径列表（有工作簿时第一个为工作簿）
+    """
+    export_format = resolve_table_format(export_format)
+    sheets = {name: df for name, df in sheets.items() if df is not None}
+
+    if export_format == 'excel':
+        return [write_excel_workbook(path, sheets, excel_engine)] if sheets else []
+
+    summary_sheets = {name: df for name, df in sheets.items() if name not in full_table_names}
+    written = []
+    if summary_sheets:
+        written.append(write_excel_workbook(path, summary_sheets, excel_engine))
+    base_path = os.path.splitext(path)[0]
+    for table_name, df in sheets.items():
+        if table_name in full_table_names:
+            written.append(write_table(df, f"{base_path}_{table_name}", export_format))
+    return written
@@ -3,7 +3,14 @@
 Workflow modules for refactored macro strategy
 """
 
-from .main_workflow import MainWorkflow
-from .stability_workflow import StabilityWorkflow
+from ..utils.lazy_exports import lazy_exports
 
-__all__ = ['MainWorkflow', 'StabilityWorkflow'] 
\ No newline at end of file
+__all__ = ['MainWorkflow', 'StabilityWorkflow', 'DagRunner', 'DagStage', 'use_shared_runner']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'MainWorkflow': '.main_workflow',
+    'StabilityWorkflow': '.stability_workflow',
+    'DagRunner': '.dag_runner',
+    'DagStage': '.dag_runner',
+    'use_shared_runner': '.dag_runner',
+})
@@ -0,0 +1,591 @@
+"""
+常驻分析服务
+Warm long-lived analysis daemon with a local HTTP API
+
+交互式调参时，每次查询都重新加载Excel、重新生成信号、重新读取滚动结果，
+真正的计算只占很小一部分。这里启动一个常驻进程（仅监听 127.0.0.1），
+以下内容在进程内常驻：
+- 已加载的数据（经由 DagRunner 的内存缓存）
+- 单指标信号缓存：(指标, 信号类型, 参数) -> 信号序列
+- 单组合回测结果缓存：相同组合的重复查询直接返回
+- 投票评估器：全部候选信号列、交易日历与基准（见 VotingEvaluator），任意投票配置即时评估
+- 已载入滚动结果的显著组合与全窗口IR统计，调整稳定性权重时只重新打分
+- 批量回测经 TaskExecutor 线程后端并行（占用全局工作单元预算，嵌套的并行调用降级为串行）
+
+接口（POST JSON，GET 仅用于 /status）:
+    /status               服务状态与各接口耗时统计
+    /backtest             单个 (指标, 信号类型, 参数, 方向) 回测
+    /backtest/batch       多个组合的回测（线程并行）
+    /voting               投票配置回测（普通 / 按比例，可直接提交配置文本）
+    /stability/load       载入滚动回测结果，缓存显著组合与全窗口IR统计
+    /stability/reweight   以新的权重 / 阈值重新计算稳定性得分
+    /shutdown             关闭服务
+
+命令行:
+    python -m refactored_macro_strategy.workflows.analysis_server serve --data 宏观指标与逻辑.xlsx
+"""
+
+import json
+import time
+import dataclasses
+import threading
+import argparse
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import SignalConfig, BacktestConfig
+from ..core.signal_engine import SignalEngine
+from ..core.backtest_engine import BacktestEngine
+from ..core.voting_evaluator import VotingEvaluator
+from ..core.stability_analyzer import RankingStabilityAnalyzer, StabilityConfig
+from ..utils.partitioned_results import PartitionedResults
+from ..utils.async_exporter import snapshot
+from ..utils.executor import TaskExecutor
+from .dag_runner import DagRunner, data_stage
+from .stability_workflow import StabilityWorkflow
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 重新打分时可调整的稳定性配置字段（提取显著组合的字段变化需要重新载入）
+REWEIGHT_FIELDS = ('ranking_weight', 'significance_weight', 'performance_weight',
+                   'absolute_performance_weight', 'min_appearance_windows',
+                   'high_stability_threshold')
+
+
+def to_jsonable(value: Any) -> Any:
+    """将结果（DataFrame/Series/numpy标量/时间戳等）转换为可JSON序列化的结构"""
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if not isinstance(value.index, pd.RangeIndex) else value
+        return json.loads(frame.to_json(orient='records', date_format='iso', force_ascii=False))
+    if isinstance(value, pd.Series):
+        payload = json.loads(value.to_json(orient='split', date_format='iso', force_ascii=False))
+        return {'index': payload['index'], 'values': payload['data']}
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class AnalysisService:
+    """
+    常驻分析服务（与传输层无关，可直接在进程内调用）
+
+    参数:
+        data_path: 数据文件路径
+        signal_config: 信号配置
+        backtest_config: 回测配置（backtest_target 为默认回测标的）
+        stability_config: 稳定性分析基础配置
+        max_workers: 批量回测的并行线程数上限（同时受全局工作单元预算约束）
+        cache_dir: DagRunner 磁盘缓存目录，None 时只在内存中缓存
+    """
+
+    def __init__(self, data_path: str,
+                 signal_config: Optional[SignalConfig] = None,
+                 backtest_config: Optional[BacktestConfig] = None,
+                 stability_config: Optional[StabilityConfig] = None,
+                 max_workers: int = 4,
+                 cache_dir: Optional[str] = None):
+        if max_workers < 1:
+            raise ValueError(f"max_workers必须为正整数，当前为: {max_workers}")
+        self.data_path = data_path
+        self.signal_config = signal_config or SignalConfig()
+        self.backtest_config = backtest_config or BacktestConfig()
+        self.stability_config = stability_config or StabilityConfig()
+        self.runner = DagRunner(cache_dir=cache_dir)
+        self.signal_engine = SignalEngine(self.signal_config)
+        self.backtest_engine = BacktestEngine(self.backtest_config)
+        self.executor = TaskExecutor(backend='thread', max_workers=max_workers)
+        self.max_workers = max_workers
+        self.started_at = time.time()
+
+        self._signals: Dict[Tuple[str, str, int], pd.Series] = {}
+        self._backtests: Dict[Tuple, Dict[str, Any]] = {}
+        self._voting_evaluators: Dict[Tuple[str, str], VotingEvaluator] = {}
+        self._stability: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.request_stats: Dict[str, Dict[str, float]] = {}
+
+        print(f"分析服务预热: 加载数据 {data_path}")
+        self.data = self.runner.compute(data_stage(self.runner, data_path))
+        print(f"  宏观指标数据: {self.data['indicator_data'].shape}")
+        print(f"  价格数据: {self.data['price_data'].shape}")
+
+    def close(self) -> None:
+        """释放常驻缓存"""
+        with self._lock:
+            self._signals.clear()
+            self._backtests.clear()
+            self._voting_evaluators.clear()
+            self._stability.clear()
+        self.runner.clear_memory()
+
+    def record_request(self, endpoint: str, seconds: float) -> None:
+        """登记一次请求耗时"""
+        with self._stats_lock:
+            stats = self.request_stats.setdefault(endpoint, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += seconds * 1000
+            stats['max_ms'] = max(stats['max_ms'], seconds * 1000)
+
+    def status(self) -> Dict[str, Any]:
+        """服务状态：数据规模、缓存条目与各接口耗时"""
+        with self._stats_lock:
+            requests = {endpoint: {**stats, 'mean_ms': stats['total_ms'] / stats['count']}
+                        for endpoint, stats in self.request_stats.items()}
+        return {
+            'data_path': self.data_path,
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'indicator_shape': list(self.data['indicator_data'].shape),
+            'price_shape': list(self.data['price_data'].shape),
+            'cached_signals': len(self._signals),
+            'cached_backtests': len(self._backtests),
+            'voting_evaluators': len(self._voting_evaluators),
+            'stability_sets': {name: {'source': entry['source'], 'combinations': int(len(entry['ir_stats'])),
+                                      'significant_rows': int(len(entry['significant_df']))}
+                               for name, entry in self._stability.items()},
+            'max_workers': self.max_workers,
+            'requests': requests,
+        }
+
+    # ------------------------------------------------------------ 单指标回测
+
+    def _signal(self, indicator: str, signal_type: str, parameter_n: int) -> pd.Series:
+        """单指标信号（首次计算后常驻）"""
+        key = (indicator, signal_type, int(parameter_n))
+        signals = self._signals.get(key)
+        if signals is None:
+            indicator_data = self.data['indicator_data']
+            if indicator not in indicator_data.columns:
+                raise ValueError(f"未知指标: {indicator}")
+            signals = self.signal_engine.generate_single_signal(indicator_data[indicator], signal_type, int(parameter_n))
+            self._signals[key] = signals
+        return signals
+
+    def backtest(self, indicator: str, signal_type: str, parameter_n: int,
+                 assumed_direction: int = 1,
+                 backtest_target: Optional[str] = None,
+                 window_start_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        单个组合的回测
+
+        参数:
+            indicator: 指标名称
+            signal_type: 信号类型
+            parameter_n: 信号参数
+            assumed_direction: 假设方向（1 或 -1）
+            backtest_target: 回测标的，默认使用回测配置中的标的
+            window_start_date: 回测起始日期（可选）
+
+        返回:
+            回测结果字典（与批量回测的单行结果相同），失败时含 error
+        """
+        if int(assumed_direction) not in (1, -1):
+            raise ValueError(f"assumed_direction必须为1或-1，当前为: {assumed_direction}")
+        target = backtest_target or self.backtest_config.backtest_target
+        self.backtest_config.get_target_columns(target)
+        key = (indicator, signal_type, int(parameter_n), int(assumed_direction), target, window_start_date)
+        result = self._backtests.get(key)
+        if result is None:
+            signals = self._signal(indicator, signal_type, parameter_n)
+            start = pd.Timestamp(window_start_date) if window_start_date else None
+            result = self.backtest_engine.run_single_backtest_multi_target(
+                indicator, signal_type, int(parameter_n), signals, self.data['price_data'],
+                int(assumed_direction), start, self.data['memo_data'], [target]
+            )[0]
+            self._backtests[key] = result
+        return dict(result)
+
+    def batch_backtest(self, combinations: List[Dict[str, Any]],
+                       backtest_target: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        多个组合的回测（经 TaskExecutor 线程并行）
+
+        参数:
+            combinations: 组合列表，每项为 backtest 的关键字参数
+            backtest_target: 未在组合中指定标的时使用的回测标的
+
+        返回:
+            与 combinations 顺序一致的结果列表
+        """
+        args_list = [({'backtest_target': backtest_target, **combination},) for combination in combinations]
+        return self.executor.starmap(self._safe_backtest, args_list)
+
+    def _safe_backtest(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            return self.backtest(**params)
+        except (TypeError, ValueError) as e:
+            return {'error': str(e)}
+
+    # ------------------------------------------------------------ 投票策略
+
+    def _voting_evaluator(self, start_date: str, end_date: str) -> VotingEvaluator:
+        """回测区间对应的投票评估器（候选信号、交易日历与基准常驻）"""
+        key = (start_date, end_date)
+        evaluator = self._voting_evaluators.get(key)
+        if evaluator is None:
+            with self._lock:
+                evaluator = self._voting_evaluators.get(key)
+                if evaluator is None:
+                    evaluator = VotingEvaluator(self.data['indicator_data'], self.data['price_data'],
+                                                self.signal_config, start_date, end_date)
+                    self._voting_evaluators[key] = evaluator
+        return evaluator
+
+    def voting(self, strategy_type: Optional[str] = None,
+               signals: Optional[List[Dict]] = None,
+               config_text: Optional[str] = None,
+               proportional: bool = False,
+               start_date: str = '2013-01-01',
+               end_date: str = '2025-05-27',
+               include_yearly: bool = True,
+               include_nav: bool = False) -> Dict[str, Any]:
+        """
+        投票策略回测（基于 VotingEvaluator，不导出文件）
+
+        参数:
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')；给出 config_text 时可省略
+            signals: 自定义信号配置，默认使用配置中的投票信号
+            config_text: 制表符分隔的配置文本（格式同 parse_signal_config_text），可含两个策略
+            proportional: 是否按投票比例分配仓位
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            include_yearly: 是否计算年度绩效表
+            include_nav: 是否返回策略与基准净值曲线
+
+        返回:
+            {'strategy_type', 'signal_count', 'skipped_signals', 'enhanced_metrics'[, 'strategy_nav', 'benchmark_nav']}；
+            给出 config_text 时为 策略类型 -> 上述结果
+        """
+        evaluator = self._voting_evaluator(start_date, end_date)
+        mode = 'proportional' if proportional else 'binary'
+        if config_text is not None:
+            parsed = evaluator.signal_configuration.parse_signal_config_text(config_text)
+            if strategy_type is not None:
+                parsed = {strategy_type: parsed.get(strategy_type, [])}
+            results = {name: self._voting_response(evaluator.evaluate(configs, name, mode, include_yearly),
+                                                   include_nav)
+                       for name, configs in parsed.items() if configs}
+            if not results:
+                raise ValueError("配置文本中没有可用的信号配置")
+            return results
+
+        if strategy_type is None:
+            raise ValueError("未指定策略类型")
+        if signals is None:
+            signals = self.signal_config.get_voting_strategy_signals(strategy_type)
+        if not signals:
+            raise ValueError(f"没有找到 {strategy_type} 策略的信号配置")
+        return self._voting_response(evaluator.evaluate(signals, strategy_type, mode, include_yearly), include_nav)
+
+    @staticmethod
+    def _voting_response(result: Dict[str, Any], include_nav: bool) -> Dict[str, Any]:
+        response = {'strategy_type': result['strategy_type'], 'mode': result['mode'],
+                    'signal_count': result['signal_count'], 'skipped_signals': result['skipped_signals'],
+                    'enhanced_metrics': result['enhanced_metrics']}
+        if include_nav:
+            response['strategy_nav'] = result['strategy_nav']
+            response['benchmark_nav'] = result['benchmark_nav']
+        return response
+
+    # ------------------------------------------------------------ 稳定性重新打分
+
+    def load_stability(self, rolling_results_file: str,
+                       name: str = 'default',
+                       backtest_target: Optional[str] = None) -> Dict[str, Any]:
+        """
+        载入滚动回测结果，缓存显著组合与全窗口IR统计
+
+        参数:
+            rolling_results_file: 滚动结果文件、.cols 列式目录或分区目录
+            name: 缓存名称（可同时载入多组结果）
+            backtest_target: 多标的结果中只分析该标的
+
+        返回:
+            载入摘要
+        """
+        analyzer = RankingStabilityAnalyzer(self.stability_config)
+        rolling_results = StabilityWorkflow.load_rolling_results(rolling_results_file)
+        if isinstance(rolling_results, PartitionedResults):
+            significant_df, ir_stats = analyzer.stream_partitioned_results(rolling_results, backtest_target)
+        else:
+            if backtest_target is not None and 'backtest_target' in rolling_results.columns:
+                rolling_results = rolling_results[rolling_results['backtest_target'].astype(str) == backtest_target]
+                rolling_results = rolling_results.reset_index(drop=True)
+            significant_df = analyzer.extract_significant_combinations_per_window(rolling_results)
+            if not significant_df.empty:
+                analyzer.registry.encode_frame(significant_df)
+                analyzer.registry.encode_frame(rolling_results)
+                ir_stats = analyzer._all_window_ir_stats(rolling_results)
+        if significant_df.empty:
+            raise ValueError(f"滚动结果中没有显著组合: {rolling_results_file}")
+
+        with self._lock:
+            self._stability[name] = {'source': rolling_results_file, 'registry': analyzer.registry,
+                                     'significant_df': significant_df, 'ir_stats': ir_stats}
+        return {'name': name, 'source': rolling_results_file,
+                'significant_rows': int(len(significant_df)),
+                'windows': int(significant_df['window_id'].nunique()),
+                'combinations': int(len(ir_stats))}
+
+    def stability_reweight(self, name: str = 'default', top_n: int = 20,
+                           **overrides: Any) -> Dict[str, Any]:
+        """
+        以新的权重 / 阈值重新计算稳定性得分（不重新读取滚动结果）
+
+        参数:
+            name: load_stability 时的缓存名称
+            top_n: 返回得分最高的组合数
+            overrides: REWEIGHT_FIELDS 中的稳定性配置字段
+
+        返回:
+            {'config', 'combinations', 'top'}
+        """
+        unknown = [field for field in overrides if field not in REWEIGHT_FIELDS]
+        if unknown:
+            raise ValueError(f"不支持重新打分时调整的字段: {unknown}，可调整: {list(REWEIGHT_FIELDS)}")
+        if name not in self._stability:
+            raise ValueError(f"尚未载入滚动结果: {name}")
+
+        config = dataclasses.replace(self.stability_config, **overrides)
+        entry = self._stability[name]
+        analyzer = RankingStabilityAnalyzer(config)
+        # 组合编码与缓存的显著组合一致，复用载入时的注册表
+        analyzer.registry = entry['registry']
+        with self._lock:
+            stability_df = analyzer._score_combinations(snapshot(entry['significant_df']), entry['ir_stats'])
+        return {'config': dataclasses.asdict(config), 'combinations': int(len(stability_df)),
+                'top': stability_df.head(int(top_n)).reset_index(drop=True)}
+
+
+class _AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """JSON 请求处理（服务对象挂在 server.service 上）"""
+
+    server_version = 'MacroAnalysisServer/1.0'
+
+    def _routes(self) -> Dict[str, Callable[..., Any]]:
+        service = self.server.service
+        return {
+            '/status': lambda: service.status(),
+            '/backtest': service.backtest,
+            '/backtest/batch': service.batch_backtest,
+            '/voting': service.voting,
+            '/stability/load': service.load_stability,
+            '/stability/reweight': service.stability_reweight,
+        }
+
+    def _send(self, status: int, payload: Any) -> None:
+        body = json.dumps(to_jsonable(payload), ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != '/status':
+            self._send(404, {'error': f'未知接口: {self.path}'})
+            return
+        self._send(200, self.server.service.status())
+
+    def do_POST(self) -> None:
+        if self.path == '/shutdown':
+            self._send(200, {'status': 'shutting down'})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        handler = self._routes().get(self.path)
+        if handler is None:
+            self._send(404, {'error': f'未知接口: {self.path}'})
+            return
+
+        start = time.time()
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            params = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(params, dict):
+                raise ValueError("请求体必须是JSON对象")
+            result = handler(**params)
+        except (TypeError, ValueError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            print(f"分析服务请求失败: {self.path} - {e}")
+            self._send(500, {'error': str(e)})
+            return
+        elapsed = time.time() - start
+        self.server.service.record_request(self.path, elapsed)
+        self._send(200, {'result': result, 'elapsed_ms': round(elapsed * 1000, 2)})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """请求耗时已计入 /status，不逐条打印访问日志"""
+
+
+def create_analysis_server(service: AnalysisService,
+                           host: str = DEFAULT_HOST,
+                           port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    创建绑定到本机的HTTP服务（尚未开始处理请求）
+
+    参数:
+        service: 已预热的分析服务
+        host: 监听地址，默认只监听本机回环地址
+        port: 端口，0 表示由系统分配
+
+    返回:
+        ThreadingHTTPServer，实际端口见 server.server_address
+    """
+    server = ThreadingHTTPServer((host, port), _AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def start_analysis_server(service: AnalysisService,
+                          host: str = DEFAULT_HOST,
+                          port: int = DEFAULT_PORT) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    """在后台线程中启动服务（适合在 notebook 或脚本中内嵌使用）"""
+    server = create_analysis_server(service, host, port)
+    thread = threading.Thread(target=server.serve_forever, name='analysis-server', daemon=True)
+    thread.start()
+    return server, thread
+
+
+def serve_analysis(data_path: str,
+                   host: str = DEFAULT_HOST,
+                   port: int = DEFAULT_PORT,
+                   rolling_results_file: Optional[str] = None,
+                   max_workers: int = 4,
+                   cache_dir: Optional[str] = None) -> None:
+    """
+    预热并在前台运行分析服务，直到收到 /shutdown 或 Ctrl+C
+
+    参数:
+        data_path: 数据文件路径
+        host: 监听地址
+        port: 端口
+        rolling_results_file: 启动时载入的滚动回测结果（可选）
+        max_workers: 批量回测的并行线程数上限
+        cache_dir: DagRunner 磁盘缓存目录
+    """
+    service = AnalysisService(data_path, max_workers=max_workers, cache_dir=cache_dir)
+    if rolling_results_file:
+        service.load_stability(rolling_results_file)
+    server = create_analysis_server(service, host, port)
+    print(f"分析服务已启动: http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("收到中断信号，关闭分析服务")
+    finally:
+        server.server_close()
+        service.close()
+
+
+class AnalysisClient:
+    """
+    分析服务客户端
+
+    参数:
+        host: 服务地址
+        port: 服务端口
+        timeout: 请求超时（秒）
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: float = 300.0):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        发送请求并返回结果
+
+        参数:
+            path: 接口路径
+            payload: 请求参数（None 时以GET请求）
+
+        返回:
+            接口返回的 result 字段（/status 为状态字典）
+        """
+        data = None if payload is None else json.dumps(to_jsonable(payload), ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.base_url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read() or b'{}').get('error', e.reason)
+            if e.code == 400:
+                raise ValueError(message) from None
+            raise RuntimeError(f"分析服务请求失败: {path} - {message}") from None
+        return body.get('result', body)
+
+    def status(self) -> Dict[str, Any]:
+        return self.request('/status')
+
+    def backtest(self, **params: Any) -> Dict[str, Any]:
+        return self.request('/backtest', params)
+
+    def batch_backtest(self, combinations: List[Dict[str, Any]], **params: Any) -> List[Dict[str, Any]]:
+        return self.request('/backtest/batch', {'combinations': combinations, **params})
+
+    def voting(self, **params: Any) -> Dict[str, Any]:
+        return self.request('/voting', params)
+
+    def load_stability(self, rolling_results_file: str, **params: Any) -> Dict[str, Any]:
+        return self.request('/stability/load', {'rolling_results_file': rolling_results_file, **params})
+
+    def stability_reweight(self, **params: Any) -> Dict[str, Any]:
+        return self.request('/stability/reweight', params)
+
+    def shutdown(self) -> None:
+        self.request('/shutdown', {})
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口：serve 启动服务，query 向运行中的服务发送请求"""
+    parser = argparse.ArgumentParser(description='宏观策略常驻分析服务')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='预热并启动分析服务')
+    serve_parser.add_argument('--data', required=True, help='数据文件路径')
+    serve_parser.add_argument('--host', default=DEFAULT_HOST)
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--rolling-results', help='启动时载入的滚动回测结果')
+    serve_parser.add_argument('--workers', type=int, default=4, help='批量回测的并行线程数上限')
+    serve_parser.add_argument('--cache-dir', help='阶段缓存目录')
+
+    query_parser = subparsers.add_parser('query', help='向运行中的服务发送请求')
+    query_parser.add_argument('path', help='接口路径，如 /backtest')
+    query_parser.add_argument('params', nargs='?', default=None, help='JSON格式的请求参数')
+    query_parser.add_argument('--host', default=DEFAULT_HOST)
+    query_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve_analysis(args.data, args.host, args.port, args.rolling_results, args.workers, args.cache_dir)
+        return
+
+    client = AnalysisClient(args.host, args.port)
+    payload = json.loads(args.params) if args.params else ({} if args.path != '/status' else None)
+    print(json.dumps(client.request(args.path, payload), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,369 @@
+"""
+带缓存的阶段图运行器
+Memoized DAG runner for workflow stages
+
+各工作流都按 加载 → 信号 → 回测 → 分析 的顺序执行，多个场景（价值成长与大小盘、
+普通投票与按比例投票……）之间有大量完全相同的上游阶段。这里把每个阶段声明为
+DagStage：阶段函数、上游阶段与本阶段用到的配置切片。阶段键是
+（阶段名、配置切片、上游阶段键、输入文件指纹、代码版本）的哈希：
+- 同一个运行器内阶段键相同的阶段只执行一次，结果保存在内存中；
+- 指定 cache_dir 时结果同时按阶段键写入磁盘，跨进程复用；
+- run 时依赖已就绪的阶段经 TaskExecutor 线程后端并发执行，占用全局工作单元预算。
+
+工作流通过 use_shared_runner 启用一个进程内共享的运行器，启用后
+load_data / generate_vote_matrix 等入口经由运行器取数，未启用时行为不变。
+"""
+
+import os
+import time
+import pickle
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from ..config import SignalConfig, BacktestConfig, ExportConfig
+from ..core.signal_engine import SignalEngine
+from ..core.backtest_engine import BacktestEngine
+from ..core.result_processor import ResultProcessor
+from ..core.multi_signal_voting import MultiSignalVotingEngine
+from ..utils.data_loader import load_all_data
+from ..utils.executor import TaskExecutor
+from ..utils.fingerprint import file_fingerprint
+from ..utils.async_exporter import snapshot
+from ..utils.run_manifest import stage_key, code_version
+
+
+class DagStage:
+    """
+    阶段图中的一个阶段
+
+    参数:
+        name: 阶段名（用于日志与缓存文件名）
+        func: 阶段函数，以 func(*上游结果, **config) 调用
+        inputs: 上游阶段
+        config: 本阶段用到的配置切片，作为关键字参数传给 func 并计入阶段键
+        files: 输入文件，其内容指纹计入阶段键
+        persist: 是否写入磁盘缓存
+    """
+
+    def __init__(self, name: str, func: Callable,
+                 inputs: Sequence['DagStage'] = (),
+                 config: Optional[Dict[str, Any]] = None,
+                 files: Sequence[str] = (),
+                 persist: bool = True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.config = dict(config or {})
+        self.files = tuple(files)
+        self.persist = persist
+        self.key = stage_key(
+            name, f"{func.__module__}.{func.__qualname__}", self.config,
+            [stage.key for stage in self.inputs],
+            [file_fingerprint(path) for path in self.files],
+            code_version()
+        )
+
+    def __repr__(self) -> str:
+        return f"DagStage('{self.name}', key={self.key})"
+
+
+def _share(value: Any) -> Any:
+    """返回缓存结果的快照（写时复制生效时为浅拷贝，否则深拷贝），调用方修改不影响缓存"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return snapshot(value)
+    if isinstance(value, dict):
+        return {name: _share(item) for name, item in value.items()}
+    return value
+
+
+class DagRunner:
+    """
+    阶段图运行器
+
+    参数:
+        cache_dir: 磁盘缓存目录，None 时只在内存中缓存
+        max_workers: 并发执行阶段的线程数上限（同时受全局工作单元预算约束）
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: int = 4):
+        if max_workers < 1:
+            raise ValueError(f"max_workers必须为正整数，当前为: {max_workers}")
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self._stages: Dict[str, DagStage] = {}
+        self._memory: Dict[str, Any] = {}
+        self.stage_log: List[Dict[str, Any]] = []
+
+    def __repr__(self) -> str:
+        return f"DagRunner({len(self._stages)} 个阶段, {len(self._memory)} 个已缓存)"
+
+    def stage(self, name: str, func: Callable,
+              inputs: Sequence[DagStage] = (),
+              config: Optional[Dict[str, Any]] = None,
+              files: Sequence[str] = (),
+              persist: bool = True) -> DagStage:
+        """
+        声明一个阶段（阶段键相同的阶段只登记一次）
+
+        参数同 DagStage
+
+        返回:
+            已登记的阶段
+        """
+        stage = DagStage(name, func, inputs, config, files, persist)
+        return self._stages.setdefault(stage.key, stage)
+
+    def _cache_path(self, stage: DagStage) -> Optional[str]:
+        if self.cache_dir is None or not stage.persist:
+            return None
+        return os.path.join(self.cache_dir, f"{stage.name}_{stage.key}.pkl")
+
+    def _load_cached(self, stage: DagStage) -> tuple:
+        """(是否命中, 结果, 来源)"""
+        if stage.key in self._memory:
+            return True, self._memory[stage.key], 'memory'
+        path = self._cache_path(stage)
+        if path is not None and os.path.isfile(path):
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                self._memory[stage.key] = value
+                return True, value, 'disk'
+            except Exception as e:
+                print(f"读取阶段缓存失败，重新计算: {path} - {e}")
+        return False, None, None
+
+    def _execute(self, stage: DagStage, upstream: List[Any]) -> Any:
+        start = time.time()
+        value = stage.func(*[_share(item) for item in upstream], **stage.config)
+        duration = time.time() - start
+
+        path = self._cache_path(stage)
+        if path is not None:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                temp_path = path + '.tmp'
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, path)
+            except Exception as e:
+                print(f"写入阶段缓存失败: {path} - {e}")
+        self._memory[stage.key] = value
+        self.stage_log.append({'stage': stage.name, 'key': stage.key, 'source': 'computed', 'seconds': duration})
+        return value
+
+    def run(self, targets: Sequence[DagStage]) -> List[Any]:
+        """
+        执行目标阶段（只执行未缓存的阶段，互不依赖的阶段并发执行）
+
+        已缓存阶段的上游不会被读取或执行。
+
+        参数:
+            targets: 目标阶段列表
+
+        返回:
+            与 targets 顺序一致的结果列表（DataFrame 为快照，修改不影响缓存）
+        """
+        results: Dict[str, Any] = {}
+        pending: List[DagStage] = []
+        pending_keys = set()
+
+        def visit(stage: DagStage) -> None:
+            if stage.key in results or stage.key in pending_keys:
+                return
+            hit, value, source = self._load_cached(stage)
+            if hit:
+                results[stage.key] = value
+                self.stage_log.append({'stage': stage.name, 'key': stage.key, 'source': source, 'seconds': 0.0})
+                return
+            for upstream in stage.inputs:
+                visit(upstream)
+            pending.append(stage)
+            pending_keys.add(stage.key)
+
+        for target in targets:
+            visit(target)
+
+        # 依赖已就绪的阶段逐批经 TaskExecutor 并发执行（共享全局工作单元预算；
+        # 阶段线程标记为工作线程，阶段内部的并行调用自动降级为串行）
+        executor = TaskExecutor(backend='thread', max_workers=self.max_workers)
+        while pending:
+            ready = [stage for stage in pending if all(upstream.key in results for upstream in stage.inputs)]
+            for stage in ready:
+                pending.remove(stage)
+            args_list = [(stage, [results[item.key] for item in stage.inputs]) for stage in ready]
+            for index, value, error in executor.imap_unordered(self._execute, args_list):
+                if error is not None:
+                    raise RuntimeError(f"阶段 {ready[index].name} 执行失败: {error}") from error
+                results[ready[index].key] = value
+
+        return [_share(results[target.key]) for target in targets]
+
+    def compute(self, target: DagStage) -> Any:
+        """执行单个目标阶段并返回其结果"""
+        return self.run([target])[0]
+
+    def clear_memory(self) -> None:
+        """清空内存缓存（磁盘缓存保留）"""
+        self._memory.clear()
+
+    def summary(self) -> pd.DataFrame:
+        """按阶段汇总执行次数、缓存命中次数与计算耗时"""
+        if not self.stage_log:
+            return pd.DataFrame()
+        log_df = pd.DataFrame(self.stage_log)
+        report = log_df.pivot_table(index='stage', columns='source', values='key',
+                                    aggfunc='count', fill_value=0)
+        report['computed_seconds'] = log_df[log_df['source'] == 'computed'].groupby('stage')['seconds'].sum()
+        return report.fillna(0.0)
+
+    def print_summary(self) -> None:
+        """打印阶段执行与缓存命中统计"""
+        report = self.summary()
+        if report.empty:
+            print("阶段图运行器: 尚未执行任何阶段")
+            return
+        print("阶段图运行器统计 (computed=计算, memory/disk=缓存命中):")
+        print(report.to_string())
+
+
+# ---------------------------------------------------------------- 标准阶段
+
+def _load_stage(file_path: str) -> Dict[str, pd.DataFrame]:
+    return load_all_data(file_path)
+
+
+def _signal_stage(data: Dict[str, pd.DataFrame], signal_config: SignalConfig,
+                  signal_types: Optional[List[str]]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    return SignalEngine(signal_config).comprehensive_parameter_test(
+        data=data['indicator_data'], test_params=signal_config.TEST_PARAMS, signal_types=signal_types
+    )
+
+
+def _backtest_stage(data: Dict[str, pd.DataFrame], test_results: Dict,
+                    backtest_config: BacktestConfig,
+                    indicators: Optional[List[str]],
+                    signal_types: Optional[List[str]]) -> pd.DataFrame:
+    return BacktestEngine(backtest_config).run_batch_backtest(
+        test_results=test_results, price_data=data['price_data'], memo_df=data['memo_data'],
+        indicators=indicators, signal_types=signal_types
+    )
+
+
+def _analysis_stage(backtest_results: pd.DataFrame, export_config: ExportConfig) -> Dict[str, Any]:
+    processor = ResultProcessor(export_config)
+    if backtest_results.empty:
+        return {'filtered_results': pd.DataFrame(), 'performance_report': {}}
+    return {
+        'filtered_results': processor.filter_best_significant_results(backtest_results),
+        'performance_report': processor.generate_performance_report(backtest_results),
+    }
+
+
+def _vote_matrix_stage(data: Dict[str, pd.DataFrame], signal_config: SignalConfig,
+                       signal_configs: List[Dict], strategy_type: str,
+                       signal_start_date: str):
+    return MultiSignalVotingEngine(signal_config).generate_vote_matrix(
+        data['indicator_data'], signal_configs, strategy_type, signal_start_date=signal_start_date
+    )
+
+
+def data_stage(runner: DagRunner, data_path: str) -> DagStage:
+    """数据加载阶段（数据文件内容指纹计入阶段键）"""
+    return runner.stage('load', _load_stage, config={'file_path': data_path}, files=[data_path])
+
+
+def backtest_stages(runner: DagRunner, data_path: str,
+                    signal_config: SignalConfig,
+                    backtest_config: BacktestConfig,
+                    export_config: Optional[ExportConfig] = None,
+                    signal_types: Optional[List[str]] = None,
+                    indicators: Optional[List[str]] = None) -> Dict[str, DagStage]:
+    """
+    声明 加载 → 信号 → 回测 → 分析 阶段
+
+    信号阶段只依赖信号配置，不同回测标的的场景共享同一组信号。
+
+    返回:
+        {'load', 'signals', 'backtest', 'analysis'} -> 阶段（未给出导出配置时不含 analysis）
+    """
+    load = data_stage(runner, data_path)
+    signals = runner.stage('signals', _signal_stage, [load],
+                           {'signal_config': signal_config, 'signal_types': signal_types})
+    backtest = runner.stage('backtest', _backtest_stage, [load, signals],
+                            {'backtest_config': backtest_config, 'indicators': indicators,
+                             'signal_types': signal_types})
+    stages = {'load': load, 'signals': signals, 'backtest': backtest}
+    if export_config is not None:
+        stages['analysis'] = runner.stage('analysis', _analysis_stage, [backtest],
+                                          {'export_config': export_config}, persist=False)
+    return stages
+
+
+def vote_matrix_stage(runner: DagRunner, data_path: str,
+                      signal_config: SignalConfig,
+                      signal_configs: List[Dict],
+                      strategy_type: str,
+                      signal_start_date: str = '2012-11-01') -> DagStage:
+    """投票矩阵阶段（普通投票、按比例投票与敏感性测试共享）"""
+    return runner.stage('vote_matrix', _vote_matrix_stage, [data_stage(runner, data_path)],
+                        {'signal_config': signal_config, 'signal_configs': signal_configs,
+                         'strategy_type': strategy_type, 'signal_start_date': signal_start_date})
+
+
+# ---------------------------------------------------------------- 共享运行器
+
+_SHARED_RUNNER: Optional[DagRunner] = None
+
+
+def shared_runner() -> Optional[DagRunner]:
+    """当前启用的共享运行器（未启用时为None）"""
+    return _SHARED_RUNNER
+
+
+@contextmanager
+def use_shared_runner(runner: Optional[DagRunner] = None,
+                      cache_dir: Optional[str] = None) -> Iterator[DagRunner]:
+    """
+    在 with 块内启用共享运行器，块内各工作流的数据加载、信号与投票矩阵经由它缓存
+
+    已有共享运行器时（嵌套调用）直接复用外层运行器。
+
+    参数:
+        runner: 要启用的运行器，默认新建
+        cache_dir: 新建运行器时的磁盘缓存目录
+    """
+    global _SHARED_RUNNER
+    if _SHARED_RUNNER is not None:
+        yield _SHARED_RUNNER
+        return
+
+    _SHARED_RUNNER = runner or DagRunner(cache_dir=cache_dir)
+    try:
+        yield _SHARED_RUNNER
+    finally:
+        _SHARED_RUNNER = None
+
+
+def load_data(data_path: str) -> Dict[str, pd.DataFrame]:
+    """加载数据；启用共享运行器时同一数据文件只加载一次"""
+    runner = shared_runner()
+    if runner is None:
+        return load_all_data(data_path)
+    return runner.compute(data_stage(runner, data_path))
+
+
+def generate_vote_matrix(voting_engine: MultiSignalVotingEngine, data_path: str,
+                         indicator_data: pd.DataFrame, signal_configs: List[Dict],
+                         strategy_type: str, signal_start_date: str = '2012-11-01'):
+    """生成投票矩阵；启用共享运行器时相同信号配置的投票矩阵只生成一次"""
+    runner = shared_runner()
+    if runner is None:
+        return voting_engine.generate_vote_matrix(
+            indicator_data, signal_configs, strategy_type, signal_start_date=signal_start_date
+        )
+    return runner.compute(vote_matrix_stage(
+        runner, data_path, voting_engine.signal_config, signal_configs, strategy_type, signal_start_date
+    ))
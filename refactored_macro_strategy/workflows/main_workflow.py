@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Tuple
 import os
+from contextlib import nullcontext
 from datetime import datetime
 
 from ..config.signal_config import SignalConfig
@@ -18,6 +19,12 @@ from ..core.backtest_engine import BacktestEngine
 from ..core.result_processor import ResultProcessor
 
 from ..utils.validators import validate_dataframe_input
+from ..utils.combination_registry import CombinationRegistry
+from ..utils.result_store import ResultStore
+from ..utils.fingerprint import file_fingerprint
+from ..utils.columnar_store import write_columnar, read_columnar
+from ..utils.run_manifest import RunManifest, stage_key, code_version
+from .dag_runner import shared_runner, backtest_stages
 
 
 class MainWorkflow:
@@ -43,6 +50,7 @@ class MainWorkflow:
         self.signal_engine = SignalEngine(self.signal_config)
         self.backtest_engine = BacktestEngine(self.backtest_config)
         self.result_processor = ResultProcessor(self.export_config)
+        self.combination_registry = CombinationRegistry()
     
     def load_data(self, data_path: str, memo_path: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
         """
@@ -217,6 +225,9 @@ class MainWorkflow:
                 print("警告: 回测结果为空")
                 return pd.DataFrame()
             
+            # 组合键编码为整数，indicator/signal_type转为category
+            self.combination_registry.encode_frame(backtest_results)
+            
             print(f"\n回测完成!")
             print(f"成功回测组合: {len(backtest_results)}")
             
@@ -247,6 +258,7 @@ class MainWorkflow:
             
             # 导出结果
             export_path = self.result_processor.export_results(backtest_results, filtered_results)
+            self._record_results(backtest_results, export_path)
             
             print(f"\n分析和导出完成!")
             return filtered_results, export_path
@@ -255,6 +267,108 @@ class MainWorkflow:
             print(f"分析和导出失败: {e}")
             raise
     
+    def _record_results(self, backtest_results: pd.DataFrame, export_path: Optional[str]) -> None:
+        """将本次回测结果写入结果库"""
+        store_path = self.export_config.get_result_store_path()
+        if store_path is None:
+            return
+        try:
+            target = self.backtest_config.backtest_target
+            with ResultStore(store_path) as store:
+                run_id = store.start_run(
+                    'backtest', target, export_path=export_path,
+                    configs={'signal_config': self.signal_config, 'backtest_config': self.backtest_config}
+                )
+                row_count = store.add_backtest_results(run_id, backtest_results, target)
+            print(f"回测结果已写入结果库: {store_path} (run_id={run_id}, {row_count} 行)")
+        except Exception as e:
+            print(f"写入结果库失败: {e}")
+    
+    def _open_run_manifest(self, data_path: str,
+                           signal_types: Optional[List[str]],
+                           indicators: Optional[List[str]]) -> Optional[RunManifest]:
+        """按数据文件指纹与全部配置打开运行目录，未启用或失败时返回None"""
+        if not self.export_config.run_directories:
+            return None
+        try:
+            return RunManifest.open(self.export_config.output_dir, file_fingerprint(data_path), {
+                'signal_config': self.signal_config,
+                'backtest_config': self.backtest_config,
+                'export_config': self.export_config,
+                'signal_types': signal_types,
+                'indicators': indicators,
+            })
+        except Exception as e:
+            print(f"打开运行目录失败，结果写入输出目录: {e}")
+            return None
+    
+    def _load_completed_run(self, manifest: RunManifest) -> Dict[str, any]:
+        """读取已完成运行的产出"""
+        print(f"相同输入的运行已完成，直接读取已有结果: {manifest.directory}")
+        backtest_results = read_columnar(manifest.artifact('backtest', 'backtest_results'))
+        self.combination_registry.encode_frame(backtest_results)
+        filtered_results = read_columnar(manifest.artifact('analysis', 'filtered_results'))
+        return {
+            'backtest_results': backtest_results,
+            'filtered_results': filtered_results,
+            'export_path': manifest.artifact('analysis', 'export'),
+            'performance_report': self.result_processor.generate_performance_report(backtest_results),
+            'data_info': _data_info(manifest.stages['backtest']['info']),
+            'run_dir': manifest.directory
+        }
+    
+    def _run_backtest_stages(self, data_path: str,
+                             memo_path: Optional[str],
+                             signal_types: Optional[List[str]],
+                             indicators: Optional[List[str]],
+                             enable_parallel: Optional[bool]) -> Tuple[pd.DataFrame, Dict[str, any]]:
+        """
+        数据加载、信号生成与回测
+        
+        启用共享运行器（use_shared_runner）时经由阶段图执行：数据与信号在
+        不同回测标的的场景间共享，相同配置的回测只执行一次。
+        
+        返回:
+            (回测结果, 数据信息)
+        """
+        runner = shared_runner()
+        if runner is not None:
+            stages = backtest_stages(runner, data_path, self.signal_config, self.backtest_config,
+                                     signal_types=signal_types, indicators=indicators)
+            data_dict, backtest_results = runner.run([stages['load'], stages['backtest']])
+            if not backtest_results.empty:
+                self.combination_registry.encode_frame(backtest_results)
+            return backtest_results, {
+                'macro_data_shape': data_dict['indicator_data'].shape,
+                'price_data_shape': data_dict['price_data'].shape,
+                'memo_available': data_dict['memo_data'] is not None
+            }
+        
+        # 1. 数据加载
+        macro_data, price_data, memo_df = self.load_data(data_path, memo_path)
+        data_info = {
+            'macro_data_shape': macro_data.shape,
+            'price_data_shape': price_data.shape,
+            'memo_available': memo_df is not None
+        }
+        
+        # 2. 信号生成
+        test_results = self.run_signal_generation(
+            macro_data=macro_data,
+            signal_types=signal_types
+        )
+        
+        # 3. 回测
+        backtest_results = self.run_backtest(
+            test_results=test_results,
+            price_data=price_data,
+            memo_df=memo_df,
+            indicators=indicators,
+            signal_types=signal_types,
+            enable_parallel=enable_parallel
+        )
+        return backtest_results, data_info
+    
     def run_complete_workflow(self, data_path: str,
                             memo_path: Optional[str] = None,
                             signal_types: Optional[List[str]] = None,
@@ -262,42 +376,73 @@ class MainWorkflow:
                             enable_parallel: Optional[bool] = None) -> Dict[str, any]:
         """
         运行完整工作流程 - 一键执行
+        
+        启用运行目录时结果写入 输出目录/runs/<运行键>/：相同输入的运行已完成时
+        直接返回已有结果；回测阶段输入相同（只有导出配置不同）时复用已有回测结果。
         """
         print("="*100)
         print("宏观策略精简工作流程开始")
         print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*100)
         
+        manifest = self._open_run_manifest(data_path, signal_types, indicators)
+        if manifest is not None and manifest.is_complete:
+            return self._load_completed_run(manifest)
+        
         try:
-            # 1. 数据加载
-            macro_data, price_data, memo_df = self.load_data(data_path, memo_path)
-            
-            # 2. 信号生成
-            test_results = self.run_signal_generation(
-                macro_data=macro_data,
-                signal_types=signal_types
-            )
-            
-            # 3. 回测
-            backtest_results = self.run_backtest(
-                test_results=test_results,
-                price_data=price_data,
-                memo_df=memo_df,
-                indicators=indicators,
-                signal_types=signal_types,
-                enable_parallel=enable_parallel
-            )
+            if manifest is not None:
+                self.export_config.run_dir = manifest.directory
+                print(f"运行目录: {manifest.directory}")
+                backtest_key = stage_key(manifest.manifest['inputs']['data_fingerprint'], self.signal_config,
+                                         self.backtest_config, signal_types, indicators, code_version())
+                reused = manifest.find_stage('backtest', backtest_key)
+            else:
+                backtest_key = reused = None
+            
+            if reused is not None and 'backtest_results' in reused['artifacts']:
+                # 1-3. 复用输入相同的回测阶段
+                print(f"复用运行 {reused['run_key']} 的回测结果")
+                backtest_results = read_columnar(reused['artifacts']['backtest_results'])
+                self.combination_registry.encode_frame(backtest_results)
+                data_info = _data_info(reused['info'])
+                manifest.reuse_stage('backtest', reused)
+            else:
+                stage = manifest.stage('backtest', backtest_key) if manifest is not None else nullcontext({})
+                with stage as record:
+                    backtest_results, data_info = self._run_backtest_stages(
+                        data_path, memo_path, signal_types, indicators, enable_parallel
+                    )
+                    
+                    if manifest is not None and not backtest_results.empty:
+                        record['rows'] = len(backtest_results)
+                        record['info'] = data_info
+                        record['artifacts']['backtest_results'] = write_columnar(
+                            backtest_results, manifest.path('backtest_results')
+                        )
             
             if backtest_results.empty:
                 print("工作流程提前终止: 无有效回测结果")
                 return {}
             
             # 4. 分析和导出
-            filtered_results, export_path = self.run_analysis_and_export(backtest_results)
+            analysis_key = stage_key(backtest_key, self.export_config)
+            stage = manifest.stage('analysis', analysis_key) if manifest is not None else nullcontext({})
+            with stage as record:
+                filtered_results, export_path = self.run_analysis_and_export(backtest_results)
+                if manifest is not None:
+                    record['rows'] = len(filtered_results)
+                    record['artifacts']['export'] = export_path
+                    record['artifacts']['filtered_results'] = write_columnar(
+                        filtered_results, manifest.path('filtered_results')
+                    )
             
             # 5. 生成最终报告
             performance_report = self.result_processor.generate_performance_report(backtest_results)
             
+            if manifest is not None:
+                manifest.complete()
+                print("运行清单: " + "; ".join(manifest.timing_summary()))
+            
             print("="*100)
             print("工作流程完成!")
             print(f"结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -309,16 +454,15 @@ class MainWorkflow:
                 'filtered_results': filtered_results,
                 'export_path': export_path,
                 'performance_report': performance_report,
-                'data_info': {
-                    'macro_data_shape': macro_data.shape,
-                    'price_data_shape': price_data.shape,
-                    'memo_available': memo_df is not None
-                }
+                'data_info': data_info,
+                'run_dir': manifest.directory if manifest is not None else None
             }
             
         except Exception as e:
             print(f"工作流程执行失败: {e}")
             raise
+        finally:
+            self.export_config.run_dir = None
     
     def get_configuration_summary(self) -> Dict[str, any]:
         """获取配置摘要"""
@@ -331,6 +475,8 @@ class MainWorkflow:
             'backtest_config': {
                 'enable_parallel': self.backtest_config.enable_parallel,
                 'num_processes': self.backtest_config.num_processes,
+                'executor_backend': self.backtest_config.executor_backend,
+                'blas_threads': self.backtest_config.blas_threads,
                 'enable_dual_direction': self.backtest_config.enable_dual_direction,
                 'significance_level': self.backtest_config.significance_level
             },
@@ -380,4 +526,9 @@ class MainWorkflow:
         finally:
             # 恢复原始配置
             self.signal_config.TEST_PARAMS = original_test_params
-            self.backtest_config.enable_parallel = original_enable_parallel 
\ No newline at end of file
+            self.backtest_config.enable_parallel = original_enable_parallel 
+
+
+def _data_info(info: Dict[str, any]) -> Dict[str, any]:
+    """清单中的数据信息（JSON 列表还原为形状元组）"""
+    return {name: tuple(value) if isinstance(value, list) else value for name, value in info.items()}
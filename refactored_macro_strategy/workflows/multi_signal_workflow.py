@@ -15,18 +15,26 @@ from ..core.multi_signal_voting import (
     MultiSignalVotingEngine, 
     MultiSignalBacktestEngine
 )
-from ..utils.data_loader import load_all_data
+from .dag_runner import load_data, generate_vote_matrix
 from ..config.signal_config import SignalConfig
+from ..config.export_config import ExportConfig
+from ..utils.table_io import export_tables
+from ..utils.async_exporter import background_export
+from ..utils.result_store import ResultStore
 
 
 class MultiSignalVotingWorkflow:
     """多信号投票策略工作流程"""
     
-    def __init__(self, signal_config: Optional[SignalConfig] = None):
+    def __init__(self, signal_config: Optional[SignalConfig] = None,
+                 export_config: Optional[ExportConfig] = None):
         self.signal_config = signal_config or SignalConfig()
+        self.export_config = export_config or ExportConfig()
         self.signal_configuration = SignalConfiguration(self.signal_config)
         self.voting_engine = MultiSignalVotingEngine(self.signal_config)
         self.backtest_engine = MultiSignalBacktestEngine()
+        # 后台导出器（两策略批量运行期间启用），为None时同步写出
+        self.exporter = None
     
     def run_complete_voting_strategy(self, 
                                    data_path: str,
@@ -53,7 +61,7 @@ class MultiSignalVotingWorkflow:
         
         # 1. 加载数据
         try:
-            data_dict = load_all_data(data_path)
+            data_dict = load_data(data_path)
             indicator_data = data_dict['indicator_data']
             price_data = data_dict['price_data']
             print(f"数据加载成功:")
@@ -77,17 +85,18 @@ class MultiSignalVotingWorkflow:
             return {}
         
         # 3. 生成投票信号
-        voting_signals = self.voting_engine.generate_voting_signals(
-            indicator_data, signal_configs, strategy_type, signal_start_date='2012-11-01'
+        vote_matrix = generate_vote_matrix(
+            self.voting_engine, data_path, indicator_data, signal_configs, strategy_type,
+            signal_start_date='2012-11-01'
         )
         
-        if voting_signals.empty:
+        if vote_matrix.empty:
             print("错误: 投票信号生成失败")
             return {}
         
         # 4. 计算投票决策
         voting_decisions = self.voting_engine.calculate_voting_decisions(
-            voting_signals, strategy_type
+            vote_matrix, strategy_type
         )
         
         if voting_decisions.empty:
@@ -108,12 +117,13 @@ class MultiSignalVotingWorkflow:
             self._export_results(backtest_results, strategy_type)
         except Exception as e:
             print(f"结果导出失败: {e}")
+        self._record_results(backtest_results, strategy_type, signal_configs, 'multi_signal_voting')
         
         # 7. 综合结果
         complete_results = {
             'strategy_type': strategy_type,
             'signal_configs': signal_configs,
-            'voting_signals': voting_signals,
+            'vote_matrix': vote_matrix,
             'voting_decisions': voting_decisions,
             **backtest_results
         }
@@ -146,7 +156,7 @@ class MultiSignalVotingWorkflow:
         
         # 1. 加载数据
         try:
-            data_dict = load_all_data(data_path)
+            data_dict = load_data(data_path)
             indicator_data = data_dict['indicator_data']
             price_data = data_dict['price_data']
             print(f"数据加载成功:")
@@ -170,17 +180,18 @@ class MultiSignalVotingWorkflow:
             return {}
         
         # 3. 生成投票信号
-        voting_signals = self.voting_engine.generate_voting_signals(
-            indicator_data, signal_configs, strategy_type, signal_start_date='2012-11-01'
+        vote_matrix = generate_vote_matrix(
+            self.voting_engine, data_path, indicator_data, signal_configs, strategy_type,
+            signal_start_date='2012-11-01'
         )
         
-        if voting_signals.empty:
+        if vote_matrix.empty:
             print("错误: 投票信号生成失败")
             return {}
         
         # 4. 计算投票决策
         voting_decisions = self.voting_engine.calculate_voting_decisions(
-            voting_signals, strategy_type
+            vote_matrix, strategy_type
         )
         
         if voting_decisions.empty:
@@ -201,13 +212,14 @@ class MultiSignalVotingWorkflow:
             self._export_results(backtest_results, strategy_type, mode_suffix='proportional')
         except Exception as e:
             print(f"结果导出失败: {e}")
+        self._record_results(backtest_results, strategy_type, signal_configs, 'multi_signal_voting_proportional')
         
         # 7. 综合结果
         complete_results = {
             'strategy_type': strategy_type,
             'backtest_mode': 'proportional',
             'signal_configs': signal_configs,
-            'voting_signals': voting_signals,
+            'vote_matrix': vote_matrix,
             'voting_decisions': voting_decisions,
             **backtest_results
         }
@@ -234,174 +246,206 @@ class MultiSignalVotingWorkflow:
         print("多信号投票策略 - 价值成长 & 大小盘轮动")
         print("="*80)
         
-        all_results = {}
+        # 前一个策略的结果在后台写出，与下一个策略的计算重叠
+        with background_export(self, enabled=self.export_config.async_export):
+            all_results = {}
         
-        # 运行价值成长策略
-        try:
-            print("\n>>> 开始价值成长策略分析 <<<")
-            value_growth_results = self.run_complete_voting_strategy(
-                data_path, 'value_growth', start_date, end_date
-            )
-            all_results['value_growth'] = value_growth_results
-        except Exception as e:
-            print(f"价值成长策略运行失败: {e}")
-            all_results['value_growth'] = {}
+            # 运行价值成长策略
+            try:
+                print("\n>>> 开始价值成长策略分析 <<<")
+                value_growth_results = self.run_complete_voting_strategy(
+                    data_path, 'value_growth', start_date, end_date
+                )
+                all_results['value_growth'] = value_growth_results
+            except Exception as e:
+                print(f"价值成长策略运行失败: {e}")
+                all_results['value_growth'] = {}
         
-        # 运行大小盘策略
-        try:
-            print("\n>>> 开始大小盘策略分析 <<<")
-            big_small_results = self.run_complete_voting_strategy(
-                data_path, 'big_small', start_date, end_date
-            )
-            all_results['big_small'] = big_small_results
-        except Exception as e:
-            print(f"大小盘策略运行失败: {e}")
-            all_results['big_small'] = {}
+            # 运行大小盘策略
+            try:
+                print("\n>>> 开始大小盘策略分析 <<<")
+                big_small_results = self.run_complete_voting_strategy(
+                    data_path, 'big_small', start_date, end_date
+                )
+                all_results['big_small'] = big_small_results
+            except Exception as e:
+                print(f"大小盘策略运行失败: {e}")
+                all_results['big_small'] = {}
         
-        # 生成比较报告
-        try:
-            self._generate_comparison_report(all_results)
-        except Exception as e:
-            print(f"比较报告生成失败: {e}")
+            # 生成比较报告
+            try:
+                self._generate_comparison_report(all_results)
+            except Exception as e:
+                print(f"比较报告生成失败: {e}")
         
         return all_results
     
+    def _record_results(self, results: Dict, strategy_type: str,
+                        signal_configs: List[Dict], run_type: str) -> None:
+        """将策略净值与汇总指标写入结果库"""
+        store_path = self.export_config.get_result_store_path()
+        if store_path is None:
+            return
+        try:
+            enhanced_metrics = results['enhanced_metrics']
+            metrics = {**enhanced_metrics['strategy_metrics'], **enhanced_metrics['excess_metrics']}
+            with ResultStore(store_path) as store:
+                run_id = store.start_run(run_type, strategy_type, metrics=metrics,
+                                         configs={'signal_configs': signal_configs})
+                store.add_nav_series(run_id, strategy_type, results['strategy_nav'], results['benchmark_nav'])
+            print(f"策略净值已写入结果库: {store_path} (run_id={run_id})")
+        except Exception as e:
+            print(f"写入结果库失败: {e}")
+    
     def _export_results(self, results: Dict, strategy_type: str, mode_suffix: str = '') -> None:
-        """导出分析结果到Excel"""
+        """导出分析结果（汇总表写入Excel，完整数据表按 export_format 导出）"""
         timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"signal_test_results/multi_signal_voting_{strategy_type}_{mode_suffix}_{timestamp}.xlsx"
         
         # 确保输出目录存在
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # 获取增强绩效指标
-            enhanced_metrics = results['enhanced_metrics']
+        sheets = {}
+        # 获取增强绩效指标
+        enhanced_metrics = results['enhanced_metrics']
+        
+        try:
+            # 年度绩效分析（已包含累计表现和中文表头）
+            yearly_analysis = enhanced_metrics['yearly_analysis']
+            if not yearly_analysis.empty:
+                sheets['年度绩效分析'] = yearly_analysis
+                print("  ✓ 年度绩效分析已加入导出")
+        except Exception as e:
+            print(f"  ✗ 年度绩效分析导出失败: {e}")
+        
+        try:
+            # 交易信号（处理None值并使用中文列名）
+            if 'trading_signals' in results and not results['trading_signals'].empty:
+                trading_signals_export = results['trading_signals'].copy()
+                
+                # 处理None值，转换为字符串
+                trading_signals_export['trading_date'] = trading_signals_export['trading_date'].apply(
+                    lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else '未来信号'
+                )
+                trading_signals_export['signal_date'] = trading_signals_export['signal_date'].apply(
+                    lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
+                )
+                
+                # 根据回测模式决定列名映射
+                if results.get('backtest_mode') == 'proportional':
+                    # 按比例分配模式的列名映射
+                    trading_signals_export = trading_signals_export.rename(columns={
+                        'signal_date': '信号日期',
+                        'trading_date': '交易日期', 
+                        'asset1_weight': '第一资产权重',
+                        'asset2_weight': '第二资产权重',
+                        'asset1_votes': '第一资产票数',
+                        'asset2_votes': '第二资产票数',
+                        'total_votes': '总票数',
+                        'asset1_name': '第一资产名称',
+                        'asset2_name': '第二资产名称'
+                    })
+                else:
+                    # 传统获胜者全拿模式的列名映射
+                    trading_signals_export = trading_signals_export.rename(columns={
+                        'signal_date': '信号日期',
+                        'trading_date': '交易日期', 
+                        'target_asset': '目标资产',
+                        'winning_direction': '获胜方向',
+                        'vote_confidence': '投票信心度'
+                    })
+                
+                sheets['交易信号'] = trading_signals_export
+                print("  ✓ 交易信号已加入导出")
+        except Exception as e:
+            print(f"  ✗ 交易信号导出失败: {e}")
+        
+        try:
+            # 投票决策
+            if 'voting_decisions' in results and not results['voting_decisions'].empty:
+                sheets['投票决策'] = results['voting_decisions'].reset_index()
+                print("  ✓ 投票决策已加入导出")
+        except Exception as e:
+            print(f"  ✗ 投票决策导出失败: {e}")
+        
+        try:
+            # 净值曲线数据（使用新计算的净值，以2013/1/4为基准）
+            strategy_nav = results['strategy_nav']
+            benchmark_nav = results['benchmark_nav']
+            nav_base_date = results['nav_base_date']
             
-            try:
-                # 年度绩效分析（已包含累计表现和中文表头）
-                yearly_analysis = enhanced_metrics['yearly_analysis']
-                if not yearly_analysis.empty:
-                    yearly_analysis.to_excel(writer, sheet_name='年度绩效分析', index=False)
-                    print("  ✓ 年度绩效分析导出成功")
-            except Exception as e:
-                print(f"  ✗ 年度绩效分析导出失败: {e}")
+            print(f"  策略净值长度: {len(strategy_nav)}, 基准净值长度: {len(benchmark_nav)}")
             
-            try:
-                # 交易信号（处理None值并使用中文列名）
-                if 'trading_signals' in results and not results['trading_signals'].empty:
-                    trading_signals_export = results['trading_signals'].copy()
-                    
-                    # 处理None值，转换为字符串
-                    trading_signals_export['trading_date'] = trading_signals_export['trading_date'].apply(
-                        lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else '未来信号'
-                    )
-                    trading_signals_export['signal_date'] = trading_signals_export['signal_date'].apply(
-                        lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-                    )
-                    
-                    # 根据回测模式决定列名映射
-                    if results.get('backtest_mode') == 'proportional':
-                        # 按比例分配模式的列名映射
-                        trading_signals_export = trading_signals_export.rename(columns={
-                            'signal_date': '信号日期',
-                            'trading_date': '交易日期', 
-                            'asset1_weight': '第一资产权重',
-                            'asset2_weight': '第二资产权重',
-                            'asset1_votes': '第一资产票数',
-                            'asset2_votes': '第二资产票数',
-                            'total_votes': '总票数',
-                            'asset1_name': '第一资产名称',
-                            'asset2_name': '第二资产名称'
-                        })
-                    else:
-                        # 传统获胜者全拿模式的列名映射
-                        trading_signals_export = trading_signals_export.rename(columns={
-                            'signal_date': '信号日期',
-                            'trading_date': '交易日期', 
-                            'target_asset': '目标资产',
-                            'winning_direction': '获胜方向',
-                            'vote_confidence': '投票信心度'
-                        })
-                    
-                    trading_signals_export.to_excel(writer, sheet_name='交易信号', index=False)
-                    print("  ✓ 交易信号导出成功")
-            except Exception as e:
-                print(f"  ✗ 交易信号导出失败: {e}")
+            # 确保数据对齐
+            aligned_nav_data = pd.DataFrame({
+                'strategy_nav': strategy_nav,
+                'benchmark_nav': benchmark_nav
+            }).dropna()
             
-            try:
-                # 投票决策
-                if 'voting_decisions' in results and not results['voting_decisions'].empty:
-                    results['voting_decisions'].to_excel(writer, sheet_name='投票决策')
-                    print("  ✓ 投票决策导出成功")
-            except Exception as e:
-                print(f"  ✗ 投票决策导出失败: {e}")
+            print(f"  对齐后净值数据长度: {len(aligned_nav_data)}")
             
-            try:
-                # 净值曲线数据（使用新计算的净值，以2013/1/4为基准）
-                strategy_nav = results['strategy_nav']
-                benchmark_nav = results['benchmark_nav']
-                nav_base_date = results['nav_base_date']
-                
-                print(f"  策略净值长度: {len(strategy_nav)}, 基准净值长度: {len(benchmark_nav)}")
-                
-                # 确保数据对齐
-                aligned_nav_data = pd.DataFrame({
-                    'strategy_nav': strategy_nav,
-                    'benchmark_nav': benchmark_nav
-                }).dropna()
-                
-                print(f"  对齐后净值数据长度: {len(aligned_nav_data)}")
-                
-                # 计算相对净值
-                relative_nav = aligned_nav_data['strategy_nav'] / aligned_nav_data['benchmark_nav']
-                
-                nav_data = pd.DataFrame({
-                    '日期': aligned_nav_data.index,
-                    '策略净值': aligned_nav_data['strategy_nav'].values,
-                    '基准净值': aligned_nav_data['benchmark_nav'].values,
-                    '相对净值': relative_nav.values
-                })
-                nav_data.to_excel(writer, sheet_name='净值曲线', index=False)
-                print("  ✓ 净值曲线导出成功")
-            except Exception as e:
-                print(f"  ✗ 净值曲线导出失败: {e}")
+            # 计算相对净值
+            relative_nav = aligned_nav_data['strategy_nav'] / aligned_nav_data['benchmark_nav']
             
-            try:
-                # 日度收益数据（确保数据对齐）
-                aligned_returns = pd.DataFrame({
-                    'strategy': results['strategy_returns'],
-                    'benchmark': results['benchmark_returns']
-                }).dropna()
-                
-                print(f"  对齐后收益数据长度: {len(aligned_returns)}")
-                
-                returns_data = pd.DataFrame({
-                    '日期': aligned_returns.index,
-                    '策略收益': aligned_returns['strategy'].values,
-                    '基准收益': aligned_returns['benchmark'].values,
-                    '超额收益': (aligned_returns['strategy'] - aligned_returns['benchmark']).values
-                })
-                returns_data.to_excel(writer, sheet_name='日度收益', index=False)
-                print("  ✓ 日度收益导出成功")
-            except Exception as e:
-                print(f"  ✗ 日度收益导出失败: {e}")
+            nav_data = pd.DataFrame({
+                '日期': aligned_nav_data.index,
+                '策略净值': aligned_nav_data['strategy_nav'].values,
+                '基准净值': aligned_nav_data['benchmark_nav'].values,
+                '相对净值': relative_nav.values
+            })
+            sheets['净值曲线'] = nav_data
+            print("  ✓ 净值曲线已加入导出")
+        except Exception as e:
+            print(f"  ✗ 净值曲线导出失败: {e}")
+        
+        try:
+            # 日度收益数据（确保数据对齐）
+            aligned_returns = pd.DataFrame({
+                'strategy': results['strategy_returns'],
+                'benchmark': results['benchmark_returns']
+            }).dropna()
             
-            try:
-                # 月度胜率统计
-                win_rate_data = enhanced_metrics['monthly_win_rate']
-                monthly_stats = pd.DataFrame([{
-                    '总月份数': win_rate_data['total_months'],
-                    '获胜月份': win_rate_data['winning_months'],
-                    '失败月份': win_rate_data['losing_months'],
-                    '月胜率': f"{win_rate_data['monthly_win_rate']:.1%}"
-                }])
-                monthly_stats.to_excel(writer, sheet_name='月度统计', index=False)
-                print("  ✓ 月度统计导出成功")
-            except Exception as e:
-                print(f"  ✗ 月度统计导出失败: {e}")
+            print(f"  对齐后收益数据长度: {len(aligned_returns)}")
+            
+            returns_data = pd.DataFrame({
+                '日期': aligned_returns.index,
+                '策略收益': aligned_returns['strategy'].values,
+                '基准收益': aligned_returns['benchmark'].values,
+                '超额收益': (aligned_returns['strategy'] - aligned_returns['benchmark']).values
+            })
+            sheets['日度收益'] = returns_data
+            print("  ✓ 日度收益已加入导出")
+        except Exception as e:
+            print(f"  ✗ 日度收益导出失败: {e}")
         
-        print(f"\n{strategy_type} 策略结果已导出: {output_file}")
+        try:
+            # 月度胜率统计
+            win_rate_data = enhanced_metrics['monthly_win_rate']
+            monthly_stats = pd.DataFrame([{
+                '总月份数': win_rate_data['total_months'],
+                '获胜月份': win_rate_data['winning_months'],
+                '失败月份': win_rate_data['losing_months'],
+                '月胜率': f"{win_rate_data['monthly_win_rate']:.1%}"
+            }])
+            sheets['月度统计'] = monthly_stats
+            print("  ✓ 月度统计已加入导出")
+        except Exception as e:
+            print(f"  ✗ 月度统计导出失败: {e}")
+        
+        # 净值曲线与日度收益为完整数据表，非Excel格式时单独成文件
+        self._write_tables(output_file, sheets, ['净值曲线', '日度收益'], strategy_type)
+    
+    def _write_tables(self, output_file: str, sheets: Dict[str, pd.DataFrame],
+                      full_table_names: List[str], strategy_type: str) -> None:
+        """写出结果表：后台导出启用时提交到队列，否则同步写出"""
+        if self.exporter is not None:
+            self.exporter.submit_tables(output_file, sheets, full_table_names, self.export_config.export_format,
+                                        self.export_config.excel_engine)
+            print(f"\n{strategy_type} 策略结果已提交后台导出: {output_file}")
+            return
+        written = export_tables(output_file, sheets, full_table_names, self.export_config.export_format,
+                                self.export_config.excel_engine)
+        print(f"\n{strategy_type} 策略结果已导出: {', '.join(written)}")
     
     def _generate_comparison_report(self, all_results: Dict[str, Dict]) -> None:
         """生成策略比较报告"""
@@ -505,28 +549,29 @@ def run_both_proportional_voting_strategies(data_path: str) -> Dict[str, Dict]:
     """同时运行两个按比例分配投票策略"""
     workflow = MultiSignalVotingWorkflow()
     
-    all_results = {}
+    with background_export(workflow, enabled=workflow.export_config.async_export):
+        all_results = {}
     
-    # 运行价值成长比例策略
-    try:
-        print("\n>>> 开始价值成长比例策略分析 <<<")
-        value_growth_results = workflow.run_complete_proportional_voting_strategy(
-            data_path, 'value_growth'
-        )
-        all_results['value_growth_proportional'] = value_growth_results
-    except Exception as e:
-        print(f"价值成长比例策略运行失败: {e}")
-        all_results['value_growth_proportional'] = {}
+        # 运行价值成长比例策略
+        try:
+            print("\n>>> 开始价值成长比例策略分析 <<<")
+            value_growth_results = workflow.run_complete_proportional_voting_strategy(
+                data_path, 'value_growth'
+            )
+            all_results['value_growth_proportional'] = value_growth_results
+        except Exception as e:
+            print(f"价值成长比例策略运行失败: {e}")
+            all_results['value_growth_proportional'] = {}
     
-    # 运行大小盘比例策略
-    try:
-        print("\n>>> 开始大小盘比例策略分析 <<<")
-        big_small_results = workflow.run_complete_proportional_voting_strategy(
-            data_path, 'big_small'
-        )
-        all_results['big_small_proportional'] = big_small_results
-    except Exception as e:
-        print(f"大小盘比例策略运行失败: {e}")
-        all_results['big_small_proportional'] = {}
+        # 运行大小盘比例策略
+        try:
+            print("\n>>> 开始大小盘比例策略分析 <<<")
+            big_small_results = workflow.run_complete_proportional_voting_strategy(
+                data_path, 'big_small'
+            )
+            all_results['big_small_proportional'] = big_small_results
+        except Exception as e:
+            print(f"大小盘比例策略运行失败: {e}")
+            all_results['big_small_proportional'] = {}
     
     return all_results 
\ No newline at end of file
@@ -13,17 +13,30 @@ from datetime import datetime
 
 from .multi_signal_workflow import MultiSignalVotingWorkflow
 from ..config.signal_config import SignalConfig
+from ..config.export_config import ExportConfig
 from ..core.multi_signal_voting import MultiSignalVotingEngine, MultiSignalBacktestEngine
-from ..utils.data_loader import load_all_data
+from ..core.subset_evaluator import SubsetEvaluator, membership_from_subsets
+from ..core.decision_rules import DecisionRule, DecisionRuleEngine
+from ..core.subset_search import (
+    SignalSubsetSearch, candidate_configs_from_stability, MAX_EXHAUSTIVE_SIGNALS
+)
+from .dag_runner import load_data, generate_vote_matrix
+from ..utils.table_io import export_tables
+from ..utils.async_exporter import background_export
+from ..utils.result_store import ResultStore
 
 
 class SensitivityAnalysisWorkflow:
     """指标敏感性分析工作流"""
     
-    def __init__(self, signal_config: Optional[SignalConfig] = None):
+    def __init__(self, signal_config: Optional[SignalConfig] = None,
+                 export_config: Optional[ExportConfig] = None):
         self.signal_config = signal_config or SignalConfig()
+        self.export_config = export_config or ExportConfig()
         self.voting_engine = MultiSignalVotingEngine(self.signal_config)
         self.backtest_engine = MultiSignalBacktestEngine()
+        # 后台导出器（两策略批量运行期间启用），为None时同步写出
+        self.exporter = None
     
     def run_signal_count_sensitivity_test(self,
                                           data_path: str,
@@ -52,7 +65,7 @@ class SensitivityAnalysisWorkflow:
         
         # 1. 加载数据
         try:
-            data_dict = load_all_data(data_path)
+            data_dict = load_data(data_path)
             indicator_data = data_dict['indicator_data']
             price_data = data_dict['price_data']
             print(f"\n数据加载成功:")
@@ -95,17 +108,18 @@ class SensitivityAnalysisWorkflow:
             
             try:
                 # 生成投票信号
-                voting_signals = self.voting_engine.generate_voting_signals(
-                    indicator_data, top_n_signals, strategy_type, signal_start_date='2012-11-01'
+                vote_matrix = generate_vote_matrix(
+                    self.voting_engine, data_path, indicator_data, top_n_signals, strategy_type,
+                    signal_start_date='2012-11-01'
                 )
                 
-                if voting_signals.empty:
+                if vote_matrix.empty:
                     print(f"警告: {signal_count} 个信号的投票信号生成失败")
                     continue
                 
                 # 计算投票决策
                 voting_decisions = self.voting_engine.calculate_voting_decisions(
-                    voting_signals, strategy_type
+                    vote_matrix, strategy_type
                 )
                 
                 if voting_decisions.empty:
@@ -125,7 +139,7 @@ class SensitivityAnalysisWorkflow:
                 sensitivity_results[f"{signal_count}_signals"] = {
                     'signal_count': signal_count,
                     'signals_used': top_n_signals,
-                    'voting_signals': voting_signals,
+                    'vote_matrix': vote_matrix,
                     'voting_decisions': voting_decisions,
                     **backtest_results
                 }
@@ -156,6 +170,7 @@ class SensitivityAnalysisWorkflow:
                 self._export_sensitivity_results(sensitivity_results, sensitivity_summary, strategy_type)
             except Exception as e:
                 print(f"敏感性测试结果导出失败: {e}")
+            self._record_results(sensitivity_results, strategy_type)
         
         print(f"\n{'='*100}")
         print(f"{strategy_type.upper()} 策略指标敏感性测试完成")
@@ -191,37 +206,316 @@ class SensitivityAnalysisWorkflow:
         print("多信号投票策略 - 指标敏感性测试 (价值成长 & 大小盘)")
         print("="*100)
         
-        all_results = {}
+        # 前一个策略的结果在后台写出，与下一个策略的计算重叠
+        with background_export(self, enabled=self.export_config.async_export):
+            all_results = {}
         
-        # 测试价值成长策略
-        try:
-            print("\n>>> 开始价值成长策略敏感性测试 <<<")
-            value_growth_results = self.run_signal_count_sensitivity_test(
-                data_path, 'value_growth', signal_counts, start_date, end_date
-            )
-            all_results['value_growth'] = value_growth_results
-        except Exception as e:
-            print(f"价值成长策略敏感性测试失败: {e}")
-            all_results['value_growth'] = {}
+            # 测试价值成长策略
+            try:
+                print("\n>>> 开始价值成长策略敏感性测试 <<<")
+                value_growth_results = self.run_signal_count_sensitivity_test(
+                    data_path, 'value_growth', signal_counts, start_date, end_date
+                )
+                all_results['value_growth'] = value_growth_results
+            except Exception as e:
+                print(f"价值成长策略敏感性测试失败: {e}")
+                all_results['value_growth'] = {}
         
-        # 测试大小盘策略
-        try:
-            print("\n>>> 开始大小盘策略敏感性测试 <<<")
-            big_small_results = self.run_signal_count_sensitivity_test(
-                data_path, 'big_small', signal_counts, start_date, end_date
-            )
-            all_results['big_small'] = big_small_results
-        except Exception as e:
-            print(f"大小盘策略敏感性测试失败: {e}")
-            all_results['big_small'] = {}
+            # 测试大小盘策略
+            try:
+                print("\n>>> 开始大小盘策略敏感性测试 <<<")
+                big_small_results = self.run_signal_count_sensitivity_test(
+                    data_path, 'big_small', signal_counts, start_date, end_date
+                )
+                all_results['big_small'] = big_small_results
+            except Exception as e:
+                print(f"大小盘策略敏感性测试失败: {e}")
+                all_results['big_small'] = {}
+        
+            # 生成综合比较报告
+            try:
+                self._generate_cross_strategy_sensitivity_report(all_results, signal_counts)
+            except Exception as e:
+                print(f"综合敏感性分析报告生成失败: {e}")
         
-        # 生成综合比较报告
+        return all_results
+    
+    def _prepare_subset_inputs(self, data_path: str, strategy_type: str,
+                               signal_configs: Optional[List[Dict]] = None):
+        """加载数据并一次性生成全部候选信号的投票矩阵，失败时返回 (None, None)"""
         try:
-            self._generate_cross_strategy_sensitivity_report(all_results, signal_counts)
+            data_dict = load_data(data_path)
+            indicator_data = data_dict['indicator_data']
+            price_data = data_dict['price_data']
         except Exception as e:
-            print(f"综合敏感性分析报告生成失败: {e}")
+            print(f"数据加载失败: {e}")
+            return None, None
+        
+        if signal_configs is None:
+            signal_configs = self.signal_config.get_voting_strategy_signals(strategy_type)
+        vote_matrix = generate_vote_matrix(
+            self.voting_engine, data_path, indicator_data, signal_configs, strategy_type,
+            signal_start_date='2012-11-01'
+        )
+        if vote_matrix.empty:
+            print("错误: 投票信号生成失败")
+            return None, None
+        return vote_matrix, price_data
+    
+    def run_signal_subset_evaluation(self,
+                                     data_path: str,
+                                     strategy_type: str,
+                                     subsets: Optional[List[List]] = None,
+                                     mode: str = 'binary',
+                                     start_date: str = '2013-01-01',
+                                     end_date: str = '2025-05-27',
+                                     signal_configs: Optional[List[Dict]] = None,
+                                     top_n: int = 10) -> Dict:
+        """
+        批量评估任意信号子集（投票矩阵只生成一次，所有子集按列批量回测）
         
-        return all_results
+        参数:
+            data_path: 数据文件路径
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            subsets: 子集列表，每个子集为信号下标或 combination_id 列表；
+                    默认评估前1..N个信号的全部嵌套子集
+            mode: 'binary' 多数票全仓 或 'proportional' 按票数比例
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            signal_configs: 候选信号配置，默认使用策略的全部投票信号
+            top_n: 打印信息比率最高的前N个子集
+            
+        返回:
+            包含按信息比率排序的子集绩效表的字典
+        """
+        print("="*100)
+        print(f"{strategy_type.upper()} 策略 - 信号子集批量评估")
+        print("="*100)
+        
+        vote_matrix, price_data = self._prepare_subset_inputs(data_path, strategy_type, signal_configs)
+        if vote_matrix is None:
+            return {}
+        
+        evaluator = SubsetEvaluator(price_data, strategy_type, start_date, end_date)
+        if subsets is None:
+            subset_results = evaluator.evaluate_prefixes(vote_matrix, mode=mode)
+        else:
+            membership = membership_from_subsets(vote_matrix.signal_ids, subsets)
+            subset_results = evaluator.evaluate(vote_matrix, membership, mode)
+        subset_results = subset_results.sort_values('information_ratio', ascending=False).reset_index(drop=True)
+        
+        print(f"\n信息比率最高的 {min(top_n, len(subset_results))} 个子集:")
+        for _, row in subset_results.head(top_n).iterrows():
+            print(f"  [{row['signals']}] 信号数={row['signal_count']:>2d}, "
+                  f"年化收益={row['strategy_annual_return']:>7.2%}, "
+                  f"信息比率={row['information_ratio']:>6.3f}, "
+                  f"最大回撤={row['strategy_max_drawdown']:>7.2%}")
+        
+        return {
+            'strategy_type': strategy_type,
+            'mode': mode,
+            'signal_ids': vote_matrix.signal_ids,
+            'vote_matrix': vote_matrix,
+            'subset_results': subset_results,
+            'benchmark_metrics': evaluator.benchmark_metrics
+        }
+
+    def run_signal_subset_search(self,
+                                 data_path: str,
+                                 strategy_type: str,
+                                 method: str = 'auto',
+                                 mode: str = 'binary',
+                                 signal_configs: Optional[List[Dict]] = None,
+                                 stability_results: Optional[pd.DataFrame] = None,
+                                 candidate_count: int = 50,
+                                 beam_width: int = 20,
+                                 max_size: Optional[int] = None,
+                                 start_date: str = '2013-01-01',
+                                 end_date: str = '2025-05-27',
+                                 top_n: int = 10) -> Dict:
+        """
+        搜索信息比率最高的信号子集
+
+        参数:
+            data_path: 数据文件路径
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            method: 'exhaustive' 格雷码穷举, 'beam' 束搜索, 'auto' 按候选数自动选择
+            mode: 'binary' 多数票全仓 或 'proportional' 按票数比例
+            signal_configs: 候选信号配置，默认使用策略的全部投票信号
+            stability_results: 排名稳定性分析结果，提供时从中选取候选信号
+            candidate_count: 从稳定性结果中选取的候选数量
+            beam_width: 束搜索每层保留的子集数
+            max_size: 最大子集大小
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            top_n: 打印排名前N的子集
+
+        返回:
+            包含按信息比率排名的子集绩效表的字典
+        """
+        if method not in ('auto', 'exhaustive', 'beam'):
+            raise ValueError(f"不支持的搜索方法: {method}")
+
+        print("="*100)
+        print(f"{strategy_type.upper()} 策略 - 信号子集搜索")
+        print("="*100)
+
+        if stability_results is not None:
+            signal_configs = candidate_configs_from_stability(stability_results, candidate_count)
+        vote_matrix, price_data = self._prepare_subset_inputs(data_path, strategy_type, signal_configs)
+        if vote_matrix is None:
+            return {}
+
+        if method == 'auto':
+            method = 'exhaustive' if vote_matrix.n_signals <= MAX_EXHAUSTIVE_SIGNALS else 'beam'
+
+        evaluator = SubsetEvaluator(price_data, strategy_type, start_date, end_date)
+        search = SignalSubsetSearch(evaluator)
+        if method == 'exhaustive':
+            subset_results = search.exhaustive(vote_matrix, mode, max_size=max_size)
+        else:
+            subset_results = search.beam(vote_matrix, mode, beam_width=beam_width, max_size=max_size)
+
+        print(f"\n共评估 {len(subset_results)} 个子集，信息比率最高的 {min(top_n, len(subset_results))} 个:")
+        for _, row in subset_results.head(top_n).iterrows():
+            print(f"  #{row['rank']:<3d} 信号数={row['signal_count']:>2d}, "
+                  f"年化收益={row['strategy_annual_return']:>7.2%}, "
+                  f"信息比率={row['information_ratio']:>6.3f}, "
+                  f"最大回撤={row['strategy_max_drawdown']:>7.2%}  [{row['signal_ids']}]")
+
+        return {
+            'strategy_type': strategy_type,
+            'mode': mode,
+            'method': method,
+            'signal_ids': vote_matrix.signal_ids,
+            'vote_matrix': vote_matrix,
+            'subset_results': subset_results,
+            'benchmark_metrics': evaluator.benchmark_metrics
+        }
+
+    def run_decision_rule_grid(self,
+                               data_path: str,
+                               strategy_type: str,
+                               rules: Optional[List[DecisionRule]] = None,
+                               start_date: str = '2013-01-01',
+                               end_date: str = '2025-05-27',
+                               signal_configs: Optional[List[Dict]] = None) -> Dict:
+        """
+        在同一投票矩阵上比较多种决策规则（超级多数、滞后带、置信度加权）
+
+        参数:
+            data_path: 数据文件路径
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            rules: 决策规则列表，默认 build_rule_grid()
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            signal_configs: 参与投票的信号配置，默认使用策略的全部投票信号
+
+        返回:
+            包含按信息比率排序的规则绩效表的字典
+        """
+        print("="*100)
+        print(f"{strategy_type.upper()} 策略 - 决策规则网格评估")
+        print("="*100)
+
+        vote_matrix, price_data = self._prepare_subset_inputs(data_path, strategy_type, signal_configs)
+        if vote_matrix is None:
+            return {}
+
+        evaluator = SubsetEvaluator(price_data, strategy_type, start_date, end_date)
+        rule_results = DecisionRuleEngine(evaluator).evaluate(vote_matrix, rules)
+        rule_results = rule_results.sort_values('information_ratio', ascending=False).reset_index(drop=True)
+
+        print(f"\n{'规则':<22} {'年化收益':>9} {'夏普':>7} {'最大回撤':>9} {'信息比率':>8} {'决策变化':>8}")
+        for _, row in rule_results.iterrows():
+            print(f"{row['rule']:<22} {row['strategy_annual_return']:>9.2%} "
+                  f"{row['strategy_sharpe_ratio']:>7.3f} {row['strategy_max_drawdown']:>9.2%} "
+                  f"{row['information_ratio']:>8.3f} {int(row['decision_changes']):>8d}")
+
+        return {
+            'strategy_type': strategy_type,
+            'vote_matrix': vote_matrix,
+            'rule_results': rule_results,
+            'benchmark_metrics': evaluator.benchmark_metrics
+        }
+
+    def run_signal_count_sweep(self,
+                               data_path: str,
+                               strategy_type: str,
+                               mode: str = 'binary',
+                               max_signal_count: Optional[int] = None,
+                               start_date: str = '2013-01-01',
+                               end_date: str = '2025-05-27') -> Dict:
+        """
+        一次扫描评估从1到全部信号的每一个信号数量
+        
+        敏感性测试的子集是按排序嵌套的前缀（前5 ⊂ 前7 ⊂ ...），票数沿信号
+        方向累加即可得到所有前缀的投票，无需逐个数量重新生成信号和回测。
+        
+        参数:
+            data_path: 数据文件路径
+            strategy_type: 策略类型 ('value_growth' 或 'big_small')
+            mode: 'binary' 多数票全仓 或 'proportional' 按票数比例
+            max_signal_count: 最大信号数量，默认全部信号
+            start_date: 回测开始日期
+            end_date: 回测结束日期
+            
+        返回:
+            包含逐信号数量摘要表、稳定性指标和绩效趋势的字典
+        """
+        print("="*100)
+        print(f"{strategy_type.upper()} 策略 - 全信号数量敏感性扫描")
+        print("="*100)
+        
+        vote_matrix, price_data = self._prepare_subset_inputs(data_path, strategy_type)
+        if vote_matrix is None:
+            return {}
+        
+        total_signals = vote_matrix.n_signals
+        max_count = min(max_signal_count or total_signals, total_signals)
+        signal_counts = list(range(1, max_count + 1))
+        
+        evaluator = SubsetEvaluator(price_data, strategy_type, start_date, end_date)
+        prefix_results = evaluator.evaluate_prefixes(vote_matrix, signal_counts, mode)
+        
+        # 与逐个数量回测的摘要表保持相同列
+        benchmark_metrics = evaluator.benchmark_metrics
+        summary_df = pd.DataFrame({
+            'signal_count': prefix_results['signal_count'],
+            'strategy_annual_return': prefix_results['strategy_annual_return'],
+            'strategy_volatility': prefix_results['strategy_volatility'],
+            'strategy_sharpe_ratio': prefix_results['strategy_sharpe_ratio'],
+            'strategy_max_drawdown': prefix_results['strategy_max_drawdown'],
+            'benchmark_annual_return': benchmark_metrics['strategy_annual_return'],
+            'benchmark_volatility': benchmark_metrics['strategy_volatility'],
+            'benchmark_sharpe_ratio': benchmark_metrics['strategy_sharpe_ratio'],
+            'benchmark_max_drawdown': benchmark_metrics['strategy_max_drawdown'],
+            'excess_annual_return': prefix_results['excess_annual_return'],
+            'information_ratio': prefix_results['information_ratio'],
+            'tracking_error': prefix_results['tracking_error'],
+            'relative_drawdown': prefix_results['relative_drawdown'],
+            'monthly_win_rate': prefix_results['monthly_win_rate']
+        })
+        
+        print(f"\n{'信号数':>6} {'年化收益':>9} {'夏普':>7} {'最大回撤':>9} {'超额收益':>9} {'信息比率':>8} {'月胜率':>7}")
+        for _, row in summary_df.iterrows():
+            print(f"{int(row['signal_count']):>6d} {row['strategy_annual_return']:>9.2%} "
+                  f"{row['strategy_sharpe_ratio']:>7.3f} {row['strategy_max_drawdown']:>9.2%} "
+                  f"{row['excess_annual_return']:>9.2%} {row['information_ratio']:>8.3f} "
+                  f"{row['monthly_win_rate']:>7.1%}")
+        
+        sensitivity_summary = self._summarize_sensitivity_table(summary_df) if len(summary_df) > 1 else {
+            'summary_table': summary_df, 'stability_metrics': {}, 'performance_trend': {}
+        }
+        
+        return {
+            'strategy_type': strategy_type,
+            'mode': mode,
+            'signal_counts_tested': signal_counts,
+            'total_signals_available': total_signals,
+            'signal_ids': vote_matrix.signal_ids,
+            'sensitivity_summary': sensitivity_summary
+        }
     
     def _generate_sensitivity_summary(self, sensitivity_results: Dict, strategy_type: str) -> Dict:
         """生成敏感性分析摘要"""
@@ -254,7 +548,10 @@ class SensitivityAnalysisWorkflow:
             })
         
         summary_df = pd.DataFrame(summary_data)
-        
+        return self._summarize_sensitivity_table(summary_df)
+    
+    def _summarize_sensitivity_table(self, summary_df: pd.DataFrame) -> Dict:
+        """基于按信号数量排列的摘要表计算稳定性指标与绩效趋势"""
         # 计算稳定性指标
         stability_metrics = {
             'return_stability': summary_df['strategy_annual_return'].std(),
@@ -316,6 +613,24 @@ class SensitivityAnalysisWorkflow:
             'info_ratio_slope': info_ratio_trend
         }
     
+    def _record_results(self, sensitivity_results: Dict, strategy_type: str) -> None:
+        """将各信号数量的策略净值写入结果库（一次敏感性测试为一条运行记录）"""
+        store_path = self.export_config.get_result_store_path()
+        if store_path is None:
+            return
+        try:
+            signals_used = {key: result['signals_used'] for key, result in sensitivity_results.items()}
+            metrics = {key: result['enhanced_metrics']['excess_metrics']['information_ratio']
+                       for key, result in sensitivity_results.items()}
+            with ResultStore(store_path) as store:
+                run_id = store.start_run('sensitivity', strategy_type, configs={'signals_used': signals_used},
+                                         metrics={'information_ratio': metrics})
+                for key, result in sensitivity_results.items():
+                    store.add_nav_series(run_id, key, result['strategy_nav'], result['benchmark_nav'])
+            print(f"敏感性测试净值已写入结果库: {store_path} (run_id={run_id})")
+        except Exception as e:
+            print(f"写入结果库失败: {e}")
+    
     def _export_sensitivity_results(self, 
                                    sensitivity_results: Dict, 
                                    sensitivity_summary: Dict, 
@@ -327,126 +642,135 @@ class SensitivityAnalysisWorkflow:
         # 确保输出目录存在
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            # 1. 敏感性分析摘要
-            summary_df = sensitivity_summary['summary_table']
-            summary_df_export = summary_df.copy()
-            
-            # 格式化百分比列
-            pct_columns = ['strategy_annual_return', 'strategy_volatility', 'benchmark_annual_return', 
-                          'benchmark_volatility', 'excess_annual_return', 'strategy_max_drawdown', 
-                          'benchmark_max_drawdown', 'tracking_error', 'relative_drawdown', 'monthly_win_rate']
-            
-            for col in pct_columns:
-                if col in summary_df_export.columns:
-                    summary_df_export[col] = summary_df_export[col].apply(lambda x: f"{x:.2%}")
-            
-            # 格式化比率列
-            ratio_columns = ['strategy_sharpe_ratio', 'benchmark_sharpe_ratio', 'information_ratio']
-            for col in ratio_columns:
-                if col in summary_df_export.columns:
-                    summary_df_export[col] = summary_df_export[col].apply(lambda x: f"{x:.3f}")
-            
-            # 重命名列为中文
-            summary_df_export = summary_df_export.rename(columns={
-                'signal_count': '信号数量',
-                'strategy_annual_return': '策略年化收益',
-                'strategy_volatility': '策略波动率',
-                'strategy_sharpe_ratio': '策略夏普比率',
-                'strategy_max_drawdown': '策略最大回撤',
-                'benchmark_annual_return': '基准年化收益',
-                'benchmark_volatility': '基准波动率',
-                'benchmark_sharpe_ratio': '基准夏普比率',
-                'benchmark_max_drawdown': '基准最大回撤',
-                'excess_annual_return': '超额年化收益',
-                'information_ratio': '信息比率',
-                'tracking_error': '跟踪误差',
-                'relative_drawdown': '相对回撤',
-                'monthly_win_rate': '月胜率'
-            })
-            
-            summary_df_export.to_excel(writer, sheet_name='敏感性分析摘要', index=False)
-            
-            # 2. 稳定性指标
-            stability_metrics = sensitivity_summary['stability_metrics']
-            stability_df = pd.DataFrame([{
-                '指标': '年化收益率稳定性（标准差）',
-                '数值': f"{stability_metrics['return_stability']:.4f}"
-            }, {
-                '指标': '夏普比率稳定性（标准差）',
-                '数值': f"{stability_metrics['sharpe_stability']:.4f}"
-            }, {
-                '指标': '超额收益稳定性（标准差）',
-                '数值': f"{stability_metrics['excess_return_stability']:.4f}"
-            }, {
-                '指标': '信息比率稳定性（标准差）',
-                '数值': f"{stability_metrics['info_ratio_stability']:.4f}"
-            }, {
-                '指标': '月胜率稳定性（标准差）',
-                '数值': f"{stability_metrics['win_rate_stability']:.4f}"
-            }, {
-                '指标': '最佳信号数量',
-                '数值': str(stability_metrics['best_signal_count'])
-            }, {
-                '指标': '最稳定信号范围',
-                '数值': stability_metrics['most_stable_range']
-            }])
-            
-            stability_df.to_excel(writer, sheet_name='稳定性指标', index=False)
-            
-            # 3. 绩效趋势分析
-            trend_analysis = sensitivity_summary['performance_trend']
-            trend_df = pd.DataFrame([{
-                '绩效指标': '年化收益率',
-                '趋势方向': trend_analysis['return_trend'],
-                '趋势斜率': f"{trend_analysis['return_slope']:.6f}"
-            }, {
-                '绩效指标': '夏普比率',
-                '趋势方向': trend_analysis['sharpe_trend'],
-                '趋势斜率': f"{trend_analysis['sharpe_slope']:.6f}"
-            }, {
-                '绩效指标': '信息比率',
-                '趋势方向': trend_analysis['info_ratio_trend'],
-                '趋势斜率': f"{trend_analysis['info_ratio_slope']:.6f}"
-            }])
+        sheets = {}
+        # 1. 敏感性分析摘要
+        summary_df = sensitivity_summary['summary_table']
+        summary_df_export = summary_df.copy()
+        
+        # 格式化百分比列
+        pct_columns = ['strategy_annual_return', 'strategy_volatility', 'benchmark_annual_return', 
+                      'benchmark_volatility', 'excess_annual_return', 'strategy_max_drawdown', 
+                      'benchmark_max_drawdown', 'tracking_error', 'relative_drawdown', 'monthly_win_rate']
+        
+        for col in pct_columns:
+            if col in summary_df_export.columns:
+                summary_df_export[col] = summary_df_export[col].apply(lambda x: f"{x:.2%}")
+        
+        # 格式化比率列
+        ratio_columns = ['strategy_sharpe_ratio', 'benchmark_sharpe_ratio', 'information_ratio']
+        for col in ratio_columns:
+            if col in summary_df_export.columns:
+                summary_df_export[col] = summary_df_export[col].apply(lambda x: f"{x:.3f}")
+        
+        # 重命名列为中文
+        summary_df_export = summary_df_export.rename(columns={
+            'signal_count': '信号数量',
+            'strategy_annual_return': '策略年化收益',
+            'strategy_volatility': '策略波动率',
+            'strategy_sharpe_ratio': '策略夏普比率',
+            'strategy_max_drawdown': '策略最大回撤',
+            'benchmark_annual_return': '基准年化收益',
+            'benchmark_volatility': '基准波动率',
+            'benchmark_sharpe_ratio': '基准夏普比率',
+            'benchmark_max_drawdown': '基准最大回撤',
+            'excess_annual_return': '超额年化收益',
+            'information_ratio': '信息比率',
+            'tracking_error': '跟踪误差',
+            'relative_drawdown': '相对回撤',
+            'monthly_win_rate': '月胜率'
+        })
+        
+        sheets['敏感性分析摘要'] = summary_df_export
+        
+        # 2. 稳定性指标
+        stability_metrics = sensitivity_summary['stability_metrics']
+        stability_df = pd.DataFrame([{
+            '指标': '年化收益率稳定性（标准差）',
+            '数值': f"{stability_metrics['return_stability']:.4f}"
+        }, {
+            '指标': '夏普比率稳定性（标准差）',
+            '数值': f"{stability_metrics['sharpe_stability']:.4f}"
+        }, {
+            '指标': '超额收益稳定性（标准差）',
+            '数值': f"{stability_metrics['excess_return_stability']:.4f}"
+        }, {
+            '指标': '信息比率稳定性（标准差）',
+            '数值': f"{stability_metrics['info_ratio_stability']:.4f}"
+        }, {
+            '指标': '月胜率稳定性（标准差）',
+            '数值': f"{stability_metrics['win_rate_stability']:.4f}"
+        }, {
+            '指标': '最佳信号数量',
+            '数值': str(stability_metrics['best_signal_count'])
+        }, {
+            '指标': '最稳定信号范围',
+            '数值': stability_metrics['most_stable_range']
+        }])
+        
+        sheets['稳定性指标'] = stability_df
+        
+        # 3. 绩效趋势分析
+        trend_analysis = sensitivity_summary['performance_trend']
+        trend_df = pd.DataFrame([{
+            '绩效指标': '年化收益率',
+            '趋势方向': trend_analysis['return_trend'],
+            '趋势斜率': f"{trend_analysis['return_slope']:.6f}"
+        }, {
+            '绩效指标': '夏普比率',
+            '趋势方向': trend_analysis['sharpe_trend'],
+            '趋势斜率': f"{trend_analysis['sharpe_slope']:.6f}"
+        }, {
+            '绩效指标': '信息比率',
+            '趋势方向': trend_analysis['info_ratio_trend'],
+            '趋势斜率': f"{trend_analysis['info_ratio_slope']:.6f}"
+        }])
+        
+        sheets['绩效趋势分析'] = trend_df
+        
+        # 4. 各测试的详细结果
+        for test_key, result in sensitivity_results.items():
+            signal_count = result['signal_count']
             
-            trend_df.to_excel(writer, sheet_name='绩效趋势分析', index=False)
+            # 年度绩效
+            try:
+                yearly_analysis = result['enhanced_metrics']['yearly_analysis']
+                if not yearly_analysis.empty:
+                    sheets[f'{signal_count}信号_年度绩效'] = yearly_analysis
+            except:
+                pass
             
-            # 4. 各测试的详细结果
-            for test_key, result in sensitivity_results.items():
-                signal_count = result['signal_count']
+            # 净值曲线
+            try:
+                strategy_nav = result['strategy_nav']
+                benchmark_nav = result['benchmark_nav']
+                
+                aligned_nav_data = pd.DataFrame({
+                    'strategy_nav': strategy_nav,
+                    'benchmark_nav': benchmark_nav
+                }).dropna()
                 
-                # 年度绩效
-                try:
-                    yearly_analysis = result['enhanced_metrics']['yearly_analysis']
-                    if not yearly_analysis.empty:
-                        yearly_analysis.to_excel(writer, sheet_name=f'{signal_count}信号_年度绩效', index=False)
-                except:
-                    pass
+                relative_nav = aligned_nav_data['strategy_nav'] / aligned_nav_data['benchmark_nav']
                 
-                # 净值曲线
-                try:
-                    strategy_nav = result['strategy_nav']
-                    benchmark_nav = result['benchmark_nav']
-                    
-                    aligned_nav_data = pd.DataFrame({
-                        'strategy_nav': strategy_nav,
-                        'benchmark_nav': benchmark_nav
-                    }).dropna()
-                    
-                    relative_nav = aligned_nav_data['strategy_nav'] / aligned_nav_data['benchmark_nav']
-                    
-                    nav_data = pd.DataFrame({
-                        '日期': aligned_nav_data.index,
-                        '策略净值': aligned_nav_data['strategy_nav'].values,
-                        '基准净值': aligned_nav_data['benchmark_nav'].values,
-                        '相对净值': relative_nav.values
-                    })
-                    nav_data.to_excel(writer, sheet_name=f'{signal_count}信号_净值曲线', index=False)
-                except:
-                    pass
-        
-        print(f"\n{strategy_type} 敏感性测试结果已导出: {output_file}")
+                nav_data = pd.DataFrame({
+                    '日期': aligned_nav_data.index,
+                    '策略净值': aligned_nav_data['strategy_nav'].values,
+                    '基准净值': aligned_nav_data['benchmark_nav'].values,
+                    '相对净值': relative_nav.values
+                })
+                sheets[f'{signal_count}信号_净值曲线'] = nav_data
+            except:
+                pass
+        
+        # 各信号数量的净值曲线为完整数据表，非Excel格式时单独成文件
+        full_table_names = [name for name in sheets if name.endswith('_净值曲线')]
+        if self.exporter is not None:
+            self.exporter.submit_tables(output_file, sheets, full_table_names, self.export_config.export_format,
+                                        self.export_config.excel_engine)
+            print(f"\n{strategy_type} 敏感性测试结果已提交后台导出: {output_file}")
+            return
+        written = export_tables(output_file, sheets, full_table_names, self.export_config.export_format,
+                                self.export_config.excel_engine)
+        print(f"\n{strategy_type} 敏感性测试结果已导出: {', '.join(written)}")
     
     def _generate_cross_strategy_sensitivity_report(self, all_results: Dict, signal_counts: List[int]) -> None:
         """生成跨策略敏感性分析报告"""
@@ -5,17 +5,28 @@ Stability Analysis Workflow
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import os
-import concurrent.futures # 导入并行处理模块
 import functools # 导入functools，用于partial函数
+from contextlib import nullcontext
 
-from ..core.stability_analyzer import RankingStabilityAnalyzer, StabilityConfig
+from ..core.stability_analyzer import (
+    RankingStabilityAnalyzer, StabilityConfig, ROLLING_ANALYSIS_COLUMNS, ROLLING_CONTEXT_COLUMNS
+)
 from ..core.signal_engine import SignalEngine
 from ..core.backtest_engine import BacktestEngine
 from ..core.result_processor import ResultProcessor
+from ..core.task_scheduler import LPTScheduler, ScheduledTask, estimate_window_task_cost
 from ..config import SignalConfig, BacktestConfig, ExportConfig
-from ..utils.data_loader import load_all_data
+from .dag_runner import load_data
+from ..utils.executor import TaskExecutor
+from ..utils.table_io import write_table, read_table, resolve_table_format, table_filepath
+from ..utils.columnar_store import write_columnar, read_columnar, columnar_columns, columnar_path, is_columnar
+from ..utils.async_exporter import background_export, snapshot
+from ..utils.result_store import ResultStore
+from ..utils.partitioned_results import PartitionedResults, is_partitioned
+from ..utils.fingerprint import file_fingerprint
+from ..utils.run_manifest import RunManifest, stage_key, code_version
 
 
 def _run_single_window_task(
@@ -27,10 +38,13 @@ def _run_single_window_task(
     window_start: pd.Timestamp,
     window_end: pd.Timestamp,
     signal_types: Optional[List[str]] = None,
-    indicators: Optional[List[str]] = None
+    indicators: Optional[List[str]] = None,
+    backtest_targets: Optional[List[str]] = None
 ) -> Optional[pd.DataFrame]:
     """
     辅助函数：处理单个滚动窗口的回测任务
+
+    backtest_targets 非空时信号只生成一次，各回测标的共享同一调仓路径
     """
     window_indicator_data, window_price_data, memo_data = window_data
 
@@ -62,7 +76,8 @@ def _run_single_window_task(
             memo_df=memo_data,
             indicators=indicators,
             signal_types=signal_types,
-            enable_parallel=False  # 批量回测内部是否并行由BacktestConfig控制，这里只是单个窗口任务
+            enable_parallel=None,  # 由BacktestConfig决定；在执行器工作单元内会自动降级为串行
+            backtest_targets=backtest_targets
         )
 
         if window_results.empty:
@@ -118,13 +133,28 @@ class StabilityWorkflow:
         self.stability_analyzer = RankingStabilityAnalyzer(
             self.stability_config, self.export_config
         )
+        self.scheduler = LPTScheduler(self._create_executor())
+        self.last_schedule_report = pd.DataFrame()
+        # 最近一次滚动回测结果的可重新读取路径（列式目录/分区目录/导出文件）
+        self.last_rolling_artifact = None
+        # 后台导出器（跨标的比较期间启用），为None时同步写出
+        self.exporter = None
+    
+    def _create_executor(self) -> TaskExecutor:
+        """按回测配置创建窗口任务执行器（与引擎共享全局工作单元预算）"""
+        backend = self.backtest_config.executor_backend if self.backtest_config.enable_parallel else 'serial'
+        return TaskExecutor(backend=backend,
+                            max_workers=self.backtest_config.num_processes,
+                            blas_threads=self.backtest_config.blas_threads)
     
     def run_rolling_window_backtest(self, 
                                   data_path: str,
                                   window_years: int = 3,
                                   step_months: int = 3,
                                   signal_types: Optional[List[str]] = None,
-                                  indicators: Optional[List[str]] = None) -> pd.DataFrame:
+                                  indicators: Optional[List[str]] = None,
+                                  backtest_targets: Optional[List[str]] = None,
+                                  partition_dir: Optional[str] = None) -> Union[pd.DataFrame, PartitionedResults]:
         """
         运行滚动窗口回测，收集原始数据用于稳定性分析
         
@@ -134,18 +164,24 @@ class StabilityWorkflow:
             step_months: 步进月数
             signal_types: 信号类型列表
             indicators: 指标列表
+            backtest_targets: 多标的模式下的回测标的列表，信号每个窗口只生成一次，
+                              结果带 backtest_target 列；None 表示只回测配置中的标的
+            partition_dir: 分区目录。给定时每个子任务完成后立即把结果写成分区，
+                           不在内存中合并完整结果表（参数网格很大时使用）
             
         返回:
-            包含所有窗口回测结果的DataFrame
+            包含所有窗口回测结果的DataFrame；分区模式下为 PartitionedResults
         """
         print("="*80)
         print("滚动窗口回测 - 为稳定性分析收集数据")
         print("="*80)
         print(f"配置: 窗口={window_years}年, 步进={step_months}月")
+        if backtest_targets:
+            print(f"多标的模式: {backtest_targets} (共享信号与调仓路径)")
         
         # 加载数据
         try:
-            data_dict = load_all_data(data_path)
+            data_dict = load_data(data_path)
             indicator_data = data_dict['indicator_data']
             price_data = data_dict['price_data']
             memo_data = data_dict['memo_data']
@@ -238,8 +274,26 @@ class StabilityWorkflow:
 
         print(f"共准备 {len(window_tasks)} 个窗口任务")
 
-        # 使用ProcessPoolExecutor并行执行窗口任务
-        all_window_results = []
+        # 拆分为 (窗口 × 信号类型) 子任务并估算成本，按LPT顺序提交
+        direction_count = 2 if self.backtest_config.enable_dual_direction else 1
+        scheduled_tasks = []
+        for window_data, task_window_id, window_start, window_end, task_signal_types, task_indicators in window_tasks:
+            window_indicator_data, window_price_data, _ = window_data
+            for signal_type in task_signal_types:
+                parameter_count = len(self.signal_config.TEST_PARAMS.get(signal_type, []))
+                scheduled_tasks.append(ScheduledTask(
+                    task_id=len(scheduled_tasks),
+                    window_id=task_window_id,
+                    signal_type=signal_type,
+                    estimated_cost=estimate_window_task_cost(
+                        window_indicator_data, window_price_data, task_indicators,
+                        parameter_count, direction_count, len(backtest_targets or [None])
+                    ),
+                    args=(window_data, task_window_id, window_start, window_end,
+                          [signal_type], task_indicators, backtest_targets)
+                ))
+        print(f"拆分为 {len(scheduled_tasks)} 个 (窗口 × 信号类型) 子任务，按估算成本从大到小提交")
+
         # 传递必要的配置和引擎实例到辅助函数
         _run_task_with_engines = functools.partial(
             _run_single_window_task,
@@ -248,20 +302,19 @@ class StabilityWorkflow:
             self.signal_config
         )
 
-        # max_workers=None 会使用机器的CPU核心数
-        with concurrent.futures.ProcessPoolExecutor(max_workers=None) as executor:
-            # 使用map方法并行处理任务，参数需要解包
-            # 由于map只接收一个可迭代对象，我们需要重新组织window_tasks或使用starmap
-            # starmap 需要一个包含参数元组的列表
-            futures = [executor.submit(_run_task_with_engines, *task_args) for task_args in window_tasks]
+        self.scheduler.executor = self._create_executor()
+        self.last_rolling_artifact = None
+        if partition_dir is not None:
+            return self._run_partitioned_tasks(_run_task_with_engines, scheduled_tasks, partition_dir)
+        task_results = self.scheduler.run(_run_task_with_engines, scheduled_tasks)
+        self.scheduler.print_utilization_summary()
+        self.last_schedule_report = self.scheduler.utilization_report()
 
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    window_results = future.result()
-                    if window_results is not None:
-                        all_window_results.append(window_results)
-                except Exception as exc:
-                    print(f'单个窗口任务生成异常: {exc}')
+        # 按任务编号（窗口、信号类型顺序）合并，保证结果顺序与调度无关
+        all_window_results = [
+            task_results[task_id] for task_id in sorted(task_results)
+            if task_results[task_id] is not None
+        ]
 
         # 合并所有结果
         if not all_window_results:
@@ -269,37 +322,130 @@ class StabilityWorkflow:
             return pd.DataFrame()
 
         final_results = pd.concat(all_window_results, ignore_index=True)
+        # 合并后统一编码组合键，后续稳定性分析直接基于整数编码分组
+        self.stability_analyzer.registry.encode_frame(final_results)
+        if 'backtest_target' in final_results.columns:
+            final_results['backtest_target'] = final_results['backtest_target'].astype('category')
         print(f"\n滚动回测完成: 共 {len(final_results)} 条记录，"
               f"涉及 {final_results['window_id'].nunique()} 个窗口")
 
         # 导出原始结果
         try:
             timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            target_suffix = f"_{self.backtest_config.backtest_target}"
-            raw_output_path = f"signal_test_results/rolling_raw_results{target_suffix}_{timestamp}.xlsx"
-            os.makedirs(os.path.dirname(raw_output_path), exist_ok=True)
-            final_results.to_excel(raw_output_path, index=False)
-            print(f"原始滚动结果已导出: {raw_output_path}")
+            target_suffix = "_multi_target" if backtest_targets else f"_{self.backtest_config.backtest_target}"
+            raw_output_path = os.path.join(self.export_config.ensure_output_dir(),
+                                           f"rolling_raw_results{target_suffix}_{timestamp}.xlsx")
+            if self.exporter is not None:
+                # 后台写出前先确定实际格式与文件名，运行清单记录的产出路径才与写出的文件一致
+                export_format = resolve_table_format(self.export_config.export_format)
+                raw_output_path = table_filepath(raw_output_path, export_format)
+                self.exporter.submit(write_table, snapshot(final_results), raw_output_path,
+                                     export_format, excel_engine=self.export_config.excel_engine,
+                                     description=raw_output_path)
+                print(f"原始滚动结果已提交后台导出: {raw_output_path}")
+            else:
+                raw_output_path = write_table(final_results, raw_output_path, self.export_config.export_format,
+                                              excel_engine=self.export_config.excel_engine)
+                print(f"原始滚动结果已导出: {raw_output_path}")
+            self.last_rolling_artifact = raw_output_path
         except Exception as e:
             print(f"导出原始滚动结果失败: {e}")
+        
+        # 列式副本供稳定性重新分析按列内存映射读取
+        if self.export_config.columnar_rolling_results:
+            try:
+                if self.exporter is not None:
+                    self.exporter.submit(write_columnar, snapshot(final_results), raw_output_path,
+                                         description=f"{raw_output_path} (列式)")
+                    self.last_rolling_artifact = columnar_path(raw_output_path)
+                else:
+                    self.last_rolling_artifact = write_columnar(final_results, raw_output_path)
+                    print(f"原始滚动结果列式副本: {self.last_rolling_artifact}")
+            except Exception as e:
+                print(f"写出列式滚动结果失败: {e}")
 
         return final_results
     
+    def _run_partitioned_tasks(self, func, scheduled_tasks: List[ScheduledTask],
+                               partition_dir: str) -> PartitionedResults:
+        """执行子任务，每个结果完成后立即写成分区，内存中只保留写入的行数"""
+        partitions = PartitionedResults.create(partition_dir, overwrite=True)
+        
+        def write_result(task: ScheduledTask, result: Optional[pd.DataFrame]) -> int:
+            if result is None or result.empty:
+                return 0
+            partitions.write_partition(result, task.window_id, task.task_id)
+            return len(result)
+        
+        self.scheduler.run(func, scheduled_tasks, on_result=write_result)
+        self.scheduler.print_utilization_summary()
+        self.last_schedule_report = self.scheduler.utilization_report()
+        
+        if partitions.empty:
+            print("没有有效的窗口结果")
+        else:
+            print(f"\n滚动回测完成: 共 {partitions.total_rows} 条记录，"
+                  f"涉及 {len(partitions.window_ids)} 个窗口，已按窗口分区写出: {partition_dir}")
+            self.last_rolling_artifact = partition_dir
+        return partitions
+    
+    def _analyze_rolling_results(self, rolling_results: Union[pd.DataFrame, PartitionedResults],
+                                 backtest_target: Optional[str] = None) -> Dict[str, any]:
+        """按结果形式选择整表分析或分区流式分析"""
+        if isinstance(rolling_results, PartitionedResults):
+            return self.stability_analyzer.run_partitioned_stability_analysis(rolling_results, backtest_target)
+        return self.stability_analyzer.run_complete_stability_analysis(rolling_results)
+    
+    def _open_run_manifest(self, data_path: str, run_settings: Dict[str, any]) -> Optional[RunManifest]:
+        """按数据文件指纹与全部配置打开运行目录，未启用或失败时返回None"""
+        if not self.export_config.run_directories:
+            return None
+        try:
+            return RunManifest.open(self.export_config.output_dir, file_fingerprint(data_path), {
+                'signal_config': self.signal_config,
+                'backtest_config': self.backtest_config,
+                'stability_config': self.stability_config,
+                'export_config': self.export_config,
+                **run_settings
+            })
+        except Exception as e:
+            print(f"打开运行目录失败，结果写入输出目录: {e}")
+            return None
+    
+    def _load_completed_run(self, manifest: RunManifest) -> Dict[str, any]:
+        """读取已完成运行的产出"""
+        print(f"相同输入的运行已完成，直接读取已有结果: {manifest.directory}")
+        stability_df = read_columnar(manifest.artifact('stability', 'stability_analysis'))
+        return {
+            'rolling_results': self.load_rolling_results(manifest.artifact('rolling', 'rolling_results')),
+            'stability_analysis': stability_df,
+            'insights': self.stability_analyzer.generate_stability_insights(stability_df),
+            'significant_data': read_columnar(manifest.artifact('stability', 'significant_data')),
+            'export_path': manifest.artifact('stability', 'export'),
+            'run_dir': manifest.directory
+        }
+    
     def run_complete_stability_analysis(self, 
                                       data_path: str,
                                       window_years: int = 3,
                                       step_months: int = 3,
                                       signal_types: Optional[List[str]] = None,
-                                      indicators: Optional[List[str]] = None) -> Dict[str, any]:
+                                      indicators: Optional[List[str]] = None,
+                                      partition_dir: Optional[str] = None) -> Dict[str, any]:
         """
         运行完整的稳定性分析流程
         
+        启用运行目录时结果写入 输出目录/runs/<运行键>/：相同输入的运行已完成时
+        直接返回已有结果；滚动回测阶段输入相同时复用已有滚动结果，只重新分析。
+        
         参数:
             data_path: 数据文件路径
             window_years: 滚动窗口年数
             step_months: 步进月数
             signal_types: 信号类型列表
             indicators: 指标列表
+            partition_dir: 分区目录，给定时滚动结果按窗口分区写出并流式分析
+                （启用运行目录时改为写入运行目录下的 rolling_partitions）
             
         返回:
             包含稳定性分析结果的字典
@@ -308,24 +454,81 @@ class StabilityWorkflow:
         print("完整稳定性分析流程")
         print("="*80)
         
-        # 1. 运行滚动窗口回测
-        rolling_results = self.run_rolling_window_backtest(
-            data_path, window_years, step_months, signal_types, indicators
-        )
-        
-        if rolling_results.empty:
-            print("滚动回测无结果，稳定性分析终止")
-            return {}
+        window_settings = {'window_years': window_years, 'step_months': step_months}
+        run_settings = {**window_settings, 'signal_types': signal_types, 'indicators': indicators,
+                        'partitioned': partition_dir is not None}
+        manifest = self._open_run_manifest(data_path, run_settings)
+        # 滚动结果未能保存的运行不能直接读取（缺少滚动结果），重新计算
+        if manifest is not None and manifest.is_complete and manifest.artifact('rolling', 'rolling_results'):
+            return self._load_completed_run(manifest)
         
-        # 2. 运行基于排名的稳定性分析
-        stability_results = self.stability_analyzer.run_complete_stability_analysis(
-            rolling_results
-        )
+        try:
+            if manifest is not None:
+                self.export_config.run_dir = manifest.directory
+                print(f"运行目录: {manifest.directory}")
+                rolling_key = stage_key(manifest.manifest['inputs']['data_fingerprint'], self.signal_config,
+                                        self.backtest_config, run_settings, code_version())
+                reused = manifest.find_stage('rolling', rolling_key)
+            else:
+                rolling_key = reused = None
+            
+            # 1. 运行滚动窗口回测（输入相同时复用已有结果）
+            if reused is not None and 'rolling_results' in reused['artifacts']:
+                print(f"复用运行 {reused['run_key']} 的滚动回测结果")
+                rolling_results = self.load_rolling_results(reused['artifacts']['rolling_results'])
+                manifest.reuse_stage('rolling', reused)
+            else:
+                stage = manifest.stage('rolling', rolling_key) if manifest is not None else nullcontext({})
+                if manifest is not None and partition_dir is not None:
+                    # 分区写入运行目录：调用方的分区目录每次运行都会被覆盖，
+                    # 记录它会让其他配置的运行误复用不属于自己的分区
+                    partition_dir = manifest.path('rolling_partitions')
+                with stage as record:
+                    rolling_results = self.run_rolling_window_backtest(
+                        data_path, window_years, step_months, signal_types, indicators,
+                        partition_dir=partition_dir
+                    )
+                    if manifest is not None and self.last_rolling_artifact and not rolling_results.empty:
+                        record['rows'] = (rolling_results.total_rows if isinstance(rolling_results, PartitionedResults)
+                                          else len(rolling_results))
+                        record['artifacts']['rolling_results'] = self.last_rolling_artifact
+            
+            if rolling_results.empty:
+                print("滚动回测无结果，稳定性分析终止")
+                return {}
+            
+            # 2. 运行基于排名的稳定性分析
+            stability_key = stage_key(rolling_key, self.stability_config, self.export_config)
+            stage = manifest.stage('stability', stability_key) if manifest is not None else nullcontext({})
+            with stage as record:
+                stability_results = self._analyze_rolling_results(rolling_results)
+                if manifest is not None and stability_results:
+                    record['rows'] = len(stability_results['stability_analysis'])
+                    record['artifacts']['export'] = stability_results['export_path']
+                    record['artifacts']['stability_analysis'] = write_columnar(
+                        stability_results['stability_analysis'], manifest.path('stability_analysis')
+                    )
+                    record['artifacts']['significant_data'] = write_columnar(
+                        stability_results['significant_data'], manifest.path('significant_data')
+                    )
+            
+            self._record_results(rolling_results, stability_results, self.backtest_config.backtest_target,
+                                 window_settings)
+            
+            if manifest is not None and stability_results:
+                if manifest.artifact('rolling', 'rolling_results'):
+                    manifest.complete()
+                else:
+                    print("滚动回测结果未能保存，本次运行不标记为已完成")
+                print("运行清单: " + "; ".join(manifest.timing_summary()))
+        finally:
+            self.export_config.run_dir = None
         
         # 3. 综合结果
         complete_results = {
             'rolling_results': rolling_results,
-            **stability_results
+            **stability_results,
+            'run_dir': manifest.directory if manifest is not None else None
         }
         
         print("\n" + "="*80)
@@ -334,13 +537,64 @@ class StabilityWorkflow:
         
         return complete_results
     
+    def _record_results(self, rolling_results: Union[pd.DataFrame, PartitionedResults],
+                        stability_results: Dict[str, any],
+                        target: Optional[str],
+                        window_settings: Dict[str, int]) -> None:
+        """将滚动回测结果与稳定性得分写入结果库（分区结果逐个分区写入）"""
+        store_path = self.export_config.get_result_store_path()
+        if store_path is None:
+            return
+        try:
+            with ResultStore(store_path) as store:
+                run_id = store.start_run(
+                    'stability', target, export_path=stability_results.get('export_path'),
+                    configs={'window': window_settings, 'signal_config': self.signal_config,
+                             'backtest_config': self.backtest_config, 'stability_config': self.stability_config}
+                )
+                if isinstance(rolling_results, PartitionedResults):
+                    row_count = 0
+                    for partition in rolling_results.iter_partitions():
+                        if target is not None and 'backtest_target' in partition.columns:
+                            partition = partition[partition['backtest_target'].astype(str) == target]
+                        row_count += store.add_rolling_results(run_id, partition, target)
+                else:
+                    row_count = store.add_rolling_results(run_id, rolling_results, target)
+                store.add_stability_scores(run_id, stability_results.get('stability_analysis'), target)
+            print(f"滚动结果已写入结果库: {store_path} (run_id={run_id}, {row_count} 行)")
+        except Exception as e:
+            print(f"写入结果库失败: {e}")
+    
+    @staticmethod
+    def load_rolling_results(rolling_results_file: str) -> Union[pd.DataFrame, PartitionedResults]:
+        """
+        读取已导出的滚动回测结果
+        
+        列式目录只映射稳定性分析需要的列（以及窗口日期、回测标的），
+        分区目录只打开分区清单（分析时逐窗口读取），其余格式按扩展名整表读取。
+        
+        参数:
+            rolling_results_file: 结果文件路径、.cols 列式目录或分区目录
+            
+        返回:
+            滚动回测结果DataFrame；分区目录为 PartitionedResults
+        """
+        if is_partitioned(rolling_results_file):
+            return PartitionedResults(rolling_results_file)
+        if is_columnar(rolling_results_file):
+            available = set(columnar_columns(rolling_results_file))
+            columns = [col for col in ROLLING_ANALYSIS_COLUMNS + ROLLING_CONTEXT_COLUMNS if col in available]
+            return read_columnar(rolling_results_file, columns)
+        return read_table(rolling_results_file)
+    
     def run_stability_analysis_on_existing_data(self, 
                                               rolling_results_file: str) -> Dict[str, any]:
         """
         在已有滚动回测结果上运行稳定性分析
         
         参数:
-            rolling_results_file: 滚动回测结果文件路径
+            rolling_results_file: 滚动回测结果文件路径（Excel/CSV/Parquet/Feather），
+                                  原始结果导出时写出的 .cols 列式目录，或分区目录
             
         返回:
             稳定性分析结果
@@ -351,14 +605,15 @@ class StabilityWorkflow:
         
         try:
             # 加载现有数据
-            rolling_results = pd.read_excel(rolling_results_file)
-            print(f"已加载滚动结果: {len(rolling_results)} 条记录，"
-                  f"{rolling_results['window_id'].nunique()} 个窗口")
+            rolling_results = self.load_rolling_results(rolling_results_file)
+            if isinstance(rolling_results, PartitionedResults):
+                print(f"已打开分区结果: {rolling_results}")
+            else:
+                print(f"已加载滚动结果: {len(rolling_results)} 条记录，"
+                      f"{rolling_results['window_id'].nunique()} 个窗口")
             
             # 运行稳定性分析
-            stability_results = self.stability_analyzer.run_complete_stability_analysis(
-                rolling_results
-            )
+            stability_results = self._analyze_rolling_results(rolling_results)
             
             return stability_results
             
@@ -369,7 +624,9 @@ class StabilityWorkflow:
     def compare_stability_across_targets(self, 
                                        data_path: str,
                                        window_years: int = 3,
-                                       step_months: int = 3) -> Dict[str, any]:
+                                       step_months: int = 3,
+                                       shared_signals: bool = True,
+                                       partition_dir: Optional[str] = None) -> Dict[str, any]:
         """
         比较不同回测标的的稳定性
         
@@ -377,6 +634,10 @@ class StabilityWorkflow:
             data_path: 数据文件路径
             window_years: 滚动窗口年数
             step_months: 步进月数
+            shared_signals: True时运行一次多标的滚动回测（信号与调仓路径共享），
+                            False时对每个标的分别运行完整流程
+            partition_dir: 分区目录，给定时滚动结果按窗口分区写出并流式分析
+                           （分别运行时每个标的使用以标的命名的子目录）
             
         返回:
             比较结果字典
@@ -385,27 +646,72 @@ class StabilityWorkflow:
         print("跨回测标的稳定性比较")
         print("="*80)
         
-        comparison_results = {}
+        # 各标的的结果写出在后台进行，与下一个标的的计算重叠；结束时等待全部写出
+        with background_export(self, self.stability_analyzer, enabled=self.export_config.async_export):
+            targets = ['value_growth', 'big_small']
+            comparison_results = {}
         
-        for target in ['value_growth', 'big_small']:
-            print(f"\n--- 分析回测标的: {target} ---")
-            
-            # 更新配置
-            self.backtest_config.backtest_target = target
-            self.backtest_engine = BacktestEngine(self.backtest_config)
+            # 逐个标的修改配置，结束或出错时都恢复原标的，避免影响之后的调用
+            original_target = self.backtest_config.backtest_target
+            original_export_target = self.export_config.backtest_target
+            original_engine = self.backtest_engine
+            try:
+                if shared_signals:
+                    rolling_results = self.run_rolling_window_backtest(
+                        data_path, window_years, step_months, backtest_targets=targets,
+                        partition_dir=partition_dir
+                    )
             
-            # 运行分析
-            target_results = self.run_complete_stability_analysis(
-                data_path, window_years, step_months
-            )
-            
-            comparison_results[target] = target_results
+                    for target in targets:
+                        print(f"\n--- 分析回测标的: {target} ---")
+                        if rolling_results.empty:
+                            comparison_results[target] = {}
+                            continue
+                
+                        if isinstance(rolling_results, PartitionedResults):
+                            # 分区中各标的混合存放，分析时逐窗口按标的过滤
+                            target_rolling = rolling_results
+                        else:
+                            target_rolling = rolling_results[
+                                rolling_results['backtest_target'] == target
+                            ].reset_index(drop=True)
+                
+                        # 导出文件名按标的区分
+                        self.backtest_config.backtest_target = target
+                        self.export_config.backtest_target = target
+                        stability_results = self._analyze_rolling_results(target_rolling, target)
+                        self._record_results(target_rolling, stability_results, target,
+                                             {'window_years': window_years, 'step_months': step_months})
+                        comparison_results[target] = {
+                            'rolling_results': target_rolling,
+                            **stability_results
+                        }
+                else:
+                    for target in targets:
+                        print(f"\n--- 分析回测标的: {target} ---")
+                
+                        # 更新配置
+                        self.backtest_config.backtest_target = target
+                        self.export_config.backtest_target = target
+                        self.backtest_engine = BacktestEngine(self.backtest_config)
+                
+                        # 运行分析
+                        target_results = self.run_complete_stability_analysis(
+                            data_path, window_years, step_months,
+                            partition_dir=os.path.join(partition_dir, target) if partition_dir else None
+                        )
+                
+                        comparison_results[target] = target_results
+            finally:
+                self.backtest_config.backtest_target = original_target
+                self.export_config.backtest_target = original_export_target
+                self.backtest_engine = original_engine
         
-        # 生成比较报告
-        try:
-            self._generate_comparison_report(comparison_results)
-        except Exception as e:
-            print(f"生成比较报告失败: {e}")
+            # 生成比较报告
+            try:
+                self._generate_comparison_report(comparison_results)
+            except Exception as e:
+                print(f"生成比较报告失败: {e}")
         
         return comparison_results
     
@@ -433,7 +739,8 @@ class StabilityWorkflow:
         # 导出比较结果
         try:
             timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-            comparison_file = f"signal_test_results/stability_comparison_{timestamp}.xlsx"
+            comparison_file = os.path.join(self.export_config.ensure_output_dir(),
+                                           f"stability_comparison_{timestamp}.xlsx")
             
             with pd.ExcelWriter(comparison_file, engine='openpyxl') as writer:
                 for target, results in comparison_results.items():